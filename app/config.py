@@ -14,10 +14,63 @@ class Settings(BaseSettings):
     appwrite_database_id: str = "buildlog_db"
     appwrite_projects_collection_id: str = "projects"
     appwrite_build_logs_collection_id: str = "build_logs"
+    appwrite_rollups_collection_id: str = "analytics_rollups"
 
     # Storage Configuration
     appwrite_storage_bucket_id: str = "buildlog_files"
 
+    # Storage backend: "appwrite", or "sqlite" for a local database file and upload directory
+    storage_backend: str = "appwrite"
+    sqlite_path: str = "buildlog.db"
+    sqlite_files_dir: str = "uploads"
+
+    # HTTP Transport Configuration
+    appwrite_pool_size: int = 20
+    appwrite_keepalive_expiry: float = 30.0
+    appwrite_http2: bool = False
+    appwrite_timeout: float = 30.0
+
+    # Resilience: retries for idempotent reads (jittered exponential backoff),
+    # a circuit breaker that fails fast while Appwrite is degraded, and an
+    # optional steady request rate (0 = unlimited; 429 Retry-After is always honored)
+    appwrite_max_retries: int = 3
+    appwrite_retry_backoff: float = 0.2
+    appwrite_retry_backoff_max: float = 5.0
+    appwrite_breaker_threshold: int = 5
+    appwrite_breaker_reset: float = 30.0
+    appwrite_rate_limit: float = 0.0
+    appwrite_rate_burst: int = 20
+
+    # Documents fetched per request when paging through lists
+    appwrite_page_size: int = 100
+
+    # Read cache for documents and list queries (0 entries disables it).
+    # The byte cap counts serialized JSON; decoded objects take roughly 4x
+    # that, so 8 MB keeps the cache near 32 MB resident on a 256 MB machine.
+    cache_ttl: float = 30.0
+    cache_max_entries: int = 2048
+    cache_max_bytes: int = 8 * 1024 * 1024
+
+    # Times a failed upload chunk is resent before the upload gives up
+    upload_chunk_retries: int = 3
+
+    # Deleting a project removes its build logs and their files in the
+    # background, this many logs per batch and this many requests at once
+    delete_batch_size: int = 100
+    delete_concurrency: int = 8
+
+    # Build logs written at once by a bulk import
+    import_concurrency: int = 16
+
+    # Keep daily per-user build log rollups on every write and answer the
+    # analytics charts from them; run `python -m app.services.rollups` for
+    # each user after turning this on
+    analytics_rollups: bool = False
+
+    # Users whose computed /api/analytics response is kept until their
+    # next write (0 disables it)
+    analytics_cache_users: int = 1024
+
     # Application Settings
     secret_key: str
     debug: bool = True
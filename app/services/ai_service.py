@@ -5,6 +5,12 @@ from app.config import get_settings
 
 settings = get_settings()
 
+# How many build logs the summary and README prompts include, and the attributes they read
+SUMMARY_LOG_LIMIT = 10
+SUMMARY_LOG_FIELDS = ['log_type', 'title']
+README_LOG_LIMIT = 15
+README_LOG_FIELDS = ['created_at', 'title']
+
 
 class AIService:
     """Service for AI-powered content generation"""
@@ -148,7 +154,7 @@ Make it engaging and informative!"""
 
             # Create a summary of logs
             log_summaries = []
-            for log in logs[:10]:  # Limit to last 10 logs
+            for log in logs[:SUMMARY_LOG_LIMIT]:  # Limit to the latest logs
                 log_summaries.append(f"- [{log.get('log_type')}] {log.get('title', 'Untitled')}")
 
             logs_text = "\n".join(log_summaries) if log_summaries else "No logs yet"
@@ -261,7 +267,7 @@ Tags:"""
             for log in logs:
                 log_summaries.append(f"{log.get('created_at', '')[:10]} - {log.get('title', 'Untitled')}")
 
-            logs_timeline = "\n".join(log_summaries[:15])  # Last 15 logs
+            logs_timeline = "\n".join(log_summaries[:README_LOG_LIMIT])
             tech_stack_str = ", ".join(tech_stack) if tech_stack else "Various technologies"
 
             prompt = f"""Generate a professional README.md for this project:
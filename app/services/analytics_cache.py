@@ -0,0 +1,102 @@
+"""
+In-process cache of each user's computed analytics, revalidated by ETag
+
+Every user has a data version, a counter the routes bump after any write
+to their projects or build logs. /api/analytics keeps the serialized
+analytics it last computed for a user together with the version and day
+they were computed at, and answers from them while both still hold: the
+charts move on at midnight even when nothing was written.
+
+The strong ETag is a hash of the response body, so it is the same
+whichever process or cache computed it and changes exactly when the
+bytes do. A browser revalidating with If-None-Match gets 304 Not Modified
+without the analytics being read or computed again.
+"""
+import hashlib
+import json
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+from app.services.timestamps import today
+
+
+def analytics_body(analytics: dict) -> bytes:
+    """Analytics serialized the way JSONResponse does"""
+    return json.dumps(analytics, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def strong_etag(body: bytes) -> str:
+    """Strong entity tag of a response body"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names the ETag; as the RFC asks, W/ prefixes are ignored"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+class AnalyticsCache:
+    """Serialized analytics of the most recent users, valid until their data version moves on"""
+
+    def __init__(self, max_users: int = 1024):
+        self.max_users = max_users
+        self._versions = {}  # user id -> data version
+        self._entries = OrderedDict()  # user id -> (version, day, etag, body)
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, user_id: str) -> int:
+        """The user's data version; read it before computing, and store the result under it"""
+        return self._versions.get(user_id, 0)
+
+    def bump(self, user_id: str):
+        """Record a write to the user's projects or build logs, dropping their cached analytics"""
+        self._versions[user_id] = self.version(user_id) + 1
+        self._entries.pop(user_id, None)
+
+    @contextmanager
+    def writing(self, user_id: str):
+        """Bump the user's data version once the writes inside are done, whether or not they succeeded"""
+        try:
+            yield
+        finally:
+            self.bump(user_id)
+
+    def get(self, user_id: str) -> Optional[Tuple[str, bytes]]:
+        """The user's cached (etag, body), or None if missing, outdated or from an earlier day"""
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] != self.version(user_id) or entry[1] != today():
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry[2], entry[3]
+
+    def set(self, user_id: str, version: int, analytics: dict) -> Tuple[str, bytes]:
+        """Serialize analytics computed at a version; kept only if no write has happened since"""
+        body = analytics_body(analytics)
+        etag = strong_etag(body)
+        if self.max_users and version == self.version(user_id):
+            self._entries.pop(user_id, None)
+            self._entries[user_id] = (version, today(), etag, body)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return etag, body
+
+    def clear(self):
+        """Drop every cached result, keeping the data versions"""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and users cached"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "users": len(self._entries)
+        }
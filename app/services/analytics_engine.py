@@ -0,0 +1,252 @@
+"""
+Single-pass analytics over a user's projects and build logs
+
+AnalyticsEngine takes the projects once, is fed each build log once and
+fills every chart's buckets as it goes: totals, log types and per-project
+counts for projects without log counters, and the day, week and heatmap
+windows by the log's day number. Projects with counters contribute their
+totals from the counters, and only their recent logs are read, for the
+dated charts. The charts a caller does not ask for cost nothing, and
+their projects' logs are not read. The dated charts can instead be fed
+per-day totals from the daily rollups (app.services.rollups).
+"""
+from collections import defaultdict
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from app.services.bucketing import DayCounts
+from app.services.project_counters import has_counters, read_counters
+from app.services.rollups import rollup_total
+from app.services.timestamps import day_date, day_number, document_day, timestamp_day, weekday
+
+# Days counted as "this week" on the overview
+WEEKLY_DAYS = 7
+
+# Bucket sizes of the activity API, and the most buckets one request may ask for
+GRANULARITIES = ('day', 'week', 'month')
+MAX_ACTIVITY_BUCKETS = 1000
+
+# Readable names of the log types, and of the statuses in chart order
+LOG_TYPE_LABELS = {
+    'update': 'Update',
+    'milestone': 'Milestone',
+    'feature': 'Feature',
+    'bug_fix': 'Bug Fix',
+    'note': 'Note'
+}
+STATUS_LABELS = {
+    'planning': 'Planning',
+    'in_progress': 'In Progress',
+    'completed': 'Completed',
+    'on_hold': 'On Hold'
+}
+
+
+def format_log_type(log_type: str) -> str:
+    """Format log type for display"""
+    return LOG_TYPE_LABELS.get(log_type, log_type.replace('_', ' ').title())
+
+
+def day_labels(start_day: int, days: int) -> List[str]:
+    """Labels for a run of daily buckets, every fifth day and the last one named"""
+    return [
+        day_date(start_day + i).strftime('%b %d') if i % 5 == 0 or i == days - 1 else ''
+        for i in range(days)
+    ]
+
+
+def activity_edges(start_day: int, end_day: int, granularity: str) -> List[int]:
+    """First day of every bucket from start_day to end_day inclusive, then the day after end_day
+
+    Weeks start on Monday and months on the 1st; the first and last
+    buckets are cut short to the range.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+    if end_day < start_day:
+        raise ValueError("from must not be after to")
+
+    edges = [start_day]
+    if granularity == 'day':
+        edges = list(range(start_day, end_day + 2))
+    elif granularity == 'week':
+        edges.extend(range(start_day - weekday(start_day) + 7, end_day + 1, 7))
+    else:
+        month = day_date(start_day).replace(day=1)
+        while True:
+            month = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+            if day_number(month) > end_day:
+                break
+            edges.append(day_number(month))
+    if edges[-1] != end_day + 1:
+        edges.append(end_day + 1)
+    if len(edges) - 1 > MAX_ACTIVITY_BUCKETS:
+        raise ValueError(f"at most {MAX_ACTIVITY_BUCKETS} buckets; widen the granularity or shorten the range")
+    return edges
+
+
+def activity_label(day: int, granularity: str) -> str:
+    """Label of the bucket starting on a day: its ISO date, or year and month"""
+    return day_date(day).strftime('%Y-%m') if granularity == 'month' else day_date(day).isoformat()
+
+
+class AnalyticsEngine:
+    """Every analytics chart from one pass over a user's projects and build logs
+
+    counts=True keeps totals, log types and per-project counts; weekly,
+    activity_days, trend_weeks and heatmap_days switch on the dated
+    charts. Feed the logs of log_projects() to add(), then read the charts.
+    With daily rollups, feed the rollups from first_day on to add_rollup()
+    and only the logs of uncounted projects to add_totals() instead.
+    vectorized chooses the NumPy bucketing in app.services.bucketing, by
+    default whenever NumPy is installed.
+    """
+
+    def __init__(self, projects: List[Dict], today: int, counts: bool = True, weekly: bool = False,
+                 activity_days: Optional[int] = None, trend_weeks: Optional[int] = None,
+                 heatmap_days: Optional[int] = None, vectorized: Optional[bool] = None):
+        self.projects = projects
+        self.today = today
+        self.counts = counts
+        self.total_logs = 0
+        self.log_types = defaultdict(int)
+        self.project_logs = defaultdict(int)
+        self.uncounted = set()
+        self.project_ids = {project['$id'] for project in projects}
+
+        for project in projects:
+            if not has_counters(project):
+                self.uncounted.add(project['$id'])
+            elif counts:
+                counters = read_counters(project)
+                self.total_logs += counters['log_count']
+                self.project_logs[project['$id']] = counters['log_count']
+                for log_type, count in counters['log_type_counts'].items():
+                    self.log_types[log_type] += count
+
+        # Each dated chart is a first day and a number of buckets, or None when not asked for;
+        # the buckets are counted from the days gathered in day_counts when a chart is read
+        self.week_start = today - WEEKLY_DAYS if weekly else None
+        self.activity_start = today - activity_days if activity_days is not None else None
+        self.activity_days = activity_days + 1 if activity_days is not None else 0
+        self.heatmap_start = today - heatmap_days if heatmap_days is not None else None
+        self.heatmap_days = heatmap_days + 1 if heatmap_days is not None else 0
+        # Weeks start on Monday; the oldest week's Monday is the first day counted
+        self.trend_start = today - weekday(today) - 7 * (trend_weeks - 1) if trend_weeks is not None else None
+        self.trend_weeks = trend_weeks or 0
+        self.day_counts = DayCounts(vectorized)
+
+        starts = [d for d in (self.week_start, self.activity_start, self.heatmap_start, self.trend_start) if d is not None]
+        self.first_day = min(starts) if starts else None
+
+    def log_projects(self) -> List[Dict]:
+        """Projects whose logs the pass needs: uncounted ones for the counts, recent ones for dated charts"""
+        wanted = []
+        for project in self.projects:
+            if project['$id'] in self.uncounted:
+                if self.counts or self.first_day is not None:
+                    wanted.append(project)
+            elif self.first_day is not None and (timestamp_day(project.get('last_log_at')) or -1) >= self.first_day:
+                wanted.append(project)
+        return wanted
+
+    def add(self, log: Dict):
+        """Count one build log into every chart it falls in
+
+        Called once per log, so the common case (a stored created_day
+        inside the windows) is kept to a few lookups.
+        """
+        if self.counts and log.get('project_id') in self.uncounted:
+            self.add_totals(log)
+        if self.first_day is not None:
+            day = log.get('created_day')
+            if type(day) is not int:
+                day = document_day(log)
+            if day is not None and day >= self.first_day:
+                self.day_counts.add(day)
+
+    def add_totals(self, log: Dict):
+        """Count a log of a project without counters into the totals, log types and per-project counts"""
+        if self.counts and log.get('project_id') in self.uncounted:
+            self.total_logs += 1
+            self.log_types[log.get('log_type', 'note')] += 1
+            self.project_logs[log.get('project_id')] += 1
+
+    def add_rollup(self, rollup: Dict):
+        """Count a day's rollup into the dated charts, leaving out projects no longer listed"""
+        self.add_day(rollup['day'], rollup_total(rollup, self.project_ids))
+
+    def add_day(self, day: Optional[int], count: int = 1):
+        """Count logs written on a day into the dated charts it falls in"""
+        if self.first_day is None or day is None or day < self.first_day or not count:
+            return
+        self.day_counts.add(day, count)
+
+    @property
+    def weekly_logs(self) -> int:
+        """Logs from the past 7 days on, including any dated in the future"""
+        return self.day_counts.since(self.week_start) if self.week_start is not None else 0
+
+    # Charts
+
+    def overview(self) -> Dict[str, int]:
+        return {
+            'total_projects': len(self.projects),
+            'total_logs': self.total_logs,
+            'active_projects': sum(1 for p in self.projects if p.get('status') == 'in_progress'),
+            'weekly_logs': self.weekly_logs
+        }
+
+    def activity_over_time(self) -> Dict[str, List]:
+        return {
+            'labels': day_labels(self.activity_start, self.activity_days),
+            'values': self.day_counts.window(self.activity_start, self.activity_days)
+        }
+
+    def log_type_distribution(self) -> Dict[str, List]:
+        sorted_types = sorted(self.log_types.items(), key=lambda x: x[1], reverse=True)
+        return {
+            'labels': [format_log_type(t[0]) for t in sorted_types],
+            'values': [t[1] for t in sorted_types]
+        }
+
+    def logs_per_project(self, limit: int = 10) -> Dict[str, List]:
+        project_logs = sorted((
+            {'name': project.get('name', 'Untitled'), 'count': self.project_logs[project['$id']]}
+            for project in self.projects
+        ), key=lambda x: x['count'], reverse=True)[:limit]
+        return {
+            'labels': [p['name'][:20] for p in project_logs],  # Truncate long names
+            'values': [p['count'] for p in project_logs]
+        }
+
+    def weekly_trend(self) -> Dict[str, List]:
+        return {
+            'labels': [day_date(self.trend_start + 7 * i).strftime('%b %d') for i in range(self.trend_weeks)],
+            'values': self.day_counts.window(self.trend_start, self.trend_weeks, 7)
+        }
+
+    def activity_heatmap(self) -> List[Dict]:
+        return [{
+            'date': day_date(self.heatmap_start + i).isoformat(),
+            'count': count
+        } for i, count in enumerate(self.day_counts.window(self.heatmap_start, self.heatmap_days))]
+
+    def project_status_distribution(self) -> Dict[str, List]:
+        status_counts = defaultdict(int)
+        for project in self.projects:
+            status_counts[project.get('status', 'in_progress')] += 1
+        labels = [label for key, label in STATUS_LABELS.items() if key in status_counts]
+        values = [status_counts[key] for key in STATUS_LABELS if key in status_counts]
+        return {'labels': labels, 'values': values}
+
+    def complete(self) -> Dict[str, Any]:
+        """The /api/analytics response"""
+        return {
+            **self.overview(),
+            'activity_over_time': self.activity_over_time(),
+            'log_type_distribution': self.log_type_distribution(),
+            'logs_per_project': self.logs_per_project(),
+            'weekly_trend': self.weekly_trend(),
+            'project_status': self.project_status_distribution()
+        }
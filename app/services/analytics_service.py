@@ -1,42 +1,42 @@
 """
 Analytics service for calculating project and build log statistics
 """
-from datetime import datetime, timedelta
-from collections import defaultdict
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
+from app.config import get_settings
+from app.services.analytics_engine import AnalyticsEngine, activity_edges, activity_label, format_log_type
+from app.services.bucketing import DayCounts
+from app.services.project_counters import COUNTER_FIELDS, has_counters, log_type as type_of_log
+from app.services.rollups import rollup_total
+from app.services.timestamps import day_date, document_day, timestamp_day, today
 
-class AnalyticsService:
-    """Service for generating analytics and statistics"""
+# Only these attributes are read, so skip fetching descriptions and log content
+PROJECT_FIELDS = ['name', 'status', *COUNTER_FIELDS]
+LOG_FIELDS = ['created_at', 'created_day', 'log_type', 'project_id']
 
-    def __init__(self, appwrite_service):
-        self.appwrite = appwrite_service
+# Windows of the charts on the analytics page
+ACTIVITY_DAYS = 30
+TREND_WEEKS = 8
+HEATMAP_DAYS = 365
 
-    def get_overview_stats(self, user_id: str = "demo_user") -> Dict[str, int]:
-        """Get overview statistics"""
-        try:
-            # Get all projects
-            projects = self.appwrite.get_projects(user_id)
-            total_projects = len(projects)
 
-            # Count active projects
-            active_projects = sum(1 for p in projects if p.get('status') == 'in_progress')
+class AnalyticsService:
+    """Service for generating analytics and statistics
 
-            # Get all build logs
-            total_logs = 0
-            for project in projects:
-                logs = self.appwrite.get_build_logs(project['$id'])
-                total_logs += len(logs)
+    With use_rollups (the ANALYTICS_ROLLUPS setting by default) the dated
+    charts come from the user's daily rollups instead of their logs, so
+    answering takes the same reads however long the history is.
+    """
 
-            # Calculate weekly logs
-            weekly_logs = self._count_weekly_logs(projects)
+    def __init__(self, appwrite_service, use_rollups: bool = None):
+        self.appwrite = appwrite_service
+        self.use_rollups = get_settings().analytics_rollups if use_rollups is None else use_rollups
 
-            return {
-                'total_projects': total_projects,
-                'total_logs': total_logs,
-                'active_projects': active_projects,
-                'weekly_logs': weekly_logs
-            }
+    async def get_overview_stats(self, user_id: str = "demo_user") -> Dict[str, int]:
+        """Get overview statistics"""
+        try:
+            engine = await self._compute(user_id, weekly=True)
+            return engine.overview()
         except Exception as e:
             print(f"Error getting overview stats: {e}")
             return {
@@ -46,250 +46,176 @@ class AnalyticsService:
                 'weekly_logs': 0
             }
 
-    def get_activity_over_time(self, user_id: str = "demo_user", days: int = 30) -> Dict[str, List]:
+    async def get_activity_over_time(self, user_id: str = "demo_user", days: int = ACTIVITY_DAYS) -> Dict[str, List]:
         """Get activity over the last N days"""
         try:
-            projects = self.appwrite.get_projects(user_id)
-
-            # Initialize date range
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
-
-            # Create date labels
-            dates = []
-            current = start_date
-            while current <= end_date:
-                dates.append(current.strftime('%Y-%m-%d'))
-                current += timedelta(days=1)
-
-            # Count logs per day
-            activity_by_date = defaultdict(int)
-
-            for project in projects:
-                logs = self.appwrite.get_build_logs(project['$id'])
-                for log in logs:
-                    log_date = log.get('created_at', '')[:10]  # Get YYYY-MM-DD
-                    if log_date in dates:
-                        activity_by_date[log_date] += 1
-
-            # Create values list matching dates
-            values = [activity_by_date.get(date, 0) for date in dates]
-
-            # Format labels (show every 5 days for readability)
-            labels = []
-            for i, date in enumerate(dates):
-                if i % 5 == 0 or i == len(dates) - 1:
-                    dt = datetime.strptime(date, '%Y-%m-%d')
-                    labels.append(dt.strftime('%b %d'))
-                else:
-                    labels.append('')
-
-            return {
-                'labels': labels,
-                'values': values
-            }
+            engine = await self._compute(user_id, counts=False, activity_days=days)
+            return engine.activity_over_time()
         except Exception as e:
             print(f"Error getting activity over time: {e}")
             return {'labels': [], 'values': []}
 
-    def get_log_type_distribution(self, user_id: str = "demo_user") -> Dict[str, List]:
+    async def get_log_type_distribution(self, user_id: str = "demo_user") -> Dict[str, List]:
         """Get distribution of log types"""
         try:
-            projects = self.appwrite.get_projects(user_id)
-            log_types = defaultdict(int)
-
-            for project in projects:
-                logs = self.appwrite.get_build_logs(project['$id'])
-                for log in logs:
-                    log_type = log.get('log_type', 'note')
-                    log_types[log_type] += 1
-
-            # Sort by count
-            sorted_types = sorted(log_types.items(), key=lambda x: x[1], reverse=True)
-
-            labels = [self._format_log_type(t[0]) for t in sorted_types]
-            values = [t[1] for t in sorted_types]
-
-            return {
-                'labels': labels,
-                'values': values
-            }
+            engine = await self._compute(user_id)
+            return engine.log_type_distribution()
         except Exception as e:
             print(f"Error getting log type distribution: {e}")
             return {'labels': [], 'values': []}
 
-    def get_logs_per_project(self, user_id: str = "demo_user", limit: int = 10) -> Dict[str, List]:
+    async def get_logs_per_project(self, user_id: str = "demo_user", limit: int = 10) -> Dict[str, List]:
         """Get number of logs per project"""
         try:
-            projects = self.appwrite.get_projects(user_id)
-            project_logs = []
-
-            for project in projects:
-                logs = self.appwrite.get_build_logs(project['$id'])
-                project_logs.append({
-                    'name': project.get('name', 'Untitled'),
-                    'count': len(logs)
-                })
-
-            # Sort by count and limit
-            project_logs.sort(key=lambda x: x['count'], reverse=True)
-            project_logs = project_logs[:limit]
-
-            labels = [p['name'][:20] for p in project_logs]  # Truncate long names
-            values = [p['count'] for p in project_logs]
-
-            return {
-                'labels': labels,
-                'values': values
-            }
+            engine = await self._compute(user_id)
+            return engine.logs_per_project(limit)
         except Exception as e:
             print(f"Error getting logs per project: {e}")
             return {'labels': [], 'values': []}
 
-    def get_weekly_trend(self, user_id: str = "demo_user", weeks: int = 8) -> Dict[str, List]:
+    async def get_weekly_trend(self, user_id: str = "demo_user", weeks: int = TREND_WEEKS) -> Dict[str, List]:
         """Get weekly activity trend"""
         try:
-            projects = self.appwrite.get_projects(user_id)
-
-            # Calculate week ranges
-            end_date = datetime.now()
-            week_data = []
-
-            for i in range(weeks - 1, -1, -1):
-                week_start = end_date - timedelta(weeks=i, days=end_date.weekday())
-                week_end = week_start + timedelta(days=6)
-                week_data.append({
-                    'start': week_start.strftime('%Y-%m-%d'),
-                    'end': week_end.strftime('%Y-%m-%d'),
-                    'label': week_start.strftime('%b %d'),
-                    'count': 0
-                })
-
-            # Count logs per week
-            for project in projects:
-                logs = self.appwrite.get_build_logs(project['$id'])
-                for log in logs:
-                    log_date = log.get('created_at', '')[:10]
-                    for week in week_data:
-                        if week['start'] <= log_date <= week['end']:
-                            week['count'] += 1
-                            break
-
-            labels = [w['label'] for w in week_data]
-            values = [w['count'] for w in week_data]
-
-            return {
-                'labels': labels,
-                'values': values
-            }
+            engine = await self._compute(user_id, counts=False, trend_weeks=weeks)
+            return engine.weekly_trend()
         except Exception as e:
             print(f"Error getting weekly trend: {e}")
             return {'labels': [], 'values': []}
 
-    def get_activity_heatmap(self, user_id: str = "demo_user", days: int = 365) -> List[Dict]:
+    async def get_activity_heatmap(self, user_id: str = "demo_user", days: int = HEATMAP_DAYS) -> List[Dict]:
         """Get activity heatmap data (GitHub-style) - 12 months"""
         try:
-            projects = self.appwrite.get_projects(user_id)
-
-            # Initialize date range
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
-
-            # Count logs per day
-            activity_by_date = defaultdict(int)
-
-            for project in projects:
-                logs = self.appwrite.get_build_logs(project['$id'])
-                for log in logs:
-                    log_date = log.get('created_at', '')[:10]
-                    activity_by_date[log_date] += 1
-
-            # Create heatmap data
-            heatmap_data = []
-            current = start_date
-            while current <= end_date:
-                date_str = current.strftime('%Y-%m-%d')
-                heatmap_data.append({
-                    'date': date_str,
-                    'count': activity_by_date.get(date_str, 0)
-                })
-                current += timedelta(days=1)
-
-            return heatmap_data
+            engine = await self._compute(user_id, counts=False, heatmap_days=days)
+            return engine.activity_heatmap()
         except Exception as e:
             print(f"Error getting activity heatmap: {e}")
             return []
 
-    def get_project_status_distribution(self, user_id: str = "demo_user") -> Dict[str, List]:
+    async def get_project_status_distribution(self, user_id: str = "demo_user") -> Dict[str, List]:
         """Get distribution of project statuses"""
         try:
-            projects = self.appwrite.get_projects(user_id)
-            status_counts = defaultdict(int)
-
-            for project in projects:
-                status = project.get('status', 'in_progress')
-                status_counts[status] += 1
-
-            # Map status to readable labels (in consistent order)
-            status_map = {
-                'planning': 'Planning',
-                'in_progress': 'In Progress',
-                'completed': 'Completed',
-                'on_hold': 'On Hold'
-            }
-
-            # Maintain consistent order for chart
-            labels = []
-            values = []
-            for status_key, status_label in status_map.items():
-                if status_key in status_counts:
-                    labels.append(status_label)
-                    values.append(status_counts[status_key])
-
-            return {
-                'labels': labels,
-                'values': values
-            }
+            engine = await self._compute(user_id, counts=False)
+            return engine.project_status_distribution()
         except Exception as e:
             print(f"Error getting project status distribution: {e}")
             return {'labels': [], 'values': []}
 
-    def get_complete_analytics(self, user_id: str = "demo_user") -> Dict[str, Any]:
-        """Get all analytics data in one call"""
-        return {
-            **self.get_overview_stats(user_id),
-            'activity_over_time': self.get_activity_over_time(user_id),
-            'log_type_distribution': self.get_log_type_distribution(user_id),
-            'logs_per_project': self.get_logs_per_project(user_id),
-            'weekly_trend': self.get_weekly_trend(user_id),
-            'project_status': self.get_project_status_distribution(user_id)
-        }
+    async def get_complete_analytics(self, user_id: str = "demo_user", storage=None,
+                                     raise_errors: bool = False) -> Dict[str, Any]:
+        """Get all analytics data in one call
 
-    def _count_weekly_logs(self, projects: List[Dict]) -> int:
-        """Count logs from the past 7 days"""
+        The projects and the logs the charts need are read once, through
+        the request's storage when given, and every section comes out of
+        one pass over them. With raise_errors a failure is raised rather
+        than answered with empty analytics, so callers caching the result
+        can tell the two apart.
+        """
         try:
-            week_ago = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
-            count = 0
+            engine = await self._compute(
+                user_id, storage, weekly=True, activity_days=ACTIVITY_DAYS, trend_weeks=TREND_WEEKS
+            )
+            return engine.complete()
+        except Exception as e:
+            print(f"Error getting complete analytics: {e}")
+            if raise_errors:
+                raise
+            return {
+                'total_projects': 0,
+                'total_logs': 0,
+                'active_projects': 0,
+                'weekly_logs': 0,
+                'activity_over_time': {'labels': [], 'values': []},
+                'log_type_distribution': {'labels': [], 'values': []},
+                'logs_per_project': {'labels': [], 'values': []},
+                'weekly_trend': {'labels': [], 'values': []},
+                'project_status': {'labels': [], 'values': []}
+            }
 
-            for project in projects:
-                logs = self.appwrite.get_build_logs(project['$id'])
-                for log in logs:
-                    log_date = log.get('created_at', '')[:10]
-                    if log_date >= week_ago:
-                        count += 1
+    async def get_activity(self, user_id: str, start_day: int, end_day: int, granularity: str = 'day',
+                           project_id: Optional[str] = None, log_type: Optional[str] = None,
+                           storage=None) -> Dict[str, Any]:
+        """Logs per day, week or month from start_day to end_day, optionally of one project or log type
 
-            return count
+        Only the requested days are read: their rollups, or else the logs
+        the storage finds by created_day, and only of projects with logs
+        since start_day. Raises ValueError for an unusable range.
+        """
+        edges = activity_edges(start_day, end_day, granularity)
+        try:
+            storage = storage or self.appwrite
+            projects = await storage.get_projects(user_id, fields=PROJECT_FIELDS)
+            if project_id is not None:
+                projects = [p for p in projects if p['$id'] == project_id]
+
+            counts = DayCounts()
+            if self.use_rollups:
+                project_ids = {p['$id'] for p in projects}
+                if project_ids:
+                    for rollup in await storage.get_rollups(user_id, start_day, end_day):
+                        counts.add(rollup['day'], rollup_total(rollup, project_ids, log_type))
+            else:
+                # A project whose counters put its latest log before the range has none in it
+                projects = [
+                    p for p in projects
+                    if not has_counters(p) or (timestamp_day(p.get('last_log_at')) or -1) >= start_day
+                ]
+                if projects:
+                    async for log in storage.iter_build_logs_for_projects(
+                        [p['$id'] for p in projects], fields=LOG_FIELDS, start_day=start_day, end_day=end_day
+                    ):
+                        day = document_day(log)
+                        if day is not None and (log_type is None or type_of_log(log) == log_type):
+                            counts.add(day)
+
+            values = counts.bins(edges)
+            return {
+                'from': day_date(start_day).isoformat(),
+                'to': day_date(end_day).isoformat(),
+                'granularity': granularity,
+                'labels': [activity_label(day, granularity) for day in edges[:-1]],
+                'values': values,
+                'total': sum(values)
+            }
         except Exception as e:
-            print(f"Error counting weekly logs: {e}")
-            return 0
+            print(f"Error getting activity: {e}")
+            raise
+
+    async def _compute(self, user_id: str, storage=None, **charts) -> AnalyticsEngine:
+        """Read a user's projects and the logs the charts need, and run them through an engine"""
+        storage = storage or self.appwrite
+        projects = await storage.get_projects(user_id, fields=PROJECT_FIELDS)
+        engine = AnalyticsEngine(projects, today(), **charts)
+        if self.use_rollups:
+            await self._add_rollups(engine, user_id, storage)
+            return engine
+        # Projects with counters are only read for the dated charts, so only their logs
+        # inside the windows are fetched; the others are read whole for their totals
+        log_projects = engine.log_projects()
+        counted = [p for p in log_projects if p['$id'] not in engine.uncounted]
+        uncounted = [p for p in log_projects if p['$id'] in engine.uncounted]
+        if counted:
+            async for log in self._iter_logs(counted, storage, start_day=engine.first_day):
+                engine.add(log)
+        if uncounted:
+            async for log in self._iter_logs(uncounted, storage):
+                engine.add(log)
+        return engine
+
+    async def _add_rollups(self, engine: AnalyticsEngine, user_id: str, storage):
+        """Fill the dated charts from the rollups of their days; only projects without counters have logs read"""
+        if engine.first_day is not None:
+            for rollup in await storage.get_rollups(user_id, engine.first_day):
+                engine.add_rollup(rollup)
+        uncounted = [p for p in engine.projects if p['$id'] in engine.uncounted] if engine.counts else []
+        if uncounted:
+            async for log in self._iter_logs(uncounted, storage):
+                engine.add_totals(log)
+
+    def _iter_logs(self, projects: List[Dict], storage=None, start_day: int = None):
+        """Stream the build logs of all given projects using batched queries, from start_day on when given"""
+        storage = storage or self.appwrite
+        return storage.iter_build_logs_for_projects([p['$id'] for p in projects], fields=LOG_FIELDS, start_day=start_day)
 
     def _format_log_type(self, log_type: str) -> str:
         """Format log type for display"""
-        type_map = {
-            'update': 'Update',
-            'milestone': 'Milestone',
-            'feature': 'Feature',
-            'bug_fix': 'Bug Fix',
-            'note': 'Note'
-        }
-        return type_map.get(log_type, log_type.replace('_', ' ').title())
+        return format_log_type(log_type)
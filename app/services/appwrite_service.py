@@ -1,12 +1,105 @@
-import requests
+import asyncio
+import math
+import threading
+import time
+
+import httpx
 from appwrite.id import ID
+from appwrite.permission import Permission
+from appwrite.query import Query
+from appwrite.role import Role
 from app.config import get_settings
+from app.services.cache import DocumentCache
+from app.services.project_counters import (
+    COUNTED_LOG_FIELDS, apply_log_change, counters_changed, counters_from_logs, encode_counters,
+    has_counters, initial_counters, newest_log_at, read_counters
+)
+from app.services.rollups import (
+    ROLLED_UP_LOG_FIELDS, apply_rollup_change, count_log, encode_rollup, read_rollup, rollup_changes, rollup_id
+)
+from app.services.storage_backend import AlreadyCreatedError, StorageBackend
+from app.services.timestamps import with_epoch_fields
+from app.services.resilience import (
+    CircuitBreaker, TokenBucket, RETRYABLE_STATUSES, TOO_MANY_REQUESTS, backoff_delay, retry_after_seconds
+)
 
 settings = get_settings()
 
+# Largest page Appwrite will return for a single list call
+MAX_LIST_LIMIT = 5000
 
-class AppwriteService:
-    """Service class for Appwrite operations using direct HTTP requests"""
+# Most values Appwrite accepts in a single Query.equal
+MAX_QUERY_VALUES = 100
+
+# Appwrite's chunked upload protocol uses fixed 5 MB chunks
+UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024
+
+# Requests that are safe to resend after a server error or a dropped connection
+IDEMPOTENT_METHODS = {"GET", "HEAD"}
+
+
+def _http2_available() -> bool:
+    """Check whether the optional 'h2' package needed for HTTP/2 is installed"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _KeyedLocks:
+    """One lock per key, kept only while a caller holds or waits for it
+
+    enter() hands out the key's lock (making it on first use) and every
+    enter() is matched by a leave(); the last leave() forgets the key, so
+    the registry does not grow with every project and user ever written.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._guard = threading.Lock()
+        self._entries = {}  # key -> [lock, callers holding or waiting]
+
+    def enter(self, key):
+        with self._guard:
+            entry = self._entries.setdefault(key, [self._factory(), 0])
+            entry[1] += 1
+            return entry[0]
+
+    def leave(self, key):
+        with self._guard:
+            entry = self._entries[key]
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._entries[key]
+            return entry[0]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _owner_permissions(owner_id: str = None) -> dict:
+    """Form fields giving a file's uploader read and delete rights, which also record who uploaded it"""
+    if not owner_id:
+        return {}
+    return {'permissions[]': [Permission.read(Role.user(owner_id)), Permission.delete(Role.user(owner_id))]}
+
+
+def file_owner(file: dict):
+    """Id of the user a file's permissions say uploaded it, None if they name nobody"""
+    for permission in file.get('$permissions') or []:
+        if permission.startswith('delete("user:') and permission.endswith('")'):
+            return permission[len('delete("user:'):-len('")')]
+    return None
+
+
+def _step(name: str, *args, **kwargs):
+    """One call a shared operation needs made: the service method's name and its arguments"""
+    return name, args, kwargs
+
+
+class _AppwriteBase:
+    """Configuration, headers, URLs and payloads shared by the sync and async services"""
 
     def __init__(self):
         self.endpoint = settings.appwrite_endpoint
@@ -15,254 +108,1390 @@ class AppwriteService:
         self.database_id = settings.appwrite_database_id
         self.projects_collection_id = settings.appwrite_projects_collection_id
         self.build_logs_collection_id = settings.appwrite_build_logs_collection_id
+        self.rollups_collection_id = settings.appwrite_rollups_collection_id
+        self.rollups = settings.analytics_rollups
         self.storage_bucket_id = settings.appwrite_storage_bucket_id
 
-    def _get_headers(self, session_token=None):
-        """Get common headers for API requests"""
-        headers = {
+        # Headers only depend on the auth mode, so build them once
+        self._admin_headers = {
             "X-Appwrite-Project": self.project_id,
+            "X-Appwrite-Key": self.api_key,
             "Content-Type": "application/json"
         }
+        # Multipart uploads must let the client set the Content-Type boundary
+        self._upload_headers = {
+            "X-Appwrite-Project": self.project_id,
+            "X-Appwrite-Key": self.api_key
+        }
+        self._session_headers = {
+            "X-Appwrite-Project": self.project_id,
+            "Content-Type": "application/json"
+        }
+
+        # Cached documents and lists are shared between callers; treat them as read-only
+        self.cache = DocumentCache(
+            ttl=settings.cache_ttl,
+            max_entries=settings.cache_max_entries,
+            max_bytes=settings.cache_max_bytes
+        )
+
+        # Shared by every request so a degraded or rate-limiting Appwrite slows everyone down together
+        self.breaker = CircuitBreaker(settings.appwrite_breaker_threshold, settings.appwrite_breaker_reset)
+        self.limiter = TokenBucket(settings.appwrite_rate_limit, settings.appwrite_rate_burst)
+
+    def _record_outcome(self, response: httpx.Response = None):
+        """Feed the circuit breaker: server errors and dropped connections count as failures"""
+        if response is None or response.status_code in RETRYABLE_STATUSES:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def _retry_delay(self, attempt: int, retry: bool, response: httpx.Response = None):
+        """Seconds to wait before resending, or None if this outcome should stand
+
+        A 429 is always resent, since Appwrite did not process the request,
+        and its Retry-After pauses every caller through the shared limiter.
+        """
+        if response is not None and response.status_code == TOO_MANY_REQUESTS:
+            delay = retry_after_seconds(response.headers.get("Retry-After"))
+            if delay is None:
+                delay = backoff_delay(attempt, settings.appwrite_retry_backoff, settings.appwrite_retry_backoff_max)
+            self.limiter.pause(delay)
+            return 0.0 if attempt < settings.appwrite_max_retries else None
+
+        if not retry or attempt >= settings.appwrite_max_retries:
+            return None
+        if response is None or response.status_code in RETRYABLE_STATUSES:
+            return backoff_delay(attempt, settings.appwrite_retry_backoff, settings.appwrite_retry_backoff_max)
+        return None
+
+    def _client_options(self) -> dict:
+        """Pool, keep-alive and protocol options for the long-lived HTTP client"""
+        http2 = settings.appwrite_http2 and _http2_available()
+        if settings.appwrite_http2 and not http2:
+            print("HTTP/2 requested but the 'h2' package is not installed, using HTTP/1.1")
+
+        limits = httpx.Limits(
+            max_connections=settings.appwrite_pool_size,
+            max_keepalive_connections=settings.appwrite_pool_size,
+            keepalive_expiry=settings.appwrite_keepalive_expiry
+        )
+        return {"http2": http2, "limits": limits, "timeout": settings.appwrite_timeout}
 
+    def _get_headers(self, session_token=None):
+        """Get common headers for API requests"""
         if session_token:
             # User session - pass session as cookie
             # Appwrite expects: a_session_<projectId>=<sessionSecret>
-            headers["Cookie"] = f"a_session_{self.project_id}={session_token}"
-        else:
-            # Admin operations - use API key
-            headers["X-Appwrite-Key"] = self.api_key
+            return {
+                **self._session_headers,
+                "Cookie": f"a_session_{self.project_id}={session_token}"
+            }
+
+        # Admin operations - use API key; a copy, so callers can't alter the shared headers
+        return dict(self._admin_headers)
+
+    def _documents_url(self, collection_id: str, document_id: str = None) -> str:
+        """URL of a collection's documents, or of one document"""
+        url = f"{self.endpoint}/databases/{self.database_id}/collections/{collection_id}/documents"
+        return f"{url}/{document_id}" if document_id else url
+
+    def _files_url(self, file_id: str = None) -> str:
+        """URL of the storage bucket's files, or of one file"""
+        url = f"{self.endpoint}/storage/buckets/{self.storage_bucket_id}/files"
+        return f"{url}/{file_id}" if file_id else url
+
+    def _list_queries(self, attribute: str, value, order: str = "desc", fields: list = None) -> list:
+        """Queries that filter on one attribute and order by created_at on the server
+
+        When fields are given, only those attributes (plus $id, which cursor
+        paging relies on) are returned.
+        """
+        if order not in ("asc", "desc"):
+            raise ValueError(f"Invalid order: {order}")
+
+        queries = [
+            Query.equal(attribute, value),
+            Query.order_asc("created_at") if order == "asc" else Query.order_desc("created_at")
+        ]
+        if fields:
+            queries.append(Query.select(list(dict.fromkeys(["$id", *fields]))))
+        return queries
+
+    def _page_params(self, queries: list, page_size: int, cursor: str = None) -> dict:
+        """Query string for one page, continuing after the cursor document if given"""
+        page_queries = [*queries, Query.limit(page_size)]
+        if cursor:
+            page_queries.append(Query.cursor_after(cursor))
+        return {"queries[]": page_queries}
+
+    def _id_queries(self, ids: list, fields: list = None) -> list:
+        """Queries for the documents with the given ids, at most MAX_QUERY_VALUES of them"""
+        queries = [Query.equal("$id", ids), Query.limit(len(ids))]
+        if fields:
+            queries.append(Query.select(list(dict.fromkeys(["$id", *fields]))))
+        return queries
 
+    def _cached_documents(self, kind: str, ids: list, fields: list = None) -> dict:
+        """Whole documents already cached under (kind, id); projections always go to Appwrite"""
+        if fields:
+            return {}
+        cached = {document_id: self.cache.get((kind, document_id)) for document_id in ids}
+        return {document_id: document for document_id, document in cached.items() if document is not None}
+
+    def _id_batches(self, ids: list) -> list:
+        """Split ids into chunks small enough for one Query.equal"""
+        ids = list(dict.fromkeys(ids))
+        return [ids[i:i + MAX_QUERY_VALUES] for i in range(0, len(ids), MAX_QUERY_VALUES)]
+
+    def _list_tags(self, scope: str, kind: str, documents: list) -> list:
+        """Cache tags for a list: its scope plus every document it contains"""
+        return [scope, *(f"{kind}:{d['$id']}" for d in documents if '$id' in d)]
+
+    def _next_cursor(self, documents: list, page_size: int):
+        """Cursor for the following page, or None when this page was the last"""
+        return documents[-1]['$id'] if len(documents) == page_size else None
+
+    def _account_payload(self, email: str, password: str, name: str) -> dict:
+        return {
+            "userId": ID.unique(),
+            "email": email,
+            "password": password,
+            "name": name
+        }
+
+    def _project_payload(self, user_id: str, data: dict, document_id: str = None) -> dict:
+        # Filter out None and empty string values
+        clean_data = {k: v for k, v in data.items() if v is not None and v != ""}
+        clean_data["user_id"] = user_id
+        clean_data.update(initial_counters())
+
+        return {
+            "documentId": document_id or ID.unique(),
+            "data": with_epoch_fields(clean_data)
+        }
+
+    def _project_update_payload(self, data: dict) -> dict:
+        # Filter out None and empty string values
+        clean_data = {k: v for k, v in data.items() if v is not None and v != ""}
+        return {"data": with_epoch_fields(clean_data)}
+
+    def _build_log_payload(self, project_id: str, data: dict, document_id: str = None) -> dict:
+        # Filter out None and empty values
+        clean_data = {k: v for k, v in data.items() if v is not None and v != "" and v != []}
+        clean_data["project_id"] = project_id
+        if "created_at" in data:
+            clean_data["created_at"] = data["created_at"]
+
+        return {
+            "documentId": document_id or ID.unique(),
+            "data": with_epoch_fields(clean_data)
+        }
+
+    def _day_queries(self, attribute: str, start_day: int = None, end_day: int = None) -> list:
+        """Queries keeping documents whose day number attribute is within a range, both ends included"""
+        queries = []
+        if start_day is not None:
+            queries.append(Query.greater_than_equal(attribute, start_day))
+        if end_day is not None:
+            queries.append(Query.less_than_equal(attribute, end_day))
+        return queries
+
+    def _rollup_queries(self, user_id: str, start_day: int = None, end_day: int = None) -> list:
+        """Queries for a user's rollups within a range of days, oldest first"""
+        return [Query.equal("user_id", user_id), Query.order_asc("day"), *self._day_queries("day", start_day, end_day)]
+
+    def _rollup_payload(self, user_id: str, day: int, counts: dict) -> dict:
+        return {
+            "documentId": rollup_id(user_id, day),
+            "data": {"user_id": user_id, "day": day, **encode_rollup(counts)}
+        }
+
+    def _created(self, response: httpx.Response, document_id: str = None) -> dict:
+        """The document a create returned; a 409 for a chosen id means an earlier call created it"""
+        if document_id and response.status_code == 409:
+            raise AlreadyCreatedError(document_id)
+        response.raise_for_status()
+        return response.json()
+
+    def _chunk_headers(self, index: int, chunk_length: int, size: int, file_id: str) -> dict:
+        """Upload headers for one chunk: its byte range, and the file id after the first"""
+        headers = dict(self._upload_headers)
+        if size > UPLOAD_CHUNK_SIZE:
+            start = index * UPLOAD_CHUNK_SIZE
+            headers["Content-Range"] = f"bytes {start}-{start + chunk_length - 1}/{size}"
+        if index > 0:
+            headers["x-appwrite-id"] = file_id
         return headers
 
-    # Authentication Operations
-    def create_account(self, email: str, password: str, name: str):
-        """Create a new user account"""
+    def _retryable_upload_error(self, error: Exception) -> bool:
+        """Network failures and server errors are worth resending a chunk for"""
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code >= 500
+        return isinstance(error, httpx.TransportError)
+
+    def get_file_url(self, file_id: str):
+        """Get file download URL"""
+        return f"{self._files_url(file_id)}/view"
+
+    # Shared operations
+    #
+    # Each operation is a generator that yields a _step() for every call
+    # that does I/O and gets its result (or exception) back. AppwriteService
+    # and AsyncAppwriteService run them with their own _run, so the logic
+    # behind both services is written once.
+
+    def _locked(self, kind: str, key: str, steps):
+        """Run steps holding this service's `kind` lock for key"""
+        yield _step("_acquire", kind, key)
         try:
-            url = f"{self.endpoint}/account"
-            payload = {
-                "userId": ID.unique(),
-                "email": email,
-                "password": password,
-                "name": name
-            }
-            response = requests.post(url, headers=self._get_headers(), json=payload)
+            return (yield from steps)
+        finally:
+            yield _step("_release", kind, key)
+
+    def _create_document_steps(self, collection_id: str, payload: dict, retry: bool):
+        """POST a new document and return it
+
+        With retry the POST is resent after transient failures, and a 409
+        for the chosen id raises AlreadyCreatedError, unless this very call
+        resent an attempt that may have gone through: that attempt created
+        the document and only its response was lost, so the document is
+        read back and returned as created here.
+        """
+        uncertain = []
+        document_id = payload["documentId"] if retry else None
+        response = yield _step("_send", "POST", self._documents_url(collection_id), json=payload,
+                               retry=retry, uncertain=uncertain)
+        if document_id and response.status_code == 409 and uncertain:
+            response = yield _step("_request", "GET", self._documents_url(collection_id, document_id))
+        return self._created(response, document_id)
+
+    def _delete_document_steps(self, collection_id: str, document_id: str):
+        response = yield _step("_send", "DELETE", self._documents_url(collection_id, document_id), retry=True)
+        if response.status_code != 404:
             response.raise_for_status()
+
+    def _list_page_steps(self, collection_id: str, queries: list, page_size: int, cursor: str = None):
+        url = self._documents_url(collection_id)
+        response = yield _step("_request", "GET", url, params=self._page_params(queries, page_size, cursor))
+        documents = response.json()['documents']
+        return documents, self._next_cursor(documents, page_size)
+
+    def _walk_documents(self, collection_id: str, queries: list, page_size: int, visit):
+        """Call visit on every matching document, one page in memory at a time"""
+        cursor = None
+        while True:
+            documents, cursor = yield from self._list_page_steps(collection_id, queries, page_size, cursor)
+            for document in documents:
+                visit(document)
+            if cursor is None:
+                return
+
+    def _all_documents(self, collection_id: str, queries: list):
+        documents = []
+        yield from self._walk_documents(collection_id, queries, MAX_LIST_LIMIT, documents.append)
+        return documents
+
+    def _create_account_steps(self, email: str, password: str, name: str):
+        try:
+            payload = self._account_payload(email, password, name)
+            response = yield _step("_request", "POST", f"{self.endpoint}/account", json=payload)
             return response.json()
         except Exception as e:
             print(f"Error creating account: {e}")
             raise
 
-    def create_session(self, email: str, password: str):
-        """Create a new session (login)"""
+    def _create_session_steps(self, email: str, password: str):
         try:
             url = f"{self.endpoint}/account/sessions/email"
             payload = {
                 "email": email,
                 "password": password
             }
-            response = requests.post(url, headers=self._get_headers(), json=payload)
-            response.raise_for_status()
+            response = yield _step("_request", "POST", url, json=payload)
             return response.json()
         except Exception as e:
             print(f"Error creating session: {e}")
             raise
 
-    def get_account(self, session_token: str):
-        """Get current user account details"""
+    def _get_account_steps(self, session_token: str):
         try:
             url = f"{self.endpoint}/account"
-            response = requests.get(url, headers=self._get_headers(session_token))
-            response.raise_for_status()
+            response = yield _step("_request", "GET", url, headers=self._get_headers(session_token))
             return response.json()
         except Exception as e:
             print(f"Error getting account: {e}")
             raise
 
-    def delete_session(self, session_token: str, session_id: str):
-        """Delete a session (logout)"""
+    def _delete_session_steps(self, session_token: str, session_id: str):
         try:
             url = f"{self.endpoint}/account/sessions/{session_id}"
-            response = requests.delete(url, headers=self._get_headers(session_token))
-            response.raise_for_status()
+            yield _step("_request", "DELETE", url, headers=self._get_headers(session_token))
             return True
         except Exception as e:
             print(f"Error deleting session: {e}")
             raise
 
-    # Database Operations
-    def create_project(self, user_id: str, data: dict):
-        """Create a new project"""
-        try:
-            url = f"{self.endpoint}/databases/{self.database_id}/collections/{self.projects_collection_id}/documents"
-
-            # Filter out None and empty string values
-            clean_data = {k: v for k, v in data.items() if v is not None and v != ""}
-            clean_data["user_id"] = user_id
+    def _create_project_steps(self, user_id: str, data: dict, document_id: str = None):
+        """Create a project
 
-            payload = {
-                "documentId": ID.unique(),
-                "data": clean_data
-            }
-
-            response = requests.post(url, headers=self._get_headers(), json=payload)
-            response.raise_for_status()
-            return response.json()
+        With a document_id the POST is resent after transient failures,
+        since a repeat can only fail with AlreadyCreatedError.
+        """
+        try:
+            payload = self._project_payload(user_id, data, document_id)
+            try:
+                return (yield from self._create_document_steps(self.projects_collection_id, payload, document_id is not None))
+            finally:
+                self.cache.invalidate(f"user:{user_id}")
         except Exception as e:
             print(f"Error creating project: {e}")
             raise
 
-    def get_projects(self, user_id: str):
-        """Get all projects for a user"""
+    def _get_projects_steps(self, user_id: str, order: str, limit: int, fields: list):
         try:
-            url = f"{self.endpoint}/databases/{self.database_id}/collections/{self.projects_collection_id}/documents"
-            response = requests.get(url, headers=self._get_headers())
-            response.raise_for_status()
-            # Filter by user_id client-side
-            all_projects = response.json()['documents']
-            return [proj for proj in all_projects if proj.get('user_id') == user_id]
+            key = ("projects", user_id, order, limit, tuple(fields or ()))
+            projects = self.cache.get(key)
+            if projects is not None:
+                return projects
+
+            queries = self._list_queries("user_id", user_id, order, fields)
+            if limit:
+                projects = (yield from self._list_page_steps(self.projects_collection_id, queries, limit))[0]
+            else:
+                projects = yield from self._all_documents(self.projects_collection_id, queries)
+            self.cache.set(key, projects, self._list_tags(f"user:{user_id}", "project", projects))
+            return projects
         except Exception as e:
             print(f"Error getting projects: {e}")
             raise
 
-    def get_project(self, project_id: str):
-        """Get a single project"""
+    def _get_project_steps(self, project_id: str):
         try:
-            url = f"{self.endpoint}/databases/{self.database_id}/collections/{self.projects_collection_id}/documents/{project_id}"
-            response = requests.get(url, headers=self._get_headers())
-            response.raise_for_status()
-            return response.json()
+            key = ("project", project_id)
+            project = self.cache.get(key)
+            if project is None:
+                url = self._documents_url(self.projects_collection_id, project_id)
+                response = yield _step("_request", "GET", url)
+                project = response.json()
+                self.cache.set(key, project, [f"project:{project_id}"])
+            return project
         except Exception as e:
             print(f"Error getting project: {e}")
             raise
 
-    def update_project(self, project_id: str, data: dict):
-        """Update a project"""
+    def _update_project_steps(self, project_id: str, data: dict):
         try:
-            url = f"{self.endpoint}/databases/{self.database_id}/collections/{self.projects_collection_id}/documents/{project_id}"
-            # Filter out None and empty string values
-            clean_data = {k: v for k, v in data.items() if v is not None and v != ""}
-            payload = {"data": clean_data}
-            response = requests.patch(url, headers=self._get_headers(), json=payload)
-            response.raise_for_status()
+            url = self._documents_url(self.projects_collection_id, project_id)
+            payload = self._project_update_payload(data)
+            response = yield _step("_request", "PATCH", url, json=payload)
+            self.cache.invalidate(f"project:{project_id}")
             return response.json()
         except Exception as e:
             print(f"Error updating project: {e}")
             raise
 
-    def delete_project(self, project_id: str):
-        """Delete a project"""
+    def _delete_project_steps(self, project_id: str):
         try:
-            url = f"{self.endpoint}/databases/{self.database_id}/collections/{self.projects_collection_id}/documents/{project_id}"
-            response = requests.delete(url, headers=self._get_headers())
-            response.raise_for_status()
+            url = self._documents_url(self.projects_collection_id, project_id)
+            yield _step("_request", "DELETE", url)
+            self.cache.invalidate(f"project:{project_id}", f"logs:{project_id}")
             return True
         except Exception as e:
             print(f"Error deleting project: {e}")
             raise
 
-    # Build Log Operations
-    def create_build_log(self, project_id: str, data: dict):
-        """Create a new build log entry"""
+    def _create_build_log_steps(self, project_id: str, data: dict, update_counters: bool, document_id: str):
+        """Create a build log and count it
+
+        update_counters=False leaves the project's counters for a later
+        repair_project_counters, as bulk imports do. With a document_id
+        the POST is resent after transient failures, and a repeat raises
+        AlreadyCreatedError without counting the log again. A resend that
+        finds the log created by its own lost attempt counts it.
+        """
         try:
-            url = f"{self.endpoint}/databases/{self.database_id}/collections/{self.build_logs_collection_id}/documents"
+            payload = self._build_log_payload(project_id, data, document_id)
+            try:
+                log = yield from self._create_document_steps(self.build_logs_collection_id, payload, document_id is not None)
+            finally:
+                self.cache.invalidate(f"logs:{project_id}")
+            if update_counters:
+                yield _step("_update_counters", project_id, new=log)
+            return log
+        except AlreadyCreatedError:
+            raise  # A repeated import row, not an error
+        except Exception as e:
+            print(f"Error creating build log: {e}")
+            raise
 
-            # Filter out None and empty values
-            clean_data = {k: v for k, v in data.items() if v is not None and v != "" and v != []}
-            clean_data["project_id"] = project_id
-            if "created_at" in data:
-                clean_data["created_at"] = data["created_at"]
+    def _get_build_logs_steps(self, project_id: str, order: str, limit: int, fields: list):
+        try:
+            key = ("build_logs", project_id, order, limit, tuple(fields or ()))
+            logs = self.cache.get(key)
+            if logs is not None:
+                return logs
 
-            payload = {
-                "documentId": ID.unique(),
-                "data": clean_data
-            }
+            queries = self._list_queries("project_id", project_id, order, fields)
+            if limit:
+                logs = (yield from self._list_page_steps(self.build_logs_collection_id, queries, limit))[0]
+            else:
+                logs = yield from self._all_documents(self.build_logs_collection_id, queries)
+            self.cache.set(key, logs, self._list_tags(f"logs:{project_id}", "log", logs))
+            return logs
+        except Exception as e:
+            print(f"Error getting build logs: {e}")
+            raise
 
-            print(f"Creating build log with payload: {payload}")
-            response = requests.post(url, headers=self._get_headers(), json=payload)
-            print(f"Response status: {response.status_code}")
-            if response.status_code != 201:
-                print(f"Response body: {response.text}")
-            response.raise_for_status()
-            return response.json()
+    def _get_build_log_steps(self, log_id: str):
+        try:
+            key = ("build_log", log_id)
+            log = self.cache.get(key)
+            if log is None:
+                response = yield _step("_request", "GET", self._documents_url(self.build_logs_collection_id, log_id))
+                log = response.json()
+                self.cache.set(key, log, [f"log:{log_id}"])
+            return log
         except Exception as e:
-            print(f"Error creating build log: {e}")
+            print(f"Error getting build log: {e}")
             raise
 
-    def get_build_logs(self, project_id: str):
-        """Get all build logs for a project"""
+    def _get_build_logs_page_steps(self, project_id: str, cursor: str, order: str, page_size: int, fields: list):
         try:
-            url = f"{self.endpoint}/databases/{self.database_id}/collections/{self.build_logs_collection_id}/documents"
-            response = requests.get(url, headers=self._get_headers())
-            response.raise_for_status()
-            # Filter by project_id client-side for now
-            all_logs = response.json()['documents']
-            return [log for log in all_logs if log.get('project_id') == project_id]
+            page_size = page_size or settings.appwrite_page_size
+            key = ("build_logs_page", project_id, cursor, order, page_size, tuple(fields or ()))
+            page = self.cache.get(key)
+            if page is not None:
+                return page
+
+            queries = self._list_queries("project_id", project_id, order, fields)
+            page = yield from self._list_page_steps(self.build_logs_collection_id, queries, page_size, cursor)
+            self.cache.set(key, page, self._list_tags(f"logs:{project_id}", "log", page[0]))
+            return page
         except Exception as e:
-            print(f"Error getting build logs: {e}")
+            print(f"Error getting build logs page: {e}")
             raise
 
-    def update_build_log(self, log_id: str, data: dict):
-        """Update a build log entry"""
+    def _update_build_log_steps(self, log_id: str, data: dict):
         try:
-            url = f"{self.endpoint}/databases/{self.database_id}/collections/{self.build_logs_collection_id}/documents/{log_id}"
-            payload = {"data": data}
-            response = requests.patch(url, headers=self._get_headers(), json=payload)
-            response.raise_for_status()
-            return response.json()
+            url = self._documents_url(self.build_logs_collection_id, log_id)
+            data = with_epoch_fields(data)
+            # The previous type and time are only needed when the edit can change them
+            old = None
+            if "log_type" in data or "created_at" in data:
+                old = (yield _step("_request", "GET", url)).json()
+            response = yield _step("_request", "PATCH", url, json={"data": data})
+            log = response.json()
+            self.cache.invalidate(f"log:{log_id}", f"logs:{log.get('project_id')}")
+            if old is not None and counters_changed(old, log):
+                yield _step("_update_counters", log.get('project_id'), old, log)
+            return log
         except Exception as e:
             print(f"Error updating build log: {e}")
             raise
 
-    def delete_build_log(self, log_id: str):
-        """Delete a build log entry"""
+    def _delete_build_log_steps(self, log_id: str):
         try:
-            url = f"{self.endpoint}/databases/{self.database_id}/collections/{self.build_logs_collection_id}/documents/{log_id}"
-            response = requests.delete(url, headers=self._get_headers())
-            response.raise_for_status()
+            url = self._documents_url(self.build_logs_collection_id, log_id)
+            log = (yield _step("_request", "GET", url)).json()
+            yield _step("_request", "DELETE", url)
+            self.cache.invalidate(f"log:{log_id}", f"logs:{log.get('project_id')}")
+            yield _step("_update_counters", log.get('project_id'), old=log)
             return True
         except Exception as e:
             print(f"Error deleting build log: {e}")
             raise
 
-    # Storage Operations (keeping SDK for file uploads as they work differently)
-    def upload_file(self, file_content, file_name: str):
-        """Upload a file to Appwrite Storage"""
+    def _repair_project_counters_steps(self, project_id: str):
         try:
-            # For file uploads, we'll use multipart/form-data directly
-            url = f"{self.endpoint}/storage/buckets/{self.storage_bucket_id}/files"
+            return (yield from self._locked("counters", project_id, self._recount_steps(project_id)))
+        except Exception as e:
+            print(f"Error repairing project counters: {e}")
+            raise
 
-            files = {
-                'fileId': (None, ID.unique()),
-                'file': (file_name, file_content)
-            }
+    def _recount_steps(self, project_id: str):
+        queries = self._list_queries("project_id", project_id, "desc", COUNTED_LOG_FIELDS)
+        counters = counters_from_logs([])
+        yield from self._walk_documents(self.build_logs_collection_id, queries, MAX_LIST_LIMIT,
+                                        lambda log: apply_log_change(counters, new=log))
+        yield from self._write_counters_steps(project_id, counters)
+        return counters
 
-            headers = {
-                "X-Appwrite-Project": self.project_id,
-                "X-Appwrite-Key": self.api_key
-            }
+    def _update_counters_steps(self, project_id: str, old: dict = None, new: dict = None):
+        """Apply one build log write to the counters stored on its project, and to its owner's rollups
 
-            response = requests.post(url, headers=headers, files=files)
-            response.raise_for_status()
+        Appwrite has no transactions or atomic increments, so the
+        read-modify-write is serialized per project within this process
+        only. With several workers or replicas, two writes to one project
+        at the same moment can both read the same counters and one change
+        is lost; so is one whose write fails halfway. Either way the log
+        itself is stored and repair_project_counters (or the
+        project_counters command) recounts the project. Projects created
+        before counters existed are left without them until repaired.
+        """
+        project = None
+        try:
+            project = yield from self._locked("counters", project_id, self._change_counters_steps(project_id, old, new))
+        except Exception as e:
+            print(f"Error updating project counters: {e}")
+        if self.rollups and project is not None:
+            try:
+                yield from self._update_rollups_steps(project.get('user_id'), rollup_changes(old, new))
+            except Exception:
+                pass  # Already reported; rebuild_rollups puts the day right
+
+    def _change_counters_steps(self, project_id: str, old: dict, new: dict):
+        """Read, change and write back a project's counters; returns the project as read"""
+        url = self._documents_url(self.projects_collection_id, project_id)
+        project = (yield _step("_request", "GET", url)).json()
+        if has_counters(project):
+            counters = read_counters(project)
+            if apply_log_change(counters, old, new):
+                counters['last_log_at'] = yield from self._latest_log_at_steps(project_id)
+            yield from self._write_counters_steps(project_id, counters)
+        return project
+
+    def _latest_log_at_steps(self, project_id: str):
+        """Timestamp of a project's newest log
+
+        Logs are ordered by created_ts; created_at, whose strings can mix
+        offsets and precision, only orders the logs not backfilled yet.
+        """
+        select = Query.select(["$id", *COUNTED_LOG_FIELDS])
+        newest = []
+        for order in ([Query.is_not_null("created_ts"), Query.order_desc("created_ts")],
+                      [Query.is_null("created_ts"), Query.order_desc("created_at")]):
+            queries = [Query.equal("project_id", project_id), *order, select]
+            newest += (yield from self._list_page_steps(self.build_logs_collection_id, queries, 1))[0]
+        return newest_log_at(newest)
+
+    def _write_counters_steps(self, project_id: str, counters: dict):
+        url = self._documents_url(self.projects_collection_id, project_id)
+        yield _step("_request", "PATCH", url, json={"data": encode_counters(counters)})
+        self.cache.invalidate(f"project:{project_id}")
+
+    def _get_rollups_steps(self, user_id: str, start_day: int, end_day: int):
+        try:
+            key = ("rollups", user_id, start_day, end_day)
+            rollups = self.cache.get(key)
+            if rollups is None:
+                queries = self._rollup_queries(user_id, start_day, end_day)
+                documents = yield from self._all_documents(self.rollups_collection_id, queries)
+                rollups = [read_rollup(document) for document in documents]
+                self.cache.set(key, rollups, [f"rollups:{user_id}"])
+            return rollups
+        except Exception as e:
+            print(f"Error getting rollups: {e}")
+            raise
+
+    def _update_rollups_steps(self, user_id: str, changes: dict):
+        """Add {day: {project: {type: delta}}} to a user's rollups, when rollups are on
+
+        Like the counters, each day is read, changed and written back,
+        serialized per user within this process.
+        """
+        try:
+            if not self.rollups or not changes:
+                return
+            yield from self._locked("rollups", user_id, self._apply_rollups_steps(user_id, changes))
+        except Exception as e:
+            print(f"Error updating rollups: {e}")
+            raise
+        finally:
+            self.cache.invalidate(f"rollups:{user_id}")
+
+    def _apply_rollups_steps(self, user_id: str, changes: dict):
+        for day, change in changes.items():
+            yield from self._apply_rollup_steps(user_id, day, change)
+
+    def _rebuild_rollups_steps(self, user_id: str):
+        try:
+            return (yield from self._locked("rollups", user_id, self._recount_rollups_steps(user_id)))
+        except Exception as e:
+            print(f"Error rebuilding rollups: {e}")
+            raise
+        finally:
+            self.cache.invalidate(f"rollups:{user_id}")
+
+    def _recount_rollups_steps(self, user_id: str):
+        projects = yield from self._all_documents(
+            self.projects_collection_id, self._list_queries("user_id", user_id, fields=['name'])
+        )
+        days = {}
+        for batch in self._id_batches([p['$id'] for p in projects]):
+            queries = self._list_queries("project_id", batch, fields=ROLLED_UP_LOG_FIELDS)
+            yield from self._walk_documents(self.build_logs_collection_id, queries, MAX_LIST_LIMIT,
+                                            lambda log: count_log(days, log))
+
+        queries = [*self._rollup_queries(user_id), Query.select(["$id", "day"])]
+        stored = {d['day']: d['$id'] for d in (yield from self._all_documents(self.rollups_collection_id, queries))}
+        for day, counts in days.items():
+            yield from self._write_rollup_steps(user_id, day, counts, exists=day in stored)
+        for day in stored.keys() - days.keys():
+            yield from self._delete_document_steps(self.rollups_collection_id, stored[day])
+        return len(days)
+
+    def _apply_rollup_steps(self, user_id: str, day: int, change: dict):
+        """Add a change to one day's rollup, creating the day with its first log and deleting it after its last"""
+        document_id = rollup_id(user_id, day)
+        url = self._documents_url(self.rollups_collection_id, document_id)
+        for _ in range(2):
+            response = yield _step("_send", "GET", url)
+            if response.status_code != 404:
+                response.raise_for_status()
+                counts = apply_rollup_change(read_rollup(response.json())['counts'], change)
+                if counts:
+                    yield from self._write_rollup_steps(user_id, day, counts, exists=True)
+                else:
+                    yield from self._delete_document_steps(self.rollups_collection_id, document_id)
+                return
+            counts = apply_rollup_change({}, change)
+            if not counts:
+                return
+            try:
+                yield from self._write_rollup_steps(user_id, day, counts, exists=False)
+                return
+            except AlreadyCreatedError:
+                continue  # Another process created the day meanwhile; add to its counts
+
+    def _write_rollup_steps(self, user_id: str, day: int, counts: dict, exists: bool):
+        payload = self._rollup_payload(user_id, day, counts)
+        if exists:
+            url = self._documents_url(self.rollups_collection_id, payload["documentId"])
+            yield _step("_request", "PATCH", url, json={"data": encode_rollup(counts)})
+        else:
+            yield from self._create_document_steps(self.rollups_collection_id, payload, retry=True)
+
+    def _upload_file_steps(self, file_content, file_name: str, owner_id: str):
+        try:
+            data = {'fileId': ID.unique(), **_owner_permissions(owner_id)}
+            files = {'file': (file_name, file_content)}
+            response = yield _step(
+                "_request", "POST", self._files_url(), headers=self._upload_headers, data=data, files=files
+            )
             return response.json()
         except Exception as e:
             print(f"Error uploading file: {e}")
             raise
 
-    def get_file_url(self, file_id: str):
-        """Get file download URL"""
-        return f"{self.endpoint}/storage/buckets/{self.storage_bucket_id}/files/{file_id}/view"
+    def _upload_file_stream_steps(self, file, file_name: str, size: int, file_id: str, on_progress, owner_id: str):
+        """Upload a file in 5 MB chunks, holding one chunk in memory at a time
+
+        Passing the file_id of an earlier, interrupted upload resumes after
+        the chunks Appwrite already has. The owner_id is kept in the file's
+        permissions, for file_owner to read back.
+        """
+        try:
+            total_chunks = max(1, math.ceil(size / UPLOAD_CHUNK_SIZE))
+            first_chunk = 0
+            if file_id:
+                first_chunk = yield from self._uploaded_chunks_steps(file_id)
+            file_id = file_id or ID.unique()
+
+            yield _step("_seek_file", file, first_chunk * UPLOAD_CHUNK_SIZE)
+            if on_progress:
+                on_progress(min(size, first_chunk * UPLOAD_CHUNK_SIZE))
+            uploaded = None
+            for index in range(first_chunk, total_chunks):
+                chunk = yield _step("_read_file", file, UPLOAD_CHUNK_SIZE)
+                uploaded = yield from self._upload_chunk_steps(index, chunk, size, file_id, file_name, owner_id)
+                if on_progress:
+                    on_progress(min(size, (index + 1) * UPLOAD_CHUNK_SIZE))
+            return uploaded or (yield _step("_request", "GET", self._files_url(file_id))).json()
+        except Exception as e:
+            print(f"Error uploading file: {e}")
+            raise
+
+    def _uploaded_chunks_steps(self, file_id: str):
+        """Chunks Appwrite already holds for a file id, 0 if it has none"""
+        try:
+            return (yield _step("_request", "GET", self._files_url(file_id))).json().get("chunksUploaded", 0)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                return 0
+            raise
+
+    def _upload_chunk_steps(self, index: int, chunk: bytes, size: int, file_id: str, file_name: str, owner_id: str):
+        """Send one chunk, resending it after transient failures"""
+        headers = self._chunk_headers(index, len(chunk), size, file_id)
+        for attempt in range(settings.upload_chunk_retries + 1):
+            try:
+                response = yield _step(
+                    "_request", "POST", self._files_url(), headers=headers,
+                    data={'fileId': file_id, **_owner_permissions(owner_id)}, files={'file': (file_name, chunk)}
+                )
+                return response.json()
+            except Exception as e:
+                if attempt == settings.upload_chunk_retries or not self._retryable_upload_error(e):
+                    raise
+                print(f"Retrying chunk {index} of {file_name}: {e}")
+                yield _step("_sleep", 0.5 * 2 ** attempt)
+
+    def _get_file_owner_steps(self, file_id: str):
+        try:
+            return file_owner((yield _step("_request", "GET", self._files_url(file_id))).json())
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                return None
+            print(f"Error getting file owner: {e}")
+            raise
+
+    def _delete_file_steps(self, file_id: str):
+        try:
+            yield _step("_request", "DELETE", self._files_url(file_id))
+            return True
+        except Exception as e:
+            print(f"Error deleting file: {e}")
+            raise
+
+
+class AppwriteService(_AppwriteBase):
+    """Service class for Appwrite operations using direct HTTP requests"""
+
+    def __init__(self):
+        super().__init__()
+        self.client = httpx.Client(**self._client_options())
+        # Counter updates to the same project, and rollup updates of the same user, are applied one at a time
+        self._locks = {"counters": _KeyedLocks(threading.Lock), "rollups": _KeyedLocks(threading.Lock)}
+
+    def close(self):
+        """Close pooled connections"""
+        self.client.close()
+
+    def _run(self, steps):
+        """Run a shared operation, making each call it yields"""
+        result = error = None
+        while True:
+            try:
+                name, args, kwargs = steps.send(result) if error is None else steps.throw(error)
+            except StopIteration as done:
+                return done.value
+            try:
+                result, error = getattr(self, name)(*args, **kwargs), None
+            except BaseException as e:
+                result, error = None, e
+
+    def _acquire(self, kind: str, key: str):
+        lock = self._locks[kind].enter(key)
+        try:
+            lock.acquire()
+        except BaseException:
+            self._locks[kind].leave(key)
+            raise
+
+    def _release(self, kind: str, key: str):
+        self._locks[kind].leave(key).release()
+
+    def _sleep(self, seconds: float):
+        time.sleep(seconds)
+
+    def _read_file(self, file, size: int):
+        return file.read(size)
+
+    def _seek_file(self, file, offset: int):
+        file.seek(offset)
+
+    def _request(self, method: str, url: str, headers: dict = None, **kwargs):
+        """Send a request over the pooled client and raise on HTTP errors"""
+        response = self._send(method, url, headers, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def _send(self, method: str, url: str, headers: dict = None, retry: bool = None, uncertain: list = None, **kwargs):
+        """Send through the circuit breaker and rate limiter, resending transient failures
+
+        Only idempotent methods are resent after server errors unless `retry` says otherwise.
+        Attempts resent although Appwrite may have carried them out (a
+        dropped connection or a server error, not a 429) are appended to
+        `uncertain` when it is given.
+        """
+        retry = method in IDEMPOTENT_METHODS if retry is None else retry
+        attempt = 0
+        while True:
+            probe = self.breaker.before_request()
+            try:
+                wait = self.limiter.reserve()
+                if wait:
+                    time.sleep(wait)
+                response = self.client.request(method, url, headers=headers or self._admin_headers, **kwargs)
+            except httpx.TransportError as e:
+                self._record_outcome()
+                delay = self._retry_delay(attempt, retry)
+                if delay is None:
+                    raise
+                if uncertain is not None:
+                    uncertain.append(e)
+            except BaseException:
+                # Cancelled or failed with no response to judge Appwrite by
+                if probe:
+                    self.breaker.release_probe()
+                raise
+            else:
+                self._record_outcome(response)
+                delay = self._retry_delay(attempt, retry, response)
+                if delay is None:
+                    return response
+                if uncertain is not None and response.status_code in RETRYABLE_STATUSES:
+                    uncertain.append(response)
+
+            time.sleep(delay)
+            attempt += 1
+
+    def _delete_document(self, collection_id: str, document_id: str):
+        """Delete a document, resending after transient failures; one already gone counts as deleted"""
+        return self._run(self._delete_document_steps(collection_id, document_id))
+
+    def _list_page(self, collection_id: str, queries: list, page_size: int, cursor: str = None):
+        """Fetch one page of documents and the cursor for the next page"""
+        return self._run(self._list_page_steps(collection_id, queries, page_size, cursor))
+
+    def _iter_documents(self, collection_id: str, queries: list, page_size: int):
+        """Walk every matching document with cursorAfter, one page in memory at a time"""
+        cursor = None
+        while True:
+            documents, cursor = self._list_page(collection_id, queries, page_size, cursor)
+            yield from documents
+            if cursor is None:
+                return
+
+    def _get_documents_by_ids(self, collection_id: str, kind: str, tag: str, ids: list, fields: list = None) -> list:
+        """Documents by id, from the cache when whole and otherwise one Query.equal('$id') per batch"""
+        ids = list(dict.fromkeys(ids))
+        found = self._cached_documents(kind, ids, fields)
+        for batch in self._id_batches([i for i in ids if i not in found]):
+            response = self._request("GET", self._documents_url(collection_id),
+                                     params={"queries[]": self._id_queries(batch, fields)})
+            for document in response.json()['documents']:
+                found[document['$id']] = document
+                if not fields:
+                    self.cache.set((kind, document['$id']), document, [f"{tag}:{document['$id']}"])
+        return [found[i] for i in ids if i in found]
+
+    # Authentication Operations
+    def create_account(self, email: str, password: str, name: str):
+        """Create a new user account"""
+        return self._run(self._create_account_steps(email, password, name))
+
+    def create_session(self, email: str, password: str):
+        """Create a new session (login)"""
+        return self._run(self._create_session_steps(email, password))
+
+    def get_account(self, session_token: str):
+        """Get current user account details"""
+        return self._run(self._get_account_steps(session_token))
+
+    def delete_session(self, session_token: str, session_id: str):
+        """Delete a session (logout)"""
+        return self._run(self._delete_session_steps(session_token, session_id))
+
+    # Database Operations
+    def create_project(self, user_id: str, data: dict, document_id: str = None):
+        """Create a new project"""
+        return self._run(self._create_project_steps(user_id, data, document_id))
+
+    def get_projects(self, user_id: str, order: str = "desc", limit: int = None, fields: list = None):
+        """Get a user's projects ordered by created_at, newest first by default"""
+        return self._run(self._get_projects_steps(user_id, order, limit, fields))
+
+    def iter_projects(self, user_id: str, order: str = "desc", page_size: int = None, fields: list = None):
+        """Iterate over a user's projects, fetching page_size documents per request"""
+        try:
+            queries = self._list_queries("user_id", user_id, order, fields)
+            page_size = page_size or settings.appwrite_page_size
+            yield from self._iter_documents(self.projects_collection_id, queries, page_size)
+        except Exception as e:
+            print(f"Error iterating projects: {e}")
+            raise
+
+    def get_project(self, project_id: str):
+        """Get a single project"""
+        return self._run(self._get_project_steps(project_id))
+
+    def get_projects_by_ids(self, project_ids: list, fields: list = None):
+        """Get the projects with the given ids, in that order, skipping ids that do not exist"""
+        try:
+            return self._get_documents_by_ids(self.projects_collection_id, "project", "project", project_ids, fields)
+        except Exception as e:
+            print(f"Error getting projects by ids: {e}")
+            raise
+
+    def update_project(self, project_id: str, data: dict):
+        """Update a project"""
+        return self._run(self._update_project_steps(project_id, data))
+
+    def delete_project(self, project_id: str):
+        """Delete a project"""
+        return self._run(self._delete_project_steps(project_id))
+
+    # Build Log Operations
+    def create_build_log(self, project_id: str, data: dict, update_counters: bool = True, document_id: str = None):
+        """Create a new build log entry"""
+        return self._run(self._create_build_log_steps(project_id, data, update_counters, document_id))
+
+    def get_build_logs(self, project_id: str, order: str = "desc", limit: int = None, fields: list = None):
+        """Get a project's build logs ordered by created_at, newest first by default"""
+        return self._run(self._get_build_logs_steps(project_id, order, limit, fields))
+
+    def get_build_log(self, log_id: str):
+        """Get a single build log"""
+        return self._run(self._get_build_log_steps(log_id))
+
+    def get_build_logs_by_ids(self, log_ids: list, fields: list = None):
+        """Get the build logs with the given ids, in that order, skipping ids that do not exist"""
+        try:
+            return self._get_documents_by_ids(self.build_logs_collection_id, "build_log", "log", log_ids, fields)
+        except Exception as e:
+            print(f"Error getting build logs by ids: {e}")
+            raise
+
+    def get_build_logs_page(self, project_id: str, cursor: str = None, order: str = "desc", page_size: int = None, fields: list = None):
+        """Get one page of a project's build logs and the cursor for the next page"""
+        return self._run(self._get_build_logs_page_steps(project_id, cursor, order, page_size, fields))
+
+    def iter_build_logs(self, project_id: str, order: str = "desc", page_size: int = None, fields: list = None):
+        """Iterate over a project's build logs, fetching page_size documents per request"""
+        try:
+            queries = self._list_queries("project_id", project_id, order, fields)
+            page_size = page_size or settings.appwrite_page_size
+            yield from self._iter_documents(self.build_logs_collection_id, queries, page_size)
+        except Exception as e:
+            print(f"Error iterating build logs: {e}")
+            raise
+
+    def get_build_logs_for_projects(self, project_ids: list, order: str = "desc", fields: list = None):
+        """Get build logs for many projects in a few round trips, grouped by project id"""
+        grouped = {project_id: [] for project_id in project_ids}
+        for log in self.iter_build_logs_for_projects(project_ids, order, page_size=MAX_LIST_LIMIT, fields=fields):
+            grouped.setdefault(log.get('project_id'), []).append(log)
+        return grouped
+
+    def iter_build_logs_for_projects(self, project_ids: list, order: str = "desc", page_size: int = None, fields: list = None,
+                                     start_day: int = None, end_day: int = None):
+        """Iterate over the build logs of many projects, one Query.equal batch of ids at a time
+
+        start_day and end_day keep only logs whose created_day is within
+        them; logs written before created_day existed are left out.
+        """
+        try:
+            page_size = page_size or settings.appwrite_page_size
+            for batch in self._id_batches(project_ids):
+                queries = self._list_queries("project_id", batch, order, fields)
+                queries += self._day_queries("created_day", start_day, end_day)
+                yield from self._iter_documents(self.build_logs_collection_id, queries, page_size)
+        except Exception as e:
+            print(f"Error iterating build logs for projects: {e}")
+            raise
+
+    def update_build_log(self, log_id: str, data: dict):
+        """Update a build log entry"""
+        return self._run(self._update_build_log_steps(log_id, data))
+
+    def delete_build_log(self, log_id: str):
+        """Delete a build log entry"""
+        return self._run(self._delete_build_log_steps(log_id))
+
+    def delete_build_logs(self, project_id: str, log_ids: list):
+        """Delete build logs of a project being deleted, leaving its counters alone"""
+        try:
+            for log_id in log_ids:
+                self._delete_document(self.build_logs_collection_id, log_id)
+            return True
+        except Exception as e:
+            print(f"Error deleting build logs: {e}")
+            raise
+        finally:
+            self.cache.invalidate(f"logs:{project_id}", *(f"log:{log_id}" for log_id in log_ids))
+
+    def repair_project_counters(self, project_id: str):
+        """Recompute a project's build log counters from its logs and store them"""
+        return self._run(self._repair_project_counters_steps(project_id))
+
+    def _update_counters(self, project_id: str, old: dict = None, new: dict = None):
+        """Apply one build log write to the counters stored on its project, and to its owner's rollups"""
+        return self._run(self._update_counters_steps(project_id, old, new))
+
+    # Daily Rollups
+    def get_rollups(self, user_id: str, start_day: int, end_day: int = None):
+        """A user's rollups from start_day on (to end_day when given), oldest first"""
+        return self._run(self._get_rollups_steps(user_id, start_day, end_day))
+
+    def update_rollups(self, user_id: str, changes: dict):
+        """Add {day: {project: {type: delta}}} to a user's rollups, when rollups are on"""
+        return self._run(self._update_rollups_steps(user_id, changes))
+
+    def rebuild_rollups(self, user_id: str):
+        """Recompute a user's rollups from their build logs, replacing the stored ones; returns the days"""
+        return self._run(self._rebuild_rollups_steps(user_id))
+
+    # Storage Operations
+    def upload_file(self, file_content, file_name: str, owner_id: str = None):
+        """Upload a file to Appwrite Storage"""
+        return self._run(self._upload_file_steps(file_content, file_name, owner_id))
+
+    def upload_file_stream(self, file, file_name: str, size: int, file_id: str = None, on_progress=None,
+                           owner_id: str = None):
+        """Upload a file in 5 MB chunks; `file` needs read(n) and seek(offset)"""
+        return self._run(self._upload_file_stream_steps(file, file_name, size, file_id, on_progress, owner_id))
+
+    def get_file_owner(self, file_id: str):
+        """Id of the user who uploaded a file, None if it is gone or has no recorded uploader"""
+        return self._run(self._get_file_owner_steps(file_id))
 
     def delete_file(self, file_id: str):
         """Delete a file from storage"""
+        return self._run(self._delete_file_steps(file_id))
+
+
+class AsyncAppwriteService(_AppwriteBase, StorageBackend):
+    """Asyncio counterpart of AppwriteService for use inside the event loop"""
+
+    def __init__(self):
+        super().__init__()
+        self.client = httpx.AsyncClient(**self._client_options())
+        # Identical GETs in flight at the same time share one upstream request
+        self._in_flight = {}
+        # Counter updates to the same project, and rollup updates of the same user, are applied one at a time
+        self._locks = {"counters": _KeyedLocks(asyncio.Lock), "rollups": _KeyedLocks(asyncio.Lock)}
+
+    async def aclose(self):
+        """Close pooled connections"""
+        await self.client.aclose()
+
+    def health(self) -> dict:
+        return {
+            "backend": "appwrite",
+            "cache": self.cache.stats(),
+            "appwrite_circuit": self.breaker.state
+        }
+
+    async def _run(self, steps):
+        """Run a shared operation, awaiting each call it yields
+
+        A cancellation is thrown into the operation too, so it still
+        releases the locks it holds.
+        """
+        result = error = None
+        while True:
+            try:
+                name, args, kwargs = steps.send(result) if error is None else steps.throw(error)
+            except StopIteration as done:
+                return done.value
+            try:
+                result, error = await getattr(self, name)(*args, **kwargs), None
+            except BaseException as e:
+                result, error = None, e
+
+    async def _acquire(self, kind: str, key: str):
+        lock = self._locks[kind].enter(key)
         try:
-            url = f"{self.endpoint}/storage/buckets/{self.storage_bucket_id}/files/{file_id}"
-            response = requests.delete(url, headers=self._get_headers())
-            response.raise_for_status()
+            await lock.acquire()
+        except BaseException:
+            # Cancelled while waiting: give up the place without taking the lock
+            self._locks[kind].leave(key)
+            raise
+
+    async def _release(self, kind: str, key: str):
+        self._locks[kind].leave(key).release()
+
+    async def _sleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+    async def _read_file(self, file, size: int):
+        return await file.read(size)
+
+    async def _seek_file(self, file, offset: int):
+        await file.seek(offset)
+
+    async def _request(self, method: str, url: str, headers: dict = None, **kwargs):
+        """Send a request over the pooled client and raise on HTTP errors"""
+        headers = headers or self._admin_headers
+        if method == "GET":
+            response = await self._coalesced_get(url, headers, **kwargs)
+        else:
+            response = await self._send(method, url, headers, **kwargs)
+        response.raise_for_status()
+        return response
+
+    async def _send(self, method: str, url: str, headers: dict = None, retry: bool = None, uncertain: list = None, **kwargs):
+        """Send through the circuit breaker and rate limiter, resending transient failures
+
+        Only idempotent methods are resent after server errors unless `retry` says otherwise.
+        Attempts resent although Appwrite may have carried them out (a
+        dropped connection or a server error, not a 429) are appended to
+        `uncertain` when it is given.
+        """
+        retry = method in IDEMPOTENT_METHODS if retry is None else retry
+        attempt = 0
+        while True:
+            probe = self.breaker.before_request()
+            try:
+                wait = self.limiter.reserve()
+                if wait:
+                    await asyncio.sleep(wait)
+                response = await self.client.request(method, url, headers=headers or self._admin_headers, **kwargs)
+            except httpx.TransportError as e:
+                self._record_outcome()
+                delay = self._retry_delay(attempt, retry)
+                if delay is None:
+                    raise
+                if uncertain is not None:
+                    uncertain.append(e)
+            except BaseException:
+                # Cancelled or failed with no response to judge Appwrite by
+                if probe:
+                    self.breaker.release_probe()
+                raise
+            else:
+                self._record_outcome(response)
+                delay = self._retry_delay(attempt, retry, response)
+                if delay is None:
+                    return response
+                if uncertain is not None and response.status_code in RETRYABLE_STATUSES:
+                    uncertain.append(response)
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _coalesced_get(self, url: str, headers: dict, params: dict = None):
+        """Join an identical GET already in flight, or start one others can join"""
+        key = (
+            url,
+            headers.get("Cookie"),
+            tuple((name, tuple(value) if isinstance(value, list) else value)
+                  for name, value in sorted((params or {}).items()))
+        )
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._send("GET", url, headers, params=params))
+            self._in_flight[key] = task
+
+            def forget(done):
+                if self._in_flight.get(key) is done:
+                    del self._in_flight[key]
+            task.add_done_callback(forget)
+
+        # A caller that gives up must not cancel the request for everyone else
+        return await asyncio.shield(task)
+
+    async def _delete_document(self, collection_id: str, document_id: str):
+        """Delete a document, resending after transient failures; one already gone counts as deleted"""
+        return await self._run(self._delete_document_steps(collection_id, document_id))
+
+    async def _list_page(self, collection_id: str, queries: list, page_size: int, cursor: str = None):
+        """Fetch one page of documents and the cursor for the next page"""
+        return await self._run(self._list_page_steps(collection_id, queries, page_size, cursor))
+
+    async def _iter_documents(self, collection_id: str, queries: list, page_size: int):
+        """Walk every matching document with cursorAfter, one page in memory at a time"""
+        cursor = None
+        while True:
+            documents, cursor = await self._list_page(collection_id, queries, page_size, cursor)
+            for document in documents:
+                yield document
+            if cursor is None:
+                return
+
+    async def _get_documents_by_ids(self, collection_id: str, kind: str, tag: str, ids: list, fields: list = None) -> list:
+        """Documents by id, from the cache when whole and otherwise one Query.equal('$id') per batch, batches in parallel"""
+        ids = list(dict.fromkeys(ids))
+        found = self._cached_documents(kind, ids, fields)
+        responses = await asyncio.gather(*(
+            self._request("GET", self._documents_url(collection_id), params={"queries[]": self._id_queries(batch, fields)})
+            for batch in self._id_batches([i for i in ids if i not in found])
+        ))
+        for response in responses:
+            for document in response.json()['documents']:
+                found[document['$id']] = document
+                if not fields:
+                    self.cache.set((kind, document['$id']), document, [f"{tag}:{document['$id']}"])
+        return [found[i] for i in ids if i in found]
+
+    # Authentication Operations
+    async def create_account(self, email: str, password: str, name: str):
+        """Create a new user account"""
+        return await self._run(self._create_account_steps(email, password, name))
+
+    async def create_session(self, email: str, password: str):
+        """Create a new session (login)"""
+        return await self._run(self._create_session_steps(email, password))
+
+    async def get_account(self, session_token: str):
+        """Get current user account details"""
+        return await self._run(self._get_account_steps(session_token))
+
+    async def delete_session(self, session_token: str, session_id: str):
+        """Delete a session (logout)"""
+        return await self._run(self._delete_session_steps(session_token, session_id))
+
+    # Database Operations
+    async def create_project(self, user_id: str, data: dict, document_id: str = None):
+        """Create a new project"""
+        return await self._run(self._create_project_steps(user_id, data, document_id))
+
+    async def get_projects(self, user_id: str, order: str = "desc", limit: int = None, fields: list = None):
+        """Get a user's projects ordered by created_at, newest first by default"""
+        return await self._run(self._get_projects_steps(user_id, order, limit, fields))
+
+    async def iter_projects(self, user_id: str, order: str = "desc", page_size: int = None, fields: list = None):
+        """Iterate over a user's projects, fetching page_size documents per request"""
+        try:
+            queries = self._list_queries("user_id", user_id, order, fields)
+            page_size = page_size or settings.appwrite_page_size
+            async for project in self._iter_documents(self.projects_collection_id, queries, page_size):
+                yield project
+        except Exception as e:
+            print(f"Error iterating projects: {e}")
+            raise
+
+    async def get_project(self, project_id: str):
+        """Get a single project"""
+        return await self._run(self._get_project_steps(project_id))
+
+    async def get_projects_by_ids(self, project_ids: list, fields: list = None):
+        """Get the projects with the given ids, in that order, skipping ids that do not exist"""
+        try:
+            return await self._get_documents_by_ids(self.projects_collection_id, "project", "project", project_ids, fields)
+        except Exception as e:
+            print(f"Error getting projects by ids: {e}")
+            raise
+
+    async def update_project(self, project_id: str, data: dict):
+        """Update a project"""
+        return await self._run(self._update_project_steps(project_id, data))
+
+    async def delete_project(self, project_id: str):
+        """Delete a project"""
+        return await self._run(self._delete_project_steps(project_id))
+
+    # Build Log Operations
+    async def create_build_log(self, project_id: str, data: dict, update_counters: bool = True, document_id: str = None):
+        """Create a new build log entry"""
+        return await self._run(self._create_build_log_steps(project_id, data, update_counters, document_id))
+
+    async def get_build_logs(self, project_id: str, order: str = "desc", limit: int = None, fields: list = None):
+        """Get a project's build logs ordered by created_at, newest first by default"""
+        return await self._run(self._get_build_logs_steps(project_id, order, limit, fields))
+
+    async def get_build_log(self, log_id: str):
+        """Get a single build log"""
+        return await self._run(self._get_build_log_steps(log_id))
+
+    async def get_build_logs_by_ids(self, log_ids: list, fields: list = None):
+        """Get the build logs with the given ids, in that order, skipping ids that do not exist"""
+        try:
+            return await self._get_documents_by_ids(self.build_logs_collection_id, "build_log", "log", log_ids, fields)
+        except Exception as e:
+            print(f"Error getting build logs by ids: {e}")
+            raise
+
+    async def get_build_logs_page(self, project_id: str, cursor: str = None, order: str = "desc", page_size: int = None, fields: list = None):
+        """Get one page of a project's build logs and the cursor for the next page"""
+        return await self._run(self._get_build_logs_page_steps(project_id, cursor, order, page_size, fields))
+
+    async def iter_build_logs(self, project_id: str, order: str = "desc", page_size: int = None, fields: list = None):
+        """Iterate over a project's build logs, fetching page_size documents per request"""
+        try:
+            queries = self._list_queries("project_id", project_id, order, fields)
+            page_size = page_size or settings.appwrite_page_size
+            async for log in self._iter_documents(self.build_logs_collection_id, queries, page_size):
+                yield log
+        except Exception as e:
+            print(f"Error iterating build logs: {e}")
+            raise
+
+    async def get_build_logs_for_projects(self, project_ids: list, order: str = "desc", fields: list = None):
+        """Get build logs for many projects in a few round trips, grouped by project id"""
+        grouped = {project_id: [] for project_id in project_ids}
+        async for log in self.iter_build_logs_for_projects(project_ids, order, page_size=MAX_LIST_LIMIT, fields=fields):
+            grouped.setdefault(log.get('project_id'), []).append(log)
+        return grouped
+
+    async def iter_build_logs_for_projects(self, project_ids: list, order: str = "desc", page_size: int = None, fields: list = None,
+                                           start_day: int = None, end_day: int = None):
+        """Iterate over the build logs of many projects, one Query.equal batch of ids at a time
+
+        start_day and end_day keep only logs whose created_day is within
+        them; logs written before created_day existed are left out.
+        """
+        try:
+            page_size = page_size or settings.appwrite_page_size
+            for batch in self._id_batches(project_ids):
+                queries = self._list_queries("project_id", batch, order, fields)
+                queries += self._day_queries("created_day", start_day, end_day)
+                async for log in self._iter_documents(self.build_logs_collection_id, queries, page_size):
+                    yield log
+        except Exception as e:
+            print(f"Error iterating build logs for projects: {e}")
+            raise
+
+    async def update_build_log(self, log_id: str, data: dict):
+        """Update a build log entry"""
+        return await self._run(self._update_build_log_steps(log_id, data))
+
+    async def delete_build_log(self, log_id: str):
+        """Delete a build log entry"""
+        return await self._run(self._delete_build_log_steps(log_id))
+
+    async def delete_build_logs(self, project_id: str, log_ids: list):
+        """Delete build logs of a project being deleted, leaving its counters alone
+
+        Up to settings.delete_concurrency deletes are in flight at once.
+        """
+        try:
+            limit = asyncio.Semaphore(settings.delete_concurrency)
+
+            async def delete(log_id):
+                async with limit:
+                    await self._delete_document(self.build_logs_collection_id, log_id)
+
+            await asyncio.gather(*(delete(log_id) for log_id in log_ids))
             return True
         except Exception as e:
-            print(f"Error deleting file: {e}")
+            print(f"Error deleting build logs: {e}")
             raise
+        finally:
+            self.cache.invalidate(f"logs:{project_id}", *(f"log:{log_id}" for log_id in log_ids))
+
+    async def repair_project_counters(self, project_id: str):
+        """Recompute a project's build log counters from its logs and store them"""
+        return await self._run(self._repair_project_counters_steps(project_id))
+
+    async def _update_counters(self, project_id: str, old: dict = None, new: dict = None):
+        """Apply one build log write to the counters stored on its project, and to its owner's rollups"""
+        return await self._run(self._update_counters_steps(project_id, old, new))
+
+    # Daily Rollups
+    async def get_rollups(self, user_id: str, start_day: int, end_day: int = None):
+        """A user's rollups from start_day on (to end_day when given), oldest first"""
+        return await self._run(self._get_rollups_steps(user_id, start_day, end_day))
+
+    async def update_rollups(self, user_id: str, changes: dict):
+        """Add {day: {project: {type: delta}}} to a user's rollups, when rollups are on"""
+        return await self._run(self._update_rollups_steps(user_id, changes))
+
+    async def rebuild_rollups(self, user_id: str):
+        """Recompute a user's rollups from their build logs, replacing the stored ones; returns the days"""
+        return await self._run(self._rebuild_rollups_steps(user_id))
+
+    # Storage Operations
+    async def upload_file(self, file_content, file_name: str, owner_id: str = None):
+        """Upload a file to Appwrite Storage"""
+        return await self._run(self._upload_file_steps(file_content, file_name, owner_id))
+
+    async def upload_file_stream(self, file, file_name: str, size: int, file_id: str = None, on_progress=None,
+                                 owner_id: str = None):
+        """Upload a file in 5 MB chunks; `file` needs async read(n) and seek(offset), like UploadFile"""
+        return await self._run(self._upload_file_stream_steps(file, file_name, size, file_id, on_progress, owner_id))
+
+    async def get_file_owner(self, file_id: str):
+        """Id of the user who uploaded a file, None if it is gone or has no recorded uploader"""
+        return await self._run(self._get_file_owner_steps(file_id))
+
+    async def delete_file(self, file_id: str):
+        """Delete a file from storage"""
+        return await self._run(self._delete_file_steps(file_id))
 
 
-# Singleton instance
+# Singleton instances
 appwrite_service = AppwriteService()
+async_appwrite_service = AsyncAppwriteService()
@@ -0,0 +1,101 @@
+"""
+Counting build logs into the day and week buckets of the analytics charts
+
+Logs are bucketed by their day number (days since 1970-01-01, the same
+integers NumPy stores in a datetime64[D] array). DayCounts collects the
+day of every log as it streams past, counts them all at once when the
+first chart is read, and then cuts every window out of those counts:
+per-day buckets for the activity chart and the yearly heatmap, per-week
+buckets for the trend, the total from a day on for the overview, and
+buckets of any widths, such as calendar months, between given edges.
+
+NumPy is optional and not in requirements.txt. With it, the days become
+one int64 array, np.unique sorts and counts them, and each window is
+found with searchsorted and binned with bincount; without it,
+collections.Counter counts them and windows walk the distinct days.
+Both give the same counts.
+"""
+from bisect import bisect_right
+from collections import Counter
+from typing import List
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when NumPy is not installed
+    np = None
+
+
+class DayCounts:
+    """How many logs fell on each day, collected one log (or one day's total) at a time"""
+
+    def __init__(self, vectorized: bool = None):
+        self.vectorized = np is not None if vectorized is None else vectorized
+        if self.vectorized and np is None:
+            raise RuntimeError("NumPy is not installed")
+        self._days = []
+        # Days added with a count, such as rollups, are few and kept apart from single logs
+        self._weighted = Counter()
+        self._counted = None
+
+    def add(self, day: int, count: int = 1):
+        if count == 1:
+            self._days.append(day)
+        else:
+            self._weighted[day] += count
+        self._counted = None
+
+    def window(self, start: int, bins: int, width: int = 1) -> List[int]:
+        """Counts for bins consecutive runs of width days from start; earlier and later days are left out"""
+        end = start + bins * width
+        if not self.vectorized:
+            counts = [0] * bins
+            for day, count in self._count().items():
+                if start <= day < end:
+                    counts[(day - start) // width] += count
+            return counts
+
+        days, counts = self._count()
+        low, high = np.searchsorted(days, [start, end])
+        return np.bincount((days[low:high] - start) // width, weights=counts[low:high], minlength=bins).astype(np.int64).tolist()
+
+    def bins(self, edges: List[int]) -> List[int]:
+        """Counts between consecutive ascending edges: bin i holds the days from edges[i] up to edges[i + 1]"""
+        if not self.vectorized:
+            counts = [0] * (len(edges) - 1)
+            for day, count in self._count().items():
+                if edges[0] <= day < edges[-1]:
+                    counts[bisect_right(edges, day) - 1] += count
+            return counts
+
+        days, counts = self._count()
+        low, high = np.searchsorted(days, [edges[0], edges[-1]])
+        positions = np.searchsorted(edges, days[low:high], side='right') - 1
+        return np.bincount(positions, weights=counts[low:high], minlength=len(edges) - 1).astype(np.int64).tolist()
+
+    def since(self, start: int) -> int:
+        """Logs on start or any later day"""
+        if not self.vectorized:
+            return sum(count for day, count in self._count().items() if day >= start)
+        days, counts = self._count()
+        return int(counts[np.searchsorted(days, start):].sum())
+
+    def _count(self):
+        """Logs per distinct day, counted once and reused until more are added
+
+        A Counter of day -> logs, or with NumPy the sorted distinct days
+        and their counts as two arrays.
+        """
+        if self._counted is not None:
+            return self._counted
+        if not self.vectorized:
+            counted = Counter(self._days)
+            counted.update(self._weighted)
+        else:
+            days, counts = np.unique(np.array(self._days, dtype=np.int64), return_counts=True)
+            if self._weighted:
+                days, position = np.unique(np.concatenate([days, list(self._weighted)]), return_inverse=True)
+                weights = np.concatenate([counts, list(self._weighted.values())])
+                counts = np.bincount(position, weights=weights, minlength=len(days)).astype(np.int64)
+            counted = (days, counts)
+        self._counted = counted
+        return counted
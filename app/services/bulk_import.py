@@ -0,0 +1,256 @@
+"""
+Streaming bulk import of build logs from NDJSON or CSV
+
+Rows are parsed as the request body arrives, validated with
+BuildLogCreate and written by a fixed number of workers fed through a
+bounded queue, so memory stays flat however long the upload is. A row
+that cannot be parsed, validated or written is reported by its number
+and the import carries on with the next one. Project counters are not
+updated row by row; they are recomputed once when the import ends, and
+the owner's daily rollups get the imported rows in one update.
+"""
+import asyncio
+import codecs
+import csv
+import json
+from datetime import datetime
+from typing import AsyncIterator, Dict, Tuple
+
+from pydantic import ValidationError
+
+from app.config import get_settings
+from app.models.schemas import BuildLogCreate
+from app.services.idempotency import idempotent_document_id
+from app.services.rollups import merge_changes, rollup_changes
+from app.services.storage_backend import AlreadyCreatedError
+from app.services.timestamps import parse_timestamp
+
+settings = get_settings()
+
+# Content types accepted for the request body, and the parser each one uses
+IMPORT_FORMATS = {
+    'application/x-ndjson': 'ndjson',
+    'application/ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+    'text/csv': 'csv',
+}
+
+# Longest row accepted, in characters; longer ones are reported and skipped
+MAX_ROW_LENGTH = 1024 * 1024
+
+# Row errors listed in the result; later ones are only counted
+MAX_REPORTED_ERRORS = 100
+
+# CSV columns holding several values, separated by commas
+CSV_LIST_COLUMNS = ('tags', 'images')
+
+# Attributes Appwrite stores as arrays of strings, so objects are kept as JSON
+JSON_LIST_FIELDS = ('code_snippets', 'links')
+
+
+class RowError(ValueError):
+    """A row that cannot be imported; the message says why"""
+
+
+def import_format(content_type: str):
+    """Parser name for a request's Content-Type, or None if it is not importable"""
+    return IMPORT_FORMATS.get((content_type or '').split(';')[0].strip().lower())
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[str, bool]]:
+    """Decode a byte stream into lines, yielding (line, too_long)
+
+    Only the current line is held; a line over MAX_ROW_LENGTH is yielded
+    once, empty and marked too long, and the rest of it is dropped.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    pending = ''
+    skipping = False
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            if skipping:
+                skipping = False
+                continue
+            yield line.rstrip('\r'), False
+        if len(pending) > MAX_ROW_LENGTH and not skipping:
+            skipping = True
+            yield '', True
+        if skipping:
+            pending = ''
+    pending += decoder.decode(b'', final=True)
+    if pending and not skipping:
+        yield pending.rstrip('\r'), False
+
+
+async def iter_ndjson_rows(chunks: AsyncIterator[bytes]):
+    """Yield (row number, object or RowError) for each non-blank line of NDJSON"""
+    number = 0
+    async for line, too_long in iter_lines(chunks):
+        if not line.strip() and not too_long:
+            continue
+        number += 1
+        if too_long:
+            yield number, RowError(f"Row is longer than {MAX_ROW_LENGTH} characters")
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield number, RowError(f"Invalid JSON: {e.msg}")
+            continue
+        yield number, row if isinstance(row, dict) else RowError("Row must be a JSON object")
+
+
+async def iter_csv_rows(chunks: AsyncIterator[bytes]):
+    """Yield (row number, column dict or RowError) for each record after the CSV header
+
+    A quoted field may span lines, so lines are joined until the quotes
+    balance before the record is parsed.
+    """
+    header = None
+    number = 0
+    record = []
+    quotes = 0
+    async for line, too_long in iter_lines(chunks):
+        if too_long:
+            record, quotes = [], 0
+            number += 1
+            yield number, RowError(f"Row is longer than {MAX_ROW_LENGTH} characters")
+            continue
+        record.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        text = '\n'.join(record)
+        record, quotes = [], 0
+        if not text.strip():
+            continue
+
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip().lower() for name in values]
+            continue
+        number += 1
+        if len(values) > len(header):
+            yield number, RowError(f"Row has {len(values)} columns, the header has {len(header)}")
+            continue
+        try:
+            row = csv_row(dict(zip(header, values)))
+        except RowError as e:
+            row = e
+        yield number, row
+    if record:
+        number += 1
+        yield number, RowError("Unterminated quoted field")
+
+
+def csv_row(columns: Dict[str, str]) -> dict:
+    """A CSV record as build log fields: list columns split on commas, JSON columns decoded"""
+    row = {name: value for name, value in columns.items() if name and value != ''}
+    for name in CSV_LIST_COLUMNS:
+        if name in row:
+            row[name] = [item.strip() for item in row[name].split(',') if item.strip()]
+    for name in JSON_LIST_FIELDS:
+        if name in row:
+            try:
+                row[name] = json.loads(row[name])
+            except json.JSONDecodeError:
+                raise RowError(f"Column {name} must be a JSON list")
+    return row
+
+
+def build_log_data(row: dict) -> dict:
+    """Validate an imported row into the data create_build_log stores
+
+    created_at is optional and keeps the original date of migrated
+    entries; rows without it are stamped with the import time.
+    """
+    try:
+        log = BuildLogCreate(**row)
+    except ValidationError as e:
+        raise RowError("; ".join(
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+        ))
+
+    created_at = row.get('created_at')
+    if created_at:
+        parsed = parse_timestamp(created_at) if isinstance(created_at, str) else None
+        if parsed is None:
+            raise RowError("created_at: not a timestamp")
+    else:
+        parsed = datetime.now()
+
+    data = log.model_dump()
+    for name in JSON_LIST_FIELDS:
+        data[name] = [item if isinstance(item, str) else json.dumps(item) for item in data[name] or []]
+    data['created_at'] = parsed.isoformat()
+    return data
+
+
+async def import_build_logs(storage, project_id: str, rows, concurrency: int = None, key: str = None,
+                            user_id: str = None) -> dict:
+    """Write the rows of an import to a project, concurrency rows at a time
+
+    With an idempotency key every row gets a document id from the key and
+    its row number, so running the same import again only writes the
+    rows that did not make it and counts the others as duplicates.
+    Returns {"imported", "duplicates", "failed", "errors"}, with errors
+    listing {"row", "error"} for the first MAX_REPORTED_ERRORS failed rows.
+    user_id, the project's owner, is whose rollups get the imported rows.
+    """
+    concurrency = concurrency or settings.import_concurrency
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    result = {'imported': 0, 'duplicates': 0, 'failed': 0, 'errors': []}
+    imported_days = {}
+
+    def failed(number: int, error: Exception):
+        result['failed'] += 1
+        if len(result['errors']) < MAX_REPORTED_ERRORS:
+            result['errors'].append({'row': number, 'error': str(error) or type(error).__name__})
+
+    async def worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            number, data = item
+            document_id = idempotent_document_id(f"build_log:{project_id}", key and f"{key}:{number}")
+            try:
+                await storage.create_build_log(project_id, data, update_counters=False, document_id=document_id)
+                result['imported'] += 1
+                merge_changes(imported_days, rollup_changes(new={**data, 'project_id': project_id}))
+            except AlreadyCreatedError:
+                result['duplicates'] += 1
+            except Exception as e:
+                print(f"Error importing row {number}: {e}")
+                failed(number, e)
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        async for number, row in rows:
+            try:
+                if isinstance(row, Exception):
+                    raise row
+                data = build_log_data(row)
+            except RowError as e:
+                failed(number, e)
+                continue
+            await queue.put((number, data))
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+        if result['imported']:
+            try:
+                await storage.repair_project_counters(project_id)
+            except Exception as e:
+                print(f"Error repairing counters after import into {project_id}: {e}")
+        if imported_days and user_id:
+            try:
+                await storage.update_rollups(user_id, imported_days)
+            except Exception as e:
+                print(f"Error updating rollups after import into {project_id}: {e}")
+    return result
@@ -0,0 +1,95 @@
+"""
+In-process LRU + TTL cache for Appwrite documents and list queries
+"""
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, Optional
+
+
+class DocumentCache:
+    """Least-recently-used cache with per-entry expiry and a byte budget
+
+    Entries carry tags (e.g. ``project:<id>``) so a write can drop every
+    cached document or list that may contain the changed document.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 1024, max_bytes: int = 8 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, size, tags, value)
+        self._tags = {}  # tag -> set of keys
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[0] <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[3]
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[str] = ()):
+        """Store a value, evicting the least recently used entries to stay within budget"""
+        if not self.max_entries:
+            return
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+
+        self._remove(key)
+        tags = frozenset(tags)
+        self._entries[key] = (time.monotonic() + self.ttl, size, tags, value)
+        self.size_bytes += size
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, *tags: str):
+        """Drop every entry carrying any of the given tags"""
+        for tag in tags:
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+
+    def clear(self):
+        """Drop all entries, keeping the counters"""
+        self._entries.clear()
+        self._tags.clear()
+        self.size_bytes = 0
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current footprint"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.size_bytes
+        }
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.size_bytes -= entry[1]
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
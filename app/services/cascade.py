@@ -0,0 +1,102 @@
+"""
+Cascading delete of a project with its build logs and uploaded files
+
+Removing only the project document would orphan its logs, which every
+log list query keeps scanning, and the files they reference. The cascade
+runs after the delete request has been answered: it takes the project's
+logs one batch at a time, deletes the files they reference that the
+project's owner uploaded and then the logs, and deletes the project
+document last. A cascade that stops part
+way leaves the project in place, so deleting it again carries on from
+where it stopped.
+"""
+import asyncio
+import re
+
+from app.config import get_settings
+from app.services.project_counters import has_counters, read_counters
+
+settings = get_settings()
+
+# Logs are only read for the files they reference
+CASCADE_LOG_FIELDS = ['images']
+
+# Images count as uploads when they are a file URL of this app's Appwrite
+# bucket, or an id the app gave an upload (ID.unique(): 20 hex digits),
+# bare or behind the app's own /files/ route. Anything else, such as a
+# link to another site or a word that happens to look like an id, is
+# left alone rather than risk deleting a file the project does not own.
+BUCKET_FILES_URL = f"{settings.appwrite_endpoint}/storage/buckets/{settings.appwrite_storage_bucket_id}/files/"
+FILE_REFERENCE = re.compile(
+    rf"{re.escape(BUCKET_FILES_URL)}(?P<bucket_file>[A-Za-z0-9][A-Za-z0-9._-]{{0,35}})(?:/view)?(?:[?#].*)?"
+    r"|(?:/files/)?(?P<stored_file>[0-9a-f]{20})"
+)
+
+
+def referenced_file_ids(log: dict) -> list:
+    """Ids of the uploaded files a build log's images point at"""
+    file_ids = []
+    for image in log.get('images') or []:
+        match = FILE_REFERENCE.fullmatch(image or '')
+        if match:
+            file_ids.append(match.group('bucket_file') or match.group('stored_file'))
+    return list(dict.fromkeys(file_ids))
+
+
+def cascade_total(project: dict) -> int:
+    """Build logs a project's cascade is expected to delete, from its counters when it has them"""
+    return read_counters(project)['log_count'] if has_counters(project) else 0
+
+
+async def delete_project_cascade(storage, project_id: str, owner_id: str, tracker, batch_size: int = None):
+    """Delete a project's files, build logs and finally the project, reporting progress to tracker
+
+    The tracker entry for project_id must already be started. Only files
+    recorded as uploaded by owner_id are deleted; a log can name anyone's
+    file id, so the others are counted in files_skipped and kept. Up to
+    settings.delete_concurrency file deletes run at once; a file that
+    cannot be deleted is counted in files_failed without stopping the
+    cascade, since the logs pointing at it are going away.
+    """
+    batch_size = batch_size or settings.delete_batch_size
+    limit = asyncio.Semaphore(settings.delete_concurrency)
+    done = 0
+    files = {'files_deleted': 0, 'files_skipped': 0, 'files_failed': 0}
+    handled = set()
+
+    async def delete_file(file_id):
+        async with limit:
+            try:
+                if await storage.get_file_owner(file_id) != owner_id:
+                    files['files_skipped'] += 1
+                    return
+                await storage.delete_file(file_id)
+                files['files_deleted'] += 1
+            except Exception as e:
+                print(f"Error deleting file {file_id} of project {project_id}: {e}")
+                files['files_failed'] += 1
+
+    try:
+        while True:
+            # Deleted logs leave the list, so the first page is always the next batch
+            logs, _ = await storage.get_build_logs_page(project_id, page_size=batch_size, fields=CASCADE_LOG_FIELDS)
+            if not logs:
+                break
+
+            # A file several logs share is handled once, in the first batch that names it
+            file_ids = [file_id for file_id in dict.fromkeys(
+                file_id for log in logs for file_id in referenced_file_ids(log)
+            ) if file_id not in handled]
+            handled.update(file_ids)
+            await asyncio.gather(*(delete_file(file_id) for file_id in file_ids))
+            await storage.delete_build_logs(project_id, [log['$id'] for log in logs])
+
+            done += len(logs)
+            tracker.update(project_id, done, **files)
+
+        await storage.delete_project(project_id)
+        tracker.update(project_id, done, **files)
+        tracker.finish(project_id)
+    except Exception as e:
+        print(f"Error deleting project {project_id}: {e}")
+        tracker.fail(project_id, str(e))
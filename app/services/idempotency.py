@@ -0,0 +1,36 @@
+"""
+Idempotency keys for creating projects and build logs
+
+A client names a create with a key, sent as the Idempotency-Key header
+or the idempotency_key form field; the create forms carry one per page
+load. The key is hashed, within the scope of the user or project the
+document belongs to, into the document id. Every attempt of the same
+write therefore asks for the same id: a resent or double-submitted
+create is rejected by the backend as already existing, which tells the
+route the write happened without reading the document back, and the
+Appwrite client may safely resend the POST after a dropped connection.
+"""
+import hashlib
+from typing import Optional
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_FIELD = "idempotency_key"
+
+MAX_KEY_LENGTH = 255
+
+# Appwrite document ids are at most 36 characters
+DOCUMENT_ID_LENGTH = 36
+
+
+def document_id(scope: str, key: str) -> str:
+    """The document id an idempotency key maps to within a scope, such as "project:<user id>" """
+    return hashlib.sha256(f"{scope}\n{key}".encode()).hexdigest()[:DOCUMENT_ID_LENGTH]
+
+
+def idempotent_document_id(scope: str, key: Optional[str]) -> Optional[str]:
+    """Document id for a request's key, None without one; ValueError if the key is unusable"""
+    if not key:
+        return None
+    if len(key) > MAX_KEY_LENGTH or not key.isprintable():
+        raise ValueError(f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} printable characters")
+    return document_id(scope, key)
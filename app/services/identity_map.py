@@ -0,0 +1,101 @@
+"""
+Request-scoped identity map over a storage backend
+
+One HTTP request often asks for the same document or list more than once,
+for example every analytics section reading the user's projects. An
+IdentityMap wraps the shared backend for the lifetime of one request and
+answers repeated reads from memory: the first call for a given read goes
+to the backend, concurrent and later calls with the same arguments await
+the same result and get the same objects back, so treat them as read-only.
+
+Any write through the map goes to the backend and then forgets everything
+read so far, so a request never sees its own writes stale. Streaming
+iterators (iter_projects, iter_build_logs, ...) pass straight through:
+holding their documents would undo the flat memory they exist for.
+"""
+import asyncio
+import inspect
+
+# Backend reads whose results are kept for the request
+MEMOIZED_READS = {
+    'get_account', 'get_project', 'get_projects', 'get_projects_by_ids',
+    'get_build_log', 'get_build_logs', 'get_build_logs_by_ids',
+    'get_build_logs_page', 'get_build_logs_for_projects', 'get_rollups'
+}
+
+# Backend calls that change documents; each one clears the map
+WRITES = {
+    'create_account', 'create_session', 'delete_session',
+    'create_project', 'update_project', 'delete_project',
+    'create_build_log', 'update_build_log', 'delete_build_log', 'delete_build_logs',
+    'repair_project_counters', 'update_rollups', 'rebuild_rollups'
+}
+
+
+def _freeze(value):
+    """Hashable form of an argument; lists of ids and fields become tuples"""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+class IdentityMap:
+    """Storage backend proxy that memoizes reads for one request"""
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._results = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.storage, name)
+        if name in MEMOIZED_READS:
+            return self._memoized(name, attribute)
+        if name in WRITES:
+            return self._write(attribute)
+        return attribute
+
+    def clear(self):
+        """Forget every read, so the next ones go to the backend"""
+        self._results.clear()
+
+    def _key(self, name: str, method, args: tuple, kwargs: dict):
+        """The read and its arguments with defaults applied, so equivalent calls share a key"""
+        try:
+            bound = inspect.signature(method).bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = bound.arguments
+        except (TypeError, ValueError):
+            arguments = {'args': args, 'kwargs': kwargs}
+        return name, _freeze(arguments)
+
+    def _memoized(self, name: str, method):
+        async def read(*args, **kwargs):
+            key = self._key(name, method, args, kwargs)
+            result = self._results.get(key)
+            if result is None:
+                self.misses += 1
+                result = self._results[key] = asyncio.ensure_future(method(*args, **kwargs))
+                # A failed read is not remembered, so the next caller tries again
+                result.add_done_callback(lambda done: self._forget_failure(key, done))
+            else:
+                self.hits += 1
+            return await asyncio.shield(result)
+        return read
+
+    def _forget_failure(self, key, future):
+        if not future.cancelled() and future.exception() is None:
+            return
+        if self._results.get(key) is future:
+            del self._results[key]
+
+    def _write(self, method):
+        async def write(*args, **kwargs):
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                self.clear()
+        return write
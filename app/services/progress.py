@@ -0,0 +1,72 @@
+"""
+In-process progress tracking for long-running operations the client polls
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class ProgressTracker:
+    """Remembers the progress of the most recent operations, keyed by id"""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def start(self, operation_id: str, total: int, **details) -> Dict:
+        """Begin tracking an operation of `total` units, with any details worth keeping (such as its owner)"""
+        entry = {
+            "id": operation_id,
+            "status": "in_progress",
+            "done": 0,
+            "total": total,
+            "error": None,
+            "started_at": time.time(),
+            "finished_at": None,
+            **details
+        }
+        self._entries.pop(operation_id, None)
+        self._entries[operation_id] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def update(self, operation_id: str, done: int, **details):
+        """Record how many units are complete, and any other counts worth reporting
+
+        A total that was only an estimate grows to match the units done.
+        """
+        entry = self._entries.get(operation_id)
+        if entry is not None:
+            entry.update(details)
+            entry["done"] = done
+            entry["total"] = max(entry["total"], done)
+
+    def running(self, operation_id: str) -> bool:
+        """Whether an operation with this id is still in progress"""
+        entry = self._entries.get(operation_id)
+        return entry is not None and entry["status"] == "in_progress"
+
+    def finish(self, operation_id: str):
+        """Mark an operation as completed"""
+        entry = self._entries.get(operation_id)
+        if entry is not None:
+            entry["done"] = entry["total"]
+            entry["status"] = "completed"
+            entry["finished_at"] = time.time()
+
+    def fail(self, operation_id: str, error: str):
+        """Mark an operation as failed, keeping the units completed so far"""
+        entry = self._entries.get(operation_id)
+        if entry is not None:
+            entry["status"] = "failed"
+            entry["error"] = error
+            entry["finished_at"] = time.time()
+
+    def get(self, operation_id: str) -> Optional[Dict]:
+        """Snapshot of an operation's progress, with a percentage"""
+        entry = self._entries.get(operation_id)
+        if entry is None:
+            return None
+        percent = 100.0 if not entry["total"] else round(entry["done"] * 100 / entry["total"], 1)
+        return {**entry, "percent": percent}
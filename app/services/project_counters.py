@@ -0,0 +1,154 @@
+"""
+Build log counters kept on each project document
+
+Every project stores how many build logs it has (log_count), when the
+newest one was written (last_log_at) and a count per log type
+(log_type_counts), so dashboards and analytics read one document per
+project instead of every log. The storage backends update them on each
+build log write; `python -m app.services.project_counters` recomputes
+them from the logs, and sets them on projects created before they
+existed (until then those projects have their logs read as before).
+"""
+import argparse
+import asyncio
+import json
+
+from app.services.timestamps import parse_timestamp
+
+COUNTER_FIELDS = ['log_count', 'last_log_at', 'log_type_counts']
+
+# Log attributes the counters are derived from
+COUNTED_LOG_FIELDS = ['created_at', 'log_type']
+
+
+def log_timestamp(log: dict):
+    """When a log was written, falling back to Appwrite's own timestamp"""
+    return log.get('created_at') or log.get('$createdAt')
+
+
+def timestamp_order(value) -> float:
+    """Epoch seconds of a timestamp for ordering; missing or unreadable ones sort first
+
+    Stored timestamps mix formats and offsets, so comparing the strings
+    themselves can put an older log after a newer one.
+    """
+    parsed = parse_timestamp(value)
+    return parsed.timestamp() if parsed else float('-inf')
+
+
+def newest_log_at(logs):
+    """Timestamp of the newest of the given logs, compared as moments"""
+    return max((log_timestamp(log) for log in logs), key=timestamp_order, default=None)
+
+
+def log_type(log: dict) -> str:
+    return log.get('log_type') or 'note'
+
+
+def counters_changed(old: dict, new: dict) -> bool:
+    """Whether an edit moved a log to another type or time, which the counters track"""
+    return log_type(old) != log_type(new) or log_timestamp(old) != log_timestamp(new)
+
+
+def has_counters(project: dict) -> bool:
+    """Whether the project was written after counters were introduced"""
+    return project.get('log_count') is not None
+
+
+def read_counters(project: dict) -> dict:
+    """Counters of a project document, with log_type_counts decoded"""
+    counts = project.get('log_type_counts') or {}
+    if isinstance(counts, str):
+        counts = json.loads(counts)
+    return {
+        'log_count': project.get('log_count') or 0,
+        'last_log_at': project.get('last_log_at'),
+        'log_type_counts': dict(counts)
+    }
+
+
+def encode_counters(counters: dict) -> dict:
+    """Counters as stored; Appwrite has no map attribute, so type counts are a JSON string"""
+    return {
+        'log_count': counters['log_count'],
+        'last_log_at': counters['last_log_at'],
+        'log_type_counts': json.dumps(counters['log_type_counts'], sort_keys=True)
+    }
+
+
+def initial_counters() -> dict:
+    """Stored counters of a project that has no logs yet"""
+    return encode_counters(counters_from_logs([]))
+
+
+def counters_from_logs(logs) -> dict:
+    """Counters recomputed from every log of a project"""
+    counters = {'log_count': 0, 'last_log_at': None, 'log_type_counts': {}}
+    for log in logs:
+        apply_log_change(counters, new=log)
+    return counters
+
+
+def apply_log_change(counters: dict, old: dict = None, new: dict = None) -> bool:
+    """Update counters in place for a created (new), deleted (old) or edited (both) log
+
+    Returns True when last_log_at may now be too new and has to be re-read
+    from the newest remaining log.
+    """
+    counts = counters['log_type_counts']
+    stale = False
+    if old is not None:
+        counters['log_count'] = max(0, counters['log_count'] - 1)
+        remaining = counts.get(log_type(old), 0) - 1
+        if remaining > 0:
+            counts[log_type(old)] = remaining
+        else:
+            counts.pop(log_type(old), None)
+        old_at = log_timestamp(old)
+        stale = bool(old_at) and timestamp_order(old_at) >= timestamp_order(counters['last_log_at'])
+    if new is not None:
+        counters['log_count'] += 1
+        counts[log_type(new)] = counts.get(log_type(new), 0) + 1
+        new_at = log_timestamp(new)
+        if new_at and timestamp_order(new_at) >= timestamp_order(counters['last_log_at']):
+            counters['last_log_at'] = new_at
+            stale = False
+    return stale and counters['log_count'] > 0
+
+
+async def repair(storage, user_ids: list = (), project_ids: list = ()) -> int:
+    """Recompute the counters of the given projects and of every project of the given users"""
+    project_ids = list(project_ids)
+    for user_id in user_ids:
+        async for project in storage.iter_projects(user_id, fields=['name']):
+            project_ids.append(project['$id'])
+
+    for project_id in dict.fromkeys(project_ids):
+        counters = await storage.repair_project_counters(project_id)
+        print(f"{project_id}: {counters['log_count']} logs, last at {counters['last_log_at']}")
+    return len(set(project_ids))
+
+
+async def _repair_command(args):
+    from app.services.storage_backend import create_storage
+
+    storage = create_storage()
+    try:
+        repaired = await repair(storage, args.user, args.project)
+        print(f"Repaired counters on {repaired} project(s)")
+    finally:
+        await storage.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute the build log counters stored on projects")
+    parser.add_argument("--user", action="append", default=[], help="repair every project of this user id")
+    parser.add_argument("--project", action="append", default=[], help="repair this project id")
+    args = parser.parse_args()
+    if not args.user and not args.project:
+        parser.error("pass at least one --user or --project")
+    asyncio.run(_repair_command(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+Declarative schema for the Appwrite database, and a tool that applies it
+
+The database, the projects, build_logs and analytics rollups collections,
+their attributes and their indexes are declared below using the IDs from
+app.config.
+
+    python -m app.services.provisioning           # create or update what is missing
+    python -m app.services.provisioning --check   # only report drift, exit 1 if any
+
+Running it again changes nothing. Attributes whose type changed, and
+attributes or indexes that exist on the server but are not declared here,
+are reported and never removed, because that would drop data; an index
+whose definition changed is recreated.
+"""
+import argparse
+import sys
+import time
+
+import httpx
+from appwrite.query import Query
+
+from app.config import get_settings
+
+# Collection permissions: signed-in users work with documents, as described in APPWRITE_SETUP.md
+USER_PERMISSIONS = ['create("users")', 'read("users")', 'update("users")', 'delete("users")']
+
+# Upper bound on attributes and indexes listed per collection
+SCHEMA_LIST_LIMIT = 100
+
+
+def string(key: str, size: int, required: bool = False, default: str = None, array: bool = False) -> dict:
+    return {"key": key, "type": "string", "size": size, "required": required, "default": default, "array": array}
+
+
+def url(key: str, required: bool = False) -> dict:
+    return {"key": key, "type": "string", "format": "url", "required": required, "default": None, "array": False}
+
+
+def integer(key: str, required: bool = False, default: int = None) -> dict:
+    return {"key": key, "type": "integer", "required": required, "default": default, "array": False}
+
+
+def index(key: str, attributes: list, orders: list = None) -> dict:
+    return {"key": key, "type": "key", "attributes": attributes, "orders": orders or ["ASC"] * len(attributes)}
+
+
+def desired_schema(settings=None) -> dict:
+    """Collections keyed by their configured ID, with the attributes and indexes the app relies on
+
+    Appwrite does not allow a default on a required attribute, so status
+    and log_type are optional with a default instead.
+    """
+    settings = settings or get_settings()
+    return {
+        settings.appwrite_projects_collection_id: {
+            "name": "Projects",
+            "attributes": [
+                string("name", 200, required=True),
+                string("description", 5000),
+                string("tech_stack", 100, array=True),
+                url("repository_url"),
+                url("demo_url"),
+                string("tags", 50, array=True),
+                string("status", 50, default="in_progress"),
+                string("user_id", 100, required=True),
+                string("created_at", 50, required=True),
+                string("updated_at", 50, required=True),
+                integer("created_ts"),
+                integer("created_day"),
+                integer("log_count"),
+                string("last_log_at", 50),
+                string("log_type_counts", 1000),
+            ],
+            "indexes": [
+                index("idx_user_id", ["user_id"]),
+                index("idx_user_id_created_at", ["user_id", "created_at"], ["ASC", "DESC"]),
+            ]
+        },
+        settings.appwrite_build_logs_collection_id: {
+            "name": "Build Logs",
+            "attributes": [
+                string("project_id", 100, required=True),
+                string("title", 200, required=True),
+                string("content", 10000, required=True),
+                string("log_type", 50, default="update"),
+                string("code_snippets", 5000, array=True),
+                string("images", 100, array=True),
+                string("links", 500, array=True),
+                string("tags", 50, array=True),
+                string("created_at", 50, required=True),
+                integer("created_ts"),
+                integer("created_day"),
+            ],
+            "indexes": [
+                index("idx_project_id", ["project_id"]),
+                index("idx_project_id_created_at", ["project_id", "created_at"], ["ASC", "DESC"]),
+                index("idx_project_id_created_day", ["project_id", "created_day"]),
+                index("idx_project_id_created_ts", ["project_id", "created_ts"], ["ASC", "DESC"]),
+            ]
+        },
+        settings.appwrite_rollups_collection_id: {
+            "name": "Analytics Rollups",
+            "attributes": [
+                string("user_id", 100, required=True),
+                integer("day", required=True),
+                integer("log_count"),
+                string("counts", 10000),
+            ],
+            "indexes": [
+                index("idx_user_id_day", ["user_id", "day"]),
+            ]
+        }
+    }
+
+
+def _change(action: str, target: str, detail: str = "") -> dict:
+    return {"action": action, "target": target, "detail": detail}
+
+
+class SchemaProvisioner:
+    """Compares the declared schema with the server and, unless checking, makes them match
+
+    `service` is an AppwriteService; its admin-key requests, retries and
+    circuit breaker are reused for the management API.
+    """
+
+    def __init__(self, service, schema: dict = None, database_id: str = None,
+                 wait_timeout: float = 120.0, poll_interval: float = 1.0):
+        self.service = service
+        self.schema = schema or desired_schema()
+        self.database_id = database_id or service.database_id
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+
+    def run(self, apply: bool = True) -> list:
+        """Walk the database, collections, attributes and indexes; return every change made or needed"""
+        changes = []
+        database_exists = self._get(f"/databases/{self.database_id}") is not None
+        if not database_exists:
+            changes.append(_change("create", f"database {self.database_id}"))
+            if apply:
+                self._post("/databases", {"databaseId": self.database_id, "name": self.database_id})
+
+        for collection_id, collection in self.schema.items():
+            changes.extend(self._sync_collection(collection_id, collection, apply, database_exists or apply))
+        return changes
+
+    # Collections
+
+    def _sync_collection(self, collection_id: str, collection: dict, apply: bool, database_exists: bool) -> list:
+        base = f"/databases/{self.database_id}/collections"
+        changes = []
+        exists = database_exists and self._get(f"{base}/{collection_id}") is not None
+        if not exists:
+            changes.append(_change("create", f"collection {collection_id}"))
+            if not apply:
+                changes.extend(_change("create", f"attribute {collection_id}.{a['key']}") for a in collection["attributes"])
+                changes.extend(_change("create", f"index {collection_id}.{i['key']}") for i in collection["indexes"])
+                return changes
+            self._post(base, {
+                "collectionId": collection_id, "name": collection["name"],
+                "permissions": USER_PERMISSIONS, "documentSecurity": False
+            })
+
+        created = self._sync_attributes(collection_id, collection["attributes"], apply, changes)
+        if apply and created:
+            self._wait_for_attributes(collection_id)
+        self._sync_indexes(collection_id, collection["indexes"], apply, changes)
+        return changes
+
+    # Attributes
+
+    def _sync_attributes(self, collection_id: str, desired: list, apply: bool, changes: list) -> bool:
+        base = f"/databases/{self.database_id}/collections/{collection_id}/attributes"
+        live = {a["key"]: a for a in self._list(base, "attributes")}
+        created = False
+
+        for attribute in desired:
+            key, kind = attribute["key"], attribute.get("format", attribute["type"])
+            target = f"attribute {collection_id}.{key}"
+            current = live.pop(key, None)
+            if current is None:
+                changes.append(_change("create", target, kind))
+                if apply:
+                    self._post(f"{base}/{kind}", self._attribute_body(attribute))
+                    created = True
+                continue
+
+            if current.get("status") in ("failed", "stuck"):
+                changes.append(_change("drift", target, f"status {current['status']}: {current.get('error', '')}"))
+            if current.get("format", current["type"]) != kind or bool(current.get("array")) != attribute["array"]:
+                changes.append(_change(
+                    "drift", target,
+                    f"is {current.get('format', current['type'])}{'[]' if current.get('array') else ''}, "
+                    f"declared {kind}{'[]' if attribute['array'] else ''}; change it by hand"
+                ))
+                continue
+
+            differences = self._attribute_differences(attribute, current)
+            if differences:
+                changes.append(_change("update", target, ", ".join(differences)))
+                if apply:
+                    body = {"required": attribute["required"], "default": attribute["default"]}
+                    if "size" in attribute:
+                        body["size"] = attribute["size"]
+                    self._request("PATCH", f"{base}/{kind}/{key}", json=body)
+
+        for key in live:
+            changes.append(_change("drift", f"attribute {collection_id}.{key}", "not declared; left in place"))
+        return created
+
+    def _attribute_body(self, attribute: dict) -> dict:
+        body = {"key": attribute["key"], "required": attribute["required"], "array": attribute["array"]}
+        if attribute["default"] is not None:
+            body["default"] = attribute["default"]
+        if "size" in attribute:
+            body["size"] = attribute["size"]
+        return body
+
+    def _attribute_differences(self, desired: dict, current: dict) -> list:
+        differences = []
+        for field in ("size", "required", "default"):
+            if field in desired and current.get(field) != desired[field]:
+                differences.append(f"{field} {current.get(field)!r} -> {desired[field]!r}")
+        return differences
+
+    def _wait_for_attributes(self, collection_id: str):
+        """Appwrite builds attributes in the background; indexes can only use available ones"""
+        base = f"/databases/{self.database_id}/collections/{collection_id}/attributes"
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            pending = [a["key"] for a in self._list(base, "attributes") if a.get("status") == "processing"]
+            if not pending:
+                return
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Attributes still processing in {collection_id}: {', '.join(pending)}")
+            time.sleep(self.poll_interval)
+
+    # Indexes
+
+    def _sync_indexes(self, collection_id: str, desired: list, apply: bool, changes: list):
+        base = f"/databases/{self.database_id}/collections/{collection_id}/indexes"
+        live = {i["key"]: i for i in self._list(base, "indexes")}
+
+        for wanted in desired:
+            target = f"index {collection_id}.{wanted['key']}"
+            current = live.pop(wanted["key"], None)
+            if current is not None and self._same_index(wanted, current):
+                continue
+            if current is not None:
+                changes.append(_change(
+                    "recreate", target,
+                    f"{current['type']} {current['attributes']} {current.get('orders')} -> "
+                    f"{wanted['type']} {wanted['attributes']} {wanted['orders']}"
+                ))
+                if apply:
+                    self._request("DELETE", f"{base}/{wanted['key']}")
+            else:
+                changes.append(_change("create", target, ", ".join(wanted["attributes"])))
+            if apply:
+                self._post(base, wanted)
+
+        for key in live:
+            changes.append(_change("drift", f"index {collection_id}.{key}", "not declared; left in place"))
+
+    def _same_index(self, wanted: dict, current: dict) -> bool:
+        return (
+            current.get("type") == wanted["type"]
+            and current.get("attributes") == wanted["attributes"]
+            and [o.upper() for o in current.get("orders") or []] == wanted["orders"]
+        )
+
+    # HTTP helpers
+
+    def _request(self, method: str, path: str, **kwargs):
+        return self.service._request(method, f"{self.service.endpoint}{path}", **kwargs)
+
+    def _get(self, path: str):
+        """GET a resource, or None if it does not exist"""
+        try:
+            return self._request("GET", path).json()
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                return None
+            raise
+
+    def _list(self, path: str, kind: str) -> list:
+        return self._request("GET", path, params={"queries[]": [Query.limit(SCHEMA_LIST_LIMIT)]}).json()[kind]
+
+    def _post(self, path: str, body: dict):
+        return self._request("POST", path, json=body).json()
+
+
+def format_changes(changes: list, applied: bool) -> str:
+    """One line per change, worded for whether it was applied or only found"""
+    if not changes:
+        return "Schema is up to date"
+    verbs = {"create": "created", "update": "updated", "recreate": "recreated"} if applied else {}
+    return "\n".join(
+        f"{verbs.get(c['action'], c['action']):<10} {c['target']}" + (f"  ({c['detail']})" if c['detail'] else "")
+        for c in changes
+    )
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Create or check the Appwrite collections, attributes and indexes")
+    parser.add_argument("--check", action="store_true", help="only report differences; exit 1 if there are any")
+    args = parser.parse_args(argv)
+
+    from app.services.appwrite_service import AppwriteService
+
+    service = AppwriteService()
+    try:
+        changes = SchemaProvisioner(service).run(apply=not args.check)
+    finally:
+        service.close()
+    print(format_changes(changes, applied=not args.check))
+    if args.check:
+        return 1 if changes else 0
+    return 1 if any(c["action"] == "drift" for c in changes) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Retry backoff, circuit breaker and rate limiting for calls to Appwrite
+"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+# Responses that mean Appwrite is struggling rather than rejecting the request
+RETRYABLE_STATUSES = {500, 502, 503, 504}
+TOO_MANY_REQUESTS = 429
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Appwrite while the circuit breaker is open"""
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter for the given zero-based attempt"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either as seconds or as an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """Fails fast after repeated upstream failures, then lets one probe through
+
+    closed -> open after `failure_threshold` consecutive failures;
+    open -> half_open once `reset_timeout` seconds have passed;
+    half_open -> closed if the probe succeeds, back to open if it fails.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_request(self) -> bool:
+        """Raise CircuitOpenError unless a request may go to Appwrite now
+
+        Returns True when the request is the half-open probe.
+        """
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return False
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+        raise CircuitOpenError("Appwrite is unavailable, not sending request")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def release_probe(self):
+        """Let another request probe after this probe ended with no outcome, e.g. cancelled"""
+        with self._lock:
+            self._probing = False
+
+
+class TokenBucket:
+    """Spaces requests to a steady rate and pauses everyone after a 429
+
+    A rate of 0 disables steady-state limiting; Retry-After pauses still apply.
+    """
+
+    def __init__(self, rate: float = 0.0, capacity: int = 20):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return how long the caller must wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self.paused_until - now)
+            if self.rate <= 0:
+                return wait
+
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            if self.tokens < 0:
+                wait = max(wait, -self.tokens / self.rate)
+            return wait
+
+    def pause(self, seconds: float):
+        """Hold back every caller for `seconds`, as asked by a 429 response"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
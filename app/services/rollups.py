@@ -0,0 +1,142 @@
+"""
+Daily build log rollups kept per user
+
+Each user has one rollup per calendar day they have build logs on: how
+many logs each project got that day, by log type. The storage backends
+keep them up to date on every build log write when ANALYTICS_ROLLUPS is
+on, and AnalyticsService then answers the dated charts from the rollups
+of the days in their windows, so /api/analytics reads the same number of
+documents however many logs a user has written. Totals still come from
+the project counters (app.services.project_counters).
+
+`python -m app.services.rollups --user <user id>` recomputes a user's
+rollups from their logs, and repairs their project counters; run it
+after turning rollups on and whenever they may have drifted, for
+example after a failed write.
+"""
+import argparse
+import asyncio
+import json
+
+from app.services.idempotency import document_id
+from app.services.project_counters import log_type
+from app.services.timestamps import document_day
+
+ROLLUP_FIELDS = ['user_id', 'day', 'log_count', 'counts']
+
+# Log attributes the rollups are derived from
+ROLLED_UP_LOG_FIELDS = ['created_at', 'created_day', 'log_type', 'project_id']
+
+
+def rollup_id(user_id: str, day: int) -> str:
+    """Document id of a user's rollup for a day, the same on every write"""
+    return document_id(f"rollup:{user_id}", str(day))
+
+
+def rollup_changes(old: dict = None, new: dict = None) -> dict:
+    """What a created (new), deleted (old) or edited (both) log changes: {day: {project: {type: delta}}}"""
+    changes = {}
+    for log, delta in ((old, -1), (new, 1)):
+        day = document_day(log) if log is not None else None
+        if day is not None:
+            merge_changes(changes, {day: {log.get('project_id'): {log_type(log): delta}}})
+    return changes
+
+
+def merge_changes(changes: dict, more: dict) -> dict:
+    """Add one set of rollup changes into another, in place, dropping days that cancel out"""
+    for day, counts in more.items():
+        if not apply_rollup_change(changes.setdefault(day, {}), counts, keep_negative=True):
+            changes.pop(day)
+    return changes
+
+
+def apply_rollup_change(counts: dict, change: dict, keep_negative: bool = False) -> dict:
+    """Add a day's {project: {type: delta}} to its counts in place, dropping what reaches zero"""
+    for project_id, types in change.items():
+        project = counts.setdefault(project_id, {})
+        for name, delta in types.items():
+            total = project.get(name, 0) + delta
+            if total > 0 or (keep_negative and total):
+                project[name] = total
+            else:
+                project.pop(name, None)
+        if not project:
+            counts.pop(project_id)
+    return counts
+
+
+def read_rollup(document: dict) -> dict:
+    """A stored rollup with counts decoded"""
+    counts = document.get('counts') or {}
+    if isinstance(counts, str):
+        counts = json.loads(counts)
+    return {'day': document['day'], 'log_count': document.get('log_count') or 0, 'counts': counts}
+
+
+def encode_rollup(counts: dict) -> dict:
+    """A day's counts as stored; Appwrite has no map attribute, so they are a JSON string"""
+    return {
+        'log_count': sum(sum(types.values()) for types in counts.values()),
+        'counts': json.dumps(counts, sort_keys=True)
+    }
+
+
+def count_log(days: dict, log: dict) -> dict:
+    """Add one log to {day: {project: {type: count}}} being recomputed, in place"""
+    for day, change in rollup_changes(new=log).items():
+        apply_rollup_change(days.setdefault(day, {}), change)
+    return days
+
+
+def rollups_from_logs(logs) -> dict:
+    """Every day's counts recomputed from a user's logs: {day: {project: {type: count}}}"""
+    days = {}
+    for log in logs:
+        count_log(days, log)
+    return days
+
+
+def rollup_total(rollup: dict, project_ids=None, log_type: str = None) -> int:
+    """Logs in a rollup, optionally only those of some projects or of one type"""
+    return sum(
+        count
+        for project_id, types in rollup['counts'].items()
+        if project_ids is None or project_id in project_ids
+        for name, count in types.items()
+        if log_type is None or name == log_type
+    )
+
+
+async def rebuild(storage, user_ids: list) -> int:
+    """Recompute the rollups and project counters of the given users; returns the days written"""
+    days = 0
+    for user_id in user_ids:
+        async for project in storage.iter_projects(user_id, fields=['name']):
+            await storage.repair_project_counters(project['$id'])
+        rebuilt = await storage.rebuild_rollups(user_id)
+        print(f"{user_id}: {rebuilt} day(s) of build logs")
+        days += rebuilt
+    return days
+
+
+async def _rebuild_command(args):
+    from app.services.storage_backend import create_storage
+
+    storage = create_storage()
+    try:
+        days = await rebuild(storage, args.user)
+        print(f"Rebuilt {days} daily rollup(s) for {len(args.user)} user(s)")
+    finally:
+        await storage.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute the daily build log rollups analytics read")
+    parser.add_argument("--user", action="append", required=True, help="rebuild the rollups of this user id")
+    args = parser.parse_args()
+    asyncio.run(_rebuild_command(args))
+
+
+if __name__ == "__main__":
+    main()
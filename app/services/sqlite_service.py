@@ -0,0 +1,693 @@
+"""
+Embedded SQLite storage backend for self-hosted and edge deployments
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import math
+import os
+import secrets
+import sqlite3
+import threading
+from datetime import datetime
+
+from appwrite.id import ID
+
+from app.config import get_settings
+from app.services.project_counters import (
+    apply_log_change, counters_changed, counters_from_logs, encode_counters, has_counters,
+    initial_counters, newest_log_at, read_counters
+)
+from app.services.rollups import apply_rollup_change, encode_rollup, read_rollup, rollup_changes, rollups_from_logs
+from app.services.storage_backend import (
+    StorageBackend, AlreadyCreatedError, NotFoundError, ConflictError, AuthenticationError
+)
+from app.services.timestamps import epoch_fields, with_epoch_fields
+
+settings = get_settings()
+
+# Same chunking as Appwrite so resumable uploads behave identically
+UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024
+
+PASSWORD_ITERATIONS = 200_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    id TEXT PRIMARY KEY,
+    email TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    password_hash TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    secret TEXT NOT NULL UNIQUE,
+    user_id TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_projects_user_id_created_at ON projects (user_id, created_at);
+CREATE TABLE IF NOT EXISTS build_logs (
+    id TEXT PRIMARY KEY,
+    project_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_build_logs_project_id_created_at ON build_logs (project_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_build_logs_created_at ON build_logs (created_at);
+CREATE INDEX IF NOT EXISTS idx_build_logs_project_id_created_day ON build_logs (project_id, json_extract(data, '$.created_day'));
+CREATE INDEX IF NOT EXISTS idx_build_logs_project_id_created_ts ON build_logs (project_id, json_extract(data, '$.created_ts'));
+CREATE TABLE IF NOT EXISTS files (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    chunks_uploaded INTEGER NOT NULL,
+    chunks_total INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    owner_id TEXT
+);
+CREATE TABLE IF NOT EXISTS rollups (
+    user_id TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    log_count INTEGER NOT NULL,
+    counts TEXT NOT NULL,
+    PRIMARY KEY (user_id, day)
+);
+"""
+
+
+def _hash_password(password: str, salt: bytes = None) -> str:
+    salt = salt or secrets.token_bytes(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, PASSWORD_ITERATIONS)
+    return f"{salt.hex()}${digest.hex()}"
+
+
+def _check_password(password: str, stored: str) -> bool:
+    salt, _ = stored.split("$", 1)
+    return hmac.compare_digest(_hash_password(password, bytes.fromhex(salt)), stored)
+
+
+class AsyncSQLiteService(StorageBackend):
+    """Storage backend kept in a local SQLite file, with uploads on local disk
+
+    Documents are stored as JSON next to indexed user_id / project_id /
+    created_at columns, so lists are answered from the indexes. Queries run
+    in a worker thread to keep the event loop free.
+    """
+
+    def __init__(self, path: str = "buildlog.db", files_dir: str = "uploads"):
+        self.path = path
+        self.files_dir = files_dir
+        self.rollups = settings.analytics_rollups
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        # Files tables made before uploads recorded their owner
+        if "owner_id" not in {row["name"] for row in self._db.execute("PRAGMA table_info(files)")}:
+            self._db.execute("ALTER TABLE files ADD COLUMN owner_id TEXT")
+
+    async def aclose(self):
+        """Close the database connection"""
+        self._db.close()
+
+    def health(self) -> dict:
+        return {"backend": "sqlite"}
+
+    # Low-level helpers
+    def _run(self, sql: str, params=()) -> list:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    async def _query(self, sql: str, params=()) -> list:
+        return await asyncio.to_thread(self._run, sql, params)
+
+    def _run_transaction(self, work):
+        """Run work(db) inside one write transaction, rolling back if it raises"""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(self._db)
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+            return result
+
+    async def _transaction(self, work):
+        return await asyncio.to_thread(self._run_transaction, work)
+
+    def _document(self, row, fields: list = None) -> dict:
+        data = json.loads(row["data"])
+        if fields:
+            data = {k: v for k, v in data.items() if k in fields}
+        return {"$id": row["id"], **data}
+
+    def _list_sql(self, table: str, column: str, values: list, order: str, cursor: str, limit: int, days: tuple = None):
+        """SELECT for one page, keyset-paginated on (created_at, id) after the cursor document
+
+        days, a (first, last) pair of day numbers either of which may be
+        None, keeps documents whose created_day is within them.
+        """
+        if order not in ("asc", "desc"):
+            raise ValueError(f"Invalid order: {order}")
+
+        direction, compare = ("ASC", ">") if order == "asc" else ("DESC", "<")
+        placeholders = ", ".join("?" * len(values))
+        sql = f"SELECT id, created_at, data FROM {table} WHERE {column} IN ({placeholders})"
+        params = list(values)
+        for bound, compare_day in zip(days or (), (">=", "<=")):
+            if bound is not None:
+                # The same expression as idx_build_logs_project_id_created_day, so the index is used
+                sql += f" AND json_extract(data, '$.created_day') {compare_day} ?"
+                params.append(bound)
+        if cursor:
+            sql += f" AND (created_at, id) {compare} (SELECT created_at, id FROM {table} WHERE id = ?)"
+            params.append(cursor)
+        sql += f" ORDER BY created_at {direction}, id {direction}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return sql, params
+
+    async def _list_page(self, table: str, column: str, values: list, order: str, page_size: int, cursor: str = None, fields: list = None,
+                         days: tuple = None):
+        sql, params = self._list_sql(table, column, values, order, cursor, page_size, days)
+        documents = [self._document(row, fields) for row in await self._query(sql, params)]
+        next_cursor = documents[-1]["$id"] if page_size and len(documents) == page_size else None
+        return documents, next_cursor
+
+    async def _iter_documents(self, table: str, column: str, values: list, order: str, page_size: int, fields: list = None,
+                              days: tuple = None):
+        cursor = None
+        while True:
+            documents, cursor = await self._list_page(table, column, values, order, page_size, cursor, fields, days)
+            for document in documents:
+                yield document
+            if cursor is None:
+                return
+
+    async def _get_document(self, table: str, document_id: str) -> dict:
+        rows = await self._query(f"SELECT id, data FROM {table} WHERE id = ?", (document_id,))
+        if not rows:
+            raise NotFoundError("Document with the requested ID could not be found.")
+        return self._document(rows[0])
+
+    async def _get_documents(self, table: str, document_ids: list, fields: list = None) -> list:
+        """Documents with the given ids, in that order, skipping missing ones"""
+        document_ids = list(dict.fromkeys(document_ids))
+        placeholders = ", ".join("?" * len(document_ids))
+        rows = await self._query(f"SELECT id, data FROM {table} WHERE id IN ({placeholders})", document_ids)
+        found = {row["id"]: self._document(row, fields) for row in rows}
+        return [found[i] for i in document_ids if i in found]
+
+    def _read_data(self, db, table: str, document_id: str) -> dict:
+        row = db.execute(f"SELECT data FROM {table} WHERE id = ?", (document_id,)).fetchone()
+        if row is None:
+            raise NotFoundError("Document with the requested ID could not be found.")
+        return json.loads(row["data"])
+
+    async def _update_document(self, table: str, document_id: str, changes: dict) -> dict:
+        def write(db):
+            data = self._read_data(db, table, document_id)
+            data.update(changes)
+            db.execute(f"UPDATE {table} SET data = ? WHERE id = ?", (json.dumps(data), document_id))
+            return {"$id": document_id, **data}
+        return await self._transaction(write)
+
+    def _apply_counters(self, db, project_id: str, old: dict = None, new: dict = None):
+        """Apply one build log write to its project's counters and owner's rollups, inside the caller's transaction"""
+        row = db.execute("SELECT user_id, data FROM projects WHERE id = ?", (project_id,)).fetchone()
+        if row is None:
+            return
+        if self.rollups:
+            self._apply_rollups(db, row["user_id"], rollup_changes(old, new))
+        data = json.loads(row["data"])
+        if not has_counters(data):
+            # Created before counters existed; repair_project_counters sets them
+            return
+        counters = read_counters(data)
+        if apply_log_change(counters, old, new):
+            # Ordered by created_ts; created_at only orders logs not backfilled yet
+            newest = [
+                json.loads(row["data"]) for sql in (
+                    "SELECT data FROM build_logs WHERE project_id = ? AND json_extract(data, '$.created_ts') IS NOT NULL"
+                    " ORDER BY json_extract(data, '$.created_ts') DESC LIMIT 1",
+                    "SELECT data FROM build_logs WHERE project_id = ? AND json_extract(data, '$.created_ts') IS NULL"
+                    " ORDER BY created_at DESC, id DESC LIMIT 1"
+                ) for row in db.execute(sql, (project_id,))
+            ]
+            counters["last_log_at"] = newest_log_at(newest)
+        data.update(encode_counters(counters))
+        db.execute("UPDATE projects SET data = ? WHERE id = ?", (json.dumps(data), project_id))
+
+    def _count_logs(self, db, project_id: str) -> dict:
+        rows = db.execute("SELECT data FROM build_logs WHERE project_id = ?", (project_id,))
+        return counters_from_logs(json.loads(row["data"]) for row in rows)
+
+    def _apply_rollups(self, db, user_id: str, changes: dict):
+        """Add {day: {project: {type: delta}}} to a user's rollups, removing days left empty"""
+        for day, change in changes.items():
+            row = db.execute("SELECT counts FROM rollups WHERE user_id = ? AND day = ?", (user_id, day)).fetchone()
+            counts = apply_rollup_change(json.loads(row["counts"]) if row else {}, change)
+            self._write_rollup(db, user_id, day, counts)
+
+    def _write_rollup(self, db, user_id: str, day: int, counts: dict):
+        if not counts:
+            db.execute("DELETE FROM rollups WHERE user_id = ? AND day = ?", (user_id, day))
+            return
+        stored = encode_rollup(counts)
+        db.execute(
+            "INSERT INTO rollups (user_id, day, log_count, counts) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (user_id, day) DO UPDATE SET log_count = excluded.log_count, counts = excluded.counts",
+            (user_id, day, stored["log_count"], stored["counts"])
+        )
+
+    # Authentication Operations
+    async def create_account(self, email: str, password: str, name: str):
+        """Create a new user account"""
+        try:
+            user_id = ID.unique()
+            await self._query(
+                "INSERT INTO accounts (id, email, name, password_hash, created_at) VALUES (?, ?, ?, ?, ?)",
+                (user_id, email.lower(), name, await asyncio.to_thread(_hash_password, password), datetime.now().isoformat())
+            )
+            return {"$id": user_id, "email": email.lower(), "name": name}
+        except sqlite3.IntegrityError:
+            print("Error creating account: email already registered")
+            raise ConflictError("A user with the same email already exists.")
+        except Exception as e:
+            print(f"Error creating account: {e}")
+            raise
+
+    async def create_session(self, email: str, password: str):
+        """Create a new session (login)"""
+        try:
+            rows = await self._query("SELECT id, password_hash FROM accounts WHERE email = ?", (email.lower(),))
+            if not rows or not await asyncio.to_thread(_check_password, password, rows[0]["password_hash"]):
+                raise AuthenticationError("Invalid credentials.")
+
+            session = {"$id": ID.unique(), "secret": secrets.token_urlsafe(32), "userId": rows[0]["id"]}
+            await self._query(
+                "INSERT INTO sessions (id, secret, user_id, created_at) VALUES (?, ?, ?, ?)",
+                (session["$id"], session["secret"], session["userId"], datetime.now().isoformat())
+            )
+            return session
+        except Exception as e:
+            print(f"Error creating session: {e}")
+            raise
+
+    async def get_account(self, session_token: str):
+        """Get current user account details"""
+        try:
+            rows = await self._query(
+                "SELECT a.id, a.email, a.name FROM sessions s JOIN accounts a ON a.id = s.user_id WHERE s.secret = ?",
+                (session_token,)
+            )
+            if not rows:
+                raise AuthenticationError("Invalid session.")
+            return {"$id": rows[0]["id"], "email": rows[0]["email"], "name": rows[0]["name"]}
+        except Exception as e:
+            print(f"Error getting account: {e}")
+            raise
+
+    async def delete_session(self, session_token: str, session_id: str):
+        """Delete a session (logout)"""
+        try:
+            await self._query("DELETE FROM sessions WHERE id = ? AND secret = ?", (session_id, session_token))
+            return True
+        except Exception as e:
+            print(f"Error deleting session: {e}")
+            raise
+
+    # Database Operations
+    async def create_project(self, user_id: str, data: dict, document_id: str = None):
+        """Create a new project, with the given id if there is one"""
+        try:
+            project_id = document_id or ID.unique()
+            clean_data = {k: v for k, v in data.items() if v is not None and v != ""}
+            clean_data["user_id"] = user_id
+            clean_data.update(initial_counters())
+            created_at = clean_data.setdefault("created_at", datetime.now().isoformat())
+            clean_data.update(epoch_fields(created_at))
+            await self._query(
+                "INSERT INTO projects (id, user_id, created_at, data) VALUES (?, ?, ?, ?)",
+                (project_id, user_id, created_at, json.dumps(clean_data))
+            )
+            return {"$id": project_id, **clean_data}
+        except sqlite3.IntegrityError:
+            raise AlreadyCreatedError(project_id)
+        except Exception as e:
+            print(f"Error creating project: {e}")
+            raise
+
+    async def get_projects(self, user_id: str, order: str = "desc", limit: int = None, fields: list = None):
+        """Get a user's projects ordered by created_at, newest first by default"""
+        try:
+            return (await self._list_page("projects", "user_id", [user_id], order, limit, fields=fields))[0]
+        except Exception as e:
+            print(f"Error getting projects: {e}")
+            raise
+
+    async def iter_projects(self, user_id: str, order: str = "desc", page_size: int = None, fields: list = None):
+        """Iterate over a user's projects, fetching page_size documents per query"""
+        try:
+            page_size = page_size or settings.appwrite_page_size
+            async for project in self._iter_documents("projects", "user_id", [user_id], order, page_size, fields):
+                yield project
+        except Exception as e:
+            print(f"Error iterating projects: {e}")
+            raise
+
+    async def get_project(self, project_id: str):
+        """Get a single project"""
+        try:
+            return await self._get_document("projects", project_id)
+        except Exception as e:
+            print(f"Error getting project: {e}")
+            raise
+
+    async def get_projects_by_ids(self, project_ids: list, fields: list = None):
+        """Get the projects with the given ids, in that order, skipping ids that do not exist"""
+        try:
+            return await self._get_documents("projects", project_ids, fields)
+        except Exception as e:
+            print(f"Error getting projects by ids: {e}")
+            raise
+
+    async def update_project(self, project_id: str, data: dict):
+        """Update a project"""
+        try:
+            clean_data = {k: v for k, v in data.items() if v is not None and v != ""}
+            return await self._update_document("projects", project_id, with_epoch_fields(clean_data))
+        except Exception as e:
+            print(f"Error updating project: {e}")
+            raise
+
+    async def delete_project(self, project_id: str):
+        """Delete a project"""
+        try:
+            await self._query("DELETE FROM projects WHERE id = ?", (project_id,))
+            return True
+        except Exception as e:
+            print(f"Error deleting project: {e}")
+            raise
+
+    # Build Log Operations
+    async def create_build_log(self, project_id: str, data: dict, update_counters: bool = True, document_id: str = None):
+        """Create a new build log entry, with the given id if there is one
+
+        update_counters=False leaves the project's counters for a later
+        repair_project_counters, as bulk imports do.
+        """
+        try:
+            log_id = document_id or ID.unique()
+            clean_data = {k: v for k, v in data.items() if v is not None and v != "" and v != []}
+            clean_data["project_id"] = project_id
+            created_at = clean_data.setdefault("created_at", datetime.now().isoformat())
+            clean_data.update(epoch_fields(created_at))
+
+            def write(db):
+                db.execute(
+                    "INSERT INTO build_logs (id, project_id, created_at, data) VALUES (?, ?, ?, ?)",
+                    (log_id, project_id, created_at, json.dumps(clean_data))
+                )
+                if update_counters:
+                    self._apply_counters(db, project_id, new=clean_data)
+
+            await self._transaction(write)
+            return {"$id": log_id, **clean_data}
+        except sqlite3.IntegrityError:
+            raise AlreadyCreatedError(log_id)
+        except Exception as e:
+            print(f"Error creating build log: {e}")
+            raise
+
+    async def get_build_logs(self, project_id: str, order: str = "desc", limit: int = None, fields: list = None):
+        """Get a project's build logs ordered by created_at, newest first by default"""
+        try:
+            return (await self._list_page("build_logs", "project_id", [project_id], order, limit, fields=fields))[0]
+        except Exception as e:
+            print(f"Error getting build logs: {e}")
+            raise
+
+    async def get_build_log(self, log_id: str):
+        """Get a single build log"""
+        try:
+            return await self._get_document("build_logs", log_id)
+        except Exception as e:
+            print(f"Error getting build log: {e}")
+            raise
+
+    async def get_build_logs_by_ids(self, log_ids: list, fields: list = None):
+        """Get the build logs with the given ids, in that order, skipping ids that do not exist"""
+        try:
+            return await self._get_documents("build_logs", log_ids, fields)
+        except Exception as e:
+            print(f"Error getting build logs by ids: {e}")
+            raise
+
+    async def get_build_logs_page(self, project_id: str, cursor: str = None, order: str = "desc", page_size: int = None, fields: list = None):
+        """Get one page of a project's build logs and the cursor for the next page"""
+        try:
+            page_size = page_size or settings.appwrite_page_size
+            return await self._list_page("build_logs", "project_id", [project_id], order, page_size, cursor, fields)
+        except Exception as e:
+            print(f"Error getting build logs page: {e}")
+            raise
+
+    async def iter_build_logs(self, project_id: str, order: str = "desc", page_size: int = None, fields: list = None):
+        """Iterate over a project's build logs, fetching page_size documents per query"""
+        try:
+            page_size = page_size or settings.appwrite_page_size
+            async for log in self._iter_documents("build_logs", "project_id", [project_id], order, page_size, fields):
+                yield log
+        except Exception as e:
+            print(f"Error iterating build logs: {e}")
+            raise
+
+    async def get_build_logs_for_projects(self, project_ids: list, order: str = "desc", fields: list = None):
+        """Get build logs for many projects in one query, grouped by project id"""
+        grouped = {project_id: [] for project_id in project_ids}
+        async for log in self.iter_build_logs_for_projects(project_ids, order, fields=fields):
+            grouped.setdefault(log.get("project_id"), []).append(log)
+        return grouped
+
+    async def iter_build_logs_for_projects(self, project_ids: list, order: str = "desc", page_size: int = None, fields: list = None,
+                                           start_day: int = None, end_day: int = None):
+        """Iterate over the build logs of many projects, only those created within start_day and end_day if given"""
+        try:
+            if fields and "project_id" not in fields:
+                fields = [*fields, "project_id"]
+            project_ids = list(dict.fromkeys(project_ids))
+            if not project_ids:
+                return
+            page_size = page_size or settings.appwrite_page_size
+            days = (start_day, end_day)
+            async for log in self._iter_documents("build_logs", "project_id", project_ids, order, page_size, fields, days):
+                yield log
+        except Exception as e:
+            print(f"Error iterating build logs for projects: {e}")
+            raise
+
+    async def update_build_log(self, log_id: str, data: dict):
+        """Update a build log entry"""
+        try:
+            data = with_epoch_fields(data)
+
+            def write(db):
+                old = self._read_data(db, "build_logs", log_id)
+                log = {**old, **data}
+                db.execute(
+                    "UPDATE build_logs SET created_at = ?, data = ? WHERE id = ?",
+                    (log["created_at"], json.dumps(log), log_id)
+                )
+                if counters_changed(old, log):
+                    self._apply_counters(db, log.get("project_id"), old, log)
+                return {"$id": log_id, **log}
+
+            return await self._transaction(write)
+        except Exception as e:
+            print(f"Error updating build log: {e}")
+            raise
+
+    async def delete_build_log(self, log_id: str):
+        """Delete a build log entry"""
+        try:
+            def write(db):
+                row = db.execute("SELECT data FROM build_logs WHERE id = ?", (log_id,)).fetchone()
+                db.execute("DELETE FROM build_logs WHERE id = ?", (log_id,))
+                if row is not None:
+                    old = json.loads(row["data"])
+                    self._apply_counters(db, old.get("project_id"), old=old)
+
+            await self._transaction(write)
+            return True
+        except Exception as e:
+            print(f"Error deleting build log: {e}")
+            raise
+
+    async def delete_build_logs(self, project_id: str, log_ids: list):
+        """Delete build logs of a project being deleted, leaving its counters alone"""
+        try:
+            if log_ids:
+                placeholders = ", ".join("?" * len(log_ids))
+                await self._query(f"DELETE FROM build_logs WHERE id IN ({placeholders})", log_ids)
+            return True
+        except Exception as e:
+            print(f"Error deleting build logs: {e}")
+            raise
+
+    async def repair_project_counters(self, project_id: str):
+        """Recompute a project's build log counters from its logs and store them"""
+        try:
+            def write(db):
+                data = self._read_data(db, "projects", project_id)
+                counters = self._count_logs(db, project_id)
+                data.update(encode_counters(counters))
+                db.execute("UPDATE projects SET data = ? WHERE id = ?", (json.dumps(data), project_id))
+                return counters
+
+            return await self._transaction(write)
+        except Exception as e:
+            print(f"Error repairing project counters: {e}")
+            raise
+
+    # Daily Rollups
+    async def get_rollups(self, user_id: str, start_day: int, end_day: int = None):
+        """A user's rollups from start_day on (to end_day when given), oldest first"""
+        try:
+            sql = "SELECT day, log_count, counts FROM rollups WHERE user_id = ? AND day >= ?"
+            params = [user_id, start_day]
+            if end_day is not None:
+                sql += " AND day <= ?"
+                params.append(end_day)
+            rows = await self._query(f"{sql} ORDER BY day", params)
+            return [read_rollup(dict(row)) for row in rows]
+        except Exception as e:
+            print(f"Error getting rollups: {e}")
+            raise
+
+    async def update_rollups(self, user_id: str, changes: dict):
+        """Add {day: {project: {type: delta}}} to a user's rollups, when rollups are on"""
+        try:
+            if self.rollups and changes:
+                await self._transaction(lambda db: self._apply_rollups(db, user_id, changes))
+        except Exception as e:
+            print(f"Error updating rollups: {e}")
+            raise
+
+    async def rebuild_rollups(self, user_id: str):
+        """Recompute a user's rollups from their build logs, replacing the stored ones; returns the days"""
+        try:
+            def write(db):
+                rows = db.execute(
+                    "SELECT build_logs.data FROM build_logs JOIN projects ON projects.id = build_logs.project_id "
+                    "WHERE projects.user_id = ?", (user_id,)
+                )
+                days = rollups_from_logs(json.loads(row["data"]) for row in rows)
+                db.execute("DELETE FROM rollups WHERE user_id = ?", (user_id,))
+                for day, counts in days.items():
+                    self._write_rollup(db, user_id, day, counts)
+                return len(days)
+
+            return await self._transaction(write)
+        except Exception as e:
+            print(f"Error rebuilding rollups: {e}")
+            raise
+
+    # Storage Operations
+    def local_file_path(self, file_id: str) -> str:
+        return os.path.join(self.files_dir, os.path.basename(file_id))
+
+    def get_file_url(self, file_id: str):
+        """Get file download URL"""
+        return f"/files/{file_id}"
+
+    def _file_document(self, row) -> dict:
+        return {
+            "$id": row["id"],
+            "name": row["name"],
+            "sizeOriginal": row["size"],
+            "chunksUploaded": row["chunks_uploaded"],
+            "chunksTotal": row["chunks_total"]
+        }
+
+    def _write_chunk(self, file_id: str, offset: int, chunk: bytes):
+        os.makedirs(self.files_dir, exist_ok=True)
+        path = self.local_file_path(file_id)
+        with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+            f.seek(offset)
+            f.write(chunk)
+            f.truncate()
+
+    async def upload_file(self, file_content, file_name: str, owner_id: str = None):
+        """Store a file on local disk"""
+        try:
+            file_id = ID.unique()
+            await asyncio.to_thread(self._write_chunk, file_id, 0, file_content)
+            row = {"id": file_id, "name": file_name, "size": len(file_content), "chunks_uploaded": 1, "chunks_total": 1}
+            await self._query(
+                "INSERT INTO files (id, name, size, chunks_uploaded, chunks_total, created_at, owner_id) VALUES (?, ?, ?, 1, 1, ?, ?)",
+                (file_id, file_name, len(file_content), datetime.now().isoformat(), owner_id)
+            )
+            return self._file_document(row)
+        except Exception as e:
+            print(f"Error uploading file: {e}")
+            raise
+
+    async def upload_file_stream(self, file, file_name: str, size: int, file_id: str = None, on_progress=None,
+                                 owner_id: str = None):
+        """Store a file in 5 MB chunks, resuming after the chunks already written for file_id"""
+        try:
+            file_id = file_id or ID.unique()
+            total_chunks = max(1, math.ceil(size / UPLOAD_CHUNK_SIZE))
+            rows = await self._query("SELECT chunks_uploaded FROM files WHERE id = ?", (file_id,))
+            first_chunk = rows[0]["chunks_uploaded"] if rows else 0
+            if not rows:
+                await self._query(
+                    "INSERT INTO files (id, name, size, chunks_uploaded, chunks_total, created_at, owner_id) VALUES (?, ?, ?, 0, ?, ?, ?)",
+                    (file_id, file_name, size, total_chunks, datetime.now().isoformat(), owner_id)
+                )
+
+            await file.seek(first_chunk * UPLOAD_CHUNK_SIZE)
+            if on_progress:
+                on_progress(min(size, first_chunk * UPLOAD_CHUNK_SIZE))
+            for index in range(first_chunk, total_chunks):
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                await asyncio.to_thread(self._write_chunk, file_id, index * UPLOAD_CHUNK_SIZE, chunk)
+                await self._query("UPDATE files SET chunks_uploaded = ? WHERE id = ?", (index + 1, file_id))
+                if on_progress:
+                    on_progress(min(size, (index + 1) * UPLOAD_CHUNK_SIZE))
+
+            rows = await self._query("SELECT * FROM files WHERE id = ?", (file_id,))
+            return self._file_document(rows[0])
+        except Exception as e:
+            print(f"Error uploading file: {e}")
+            raise
+
+    async def get_file_owner(self, file_id: str):
+        """Id of the user who uploaded a file, None if it is gone or has no recorded uploader"""
+        rows = await self._query("SELECT owner_id FROM files WHERE id = ?", (file_id,))
+        return rows[0]["owner_id"] if rows else None
+
+    async def delete_file(self, file_id: str):
+        """Delete a file from storage"""
+        try:
+            await self._query("DELETE FROM files WHERE id = ?", (file_id,))
+            path = self.local_file_path(file_id)
+            if os.path.exists(path):
+                await asyncio.to_thread(os.remove, path)
+            return True
+        except Exception as e:
+            print(f"Error deleting file: {e}")
+            raise
@@ -0,0 +1,173 @@
+"""
+Storage backend interface shared by the Appwrite and SQLite implementations
+"""
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from app.config import get_settings
+
+
+class StorageError(Exception):
+    """Base class for errors raised by non-HTTP storage backends"""
+
+
+class NotFoundError(StorageError):
+    """The requested document, session or file does not exist"""
+
+
+class ConflictError(StorageError):
+    """A document with the same unique key already exists"""
+
+
+class AlreadyCreatedError(ConflictError):
+    """A create named a document id that exists: an earlier attempt of the same write succeeded"""
+
+    def __init__(self, document_id: str):
+        super().__init__(f"Document {document_id} already exists")
+        self.document_id = document_id
+
+
+class AuthenticationError(StorageError):
+    """Credentials or session are invalid"""
+
+
+class StorageBackend(ABC):
+    """Async operations the routes and AnalyticsService rely on
+
+    List methods order by created_at (newest first unless order="asc"),
+    accept `fields` to return only some attributes plus $id, and page with
+    a cursor that is the $id of the last document seen. The *_by_ids
+    reads return the documents that exist, in the order of the ids given.
+    Creates given a document_id raise AlreadyCreatedError when it is
+    taken, so a resent create is not written twice.
+    Build log writes keep the counters in app.services.project_counters up
+    to date on the log's project, except delete_build_logs, which clears
+    out the logs of a project being deleted. With rollups on (the
+    ANALYTICS_ROLLUPS setting) they also keep the owner's daily rollups
+    in app.services.rollups up to date.
+    Uploads record the owner_id given, and get_file_owner returns it (None
+    for a missing file or one uploaded without an owner).
+    """
+
+    # Authentication
+    @abstractmethod
+    async def create_account(self, email: str, password: str, name: str): ...
+
+    @abstractmethod
+    async def create_session(self, email: str, password: str): ...
+
+    @abstractmethod
+    async def get_account(self, session_token: str): ...
+
+    @abstractmethod
+    async def delete_session(self, session_token: str, session_id: str): ...
+
+    # Projects
+    @abstractmethod
+    async def create_project(self, user_id: str, data: dict, document_id: str = None): ...
+
+    @abstractmethod
+    async def get_projects(self, user_id: str, order: str = "desc", limit: int = None, fields: list = None): ...
+
+    @abstractmethod
+    def iter_projects(self, user_id: str, order: str = "desc", page_size: int = None, fields: list = None): ...
+
+    @abstractmethod
+    async def get_project(self, project_id: str): ...
+
+    @abstractmethod
+    async def get_projects_by_ids(self, project_ids: list, fields: list = None): ...
+
+    @abstractmethod
+    async def update_project(self, project_id: str, data: dict): ...
+
+    @abstractmethod
+    async def delete_project(self, project_id: str): ...
+
+    # Build logs
+    @abstractmethod
+    async def create_build_log(self, project_id: str, data: dict, update_counters: bool = True, document_id: str = None): ...
+
+    @abstractmethod
+    async def get_build_log(self, log_id: str): ...
+
+    @abstractmethod
+    async def get_build_logs_by_ids(self, log_ids: list, fields: list = None): ...
+
+    @abstractmethod
+    async def get_build_logs(self, project_id: str, order: str = "desc", limit: int = None, fields: list = None): ...
+
+    @abstractmethod
+    async def get_build_logs_page(self, project_id: str, cursor: str = None, order: str = "desc", page_size: int = None, fields: list = None): ...
+
+    @abstractmethod
+    def iter_build_logs(self, project_id: str, order: str = "desc", page_size: int = None, fields: list = None): ...
+
+    @abstractmethod
+    async def get_build_logs_for_projects(self, project_ids: list, order: str = "desc", fields: list = None): ...
+
+    @abstractmethod
+    def iter_build_logs_for_projects(self, project_ids: list, order: str = "desc", page_size: int = None, fields: list = None,
+                                     start_day: int = None, end_day: int = None): ...
+
+    @abstractmethod
+    async def update_build_log(self, log_id: str, data: dict): ...
+
+    @abstractmethod
+    async def delete_build_log(self, log_id: str): ...
+
+    @abstractmethod
+    async def delete_build_logs(self, project_id: str, log_ids: list): ...
+
+    @abstractmethod
+    async def repair_project_counters(self, project_id: str): ...
+
+    # Daily rollups
+    @abstractmethod
+    async def get_rollups(self, user_id: str, start_day: int, end_day: int = None): ...
+
+    @abstractmethod
+    async def update_rollups(self, user_id: str, changes: dict): ...
+
+    @abstractmethod
+    async def rebuild_rollups(self, user_id: str): ...
+
+    # Files
+    @abstractmethod
+    async def upload_file(self, file_content, file_name: str, owner_id: str = None): ...
+
+    @abstractmethod
+    async def upload_file_stream(self, file, file_name: str, size: int, file_id: str = None, on_progress=None,
+                                 owner_id: str = None): ...
+
+    @abstractmethod
+    async def get_file_owner(self, file_id: str): ...
+
+    @abstractmethod
+    async def delete_file(self, file_id: str): ...
+
+    @abstractmethod
+    def get_file_url(self, file_id: str): ...
+
+    def local_file_path(self, file_id: str) -> Optional[str]:
+        """Path of a file kept on this machine, or None if the backend serves files itself"""
+        return None
+
+    def health(self) -> dict:
+        """Backend details for the health check"""
+        return {}
+
+    async def aclose(self):
+        """Release connections held by the backend"""
+
+
+def create_storage() -> StorageBackend:
+    """Storage backend selected by the STORAGE_BACKEND setting"""
+    settings = get_settings()
+    if settings.storage_backend == "sqlite":
+        from app.services.sqlite_service import AsyncSQLiteService
+        return AsyncSQLiteService(settings.sqlite_path, settings.sqlite_files_dir)
+    if settings.storage_backend == "appwrite":
+        from app.services.appwrite_service import async_appwrite_service
+        return async_appwrite_service
+    raise ValueError(f"Unknown storage backend: {settings.storage_backend}")
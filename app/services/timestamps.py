@@ -0,0 +1,142 @@
+"""
+Numeric timestamps stored next to created_at on projects and build logs
+
+created_at is an ISO string, and older documents mix formats (with and
+without microseconds, offsets or a trailing Z). Every write also stores
+created_ts, the epoch seconds, and created_day, the number of the local
+calendar day since 1970-01-01, so analytics filter and bucket with
+integer math instead of re-parsing strings. Days follow the server's
+local time, like the naive datetime.now() the app writes created_at with.
+
+`python -m app.services.timestamps --user <user id>` sets them on
+documents written before they existed; until then readers fall back to
+parsing created_at.
+"""
+import argparse
+import asyncio
+import re
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+EPOCH_FIELDS = ['created_ts', 'created_day']
+
+EPOCH_DATE = date(1970, 1, 1)
+
+# Fractions beyond microseconds, which datetime.fromisoformat rejects
+_LONG_FRACTION = re.compile(r"(\.\d{6})\d+")
+
+
+def parse_timestamp(value) -> Optional[datetime]:
+    """A stored timestamp as a naive local datetime, or None if it cannot be read"""
+    if not isinstance(value, str) or not value:
+        return None
+    text = _LONG_FRACTION.sub(r"\1", value.strip().replace(" ", "T", 1))
+    if text.endswith(("Z", "z")):
+        text = text[:-1] + "+00:00"
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        try:
+            parsed = datetime.fromisoformat(text[:10])
+        except ValueError:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def day_number(value: date) -> int:
+    """Days from 1970-01-01 to a date"""
+    return (value - EPOCH_DATE).days
+
+
+def day_date(day: int) -> date:
+    """The date of a day number"""
+    return EPOCH_DATE + timedelta(days=day)
+
+
+def today() -> int:
+    return day_number(datetime.now().date())
+
+
+def weekday(day: int) -> int:
+    """Monday is 0, as with date.weekday(); 1970-01-01 was a Thursday"""
+    return (day + 3) % 7
+
+
+def epoch_fields(created_at) -> dict:
+    """created_ts and created_day for a created_at value, empty if it cannot be parsed"""
+    parsed = parse_timestamp(created_at)
+    if parsed is None:
+        return {}
+    return {'created_ts': int(parsed.timestamp()), 'created_day': day_number(parsed.date())}
+
+
+def with_epoch_fields(data: dict) -> dict:
+    """Document data with the numeric timestamps of its created_at added"""
+    if 'created_at' not in data:
+        return data
+    return {**data, **epoch_fields(data['created_at'])}
+
+
+def document_day(document: dict) -> Optional[int]:
+    """Local day number a document was created on, parsing created_at if it predates created_day"""
+    day = document.get('created_day')
+    if isinstance(day, int):
+        return day
+    return timestamp_day(document.get('created_at') or document.get('$createdAt'))
+
+
+def timestamp_day(value) -> Optional[int]:
+    """Local day number of a stored timestamp"""
+    parsed = parse_timestamp(value)
+    return None if parsed is None else day_number(parsed.date())
+
+
+def missing_epoch_fields(document: dict) -> dict:
+    """Numeric timestamps a document should store but does not, or stores differently"""
+    expected = epoch_fields(document.get('created_at'))
+    return {k: v for k, v in expected.items() if document.get(k) != v}
+
+
+async def backfill(storage, user_ids: list) -> dict:
+    """Set created_ts and created_day on every project and build log of the given users"""
+    fields = ['created_at', *EPOCH_FIELDS]
+    updated = {'projects': 0, 'logs': 0}
+    for user_id in user_ids:
+        project_ids = []
+        async for project in storage.iter_projects(user_id, fields=fields):
+            project_ids.append(project['$id'])
+            changes = missing_epoch_fields(project)
+            if changes:
+                await storage.update_project(project['$id'], changes)
+                updated['projects'] += 1
+
+        async for log in storage.iter_build_logs_for_projects(project_ids, fields=fields):
+            changes = missing_epoch_fields(log)
+            if changes:
+                await storage.update_build_log(log['$id'], changes)
+                updated['logs'] += 1
+    return updated
+
+
+async def _backfill_command(args):
+    from app.services.storage_backend import create_storage
+
+    storage = create_storage()
+    try:
+        updated = await backfill(storage, args.user)
+        print(f"Set numeric timestamps on {updated['projects']} project(s) and {updated['logs']} build log(s)")
+    finally:
+        await storage.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Set created_ts and created_day on documents written before they existed")
+    parser.add_argument("--user", action="append", required=True, help="backfill every project and build log of this user id")
+    args = parser.parse_args()
+    asyncio.run(_backfill_command(args))
+
+
+if __name__ == "__main__":
+    main()
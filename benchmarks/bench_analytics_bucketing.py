@@ -0,0 +1,142 @@
+"""
+Time bucketing of build logs for the dated analytics charts, with and without NumPy.
+
+Generates synthetic logs spread over the last --years years (created_at
+on each, and created_day on all but every --legacy-th one, so that share
+is parsed from the timestamp), then times filling the weekly count, the
+30-day activity chart, the 8-week trend and the yearly heatmap:
+
+    scan    the original per-chart loops: created_at[:10] looked up in a
+            list of dates, and every week tried in turn for the trend
+    bucket  DayCounts alone, fed the day numbers
+    engine  the whole AnalyticsEngine.add() path from log dicts to charts
+
+bucket and engine run once with the pure-Python counts and once with
+NumPy's, when it is installed, and must agree.
+
+Usage:
+    python benchmarks/bench_analytics_bucketing.py [--logs 1000000] [--years 3] [--legacy 0] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def synthetic_logs(count: int, years: int, legacy: int, today: int, seed: int = 7) -> list:
+    from app.services.timestamps import day_date
+
+    rng = random.Random(seed)
+    types = ['update', 'milestone', 'feature', 'bug_fix', 'note']
+    timestamps = {}
+    logs = []
+    for n in range(count):
+        day = today - rng.randrange(years * 365)
+        if day not in timestamps:
+            timestamps[day] = f"{day_date(day).isoformat()}T12:00:00"
+        log = {'project_id': f'p{n % 50}', 'log_type': types[n % len(types)], 'created_at': timestamps[day]}
+        if not (legacy and n % legacy == 0):
+            log['created_day'] = day
+        logs.append(log)
+    return logs
+
+
+def scan(logs: list, now: datetime) -> tuple:
+    """The charts computed the way they were before day numbers: string dates, one chart at a time"""
+    def dates(days):
+        return [(now - timedelta(days=days - i)).strftime('%Y-%m-%d') for i in range(days + 1)]
+
+    weekly_start = (now - timedelta(days=7)).strftime('%Y-%m-%d')
+    weekly = sum(1 for log in logs if log['created_at'][:10] >= weekly_start)
+
+    results = []
+    for days in (30, 365):
+        window = dates(days)
+        by_date = {}
+        for log in logs:
+            log_date = log['created_at'][:10]
+            if log_date in window:
+                by_date[log_date] = by_date.get(log_date, 0) + 1
+        results.append([by_date.get(date, 0) for date in window])
+
+    weeks = []
+    for i in range(7, -1, -1):
+        start = now - timedelta(weeks=i, days=now.weekday())
+        weeks.append([start.strftime('%Y-%m-%d'), (start + timedelta(days=6)).strftime('%Y-%m-%d'), 0])
+    for log in logs:
+        log_date = log['created_at'][:10]
+        for week in weeks:
+            if week[0] <= log_date <= week[1]:
+                week[2] += 1
+                break
+    return weekly, results[0], [week[2] for week in weeks], results[1]
+
+
+def best_of(repeat: int, work) -> tuple:
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = work()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run(args):
+    from app.services import bucketing
+    from app.services.analytics_engine import AnalyticsEngine
+    from app.services.bucketing import DayCounts
+    from app.services.timestamps import document_day, today, weekday
+
+    now = today()
+    logs = synthetic_logs(args.logs, args.years, args.legacy, now)
+    days = [document_day(log) for log in logs]
+    modes = [("python", False)] + ([("numpy", True)] if bucketing.np is not None else [])
+    if bucketing.np is None:
+        print("NumPy is not installed; timing the pure-Python buckets only")
+
+    def bucket(vectorized):
+        counts = DayCounts(vectorized)
+        for day in days:
+            counts.add(day)
+        return (counts.since(now - 7), counts.window(now - 30, 31), counts.window(now - weekday(now) - 49, 8, 7),
+                counts.window(now - 365, 366))
+
+    def engine(vectorized):
+        analytics = AnalyticsEngine([], now, counts=False, weekly=True, activity_days=30, trend_weeks=8,
+                                    heatmap_days=365, vectorized=vectorized)
+        for log in logs:
+            analytics.add(log)
+        return (analytics.weekly_logs, analytics.activity_over_time()['values'],
+                analytics.weekly_trend()['values'], [d['count'] for d in analytics.activity_heatmap()])
+
+    def report(label, mode, seconds):
+        print(f"{label:<8} {mode:<8} {seconds * 1000:9.1f} ms   {args.logs / seconds / 1e6:6.2f} M logs/s   "
+              f"x{baseline / seconds:7.2f}")
+
+    print(f"{args.logs:,} logs over {args.years} year(s)")
+    baseline, expected = best_of(1, lambda: scan(logs, datetime.now()))
+    report("scan", "python", baseline)
+    for label, work in (("bucket", bucket), ("engine", engine)):
+        for mode, vectorized in modes:
+            seconds, result = best_of(args.repeat, lambda: work(vectorized))
+            report(label, mode, seconds)
+            assert result == expected, f"{label} {mode} disagrees with scan"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logs", type=int, default=1_000_000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--legacy", type=int, default=0, help="every Nth log has only created_at (0 = none)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
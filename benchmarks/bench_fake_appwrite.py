@@ -0,0 +1,91 @@
+"""
+Page latency and Appwrite request fan-out against the in-process fake Appwrite.
+
+Seeds the fake server with one user's projects and build logs, points the
+app's Appwrite client at it, and times the main pages through the full
+FastAPI stack. Each upstream request waits --latency seconds, so the
+numbers show how request count and concurrency turn into page latency.
+
+Usage:
+    python benchmarks/bench_fake_appwrite.py [--projects 50] [--logs 20] [--calls 20]
+                                             [--latency 0.02] [--error-rate 0] [--cache] [--no-counters]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def run(args):
+    os.environ.setdefault("APPWRITE_PROJECT_ID", "bench")
+    os.environ.setdefault("APPWRITE_API_KEY", "bench")
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ["STORAGE_BACKEND"] = "appwrite"
+    if not args.cache:
+        os.environ["CACHE_MAX_ENTRIES"] = "0"
+
+    import httpx
+    import main
+    from app.config import get_settings
+    from tests.fake_appwrite import FakeAppwrite
+
+    settings = get_settings()
+    fake = FakeAppwrite(settings.appwrite_project_id, settings.appwrite_api_key,
+                        latency=args.latency, error_rate=args.error_rate)
+    seeded = fake.seed(settings.appwrite_database_id, settings.appwrite_projects_collection_id,
+                       settings.appwrite_build_logs_collection_id, projects=args.projects, logs_per_project=args.logs,
+                       counters=not args.no_counters)
+
+    storage = main.storage
+    await storage.client.aclose()
+    storage.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake))
+
+    pages = {
+        "GET /dashboard": "/dashboard",
+        "GET /projects/{id}": f"/projects/{seeded['project_ids'][0]}",
+        "GET /api/analytics": "/api/analytics",
+    }
+    print(f"{args.projects} projects x {args.logs} logs, {args.latency * 1000:.0f} ms per Appwrite call, "
+          f"error rate {args.error_rate:.0%}, cache {'on' if args.cache else 'off'}")
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                 cookies={"session": seeded["session"]["secret"]}) as client:
+        for label, path in pages.items():
+            await client.get(path)  # warm up
+            fake.reset_stats()
+            latencies, errors = [], 0
+            for _ in range(args.calls):
+                start = time.perf_counter()
+                response = await client.get(path)
+                latencies.append((time.perf_counter() - start) * 1000)
+                errors += response.status_code != 200
+
+            print(f"{label:<20} p50 {statistics.median(latencies):8.2f} ms   max {max(latencies):8.2f} ms   "
+                  f"{fake.total_calls / args.calls:6.1f} Appwrite calls/page   "
+                  f"peak concurrency {fake.peak_concurrency:3d}   errors {errors}")
+
+    await storage.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--logs", type=int, default=20)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every Appwrite call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of Appwrite calls answered with 503")
+    parser.add_argument("--cache", action="store_true", help="keep the service's read cache enabled")
+    parser.add_argument("--no-counters", action="store_true",
+                        help="seed projects without build log counters, as written before they existed")
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
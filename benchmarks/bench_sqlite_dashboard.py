@@ -0,0 +1,79 @@
+"""
+Dashboard latency on the SQLite storage backend.
+
+Seeds a temporary database with one user's projects and build logs, then
+times GET /dashboard through the full FastAPI stack (session lookup,
+project list, template render).
+
+Usage:
+    python benchmarks/bench_sqlite_dashboard.py [--projects 200] [--logs 20] [--calls 200]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def run(args, workdir):
+    os.environ.setdefault("APPWRITE_PROJECT_ID", "bench")
+    os.environ.setdefault("APPWRITE_API_KEY", "bench")
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ["STORAGE_BACKEND"] = "sqlite"
+    os.environ["SQLITE_PATH"] = os.path.join(workdir, "buildlog.db")
+    os.environ["SQLITE_FILES_DIR"] = os.path.join(workdir, "uploads")
+
+    import httpx
+    import main
+
+    storage = main.storage
+    await storage.create_account("bench@example.com", "benchmark", "Bench")
+    session = await storage.create_session("bench@example.com", "benchmark")
+    for p in range(args.projects):
+        project = await storage.create_project(session["userId"], {
+            "name": f"Project {p}",
+            "description": "Seeded by the dashboard benchmark",
+            "tech_stack": ["Python", "SQLite"],
+            "status": "in_progress",
+            "created_at": f"2025-01-01T00:{p // 60 % 60:02d}:{p % 60:02d}"
+        })
+        for n in range(args.logs):
+            await storage.create_build_log(project["$id"], {
+                "title": f"Log {n}", "content": "x" * 2000, "log_type": "update"
+            })
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", cookies={"session": session["secret"]}) as client:
+        await client.get("/dashboard")  # warm up
+        latencies = []
+        for _ in range(args.calls):
+            start = time.perf_counter()
+            response = await client.get("/dashboard")
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{args.projects} projects x {args.logs} logs, {args.calls} dashboard requests")
+    print(f"GET /dashboard on sqlite   mean {statistics.mean(latencies):7.3f} ms   "
+          f"p50 {statistics.median(latencies):7.3f} ms   p95 {p95:7.3f} ms")
+    await storage.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--logs", type=int, default=20)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        asyncio.run(run(args, workdir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Per-call latency of the Appwrite transport: one connection per call vs the pooled client.
+
+Runs against a local keep-alive HTTP server standing in for Appwrite, so the
+numbers isolate connection setup cost. Against Appwrite Cloud every fresh
+connection also pays a TLS handshake, so the real gap is larger.
+
+Usage:
+    python benchmarks/bench_transport.py [--calls 500]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROJECT_DOC = json.dumps({
+    "$id": "project123",
+    "name": "Benchmark Project",
+    "description": "Stand-in document served by the benchmark server",
+    "status": "in_progress",
+    "user_id": "user123"
+}).encode()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers every GET with the same project document, keeping connections open"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle plus
+    # delayed ACKs add ~40 ms to every reused connection
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(PROJECT_DOC)))
+        self.end_headers()
+        self.wfile.write(PROJECT_DOC)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def measure(call, calls):
+    """Return per-call latencies in milliseconds"""
+    call()  # warm up
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(name, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name:<28} mean {statistics.mean(latencies):7.3f} ms   "
+          f"p50 {statistics.median(latencies):7.3f} ms   p95 {p95:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+
+    server = start_server()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    os.environ.setdefault("APPWRITE_PROJECT_ID", "bench")
+    os.environ.setdefault("APPWRITE_API_KEY", "bench")
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ["APPWRITE_ENDPOINT"] = endpoint
+
+    import httpx
+    from app.services.appwrite_service import AppwriteService
+
+    service = AppwriteService()
+    url = f"{endpoint}/databases/{service.database_id}/collections/{service.projects_collection_id}/documents/project123"
+    headers = {
+        "X-Appwrite-Project": service.project_id,
+        "X-Appwrite-Key": service.api_key,
+        "Content-Type": "application/json"
+    }
+
+    # Previous behaviour: a new connection for every call. One client that
+    # closes each connection keeps client setup out of the measurement
+    fresh = httpx.Client(headers={"Connection": "close"})
+
+    def per_call_connection():
+        response = fresh.get(url, headers=headers)
+        response.raise_for_status()
+        return response.json()
+
+    def pooled():
+        # Bypass the document cache so every call reaches the server
+        service.cache.clear()
+        return service.get_project("project123")
+
+    print(f"{args.calls} get_project calls against {endpoint}")
+    report("before (connection per call)", measure(per_call_connection, args.calls))
+    report("after (pooled client)", measure(pooled, args.calls))
+
+    fresh.close()
+    service.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,51 @@
-from fastapi import FastAPI, Request, Form, UploadFile, File, HTTPException, Depends, Response
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi import FastAPI, Request, Form, UploadFile, File, HTTPException, Depends, Response, BackgroundTasks, Query
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from datetime import datetime
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import date, datetime
 import markdown
 from typing import Optional, List
 import json
+import os
+from appwrite.id import ID
 
 from app.config import get_settings
-from app.services.appwrite_service import appwrite_service
-from app.services.ai_service import ai_service
-from app.services.analytics_service import AnalyticsService
+from app.services.storage_backend import AlreadyCreatedError, create_storage
+from app.services.ai_service import (
+    ai_service, README_LOG_FIELDS, README_LOG_LIMIT, SUMMARY_LOG_FIELDS, SUMMARY_LOG_LIMIT
+)
+from app.services.analytics_cache import AnalyticsCache, etag_matches
+from app.services.analytics_service import ACTIVITY_DAYS, AnalyticsService
+from app.services.bulk_import import import_build_logs, import_format, iter_csv_rows, iter_ndjson_rows
+from app.services.cascade import cascade_total, delete_project_cascade
+from app.services.identity_map import IdentityMap
+from app.services.idempotency import IDEMPOTENCY_HEADER, idempotent_document_id
+from app.services.progress import ProgressTracker
+from app.services.timestamps import day_number, today
 from app.models.schemas import (
     ProjectCreate, ProjectUpdate, BuildLogCreate, BuildLogUpdate
 )
 
+
+# Appwrite or SQLite, chosen by the STORAGE_BACKEND setting
+storage = create_storage()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Release storage connections on shutdown"""
+    yield
+    await storage.aclose()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="BuildLog",
     description="AI-Powered Hackathon & Project Documentation Platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Mount static files
@@ -31,11 +57,51 @@ templates = Jinja2Templates(directory="app/templates")
 settings = get_settings()
 
 # Initialize analytics service
-analytics_service = AnalyticsService(appwrite_service)
+analytics_service = AnalyticsService(storage)
+
+# Each user's last computed /api/analytics response, until they next write
+analytics_cache = AnalyticsCache(settings.analytics_cache_users)
+
+# Project attributes rendered on the dashboard cards
+DASHBOARD_PROJECT_FIELDS = ["name", "status", "description", "tech_stack", "created_at", "log_count", "last_log_at"]
+
+# Chunked uploads, keyed by the upload id (also the Appwrite file id) and
+# recording the user who started each one
+upload_progress = ProgressTracker()
+
+# Project deletions cascading to logs and files in the background, keyed by project id
+project_deletions = ProgressTracker()
+
+
+def request_storage() -> IdentityMap:
+    """Storage for one request; repeated reads within it are answered from memory"""
+    return IdentityMap(storage)
+
+
+def request_document_id(request: Request, scope: str, form_key: Optional[str]) -> Optional[str]:
+    """Document id for the request's idempotency key, from the header or the form field"""
+    try:
+        return idempotent_document_id(scope, request.headers.get(IDEMPOTENCY_HEADER) or form_key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def require_owner(project: dict, user: dict):
+    """404 unless the user owns the project, so other users' project ids reveal nothing"""
+    if project.get("user_id") != user["$id"]:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+
+def owned_upload(upload_id: str, user: dict) -> dict:
+    """Progress of an upload the user started; 404 for unknown uploads and other users' ones"""
+    progress = upload_progress.get(upload_id)
+    if progress is None or progress.get("owner") != user["$id"]:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return progress
 
 
 # Authentication dependency
-async def get_current_user(request: Request):
+async def get_current_user(request: Request, store: IdentityMap = Depends(request_storage)):
     """Get current user from session cookie"""
     session_token = request.cookies.get("session")
 
@@ -47,7 +113,7 @@ async def get_current_user(request: Request):
         )
 
     try:
-        user = appwrite_service.get_account(session_token)
+        user = await store.get_account(session_token)
         return user
     except Exception as e:
         print(f"Error getting user from session: {e}")
@@ -58,7 +124,7 @@ async def get_current_user(request: Request):
         )
 
 
-async def get_current_user_optional(request: Request):
+async def get_current_user_optional(request: Request, store: IdentityMap = Depends(request_storage)):
     """Get current user from session cookie, returns None if not authenticated"""
     session_token = request.cookies.get("session")
 
@@ -66,7 +132,7 @@ async def get_current_user_optional(request: Request):
         return None
 
     try:
-        user = appwrite_service.get_account(session_token)
+        user = await store.get_account(session_token)
         return user
     except Exception:
         return None
@@ -74,10 +140,8 @@ async def get_current_user_optional(request: Request):
 
 # Routes
 @app.get("/", response_class=HTMLResponse)
-async def home(request: Request):
+async def home(request: Request, user: Optional[dict] = Depends(get_current_user_optional)):
     """Homepage - redirect to dashboard if logged in, otherwise show landing page"""
-    user = await get_current_user_optional(request)
-
     if user:
         return RedirectResponse(url="/dashboard", status_code=302)
 
@@ -90,9 +154,8 @@ async def home(request: Request):
 
 # Authentication Routes
 @app.get("/login", response_class=HTMLResponse)
-async def login_page(request: Request):
+async def login_page(request: Request, user: Optional[dict] = Depends(get_current_user_optional)):
     """Show login page"""
-    user = await get_current_user_optional(request)
     if user:
         return RedirectResponse(url="/dashboard", status_code=302)
 
@@ -114,7 +177,7 @@ async def login(
     """Handle login form submission"""
     try:
         # Create session with Appwrite
-        session = appwrite_service.create_session(email, password)
+        session = await storage.create_session(email, password)
 
         # Create redirect response
         redirect = RedirectResponse(url="/dashboard", status_code=303)
@@ -150,9 +213,8 @@ async def login(
 
 
 @app.get("/signup", response_class=HTMLResponse)
-async def signup_page(request: Request):
+async def signup_page(request: Request, user: Optional[dict] = Depends(get_current_user_optional)):
     """Show signup page"""
-    user = await get_current_user_optional(request)
     if user:
         return RedirectResponse(url="/dashboard", status_code=302)
 
@@ -175,10 +237,10 @@ async def signup(
     """Handle signup form submission"""
     try:
         # Create account with Appwrite
-        appwrite_service.create_account(email, password, name)
+        await storage.create_account(email, password, name)
 
         # Automatically log in after signup
-        session = appwrite_service.create_session(email, password)
+        session = await storage.create_session(email, password)
 
         # Create redirect response
         redirect = RedirectResponse(url="/dashboard", status_code=303)
@@ -228,7 +290,7 @@ async def logout(request: Request):
 
         if session_token and session_id:
             try:
-                appwrite_service.delete_session(session_token, session_id)
+                await storage.delete_session(session_token, session_id)
             except Exception as e:
                 print(f"Error deleting session: {e}")
 
@@ -250,10 +312,15 @@ async def logout(request: Request):
 
 
 @app.get("/dashboard", response_class=HTMLResponse)
-async def dashboard(request: Request, user: dict = Depends(get_current_user)):
+async def dashboard(
+    request: Request,
+    user: dict = Depends(get_current_user),
+    store: IdentityMap = Depends(request_storage)
+):
     """User dashboard with all projects"""
     try:
-        projects = appwrite_service.get_projects(user["$id"])
+        projects = await store.get_projects(user["$id"], fields=DASHBOARD_PROJECT_FIELDS)
+        projects = [p for p in projects if not project_deletions.running(p["$id"])]
 
         return templates.TemplateResponse("dashboard.html", {
             "request": request,
@@ -286,13 +353,66 @@ async def analytics_dashboard(request: Request, user: dict = Depends(get_current
 
 
 @app.get("/api/analytics")
-async def get_analytics(request: Request, user: dict = Depends(get_current_user)):
-    """Get analytics data"""
+async def get_analytics(
+    request: Request,
+    user: dict = Depends(get_current_user),
+    store: IdentityMap = Depends(request_storage)
+):
+    """Get analytics data
+
+    The response carries a strong ETag and is kept until the user next
+    writes a project or build log, or the day changes; a request whose
+    If-None-Match names the current ETag gets 304 Not Modified without
+    the analytics being read or computed.
+    """
+    user_id = user["$id"]
+    cached = analytics_cache.get(user_id)
+    if cached is None:
+        version = analytics_cache.version(user_id)
+        try:
+            analytics = await analytics_service.get_complete_analytics(user_id, storage=store, raise_errors=True)
+            cached = analytics_cache.set(user_id, version, analytics)
+        except Exception as e:
+            print(f"Error getting analytics: {e}")
+            return JSONResponse({
+                "error": str(e)
+            }, status_code=500)
+
+    etag, body = cached
+    # no-cache: the browser may keep the response but revalidates it on every visit
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.get("/api/analytics/activity")
+async def get_analytics_activity(
+    request: Request,
+    start: Optional[date] = Query(None, alias="from"),
+    end: Optional[date] = Query(None, alias="to"),
+    granularity: str = "day",
+    project_id: Optional[str] = None,
+    log_type: Optional[str] = None,
+    user: dict = Depends(get_current_user),
+    store: IdentityMap = Depends(request_storage)
+):
+    """Build logs per day, week or month between two dates, both included
+
+    from and to are ISO dates, by default the last 30 days up to today.
+    project_id and log_type narrow the count to one project or log type.
+    Only the logs (or daily rollups) of the requested days are read.
+    """
+    end_day = day_number(end) if end else today()
+    start_day = day_number(start) if start else end_day - ACTIVITY_DAYS
     try:
-        analytics = analytics_service.get_complete_analytics(user["$id"])
-        return JSONResponse(analytics)
+        return await analytics_service.get_activity(
+            user["$id"], start_day, end_day, granularity, project_id, log_type, storage=store
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print(f"Error getting analytics: {e}")
+        print(f"Error getting activity: {e}")
         return JSONResponse({
             "error": str(e)
         }, status_code=500)
@@ -305,7 +425,8 @@ async def new_project_form(request: Request, user: dict = Depends(get_current_us
         "request": request,
         "title": "Create New Project",
         "user": user,
-        "project": None
+        "project": None,
+        "idempotency_key": ID.unique()
     })
 
 
@@ -318,11 +439,17 @@ async def create_project(
     tech_stack: str = Form(""),
     repository_url: str = Form(""),
     demo_url: str = Form(""),
-    tags: str = Form("")
+    tags: str = Form(""),
+    idempotency_key: Optional[str] = Form(None),
+    store: IdentityMap = Depends(request_storage)
 ):
-    """Create a new project"""
-    try:
+    """Create a new project
 
+    A resent request with the same idempotency key lands on the project
+    the first one created.
+    """
+    document_id = request_document_id(request, f"project:{user['$id']}", idempotency_key)
+    try:
         project_data = {
             "name": name,
             "description": description,
@@ -335,28 +462,40 @@ async def create_project(
             "updated_at": datetime.now().isoformat()
         }
 
-        project = appwrite_service.create_project(user["$id"], project_data)
-        return RedirectResponse(url=f"/projects/{project['$id']}", status_code=303)
+        try:
+            with analytics_cache.writing(user["$id"]):
+                project_id = (await store.create_project(user["$id"], project_data, document_id=document_id))["$id"]
+        except AlreadyCreatedError as e:
+            project_id = e.document_id
+        return RedirectResponse(url=f"/projects/{project_id}", status_code=303)
     except Exception as e:
         print(f"Error creating project: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/projects/{project_id}", response_class=HTMLResponse)
-async def view_project(request: Request, project_id: str, user: dict = Depends(get_current_user)):
-    """View single project with all build logs"""
+async def view_project(
+    request: Request,
+    project_id: str,
+    after: Optional[str] = None,
+    user: dict = Depends(get_current_user),
+    store: IdentityMap = Depends(request_storage)
+):
+    """View single project with its build log timeline, one page at a time"""
     try:
-        project = appwrite_service.get_project(project_id)
-        build_logs = appwrite_service.get_build_logs(project_id)
-
-        # Sort build logs by created_at (newest first)
-        build_logs.sort(key=lambda x: x.get("created_at", ""), reverse=True)
+        # Build logs come back newest first; `after` continues with older entries
+        project, (build_logs, next_cursor) = await asyncio.gather(
+            store.get_project(project_id),
+            store.get_build_logs_page(project_id, cursor=after)
+        )
 
         return templates.TemplateResponse("project_detail.html", {
             "request": request,
             "title": project.get("name", "Project"),
             "project": project,
             "build_logs": build_logs,
+            "next_cursor": next_cursor,
+            "after": after,
             "user": user
         })
     except Exception as e:
@@ -365,10 +504,15 @@ async def view_project(request: Request, project_id: str, user: dict = Depends(g
 
 
 @app.get("/projects/{project_id}/edit", response_class=HTMLResponse)
-async def edit_project_form(request: Request, project_id: str, user: dict = Depends(get_current_user)):
+async def edit_project_form(
+    request: Request,
+    project_id: str,
+    user: dict = Depends(get_current_user),
+    store: IdentityMap = Depends(request_storage)
+):
     """Show edit project form"""
     try:
-        project = appwrite_service.get_project(project_id)
+        project = await store.get_project(project_id)
 
         return templates.TemplateResponse("project_form.html", {
             "request": request,
@@ -392,7 +536,8 @@ async def update_project(
     repository_url: str = Form(""),
     demo_url: str = Form(""),
     tags: str = Form(""),
-    status: str = Form("in_progress")
+    status: str = Form("in_progress"),
+    store: IdentityMap = Depends(request_storage)
 ):
     """Update a project"""
     try:
@@ -407,7 +552,8 @@ async def update_project(
             "updated_at": datetime.now().isoformat()
         }
 
-        appwrite_service.update_project(project_id, project_data)
+        with analytics_cache.writing(user["$id"]):
+            await store.update_project(project_id, project_data)
         return RedirectResponse(url=f"/projects/{project_id}", status_code=303)
     except Exception as e:
         print(f"Error updating project: {e}")
@@ -415,14 +561,40 @@ async def update_project(
 
 
 @app.post("/projects/{project_id}/delete")
-async def delete_project(request: Request, project_id: str, user: dict = Depends(get_current_user)):
-    """Delete a project"""
+async def delete_project(
+    request: Request,
+    project_id: str,
+    background_tasks: BackgroundTasks,
+    user: dict = Depends(get_current_user),
+    store: IdentityMap = Depends(request_storage)
+):
+    """Delete a project; its build logs and files are removed in the background
+
+    The project disappears from the dashboard at once. Poll
+    /projects/{project_id}/delete/progress to follow the cascade.
+    """
     try:
-        appwrite_service.delete_project(project_id)
-        return RedirectResponse(url="/dashboard", status_code=303)
+        project = await store.get_project(project_id)
     except Exception as e:
         print(f"Error deleting project: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=404, detail="Project not found")
+    require_owner(project, user)
+
+    if not project_deletions.running(project_id):
+        project_deletions.start(project_id, cascade_total(project), owner=user["$id"])
+        background_tasks.add_task(delete_project_cascade, storage, project_id, user["$id"], project_deletions)
+        # Runs after the cascade, which records its own failures rather than raising
+        background_tasks.add_task(analytics_cache.bump, user["$id"])
+    return RedirectResponse(url="/dashboard", status_code=303)
+
+
+@app.get("/projects/{project_id}/delete/progress")
+async def delete_project_status(project_id: str, user: dict = Depends(get_current_user)):
+    """Progress of a project's cascading delete: build logs done, files deleted and failed"""
+    progress = project_deletions.get(project_id)
+    if progress is None or progress.get("owner") != user["$id"]:
+        raise HTTPException(status_code=404, detail="Deletion not found")
+    return progress
 
 
 @app.post("/projects/{project_id}/status/{new_status}")
@@ -430,7 +602,8 @@ async def update_project_status(
     request: Request,
     project_id: str,
     new_status: str,
-    user: dict = Depends(get_current_user)
+    user: dict = Depends(get_current_user),
+    store: IdentityMap = Depends(request_storage)
 ):
     """Quick update project status"""
     try:
@@ -445,7 +618,8 @@ async def update_project_status(
             "updated_at": datetime.now().isoformat()
         }
 
-        appwrite_service.update_project(project_id, project_data)
+        with analytics_cache.writing(user["$id"]):
+            await store.update_project(project_id, project_data)
         return RedirectResponse(url=f"/projects/{project_id}", status_code=303)
     except Exception as e:
         print(f"Error updating project status: {e}")
@@ -453,17 +627,23 @@ async def update_project_status(
 
 
 @app.get("/projects/{project_id}/logs/new", response_class=HTMLResponse)
-async def new_log_form(request: Request, project_id: str, user: dict = Depends(get_current_user)):
+async def new_log_form(
+    request: Request,
+    project_id: str,
+    user: dict = Depends(get_current_user),
+    store: IdentityMap = Depends(request_storage)
+):
     """Show create build log form"""
     try:
-        project = appwrite_service.get_project(project_id)
+        project = await store.get_project(project_id)
 
         return templates.TemplateResponse("log_form.html", {
             "request": request,
             "title": f"New Log for {project.get('name')}",
             "user": user,
             "project": project,
-            "log": None
+            "log": None,
+            "idempotency_key": ID.unique()
         })
     except Exception as e:
         print(f"Error loading log form: {e}")
@@ -478,9 +658,15 @@ async def create_build_log(
     title: str = Form(...),
     content: str = Form(...),
     log_type: str = Form("update"),
-    tags: str = Form("")
+    tags: str = Form(""),
+    idempotency_key: Optional[str] = Form(None),
+    store: IdentityMap = Depends(request_storage)
 ):
-    """Create a new build log entry"""
+    """Create a new build log entry
+
+    A resent request with the same idempotency key does not add a second log.
+    """
+    document_id = request_document_id(request, f"build_log:{project_id}", idempotency_key)
     try:
         log_data = {
             "title": title,
@@ -493,24 +679,70 @@ async def create_build_log(
             "created_at": datetime.now().isoformat()
         }
 
-        appwrite_service.create_build_log(project_id, log_data)
+        try:
+            with analytics_cache.writing(user["$id"]):
+                await store.create_build_log(project_id, log_data, document_id=document_id)
+        except AlreadyCreatedError:
+            pass
         return RedirectResponse(url=f"/projects/{project_id}", status_code=303)
     except Exception as e:
         print(f"Error creating build log: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/projects/{project_id}/logs/import")
+async def bulk_import_build_logs(
+    request: Request,
+    project_id: str,
+    user: dict = Depends(get_current_user),
+    store: IdentityMap = Depends(request_storage)
+):
+    """Import build logs streamed as NDJSON (application/x-ndjson) or CSV (text/csv)
+
+    Rows carry the BuildLogCreate fields and an optional created_at; CSV
+    tags and images are comma-separated. Resending an import with the
+    same Idempotency-Key header skips the rows already written. Returns
+    the imported, duplicate and failed row counts with the first row errors.
+    """
+    parser = import_format(request.headers.get("content-type"))
+    if parser is None:
+        raise HTTPException(status_code=415, detail="Send application/x-ndjson or text/csv")
+
+    try:
+        project = await store.get_project(project_id)
+    except Exception as e:
+        print(f"Error loading project for import: {e}")
+        raise HTTPException(status_code=404, detail="Project not found")
+    require_owner(project, user)
+
+    # Rows take their document ids from the key, so reject an unusable one up front
+    request_document_id(request, f"build_log:{project_id}", None)
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    rows = iter_csv_rows(request.stream()) if parser == "csv" else iter_ndjson_rows(request.stream())
+    try:
+        with analytics_cache.writing(user["$id"]):
+            return await import_build_logs(store, project_id, rows, key=key, user_id=user["$id"])
+    except Exception as e:
+        print(f"Error importing build logs: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/projects/{project_id}/logs/{log_id}/edit", response_class=HTMLResponse)
-async def edit_log_form(request: Request, project_id: str, log_id: str, user: dict = Depends(get_current_user)):
+async def edit_log_form(
+    request: Request,
+    project_id: str,
+    log_id: str,
+    user: dict = Depends(get_current_user),
+    store: IdentityMap = Depends(request_storage)
+):
     """Show edit build log form"""
     try:
-        project = appwrite_service.get_project(project_id)
-
-        # Get the specific log
-        build_logs = appwrite_service.get_build_logs(project_id)
-        log = next((log for log in build_logs if log["$id"] == log_id), None)
+        project, log = await asyncio.gather(
+            store.get_project(project_id),
+            store.get_build_log(log_id)
+        )
 
-        if not log:
+        if log.get("project_id") != project_id:
             raise HTTPException(status_code=404, detail="Log not found")
 
         return templates.TemplateResponse("log_form.html", {
@@ -534,7 +766,8 @@ async def update_build_log(
     title: str = Form(...),
     content: str = Form(...),
     log_type: str = Form("update"),
-    tags: str = Form("")
+    tags: str = Form(""),
+    store: IdentityMap = Depends(request_storage)
 ):
     """Update a build log entry"""
     try:
@@ -545,7 +778,8 @@ async def update_build_log(
             "tags": tags.split(",") if tags else []
         }
 
-        appwrite_service.update_build_log(log_id, log_data)
+        with analytics_cache.writing(user["$id"]):
+            await store.update_build_log(log_id, log_data)
         return RedirectResponse(url=f"/projects/{project_id}", status_code=303)
     except Exception as e:
         print(f"Error updating build log: {e}")
@@ -553,10 +787,17 @@ async def update_build_log(
 
 
 @app.post("/projects/{project_id}/logs/{log_id}/delete")
-async def delete_build_log(request: Request, project_id: str, log_id: str, user: dict = Depends(get_current_user)):
+async def delete_build_log(
+    request: Request,
+    project_id: str,
+    log_id: str,
+    user: dict = Depends(get_current_user),
+    store: IdentityMap = Depends(request_storage)
+):
     """Delete a build log entry"""
     try:
-        appwrite_service.delete_build_log(log_id)
+        with analytics_cache.writing(user["$id"]):
+            await store.delete_build_log(log_id)
         return RedirectResponse(url=f"/projects/{project_id}", status_code=303)
     except Exception as e:
         print(f"Error deleting build log: {e}")
@@ -564,14 +805,15 @@ async def delete_build_log(request: Request, project_id: str, log_id: str, user:
 
 
 @app.get("/projects/{project_id}/export", response_class=HTMLResponse)
-async def export_to_markdown(request: Request, project_id: str, user: dict = Depends(get_current_user)):
+async def export_to_markdown(
+    request: Request,
+    project_id: str,
+    user: dict = Depends(get_current_user),
+    store: IdentityMap = Depends(request_storage)
+):
     """Export project to markdown"""
     try:
-        project = appwrite_service.get_project(project_id)
-        build_logs = appwrite_service.get_build_logs(project_id)
-
-        # Sort build logs by created_at
-        build_logs.sort(key=lambda x: x.get("created_at", ""))
+        project = await store.get_project(project_id)
 
         # Generate markdown
         md_content = f"# {project.get('name')}\n\n"
@@ -588,7 +830,8 @@ async def export_to_markdown(request: Request, project_id: str, user: dict = Dep
 
         md_content += "## Build Log\n\n"
 
-        for log in build_logs:
+        # Stream logs oldest first so only one page is held at a time
+        async for log in store.iter_build_logs(project_id, order="asc"):
             md_content += f"### {log.get('title')} ({log.get('log_type')})\n\n"
             md_content += f"*{log.get('created_at', '')}*\n\n"
             md_content += f"{log.get('content', '')}\n\n"
@@ -608,14 +851,13 @@ async def export_to_markdown(request: Request, project_id: str, user: dict = Dep
 
 
 @app.get("/portfolio/{project_id}", response_class=HTMLResponse)
-async def public_portfolio(request: Request, project_id: str):
+async def public_portfolio(request: Request, project_id: str, store: IdentityMap = Depends(request_storage)):
     """Public portfolio page for a project"""
     try:
-        project = appwrite_service.get_project(project_id)
-        build_logs = appwrite_service.get_build_logs(project_id)
-
-        # Sort build logs by created_at
-        build_logs.sort(key=lambda x: x.get("created_at", ""))
+        project, build_logs = await asyncio.gather(
+            store.get_project(project_id),
+            store.get_build_logs(project_id, order="asc")
+        )
 
         return templates.TemplateResponse("portfolio.html", {
             "request": request,
@@ -628,23 +870,76 @@ async def public_portfolio(request: Request, project_id: str):
         raise HTTPException(status_code=404, detail="Project not found")
 
 
+@app.post("/upload/new")
+async def new_upload(size: int = Form(..., ge=0), user: dict = Depends(get_current_user)):
+    """Reserve an upload id for a file of `size` bytes, to poll its progress while it uploads"""
+    upload_id = ID.unique()
+    upload_progress.start(upload_id, size, owner=user["$id"])
+    return {"upload_id": upload_id}
+
+
 @app.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
-    """Upload a file to Appwrite Storage"""
+async def upload_file(
+    file: UploadFile = File(...),
+    upload_id: Optional[str] = Form(None),
+    user: dict = Depends(get_current_user)
+):
+    """Upload a file to Appwrite Storage in chunks
+
+    The server names every upload. Send the `upload_id` from POST
+    /upload/new (or from an earlier answer) to poll
+    /upload/{upload_id}/progress while the upload runs, and resend it to
+    resume a failed upload; only the user who started the upload can
+    resume it, and only with a file of the same size.
+    """
+    size = file.size
+    if size is None:
+        size = file.file.seek(0, 2)
+
+    if upload_id:
+        if owned_upload(upload_id, user)["total"] != size:
+            raise HTTPException(status_code=409, detail="The file's size differs from the upload being resumed")
+    else:
+        upload_id = ID.unique()
+
     try:
-        file_content = await file.read()
-        uploaded_file = appwrite_service.upload_file(file_content, file.filename)
+        upload_progress.start(upload_id, size, owner=user["$id"])
+        uploaded_file = await storage.upload_file_stream(
+            file, file.filename, size, file_id=upload_id, owner_id=user["$id"],
+            on_progress=lambda done: upload_progress.update(upload_id, done)
+        )
+        upload_progress.finish(upload_id)
 
         return JSONResponse({
             "success": True,
             "file_id": uploaded_file["$id"],
-            "filename": file.filename
+            "filename": file.filename,
+            "upload_id": upload_id,
+            "size": size
         })
     except Exception as e:
         print(f"Error uploading file: {e}")
+        upload_progress.fail(upload_id, str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/files/{file_id}")
+async def view_file(file_id: str):
+    """Serve an uploaded file from local storage, or send the browser to Appwrite's copy"""
+    path = storage.local_file_path(file_id)
+    if path is None:
+        return RedirectResponse(url=storage.get_file_url(file_id), status_code=302)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="File not found")
+    return FileResponse(path)
+
+
+@app.get("/upload/{upload_id}/progress")
+async def upload_status(upload_id: str, user: dict = Depends(get_current_user)):
+    """Progress of one of the user's uploads"""
+    return owned_upload(upload_id, user)
+
+
 # AI-powered endpoints
 @app.post("/ai/generate-description")
 async def generate_project_description(
@@ -724,7 +1019,8 @@ async def ai_status():
 
 @app.post("/ai/generate-summary")
 async def generate_project_summary(
-    project_id: str = Form(...)
+    project_id: str = Form(...),
+    store: IdentityMap = Depends(request_storage)
 ):
     """Generate AI-powered project summary"""
     try:
@@ -734,12 +1030,11 @@ async def generate_project_summary(
                 "error": "AI features are not enabled. Please configure OPENAI_API_KEY in your environment."
             }, status_code=400)
 
-        # Get project and logs
-        project = appwrite_service.get_project(project_id)
-        build_logs = appwrite_service.get_build_logs(project_id)
-
-        # Sort logs by created_at (newest first)
-        build_logs.sort(key=lambda x: x.get("created_at", ""), reverse=True)
+        # Get project and the logs the summary uses (newest first)
+        project, build_logs = await asyncio.gather(
+            store.get_project(project_id),
+            store.get_build_logs(project_id, limit=SUMMARY_LOG_LIMIT, fields=SUMMARY_LOG_FIELDS)
+        )
 
         summary = ai_service.generate_project_summary(
             project.get("name", ""),
@@ -800,7 +1095,8 @@ async def suggest_tags(
 
 @app.post("/ai/generate-readme")
 async def generate_readme(
-    project_id: str = Form(...)
+    project_id: str = Form(...),
+    store: IdentityMap = Depends(request_storage)
 ):
     """Generate AI-powered README from project data"""
     try:
@@ -810,12 +1106,11 @@ async def generate_readme(
                 "error": "AI features are not enabled. Please configure OPENAI_API_KEY in your environment."
             }, status_code=400)
 
-        # Get project and logs
-        project = appwrite_service.get_project(project_id)
-        build_logs = appwrite_service.get_build_logs(project_id)
-
-        # Sort logs by created_at
-        build_logs.sort(key=lambda x: x.get("created_at", ""))
+        # Get project and the logs the README uses (oldest first)
+        project, build_logs = await asyncio.gather(
+            store.get_project(project_id),
+            store.get_build_logs(project_id, order="asc", limit=README_LOG_LIMIT, fields=README_LOG_FIELDS)
+        )
 
         readme = ai_service.generate_readme(
             project.get("name", ""),
@@ -845,8 +1140,13 @@ async def generate_readme(
 # Health check endpoint
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "service": "BuildLog API"}
+    """Health check endpoint, with storage backend details"""
+    return {
+        "status": "healthy",
+        "service": "BuildLog API",
+        **storage.health(),
+        "analytics_cache": analytics_cache.stats()
+    }
 
 
 if __name__ == "__main__":
@@ -15,7 +15,17 @@ os.environ['SECRET_KEY'] = 'test_secret_key_for_testing'
 os.environ['DEBUG'] = 'True'
 
 import pytest
-from unittest.mock import patch
+
+
+async def _async_iter(items):
+    for item in items:
+        yield item
+
+
+@pytest.fixture
+def async_iter():
+    """Build an async iterator over a list, standing in for paginated service iterators"""
+    return _async_iter
 
 
 @pytest.fixture
@@ -67,7 +77,41 @@ def sample_user_data():
 
 @pytest.fixture
 def mock_current_user(sample_user_data):
-    """Mock the current user"""
-    with patch('main.get_current_user') as mock:
-        mock.return_value = sample_user_data
-        yield mock
+    """Authenticate requests as the sample user"""
+    from main import app, get_current_user
+    app.dependency_overrides[get_current_user] = lambda: sample_user_data
+    yield sample_user_data
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+@pytest.fixture
+def fake_appwrite():
+    """In-process Appwrite API stand-in (see tests/fake_appwrite.py)"""
+    from tests.fake_appwrite import FakeAppwrite
+    return FakeAppwrite(project_id=os.environ['APPWRITE_PROJECT_ID'], api_key=os.environ['APPWRITE_API_KEY'])
+
+
+@pytest.fixture
+async def fake_async_service(fake_appwrite):
+    """AsyncAppwriteService whose HTTP client talks to the fake server"""
+    import httpx
+    from app.services.appwrite_service import AsyncAppwriteService
+
+    service = AsyncAppwriteService()
+    await service.client.aclose()
+    service.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake_appwrite))
+    yield service
+    await service.aclose()
+
+
+@pytest.fixture
+def fake_sync_service(fake_appwrite):
+    """AppwriteService whose HTTP client talks to the fake server"""
+    from starlette.testclient import TestClient
+    from app.services.appwrite_service import AppwriteService
+
+    service = AppwriteService()
+    service.client.close()
+    service.client = TestClient(fake_appwrite)
+    yield service
+    service.close()
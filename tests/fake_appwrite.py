@@ -0,0 +1,840 @@
+"""
+In-process stand-in for the Appwrite REST API
+
+Implements the endpoints AppwriteService and AsyncAppwriteService call
+(account, email sessions, documents with queries and cursors, chunked
+storage uploads) plus the database, collection, attribute and index
+endpoints the schema provisioning tool uses, as an ASGI app, so the real
+HTTP clients run unchanged against it. Collections created through the
+API validate documents against their attributes; collections that only
+exist because documents were written to them accept anything. Every
+request can be delayed and can fail at a configured rate, and per-route
+call counts plus peak concurrency are recorded to measure fan-out.
+
+    fake = FakeAppwrite(project_id="p", api_key="k", latency=0.02)
+    user = fake.seed(projects=20, logs_per_project=50)
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake))
+
+Run standalone on a real socket with:
+
+    python -m tests.fake_appwrite --port 8081 --latency 0.02 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import secrets
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Match, Route, Router
+
+from app.services.project_counters import counters_from_logs, encode_counters
+from app.services.timestamps import with_epoch_fields
+
+UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024
+MAX_LIST_LIMIT = 5000
+DEFAULT_LIST_LIMIT = 25
+
+LOG_TYPES = ["update", "milestone", "bug_fix", "feature", "note"]
+PROJECT_STATUSES = ["planning", "in_progress", "completed", "on_hold"]
+TECH_STACKS = [["Python", "FastAPI"], ["TypeScript", "React"], ["Go"], ["Rust", "WASM"], ["Python", "Appwrite"]]
+
+
+class AppwriteError(Exception):
+    """An error answered in Appwrite's JSON error format"""
+
+    def __init__(self, code: int, error_type: str, message: str):
+        super().__init__(message)
+        self.code = code
+        self.error_type = error_type
+        self.message = message
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+async def _discard(message):
+    """ASGI send that drops the response, for requests whose reply is lost"""
+
+
+def _unique_id() -> str:
+    return secrets.token_hex(10)
+
+
+# Synthetic data
+
+def generate_projects(count: int, rng: random.Random = None, start: datetime = None) -> list:
+    """Project data dicts with created_at spread one hour apart from start"""
+    rng = rng or random.Random(0)
+    start = start or datetime(2025, 1, 1)
+    return [{
+        "name": f"Project {n}",
+        "description": f"Synthetic project {n}",
+        "tech_stack": rng.choice(TECH_STACKS),
+        "status": rng.choice(PROJECT_STATUSES),
+        "created_at": (start + timedelta(hours=n)).isoformat(),
+        "updated_at": (start + timedelta(hours=n)).isoformat()
+    } for n in range(count)]
+
+
+def generate_build_logs(count: int, rng: random.Random = None, start: datetime = None, days: int = 90,
+                        content_size: int = 500) -> list:
+    """Build log data dicts with random types and created_at within `days` of start"""
+    rng = rng or random.Random(0)
+    start = start or datetime(2025, 1, 1)
+    return [{
+        "title": f"Log {n}",
+        "content": "x" * content_size,
+        "log_type": rng.choice(LOG_TYPES),
+        "created_at": (start + timedelta(seconds=rng.randrange(days * 86400))).isoformat()
+    } for n in range(count)]
+
+
+# Query evaluation
+
+def _compare(method: str, value, values: list) -> bool:
+    if method == "isNull":
+        return value is None
+    if method == "isNotNull":
+        return value is not None
+    if value is None:
+        return method == "notEqual"
+    if method == "equal":
+        return any(value == v or (isinstance(value, list) and v in value) for v in values)
+    if method == "notEqual":
+        return all(value != v for v in values)
+    if method == "lessThan":
+        return value < values[0]
+    if method == "lessThanEqual":
+        return value <= values[0]
+    if method == "greaterThan":
+        return value > values[0]
+    if method == "greaterThanEqual":
+        return value >= values[0]
+    if method == "between":
+        return values[0] <= value <= values[1]
+    if method == "startsWith":
+        return str(value).startswith(values[0])
+    if method == "endsWith":
+        return str(value).endswith(values[0])
+    if method == "contains":
+        return any(v in value for v in values)
+    if method == "search":
+        return all(word.lower() in str(value).lower() for word in str(values[0]).split())
+    raise AppwriteError(400, "general_query_invalid", f"Invalid query method: {method}")
+
+
+def _sort_key(document: dict, orders: list):
+    """Sort key for a document; order methods are applied in sequence, $sequence breaks ties"""
+    key = []
+    for attribute, descending in orders:
+        value = document.get(attribute)
+        key.append(_Ordered((value is not None, value), descending))
+    key.append(_Ordered(document["$sequence"], False))
+    return key
+
+
+class _Ordered:
+    """Wraps a sort value so descending attributes compare in reverse"""
+
+    __slots__ = ("value", "descending")
+
+    def __init__(self, value, descending: bool):
+        self.value = value
+        self.descending = descending
+
+    def __lt__(self, other):
+        return other.value < self.value if self.descending else self.value < other.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def apply_queries(documents: list, raw_queries: list, collection: dict) -> tuple:
+    """Filter, order, page and project documents as Appwrite's listDocuments does
+
+    Returns (total matching the filters, documents on the requested page).
+    """
+    filters, orders, selected = [], [], None
+    limit, offset, cursor, cursor_direction = DEFAULT_LIST_LIMIT, 0, None, None
+    for raw in raw_queries:
+        try:
+            query = json.loads(raw)
+        except ValueError:
+            raise AppwriteError(400, "general_query_invalid", f"Invalid query: {raw}")
+        method = query.get("method")
+        values = query.get("values") or []
+        if method in ("orderAsc", "orderDesc"):
+            orders.append((query["attribute"], method == "orderDesc"))
+        elif method == "limit":
+            limit = values[0]
+        elif method == "offset":
+            offset = values[0]
+        elif method in ("cursorAfter", "cursorBefore"):
+            cursor, cursor_direction = values[0], method
+        elif method == "select":
+            selected = values
+        else:
+            filters.append((method, query.get("attribute"), values))
+
+    if limit > MAX_LIST_LIMIT:
+        raise AppwriteError(400, "general_query_invalid", f"Invalid limit: must be at most {MAX_LIST_LIMIT}")
+
+    matching = [d for d in documents if all(_compare(m, d.get(a), v) for m, a, v in filters)]
+    total = len(matching)
+
+    if cursor:
+        cursor_document = collection.get(cursor)
+        if cursor_document is None:
+            raise AppwriteError(400, "document_not_found", f"Document '{cursor}' for the cursor was not found")
+        if all(d["$id"] != cursor for d in matching):
+            matching.append(cursor_document)
+
+    matching.sort(key=lambda d: _sort_key(d, orders))
+    if cursor:
+        index = next(i for i, d in enumerate(matching) if d["$id"] == cursor)
+        if cursor_direction == "cursorAfter":
+            page = matching[index + 1:][offset:offset + limit]
+        else:
+            page = matching[:index][max(0, index - offset - limit):max(0, index - offset)]
+    else:
+        page = matching[offset:offset + limit]
+
+    return total, [_public(d, selected) for d in page]
+
+
+def _public(document: dict, selected: list = None) -> dict:
+    """Document as the API returns it, without the internal sequence"""
+    if selected:
+        return {k: document[k] for k in selected if k in document}
+    return {k: v for k, v in document.items() if k != "$sequence"}
+
+
+class FakeAppwrite:
+    """ASGI app answering the Appwrite endpoints this project uses from memory
+
+    latency is the seconds each request waits before it is handled (a
+    (low, high) tuple draws uniformly between the two), error_rate the
+    fraction of requests answered with error_status instead. Both, and
+    fail_next(), apply to every route.
+    """
+
+    def __init__(self, project_id: str = "test_project_id", api_key: str = "test_api_key",
+                 latency=0.0, error_rate: float = 0.0, error_status: int = 503, seed: int = 0):
+        self.project_id = project_id
+        self.api_key = api_key
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rng = random.Random(seed)
+
+        self.users = {}
+        self.sessions = {}
+        self.collections = {}
+        self.databases = {}
+        self.schemas = {}
+        self.files = {}
+        self._sequence = 0
+        self._failures = []
+
+        self.calls = Counter()
+        self.in_flight = 0
+        self.peak_concurrency = 0
+
+        self.router = Router(routes=[
+            Route("/v1/account", self.create_account, methods=["POST"]),
+            Route("/v1/account", self.get_account, methods=["GET"]),
+            Route("/v1/account/sessions/email", self.create_session, methods=["POST"]),
+            Route("/v1/account/sessions/{session_id}", self.delete_session, methods=["DELETE"]),
+            Route("/v1/databases", self.create_database, methods=["POST"]),
+            Route("/v1/databases/{database_id}", self.get_database, methods=["GET"]),
+            Route("/v1/databases/{database_id}/collections", self.create_collection, methods=["POST"]),
+            Route("/v1/databases/{database_id}/collections/{collection_id}", self.get_collection, methods=["GET"]),
+            Route("/v1/databases/{database_id}/collections/{collection_id}/attributes",
+                  self.list_attributes, methods=["GET"]),
+            Route("/v1/databases/{database_id}/collections/{collection_id}/attributes/{kind}",
+                  self.create_attribute, methods=["POST"]),
+            Route("/v1/databases/{database_id}/collections/{collection_id}/attributes/{kind}/{key}",
+                  self.update_attribute, methods=["PATCH"]),
+            Route("/v1/databases/{database_id}/collections/{collection_id}/indexes",
+                  self.list_indexes, methods=["GET"]),
+            Route("/v1/databases/{database_id}/collections/{collection_id}/indexes",
+                  self.create_index, methods=["POST"]),
+            Route("/v1/databases/{database_id}/collections/{collection_id}/indexes/{key}",
+                  self.delete_index, methods=["DELETE"]),
+            Route("/v1/databases/{database_id}/collections/{collection_id}/documents",
+                  self.list_documents, methods=["GET"]),
+            Route("/v1/databases/{database_id}/collections/{collection_id}/documents",
+                  self.create_document, methods=["POST"]),
+            Route("/v1/databases/{database_id}/collections/{collection_id}/documents/{document_id}",
+                  self.get_document, methods=["GET"]),
+            Route("/v1/databases/{database_id}/collections/{collection_id}/documents/{document_id}",
+                  self.update_document, methods=["PATCH"]),
+            Route("/v1/databases/{database_id}/collections/{collection_id}/documents/{document_id}",
+                  self.delete_document, methods=["DELETE"]),
+            Route("/v1/storage/buckets/{bucket_id}/files", self.create_file, methods=["POST"]),
+            Route("/v1/storage/buckets/{bucket_id}/files/{file_id}", self.get_file, methods=["GET"]),
+            Route("/v1/storage/buckets/{bucket_id}/files/{file_id}", self.delete_file, methods=["DELETE"]),
+            Route("/v1/storage/buckets/{bucket_id}/files/{file_id}/view", self.view_file, methods=["GET"]),
+        ])
+
+    # ASGI entry point
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.router(scope, receive, send)
+            return
+
+        self.calls[(scope["method"], self._route_path(scope))] += 1
+        self.in_flight += 1
+        self.peak_concurrency = max(self.peak_concurrency, self.in_flight)
+        try:
+            delay = self._delay()
+            if delay:
+                await asyncio.sleep(delay)
+            failure, applied = self._injected_failure()
+            if failure is None:
+                await self.router(scope, receive, send)
+            else:
+                if applied:
+                    await self.router(scope, receive, _discard)
+                await failure(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+    def _route_path(self, scope) -> str:
+        for route in self.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+        return scope["path"]
+
+    def _delay(self) -> float:
+        if isinstance(self.latency, (tuple, list)):
+            return self.rng.uniform(*self.latency)
+        return self.latency
+
+    def _injected_failure(self):
+        if self._failures:
+            status, retry_after, applied = self._failures.pop(0)
+        elif self.error_rate and self.rng.random() < self.error_rate:
+            status, retry_after, applied = self.error_status, None, False
+        else:
+            return None, False
+        headers = {"Retry-After": str(retry_after)} if retry_after is not None else None
+        return self._error(AppwriteError(status, "general_server_error", "Injected failure"), headers), applied
+
+    def fail_next(self, count: int = 1, status: int = 503, retry_after: float = None, applied: bool = False):
+        """Answer the next `count` requests with `status`, before error_rate is considered
+
+        applied=True carries the requests out first and only then fails
+        them, as when a write commits but its response is lost.
+        """
+        self._failures.extend([(status, retry_after, applied)] * count)
+
+    def reset_stats(self):
+        """Forget recorded calls and peak concurrency"""
+        self.calls.clear()
+        self.peak_concurrency = 0
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    # Helpers
+
+    def _error(self, error: AppwriteError, headers: dict = None) -> JSONResponse:
+        return JSONResponse(
+            {"message": error.message, "code": error.code, "type": error.error_type, "version": "fake"},
+            status_code=error.code, headers=headers
+        )
+
+    def _check_project(self, request: Request):
+        if request.headers.get("x-appwrite-project") != self.project_id:
+            raise AppwriteError(404, "project_not_found", "Project with the requested ID could not be found.")
+
+    def _check_key(self, request: Request):
+        self._check_project(request)
+        if request.headers.get("x-appwrite-key") != self.api_key:
+            raise AppwriteError(401, "general_unauthorized_scope", "The current user or API key is not authorized.")
+
+    def _session_user(self, request: Request) -> tuple:
+        self._check_project(request)
+        secret = request.cookies.get(f"a_session_{self.project_id}")
+        session = self.sessions.get(secret) if secret else None
+        if session is None:
+            raise AppwriteError(401, "general_unauthorized_scope", "User (role: guests) missing scope (account)")
+        return secret, session
+
+    def _collection(self, request: Request) -> dict:
+        key = (request.path_params["database_id"], request.path_params["collection_id"])
+        return self.collections.setdefault(key, {})
+
+    def _next_sequence(self) -> int:
+        self._sequence += 1
+        return self._sequence
+
+    # Direct (non-HTTP) access for seeding and assertions
+
+    def add_user(self, email: str, password: str = "password", name: str = "Fake User", user_id: str = None) -> dict:
+        """Create an account without going through the API"""
+        email = email.lower()
+        if any(u["email"] == email for u in self.users.values()):
+            raise AppwriteError(409, "user_already_exists", "A user with the same id, email, or phone already exists.")
+        user_id = user_id if user_id and user_id != "unique()" else _unique_id()
+        if user_id in self.users:
+            raise AppwriteError(409, "user_already_exists", "A user with the same id, email, or phone already exists.")
+        now = _now()
+        self.users[user_id] = {
+            "$id": user_id, "$createdAt": now, "$updatedAt": now,
+            "name": name, "email": email, "status": True, "password": password
+        }
+        return self._public_user(self.users[user_id])
+
+    def add_session(self, user_id: str) -> dict:
+        """Open a session for a user without checking a password"""
+        secret = secrets.token_hex(32)
+        session = {"$id": _unique_id(), "$createdAt": _now(), "userId": user_id, "secret": secret, "provider": "email"}
+        self.sessions[secret] = session
+        return session
+
+    def add_document(self, database_id: str, collection_id: str, data: dict, document_id: str = None) -> dict:
+        """Store a document without going through the API"""
+        collection = self.collections.setdefault((database_id, collection_id), {})
+        document_id = document_id if document_id and document_id != "unique()" else _unique_id()
+        if document_id in collection:
+            raise AppwriteError(409, "document_already_exists", "Document with the requested ID already exists.")
+        now = _now()
+        collection[document_id] = {
+            **data,
+            "$id": document_id, "$collectionId": collection_id, "$databaseId": database_id,
+            "$createdAt": now, "$updatedAt": now, "$permissions": [], "$sequence": self._next_sequence()
+        }
+        return _public(collection[document_id])
+
+    def documents(self, database_id: str, collection_id: str) -> list:
+        """All stored documents of a collection, in insertion order"""
+        return [_public(d) for d in self.collections.get((database_id, collection_id), {}).values()]
+
+    def seed(self, database_id: str = "test_database", projects_collection_id: str = "test_projects",
+             build_logs_collection_id: str = "test_logs", projects: int = 10, logs_per_project: int = 20,
+             email: str = None, password: str = "password", user_id: str = None, content_size: int = 500,
+             counters: bool = True, timestamps: bool = True) -> dict:
+        """Create a user with a session, synthetic projects and build logs
+
+        Projects carry build log counters and documents carry numeric
+        timestamps as the app writes them, unless counters=False or
+        timestamps=False seeds them as written before those existed.
+        Returns {"user", "session", "project_ids"}.
+        """
+        stamp = with_epoch_fields if timestamps else dict
+        email = email or f"user{len(self.users)}@example.com"
+        user = self.add_user(email, password, "Seeded User", user_id)
+        session = self.add_session(user["$id"])
+        project_ids = []
+        for project in generate_projects(projects, self.rng):
+            document = self.add_document(database_id, projects_collection_id, stamp({**project, "user_id": user["$id"]}))
+            project_ids.append(document["$id"])
+            start = datetime.fromisoformat(project["created_at"])
+            logs = generate_build_logs(logs_per_project, self.rng, start, content_size=content_size)
+            for log in logs:
+                self.add_document(database_id, build_logs_collection_id, stamp({**log, "project_id": document["$id"]}))
+            if counters:
+                self.collections[(database_id, projects_collection_id)][document["$id"]].update(
+                    encode_counters(counters_from_logs(logs))
+                )
+        return {"user": user, "session": session, "project_ids": project_ids}
+
+    def _public_user(self, user: dict) -> dict:
+        return {k: v for k, v in user.items() if k != "password"}
+
+    # Account
+
+    async def create_account(self, request: Request):
+        try:
+            self._check_project(request)
+            body = await request.json()
+            user = self.add_user(body["email"], body["password"], body.get("name", ""), body.get("userId"))
+            return JSONResponse(user, status_code=201)
+        except AppwriteError as e:
+            return self._error(e)
+
+    async def create_session(self, request: Request):
+        try:
+            self._check_project(request)
+            body = await request.json()
+            email = str(body.get("email", "")).lower()
+            user = next((u for u in self.users.values() if u["email"] == email), None)
+            if user is None or user["password"] != body.get("password"):
+                raise AppwriteError(401, "user_invalid_credentials",
+                                    "Invalid credentials. Please check the email and password.")
+            return JSONResponse(self.add_session(user["$id"]), status_code=201)
+        except AppwriteError as e:
+            return self._error(e)
+
+    async def get_account(self, request: Request):
+        try:
+            _, session = self._session_user(request)
+            return JSONResponse(self._public_user(self.users[session["userId"]]))
+        except AppwriteError as e:
+            return self._error(e)
+
+    async def delete_session(self, request: Request):
+        try:
+            secret, session = self._session_user(request)
+            session_id = request.path_params["session_id"]
+            if session_id not in ("current", session["$id"]):
+                raise AppwriteError(404, "user_session_not_found", "The current user session could not be found.")
+            del self.sessions[secret]
+            return Response(status_code=204)
+        except AppwriteError as e:
+            return self._error(e)
+
+    # Databases, collections, attributes and indexes
+
+    def _schema(self, request: Request) -> dict:
+        database_id = request.path_params["database_id"]
+        if database_id not in self.databases:
+            raise AppwriteError(404, "database_not_found", "Database not found")
+        schema = self.schemas.get((database_id, request.path_params["collection_id"]))
+        if schema is None:
+            raise AppwriteError(404, "collection_not_found", "Collection with the requested ID could not be found.")
+        return schema
+
+    def _public_schema(self, schema: dict) -> dict:
+        return {
+            **{k: v for k, v in schema.items() if k not in ("attributes", "indexes")},
+            "attributes": list(schema["attributes"].values()),
+            "indexes": list(schema["indexes"].values())
+        }
+
+    async def create_database(self, request: Request):
+        try:
+            self._check_key(request)
+            body = await request.json()
+            database_id = body["databaseId"]
+            if database_id in self.databases:
+                raise AppwriteError(409, "database_already_exists", "Database already exists")
+            now = _now()
+            self.databases[database_id] = {
+                "$id": database_id, "name": body.get("name", database_id),
+                "$createdAt": now, "$updatedAt": now, "enabled": True
+            }
+            return JSONResponse(self.databases[database_id], status_code=201)
+        except AppwriteError as e:
+            return self._error(e)
+
+    async def get_database(self, request: Request):
+        try:
+            self._check_key(request)
+            database = self.databases.get(request.path_params["database_id"])
+            if database is None:
+                raise AppwriteError(404, "database_not_found", "Database not found")
+            return JSONResponse(database)
+        except AppwriteError as e:
+            return self._error(e)
+
+    async def create_collection(self, request: Request):
+        try:
+            self._check_key(request)
+            database_id = request.path_params["database_id"]
+            if database_id not in self.databases:
+                raise AppwriteError(404, "database_not_found", "Database not found")
+            body = await request.json()
+            key = (database_id, body["collectionId"])
+            if key in self.schemas:
+                raise AppwriteError(409, "collection_already_exists", "A collection with the requested ID already exists.")
+            now = _now()
+            self.schemas[key] = {
+                "$id": body["collectionId"], "databaseId": database_id, "name": body.get("name", body["collectionId"]),
+                "$permissions": body.get("permissions") or [], "documentSecurity": body.get("documentSecurity", False),
+                "enabled": True, "$createdAt": now, "$updatedAt": now, "attributes": {}, "indexes": {}
+            }
+            return JSONResponse(self._public_schema(self.schemas[key]), status_code=201)
+        except AppwriteError as e:
+            return self._error(e)
+
+    async def get_collection(self, request: Request):
+        try:
+            self._check_key(request)
+            return JSONResponse(self._public_schema(self._schema(request)))
+        except AppwriteError as e:
+            return self._error(e)
+
+    async def list_attributes(self, request: Request):
+        try:
+            self._check_key(request)
+            attributes = list(self._schema(request)["attributes"].values())
+            return JSONResponse({"total": len(attributes), "attributes": attributes})
+        except AppwriteError as e:
+            return self._error(e)
+
+    def _attribute(self, kind: str, body: dict) -> dict:
+        """Attribute as Appwrite lists it; url and email are strings with a format"""
+        if body.get("required") and body.get("default") is not None:
+            raise AppwriteError(400, "attribute_default_unsupported", "Cannot set default value for required attribute")
+        attribute = {
+            "key": body["key"], "type": kind, "status": "available", "error": "",
+            "required": bool(body.get("required")), "array": bool(body.get("array")), "default": body.get("default")
+        }
+        if kind in ("url", "email"):
+            attribute.update(type="string", format=kind)
+        elif kind == "string":
+            attribute["size"] = body["size"]
+        elif kind in ("integer", "float"):
+            attribute.update(min=body.get("min"), max=body.get("max"))
+        elif kind not in ("boolean", "datetime"):
+            raise AppwriteError(400, "general_argument_invalid", f"Unsupported attribute type: {kind}")
+        return attribute
+
+    async def create_attribute(self, request: Request):
+        try:
+            self._check_key(request)
+            schema = self._schema(request)
+            attribute = self._attribute(request.path_params["kind"], await request.json())
+            if attribute["key"] in schema["attributes"]:
+                raise AppwriteError(409, "attribute_already_exists", "Attribute with the requested ID already exists.")
+            schema["attributes"][attribute["key"]] = attribute
+            return JSONResponse(attribute, status_code=202)
+        except AppwriteError as e:
+            return self._error(e)
+
+    async def update_attribute(self, request: Request):
+        try:
+            self._check_key(request)
+            schema = self._schema(request)
+            current = schema["attributes"].get(request.path_params["key"])
+            if current is None:
+                raise AppwriteError(404, "attribute_not_found", "Attribute with the requested ID could not be found.")
+            kind = request.path_params["kind"]
+            if current.get("format", current["type"]) != kind:
+                raise AppwriteError(400, "attribute_type_invalid", f"Attribute is not of type {kind}")
+            body = await request.json()
+            updated = self._attribute(kind, {**current, **body, "key": current["key"]})
+            schema["attributes"][current["key"]] = updated
+            return JSONResponse(updated)
+        except AppwriteError as e:
+            return self._error(e)
+
+    async def list_indexes(self, request: Request):
+        try:
+            self._check_key(request)
+            indexes = list(self._schema(request)["indexes"].values())
+            return JSONResponse({"total": len(indexes), "indexes": indexes})
+        except AppwriteError as e:
+            return self._error(e)
+
+    async def create_index(self, request: Request):
+        try:
+            self._check_key(request)
+            schema = self._schema(request)
+            body = await request.json()
+            if body["key"] in schema["indexes"]:
+                raise AppwriteError(409, "index_already_exists", "Index with the requested key already exists.")
+            unknown = [a for a in body["attributes"] if a not in schema["attributes"] and not a.startswith("$")]
+            if unknown:
+                raise AppwriteError(400, "attribute_unknown", f"Unknown attribute: {unknown[0]}")
+            schema["indexes"][body["key"]] = {
+                "key": body["key"], "type": body.get("type", "key"), "status": "available", "error": "",
+                "attributes": body["attributes"], "orders": body.get("orders") or []
+            }
+            return JSONResponse(schema["indexes"][body["key"]], status_code=202)
+        except AppwriteError as e:
+            return self._error(e)
+
+    async def delete_index(self, request: Request):
+        try:
+            self._check_key(request)
+            schema = self._schema(request)
+            if schema["indexes"].pop(request.path_params["key"], None) is None:
+                raise AppwriteError(404, "index_not_found", "Index with the requested key could not be found.")
+            return Response(status_code=204)
+        except AppwriteError as e:
+            return self._error(e)
+
+    def _validate(self, request: Request, data: dict, partial: bool = False):
+        """Reject documents that do not fit a collection created through the API"""
+        schema = self.schemas.get((request.path_params["database_id"], request.path_params["collection_id"]))
+        if schema is None:
+            return
+        for key in data:
+            if key not in schema["attributes"]:
+                raise AppwriteError(400, "document_invalid_structure", f'Invalid document structure: Unknown attribute: "{key}"')
+        if not partial:
+            for attribute in schema["attributes"].values():
+                if attribute["required"] and data.get(attribute["key"]) is None:
+                    raise AppwriteError(400, "document_invalid_structure",
+                                        f'Invalid document structure: Missing required attribute "{attribute["key"]}"')
+
+    # Documents
+
+    async def list_documents(self, request: Request):
+        try:
+            self._check_key(request)
+            collection = self._collection(request)
+            total, documents = apply_queries(
+                list(collection.values()), request.query_params.getlist("queries[]"), collection
+            )
+            return JSONResponse({"total": total, "documents": documents})
+        except AppwriteError as e:
+            return self._error(e)
+
+    async def create_document(self, request: Request):
+        try:
+            self._check_key(request)
+            body = await request.json()
+            self._validate(request, body.get("data") or {})
+            document = self.add_document(
+                request.path_params["database_id"], request.path_params["collection_id"],
+                body.get("data") or {}, body.get("documentId")
+            )
+            return JSONResponse(document, status_code=201)
+        except AppwriteError as e:
+            return self._error(e)
+
+    def _document(self, request: Request) -> dict:
+        document = self._collection(request).get(request.path_params["document_id"])
+        if document is None:
+            raise AppwriteError(404, "document_not_found", "Document with the requested ID could not be found.")
+        return document
+
+    async def get_document(self, request: Request):
+        try:
+            self._check_key(request)
+            document = self._document(request)
+            selected = None
+            for raw in request.query_params.getlist("queries[]"):
+                query = json.loads(raw)
+                if query.get("method") == "select":
+                    selected = query["values"]
+            return JSONResponse(_public(document, selected))
+        except AppwriteError as e:
+            return self._error(e)
+
+    async def update_document(self, request: Request):
+        try:
+            self._check_key(request)
+            document = self._document(request)
+            body = await request.json()
+            self._validate(request, body.get("data") or {}, partial=True)
+            document.update(body.get("data") or {})
+            document["$updatedAt"] = _now()
+            return JSONResponse(_public(document))
+        except AppwriteError as e:
+            return self._error(e)
+
+    async def delete_document(self, request: Request):
+        try:
+            self._check_key(request)
+            self._document(request)
+            del self._collection(request)[request.path_params["document_id"]]
+            return Response(status_code=204)
+        except AppwriteError as e:
+            return self._error(e)
+
+    # Storage
+
+    def _stored_file(self, request: Request) -> dict:
+        stored = self.files.get((request.path_params["bucket_id"], request.path_params["file_id"]))
+        if stored is None:
+            raise AppwriteError(404, "storage_file_not_found", "The requested file could not be found.")
+        return stored
+
+    def _public_file(self, stored: dict) -> dict:
+        return {k: v for k, v in stored.items() if k not in ("chunks", "chunkSize")}
+
+    async def create_file(self, request: Request):
+        """Single-shot or chunked upload, following Content-Range and x-appwrite-id"""
+        try:
+            self._check_key(request)
+            form = await request.form()
+            upload = form["file"]
+            data = await upload.read()
+            bucket_id = request.path_params["bucket_id"]
+            file_id = request.headers.get("x-appwrite-id") or form.get("fileId")
+            file_id = file_id if file_id and file_id != "unique()" else _unique_id()
+
+            content_range = request.headers.get("content-range")
+            if content_range:
+                span, size = content_range.removeprefix("bytes ").split("/")
+                start, end = (int(n) for n in span.split("-"))
+                size = int(size)
+            else:
+                start, end, size = 0, len(data) - 1, len(data)
+
+            stored = self.files.get((bucket_id, file_id))
+            if stored is None:
+                chunk_size = end - start + 1 if content_range and start == 0 else UPLOAD_CHUNK_SIZE
+                stored = self.files[(bucket_id, file_id)] = {
+                    "$id": file_id, "bucketId": bucket_id, "$createdAt": _now(), "$updatedAt": _now(),
+                    "$permissions": form.getlist("permissions[]"), "name": upload.filename, "signature": "", "mimeType": upload.content_type,
+                    "sizeOriginal": size, "chunksTotal": max(1, math.ceil(size / chunk_size)) if content_range else 1,
+                    "chunksUploaded": 0, "chunks": {}, "chunkSize": chunk_size
+                }
+            elif stored["chunksUploaded"] == stored["chunksTotal"]:
+                raise AppwriteError(409, "storage_file_already_exists", "A storage file with the requested ID already exists.")
+
+            stored["chunks"][start] = data
+            stored["chunksUploaded"] = len(stored["chunks"])
+            stored["$updatedAt"] = _now()
+            return JSONResponse(self._public_file(stored), status_code=201)
+        except AppwriteError as e:
+            return self._error(e)
+
+    def file_content(self, bucket_id: str, file_id: str) -> bytes:
+        """Bytes of an uploaded file, joining its chunks in order"""
+        stored = self.files[(bucket_id, file_id)]
+        return b"".join(stored["chunks"][start] for start in sorted(stored["chunks"]))
+
+    async def get_file(self, request: Request):
+        try:
+            self._check_key(request)
+            return JSONResponse(self._public_file(self._stored_file(request)))
+        except AppwriteError as e:
+            return self._error(e)
+
+    async def delete_file(self, request: Request):
+        try:
+            self._check_key(request)
+            self._stored_file(request)
+            del self.files[(request.path_params["bucket_id"], request.path_params["file_id"])]
+            return Response(status_code=204)
+        except AppwriteError as e:
+            return self._error(e)
+
+    async def view_file(self, request: Request):
+        try:
+            stored = self._stored_file(request)
+            return Response(self.file_content(stored["bucketId"], stored["$id"]), media_type=stored["mimeType"])
+        except AppwriteError as e:
+            return self._error(e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the fake Appwrite API on a local port")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--project-id", default="test_project_id")
+    parser.add_argument("--api-key", default="test_api_key")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--projects", type=int, default=0, help="seed a user with this many projects")
+    parser.add_argument("--logs", type=int, default=20, help="build logs per seeded project")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    fake = FakeAppwrite(args.project_id, args.api_key, latency=args.latency, error_rate=args.error_rate)
+    if args.projects:
+        seeded = fake.seed(projects=args.projects, logs_per_project=args.logs)
+        print(f"Seeded {seeded['user']['email']} / password, session secret {seeded['session']['secret']}")
+    uvicorn.run(fake, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
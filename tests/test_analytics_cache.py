@@ -0,0 +1,78 @@
+"""
+Tests for the per-user analytics response cache and its ETags
+"""
+from unittest.mock import patch
+
+from app.services.analytics_cache import AnalyticsCache, analytics_body, etag_matches, strong_etag
+
+
+class TestAnalyticsCache:
+    """Test cached analytics follow each user's data version"""
+
+    def test_hit_until_the_user_writes(self):
+        """Test a stored result is returned until that user's version is bumped"""
+        cache = AnalyticsCache()
+        etag, body = cache.set('u1', cache.version('u1'), {'total_logs': 2})
+        cache.set('u2', cache.version('u2'), {'total_logs': 5})
+
+        assert cache.get('u1') == (etag, body)
+        assert body == b'{"total_logs":2}'
+
+        with cache.writing('u1'):
+            pass
+        assert cache.get('u1') is None
+        assert cache.get('u2') is not None
+        assert cache.stats()['hits'] == 2
+
+    def test_write_during_computation(self):
+        """Test analytics computed before a write are not kept under the new version"""
+        cache = AnalyticsCache()
+        version = cache.version('u1')
+        cache.bump('u1')
+        etag, body = cache.set('u1', version, {'total_logs': 1})
+
+        assert etag == strong_etag(body)
+        assert cache.get('u1') is None
+
+    def test_failed_write_still_bumps(self):
+        """Test a write that raises may have changed data, so the cache is dropped anyway"""
+        cache = AnalyticsCache()
+        cache.set('u1', 0, {})
+        try:
+            with cache.writing('u1'):
+                raise RuntimeError("timed out")
+        except RuntimeError:
+            pass
+        assert cache.version('u1') == 1
+        assert cache.get('u1') is None
+
+    def test_expires_at_midnight(self):
+        """Test a result from an earlier day is recomputed, as the charts' windows moved on"""
+        cache = AnalyticsCache()
+        with patch('app.services.analytics_cache.today', return_value=20000):
+            cache.set('u1', 0, {})
+            assert cache.get('u1') is not None
+        with patch('app.services.analytics_cache.today', return_value=20001):
+            assert cache.get('u1') is None
+
+    def test_least_recent_users_evicted(self):
+        """Test the cache holds at most max_users results, and none when disabled"""
+        cache = AnalyticsCache(max_users=2)
+        for user_id in ('u1', 'u2', 'u3'):
+            cache.set(user_id, 0, {})
+        assert cache.get('u1') is None
+        assert cache.stats()['users'] == 2
+
+        disabled = AnalyticsCache(max_users=0)
+        assert disabled.set('u1', 0, {'a': 1})[1] == b'{"a":1}'
+        assert disabled.get('u1') is None
+
+
+def test_etag_matches():
+    """Test If-None-Match lists, wildcards and weak validators"""
+    etag = strong_etag(analytics_body({'total_logs': 1}))
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches('*', etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
@@ -0,0 +1,79 @@
+"""
+Tests for the single-pass analytics engine
+"""
+from datetime import date
+
+import pytest
+
+from app.services.analytics_engine import AnalyticsEngine, activity_edges, activity_label
+from app.services.timestamps import day_date, day_number, weekday
+
+# A Wednesday
+TODAY = 20089 + 7 - weekday(20089 + 7) + 2
+
+
+def counted(project_id: str, log_count: int, last_log_day: str) -> dict:
+    return {
+        '$id': project_id, 'name': project_id, 'status': 'completed', 'log_count': log_count,
+        'last_log_at': last_log_day, 'log_type_counts': '{"feature": %d}' % log_count
+    }
+
+
+class TestAnalyticsEngine:
+    """Test which logs are read and where each one is counted"""
+
+    def test_only_needed_projects_are_read(self):
+        """Test counted projects are read only when a dated chart reaches their last log"""
+        projects = [{'$id': 'old'}, counted('recent', 2, '2099-01-01T00:00:00'), counted('stale', 3, '2000-01-01T00:00:00')]
+
+        assert [p['$id'] for p in AnalyticsEngine(projects, TODAY).log_projects()] == ['old']
+        assert AnalyticsEngine(projects, TODAY, counts=False).log_projects() == []
+        dated = AnalyticsEngine(projects, TODAY, counts=False, activity_days=30).log_projects()
+        assert [p['$id'] for p in dated] == ['old', 'recent']
+
+    def test_each_log_lands_in_every_window(self):
+        """Test one add updates counts, the day, week and heatmap buckets, and skips out-of-range days"""
+        projects = [{'$id': 'old', 'status': 'in_progress'}, counted('recent', 2, '2099-01-01T00:00:00')]
+        engine = AnalyticsEngine(projects, TODAY, weekly=True, activity_days=7, trend_weeks=2, heatmap_days=7)
+        for log in (
+            {'project_id': 'old', 'log_type': 'bug_fix', 'created_day': TODAY},
+            {'project_id': 'old', 'created_day': TODAY - 30},
+            {'project_id': 'recent', 'created_day': TODAY - 1},
+            {'project_id': 'recent', 'created_day': TODAY + 1},
+        ):
+            engine.add(log)
+
+        assert engine.overview() == {'total_projects': 2, 'total_logs': 4, 'active_projects': 1, 'weekly_logs': 3}
+        assert dict(zip(*engine.log_type_distribution().values())) == {'Feature': 2, 'Bug Fix': 1, 'Note': 1}
+        assert engine.activity_over_time()['values'][-2:] == [1, 1]
+        assert [d['count'] for d in engine.activity_heatmap()][-2:] == [1, 1]
+        assert engine.weekly_trend()['values'] == [0, 3]
+        assert engine.logs_per_project()['values'] == [2, 2]
+
+
+class TestActivityEdges:
+    """Test the buckets of the activity API"""
+
+    def test_weeks_and_months_cut_to_the_range(self):
+        """Test weeks start on Monday and months on the 1st, with the ends cut short"""
+        start, end = day_number(date(2025, 1, 15)), day_number(date(2025, 3, 4))
+
+        weeks = activity_edges(start, end, 'week')
+        assert weeks[0] == start and weeks[-1] == end + 1
+        assert {weekday(day) for day in weeks[1:-1]} == {0}
+        assert len(weeks) - 1 == 8
+
+        months = activity_edges(start, end, 'month')
+        assert [day_date(day) for day in months] == [
+            date(2025, 1, 15), date(2025, 2, 1), date(2025, 3, 1), date(2025, 3, 5)
+        ]
+        assert [activity_label(day, 'month') for day in months[:-1]] == ['2025-01', '2025-02', '2025-03']
+        assert activity_edges(start, start, 'day') == [start, start + 1]
+        assert activity_label(start, 'week') == '2025-01-15'
+
+    def test_unusable_ranges(self):
+        """Test unknown granularities, reversed ranges and too many buckets are refused"""
+        for start, end, granularity in ((10, 20, 'hour'), (20, 10, 'day'), (0, 5000, 'day')):
+            with pytest.raises(ValueError):
+                activity_edges(start, end, granularity)
+        assert len(activity_edges(0, 5000, 'month')) > 1
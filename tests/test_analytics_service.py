@@ -3,19 +3,35 @@ Tests for Analytics Service
 """
 import pytest
 from datetime import datetime, timedelta
-from unittest.mock import Mock, MagicMock
-from app.services.analytics_service import AnalyticsService
+from unittest.mock import AsyncMock, Mock
+from app.services.analytics_engine import AnalyticsEngine
+from app.services.analytics_service import ACTIVITY_DAYS, TREND_WEEKS, AnalyticsService, LOG_FIELDS, PROJECT_FIELDS
+from app.services.timestamps import today
 
 
 class TestAnalyticsService:
     """Test suite for AnalyticsService"""
 
     @pytest.fixture
-    def mock_appwrite(self):
+    def mock_appwrite(self, async_iter):
         """Create mock Appwrite service"""
-        mock = Mock()
+        mock = AsyncMock()
+        mock.iter_build_logs_for_projects = Mock(side_effect=lambda *args, **kwargs: async_iter([]))
         return mock
 
+    @pytest.fixture
+    def batched_logs(self, async_iter):
+        """Build an iter_build_logs_for_projects stand-in from logs keyed by project"""
+        def factory(logs_by_project):
+            def iter_logs(project_ids, **kwargs):
+                return async_iter([
+                    {**log, 'project_id': project_id}
+                    for project_id in project_ids
+                    for log in logs_by_project.get(project_id, [])
+                ])
+            return iter_logs
+        return factory
+
     @pytest.fixture
     def analytics_service(self, mock_appwrite):
         """Create AnalyticsService instance"""
@@ -85,66 +101,66 @@ class TestAnalyticsService:
             ]
         }
 
-    def test_get_overview_stats(self, analytics_service, mock_appwrite, sample_projects, sample_logs):
+    async def test_get_overview_stats(self, analytics_service, mock_appwrite, sample_projects, sample_logs, batched_logs):
         """Test getting overview statistics"""
         mock_appwrite.get_projects.return_value = sample_projects
-        mock_appwrite.get_build_logs.side_effect = lambda project_id: sample_logs.get(project_id, [])
+        mock_appwrite.iter_build_logs_for_projects.side_effect = batched_logs(sample_logs)
 
-        stats = analytics_service.get_overview_stats()
+        stats = await analytics_service.get_overview_stats()
 
         assert stats['total_projects'] == 3
         assert stats['total_logs'] == 4
         assert stats['active_projects'] == 2
         assert stats['weekly_logs'] >= 0
 
-    def test_get_overview_stats_empty(self, analytics_service, mock_appwrite):
+    async def test_get_overview_stats_empty(self, analytics_service, mock_appwrite):
         """Test getting overview stats with no data"""
         mock_appwrite.get_projects.return_value = []
 
-        stats = analytics_service.get_overview_stats()
+        stats = await analytics_service.get_overview_stats()
 
         assert stats['total_projects'] == 0
         assert stats['total_logs'] == 0
         assert stats['active_projects'] == 0
         assert stats['weekly_logs'] == 0
 
-    def test_get_overview_stats_error_handling(self, analytics_service, mock_appwrite):
+    async def test_get_overview_stats_error_handling(self, analytics_service, mock_appwrite):
         """Test error handling in overview stats"""
         mock_appwrite.get_projects.side_effect = Exception("Database error")
 
-        stats = analytics_service.get_overview_stats()
+        stats = await analytics_service.get_overview_stats()
 
         assert stats['total_projects'] == 0
         assert stats['total_logs'] == 0
 
-    def test_get_activity_over_time(self, analytics_service, mock_appwrite, sample_projects, sample_logs):
+    async def test_get_activity_over_time(self, analytics_service, mock_appwrite, sample_projects, sample_logs, batched_logs):
         """Test getting activity over time"""
         mock_appwrite.get_projects.return_value = sample_projects
-        mock_appwrite.get_build_logs.side_effect = lambda project_id: sample_logs.get(project_id, [])
+        mock_appwrite.iter_build_logs_for_projects.side_effect = batched_logs(sample_logs)
 
-        activity = analytics_service.get_activity_over_time(days=30)
+        activity = await analytics_service.get_activity_over_time(days=30)
 
         assert 'labels' in activity
         assert 'values' in activity
         assert len(activity['labels']) == 31  # 30 days + 1
         assert len(activity['values']) == 31
 
-    def test_get_activity_over_time_custom_days(self, analytics_service, mock_appwrite, sample_projects, sample_logs):
+    async def test_get_activity_over_time_custom_days(self, analytics_service, mock_appwrite, sample_projects, sample_logs, batched_logs):
         """Test getting activity with custom day range"""
         mock_appwrite.get_projects.return_value = sample_projects
-        mock_appwrite.get_build_logs.side_effect = lambda project_id: sample_logs.get(project_id, [])
+        mock_appwrite.iter_build_logs_for_projects.side_effect = batched_logs(sample_logs)
 
-        activity = analytics_service.get_activity_over_time(days=7)
+        activity = await analytics_service.get_activity_over_time(days=7)
 
         assert len(activity['labels']) == 8  # 7 days + 1
         assert len(activity['values']) == 8
 
-    def test_get_log_type_distribution(self, analytics_service, mock_appwrite, sample_projects, sample_logs):
+    async def test_get_log_type_distribution(self, analytics_service, mock_appwrite, sample_projects, sample_logs, batched_logs):
         """Test getting log type distribution"""
         mock_appwrite.get_projects.return_value = sample_projects
-        mock_appwrite.get_build_logs.side_effect = lambda project_id: sample_logs.get(project_id, [])
+        mock_appwrite.iter_build_logs_for_projects.side_effect = batched_logs(sample_logs)
 
-        distribution = analytics_service.get_log_type_distribution()
+        distribution = await analytics_service.get_log_type_distribution()
 
         assert 'labels' in distribution
         assert 'values' in distribution
@@ -154,21 +170,21 @@ class TestAnalyticsService:
         assert all(isinstance(label, str) for label in distribution['labels'])
         assert sum(distribution['values']) == 4  # Total logs
 
-    def test_get_log_type_distribution_empty(self, analytics_service, mock_appwrite):
+    async def test_get_log_type_distribution_empty(self, analytics_service, mock_appwrite):
         """Test log type distribution with no logs"""
         mock_appwrite.get_projects.return_value = []
 
-        distribution = analytics_service.get_log_type_distribution()
+        distribution = await analytics_service.get_log_type_distribution()
 
         assert distribution['labels'] == []
         assert distribution['values'] == []
 
-    def test_get_logs_per_project(self, analytics_service, mock_appwrite, sample_projects, sample_logs):
+    async def test_get_logs_per_project(self, analytics_service, mock_appwrite, sample_projects, sample_logs, batched_logs):
         """Test getting logs per project"""
         mock_appwrite.get_projects.return_value = sample_projects
-        mock_appwrite.get_build_logs.side_effect = lambda project_id: sample_logs.get(project_id, [])
+        mock_appwrite.iter_build_logs_for_projects.side_effect = batched_logs(sample_logs)
 
-        logs_per_project = analytics_service.get_logs_per_project()
+        logs_per_project = await analytics_service.get_logs_per_project()
 
         assert 'labels' in logs_per_project
         assert 'values' in logs_per_project
@@ -178,17 +194,65 @@ class TestAnalyticsService:
         # Should be sorted by count (descending)
         assert logs_per_project['values'] == sorted(logs_per_project['values'], reverse=True)
 
-    def test_get_logs_per_project_limit(self, analytics_service, mock_appwrite, sample_projects, sample_logs):
+    async def test_logs_fetched_in_one_batch(self, analytics_service, mock_appwrite, sample_projects, sample_logs, batched_logs):
+        """Logs for every project come from a single batched stream, not one query per project"""
+        mock_appwrite.get_projects.return_value = sample_projects
+        mock_appwrite.iter_build_logs_for_projects.side_effect = batched_logs(sample_logs)
+
+        await analytics_service.get_log_type_distribution()
+
+        mock_appwrite.iter_build_logs_for_projects.assert_called_once_with(
+            [p['$id'] for p in sample_projects], fields=LOG_FIELDS, start_day=None
+        )
+        mock_appwrite.get_projects.assert_called_once_with("demo_user", fields=PROJECT_FIELDS)
+        mock_appwrite.iter_build_logs.assert_not_called()
+
+    async def test_counted_projects_skip_log_reads(self, analytics_service, mock_appwrite, sample_projects, sample_logs, batched_logs):
+        """Projects carrying log counters are answered from the project documents alone"""
+        counted = {
+            **sample_projects[0], 'log_count': 5, 'last_log_at': '2020-01-01T00:00:00',
+            'log_type_counts': '{"milestone": 2, "update": 3}'
+        }
+        mock_appwrite.get_projects.return_value = [counted, *sample_projects[1:]]
+        mock_appwrite.iter_build_logs_for_projects.side_effect = batched_logs(sample_logs)
+
+        stats = await analytics_service.get_overview_stats()
+        distribution = await analytics_service.get_log_type_distribution()
+        per_project = await analytics_service.get_logs_per_project()
+
+        assert stats['total_logs'] == 7
+        assert dict(zip(distribution['labels'], distribution['values']))['Milestone'] == 2
+        assert per_project['values'][0] == 5
+        for call in mock_appwrite.iter_build_logs_for_projects.call_args_list:
+            assert 'project1' not in call.args[0]
+
+    async def test_counted_projects_read_only_window(self, analytics_service, mock_appwrite, sample_projects, batched_logs):
+        """Active projects with counters have only the logs inside the dated charts' windows read"""
+        counted = {
+            **sample_projects[0], 'log_count': 5, 'last_log_at': datetime.now().isoformat(),
+            'log_type_counts': '{"update": 5}'
+        }
+        mock_appwrite.get_projects.return_value = [counted, sample_projects[1]]
+        mock_appwrite.iter_build_logs_for_projects.side_effect = batched_logs({})
+
+        await analytics_service.get_complete_analytics()
+
+        calls = {tuple(call.args[0]): call.kwargs['start_day'] for call in mock_appwrite.iter_build_logs_for_projects.call_args_list}
+        window = AnalyticsEngine([], today(), weekly=True, activity_days=ACTIVITY_DAYS, trend_weeks=TREND_WEEKS)
+        assert calls[('project1',)] == window.first_day
+        assert calls[(sample_projects[1]['$id'],)] is None
+
+    async def test_get_logs_per_project_limit(self, analytics_service, mock_appwrite, sample_projects, sample_logs, batched_logs):
         """Test logs per project with limit"""
         mock_appwrite.get_projects.return_value = sample_projects
-        mock_appwrite.get_build_logs.side_effect = lambda project_id: sample_logs.get(project_id, [])
+        mock_appwrite.iter_build_logs_for_projects.side_effect = batched_logs(sample_logs)
 
-        logs_per_project = analytics_service.get_logs_per_project(limit=2)
+        logs_per_project = await analytics_service.get_logs_per_project(limit=2)
 
         assert len(logs_per_project['labels']) == 2
         assert len(logs_per_project['values']) == 2
 
-    def test_get_logs_per_project_truncate_names(self, analytics_service, mock_appwrite):
+    async def test_get_logs_per_project_truncate_names(self, analytics_service, mock_appwrite, batched_logs):
         """Test that long project names are truncated"""
         long_name_projects = [{
             '$id': 'project1',
@@ -197,40 +261,60 @@ class TestAnalyticsService:
         }]
 
         mock_appwrite.get_projects.return_value = long_name_projects
-        mock_appwrite.get_build_logs.return_value = [{'$id': 'log1'}]
+        mock_appwrite.iter_build_logs_for_projects.side_effect = batched_logs({'project1': [{'$id': 'log1'}]})
 
-        logs_per_project = analytics_service.get_logs_per_project()
+        logs_per_project = await analytics_service.get_logs_per_project()
 
         assert len(logs_per_project['labels'][0]) <= 20
 
-    def test_get_weekly_trend(self, analytics_service, mock_appwrite, sample_projects, sample_logs):
+    async def test_activity_buckets_mixed_formats_and_day_numbers(self, analytics_service, mock_appwrite, batched_logs):
+        """Test logs bucket by created_day, or by created_at in any ISO format when it is missing"""
+        now = datetime.now()
+        yesterday = now - timedelta(days=1)
+        mock_appwrite.get_projects.return_value = [{'$id': 'project1', 'name': 'P'}]
+        mock_appwrite.iter_build_logs_for_projects.side_effect = batched_logs({'project1': [
+            {'created_at': now.strftime('%Y-%m-%d %H:%M:%S')},
+            {'created_at': yesterday.strftime('%Y-%m-%dT%H:%M:%S.%f') + '123'},
+            {'created_at': yesterday.strftime('%Y-%m-%d')},
+            {'created_at': 'not a date', 'created_day': (now.date() - datetime(1970, 1, 1).date()).days},
+            {'created_at': 'not a date'},
+        ]})
+
+        activity = await analytics_service.get_activity_over_time(days=7)
+        heatmap = await analytics_service.get_activity_heatmap(days=7)
+
+        assert activity['values'][-2:] == [2, 2]
+        assert [d['count'] for d in heatmap[-2:]] == [2, 2]
+        assert heatmap[-1]['date'] == now.strftime('%Y-%m-%d')
+
+    async def test_get_weekly_trend(self, analytics_service, mock_appwrite, sample_projects, sample_logs, batched_logs):
         """Test getting weekly trend"""
         mock_appwrite.get_projects.return_value = sample_projects
-        mock_appwrite.get_build_logs.side_effect = lambda project_id: sample_logs.get(project_id, [])
+        mock_appwrite.iter_build_logs_for_projects.side_effect = batched_logs(sample_logs)
 
-        trend = analytics_service.get_weekly_trend(weeks=4)
+        trend = await analytics_service.get_weekly_trend(weeks=4)
 
         assert 'labels' in trend
         assert 'values' in trend
         assert len(trend['labels']) == 4
         assert len(trend['values']) == 4
 
-    def test_get_weekly_trend_custom_weeks(self, analytics_service, mock_appwrite, sample_projects, sample_logs):
+    async def test_get_weekly_trend_custom_weeks(self, analytics_service, mock_appwrite, sample_projects, sample_logs, batched_logs):
         """Test weekly trend with custom week count"""
         mock_appwrite.get_projects.return_value = sample_projects
-        mock_appwrite.get_build_logs.side_effect = lambda project_id: sample_logs.get(project_id, [])
+        mock_appwrite.iter_build_logs_for_projects.side_effect = batched_logs(sample_logs)
 
-        trend = analytics_service.get_weekly_trend(weeks=12)
+        trend = await analytics_service.get_weekly_trend(weeks=12)
 
         assert len(trend['labels']) == 12
         assert len(trend['values']) == 12
 
-    def test_get_activity_heatmap(self, analytics_service, mock_appwrite, sample_projects, sample_logs):
+    async def test_get_activity_heatmap(self, analytics_service, mock_appwrite, sample_projects, sample_logs, batched_logs):
         """Test getting activity heatmap"""
         mock_appwrite.get_projects.return_value = sample_projects
-        mock_appwrite.get_build_logs.side_effect = lambda project_id: sample_logs.get(project_id, [])
+        mock_appwrite.iter_build_logs_for_projects.side_effect = batched_logs(sample_logs)
 
-        heatmap = analytics_service.get_activity_heatmap(days=90)
+        heatmap = await analytics_service.get_activity_heatmap(days=90)
 
         assert isinstance(heatmap, list)
         assert len(heatmap) == 91  # 90 days + 1
@@ -241,20 +325,20 @@ class TestAnalyticsService:
             assert 'count' in day
             assert isinstance(day['count'], int)
 
-    def test_get_activity_heatmap_custom_days(self, analytics_service, mock_appwrite, sample_projects, sample_logs):
+    async def test_get_activity_heatmap_custom_days(self, analytics_service, mock_appwrite, sample_projects, sample_logs, batched_logs):
         """Test heatmap with custom day range"""
         mock_appwrite.get_projects.return_value = sample_projects
-        mock_appwrite.get_build_logs.side_effect = lambda project_id: sample_logs.get(project_id, [])
+        mock_appwrite.iter_build_logs_for_projects.side_effect = batched_logs(sample_logs)
 
-        heatmap = analytics_service.get_activity_heatmap(days=30)
+        heatmap = await analytics_service.get_activity_heatmap(days=30)
 
         assert len(heatmap) == 31
 
-    def test_get_project_status_distribution(self, analytics_service, mock_appwrite, sample_projects):
+    async def test_get_project_status_distribution(self, analytics_service, mock_appwrite, sample_projects):
         """Test getting project status distribution"""
         mock_appwrite.get_projects.return_value = sample_projects
 
-        distribution = analytics_service.get_project_status_distribution()
+        distribution = await analytics_service.get_project_status_distribution()
 
         assert 'labels' in distribution
         assert 'values' in distribution
@@ -263,21 +347,21 @@ class TestAnalyticsService:
         # Check that statuses are formatted correctly
         assert all(isinstance(label, str) for label in distribution['labels'])
 
-    def test_get_project_status_distribution_empty(self, analytics_service, mock_appwrite):
+    async def test_get_project_status_distribution_empty(self, analytics_service, mock_appwrite):
         """Test status distribution with no projects"""
         mock_appwrite.get_projects.return_value = []
 
-        distribution = analytics_service.get_project_status_distribution()
+        distribution = await analytics_service.get_project_status_distribution()
 
         assert distribution['labels'] == []
         assert distribution['values'] == []
 
-    def test_get_complete_analytics(self, analytics_service, mock_appwrite, sample_projects, sample_logs):
+    async def test_get_complete_analytics(self, analytics_service, mock_appwrite, sample_projects, sample_logs, batched_logs):
         """Test getting complete analytics in one call"""
         mock_appwrite.get_projects.return_value = sample_projects
-        mock_appwrite.get_build_logs.side_effect = lambda project_id: sample_logs.get(project_id, [])
+        mock_appwrite.iter_build_logs_for_projects.side_effect = batched_logs(sample_logs)
 
-        analytics = analytics_service.get_complete_analytics()
+        analytics = await analytics_service.get_complete_analytics()
 
         # Check all required keys are present
         assert 'total_projects' in analytics
@@ -290,14 +374,102 @@ class TestAnalyticsService:
         assert 'weekly_trend' in analytics
         assert 'project_status' in analytics
 
-    def test_count_weekly_logs(self, analytics_service, mock_appwrite, sample_projects, sample_logs):
-        """Test counting weekly logs"""
-        mock_appwrite.get_build_logs.side_effect = lambda project_id: sample_logs.get(project_id, [])
+    async def test_complete_analytics_is_one_pass(self, analytics_service, mock_appwrite, sample_projects, sample_logs, batched_logs):
+        """Test every section comes from one project read and one log stream, matching the section methods"""
+        mock_appwrite.get_projects.return_value = sample_projects
+        mock_appwrite.iter_build_logs_for_projects.side_effect = batched_logs(sample_logs)
+
+        analytics = await analytics_service.get_complete_analytics()
+
+        assert mock_appwrite.get_projects.await_count == 1
+        assert mock_appwrite.iter_build_logs_for_projects.call_count == 1
+        assert analytics == {
+            **await analytics_service.get_overview_stats(),
+            'activity_over_time': await analytics_service.get_activity_over_time(),
+            'log_type_distribution': await analytics_service.get_log_type_distribution(),
+            'logs_per_project': await analytics_service.get_logs_per_project(),
+            'weekly_trend': await analytics_service.get_weekly_trend(),
+            'project_status': await analytics_service.get_project_status_distribution()
+        }
+        assert analytics['total_logs'] == 4
+        assert analytics['activity_over_time']['values'][-2:] == [1, 2]
+
+    async def test_complete_analytics_error_keeps_shape(self, analytics_service, mock_appwrite):
+        """Test a failed read still answers with every section, empty"""
+        mock_appwrite.get_projects.side_effect = Exception("Network error")
+
+        analytics = await analytics_service.get_complete_analytics()
+
+        assert analytics['total_logs'] == 0
+        assert analytics['weekly_trend'] == {'labels': [], 'values': []}
+
+    async def test_complete_analytics_from_rollups(self, mock_appwrite, sample_projects, sample_logs, batched_logs):
+        """Test rollups answer the dated charts, with logs read only for the totals of projects without counters"""
+        from app.services.timestamps import today
+        counted = {**sample_projects[1], 'log_count': 3, 'last_log_at': None, 'log_type_counts': '{"feature": 3}'}
+        mock_appwrite.get_projects.return_value = [sample_projects[0], counted]
+        mock_appwrite.get_rollups.return_value = [
+            {'day': today() - 1, 'log_count': 2, 'counts': {'project1': {'update': 1}, 'project2': {'feature': 1}}},
+            {'day': today(), 'log_count': 3, 'counts': {'project2': {'feature': 2}, 'deleted': {'note': 1}}},
+        ]
+        mock_appwrite.iter_build_logs_for_projects.side_effect = batched_logs(sample_logs)
+
+        analytics = await AnalyticsService(mock_appwrite, use_rollups=True).get_complete_analytics()
+
+        assert mock_appwrite.get_rollups.await_args.args[1] <= today() - 30
+        assert mock_appwrite.iter_build_logs_for_projects.call_args.args[0] == ['project1']
+        assert analytics['total_logs'] == 5
+        assert analytics['weekly_logs'] == 4
+        assert analytics['activity_over_time']['values'][-2:] == [2, 2]
+
+    async def test_get_activity_reads_only_the_window(self, analytics_service, mock_appwrite, sample_projects, async_iter):
+        """Test the logs of the range are asked for by day, and counted per week of one log type"""
+        from app.services.timestamps import day_number
+        start, end = day_number(datetime(2025, 3, 5).date()), day_number(datetime(2025, 3, 18).date())
+        old = {'$id': 'old', 'log_count': 1, 'last_log_at': '2024-12-01T10:00:00', 'log_type_counts': '{}'}
+        mock_appwrite.get_projects.return_value = [*sample_projects, old]
+        mock_appwrite.iter_build_logs_for_projects.side_effect = lambda *args, **kwargs: async_iter([
+            {'project_id': 'project1', 'log_type': 'feature', 'created_day': start},
+            {'project_id': 'project1', 'log_type': 'feature', 'created_day': start + 6},
+            {'project_id': 'project2', 'log_type': 'update', 'created_day': start + 6},
+            {'project_id': 'project2', 'log_type': 'feature', 'created_at': '2025-03-18T09:00:00'},
+        ])
+
+        activity = await analytics_service.get_activity('u1', start, end, 'week', log_type='feature')
+
+        call = mock_appwrite.iter_build_logs_for_projects.call_args
+        assert call.args[0] == ['project1', 'project2', 'project3']
+        assert (call.kwargs['start_day'], call.kwargs['end_day']) == (start, end)
+        assert activity['labels'] == ['2025-03-05', '2025-03-10', '2025-03-17']
+        assert activity['values'] == [1, 1, 1]
+        assert activity['total'] == 3
+
+    async def test_get_activity_from_rollups(self, mock_appwrite, sample_projects):
+        """Test with rollups only the range's rollups are read, narrowed to one project"""
+        from app.services.timestamps import today
+        mock_appwrite.get_projects.return_value = sample_projects
+        mock_appwrite.get_rollups.return_value = [
+            {'day': today() - 1, 'log_count': 3, 'counts': {'project1': {'update': 1}, 'project2': {'feature': 2}}},
+            {'day': today(), 'log_count': 1, 'counts': {'project2': {'note': 1}}},
+        ]
 
-        count = analytics_service._count_weekly_logs(sample_projects)
+        activity = await AnalyticsService(mock_appwrite, use_rollups=True).get_activity(
+            'u1', today() - 1, today(), project_id='project2'
+        )
 
-        assert isinstance(count, int)
-        assert count >= 0
+        assert mock_appwrite.get_rollups.await_args.args == ('u1', today() - 1, today())
+        assert activity['values'] == [2, 1]
+        mock_appwrite.iter_build_logs_for_projects.assert_not_called()
+
+    async def test_get_activity_errors(self, analytics_service, mock_appwrite):
+        """Test an unusable range is refused before reading, and storage errors are raised"""
+        with pytest.raises(ValueError):
+            await analytics_service.get_activity('u1', 10, 5)
+        mock_appwrite.get_projects.assert_not_called()
+
+        mock_appwrite.get_projects.side_effect = Exception("Network error")
+        with pytest.raises(Exception, match="Network error"):
+            await analytics_service.get_activity('u1', 5, 10)
 
     def test_format_log_type(self, analytics_service):
         """Test log type formatting"""
@@ -308,28 +480,28 @@ class TestAnalyticsService:
         assert analytics_service._format_log_type('note') == 'Note'
         assert analytics_service._format_log_type('custom_type') == 'Custom Type'
 
-    def test_error_handling_activity_over_time(self, analytics_service, mock_appwrite):
+    async def test_error_handling_activity_over_time(self, analytics_service, mock_appwrite):
         """Test error handling in activity over time"""
         mock_appwrite.get_projects.side_effect = Exception("Network error")
 
-        activity = analytics_service.get_activity_over_time()
+        activity = await analytics_service.get_activity_over_time()
 
         assert activity['labels'] == []
         assert activity['values'] == []
 
-    def test_error_handling_weekly_trend(self, analytics_service, mock_appwrite):
+    async def test_error_handling_weekly_trend(self, analytics_service, mock_appwrite):
         """Test error handling in weekly trend"""
         mock_appwrite.get_projects.side_effect = Exception("Network error")
 
-        trend = analytics_service.get_weekly_trend()
+        trend = await analytics_service.get_weekly_trend()
 
         assert trend['labels'] == []
         assert trend['values'] == []
 
-    def test_error_handling_heatmap(self, analytics_service, mock_appwrite):
+    async def test_error_handling_heatmap(self, analytics_service, mock_appwrite):
         """Test error handling in heatmap"""
         mock_appwrite.get_projects.side_effect = Exception("Network error")
 
-        heatmap = analytics_service.get_activity_heatmap()
+        heatmap = await analytics_service.get_activity_heatmap()
 
         assert heatmap == []
@@ -4,48 +4,62 @@ Integration tests for API endpoints
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, Mock, AsyncMock
+import main
 from main import app
+from app.services.storage_backend import AlreadyCreatedError
 
 
 @pytest.fixture
 def client():
     """Create test client"""
+    main.analytics_cache.clear()
     return TestClient(app)
 
 
 @pytest.fixture
-def mock_appwrite():
+def mock_appwrite(async_iter):
     """Mock Appwrite service"""
-    with patch('main.appwrite_service') as mock:
-        # Mock synchronous methods (no longer async)
-        mock.get_projects = Mock(return_value=[])
-        mock.get_project = Mock(return_value={
+    with patch('main.storage') as mock:
+        mock.get_projects = AsyncMock(return_value=[])
+        mock.get_project = AsyncMock(return_value={
             '$id': '123',
+            'user_id': 'test_user_123',
             'name': 'Test Project',
             'description': 'Test description',
             'tech_stack': ['Python'],
             'status': 'in_progress'
         })
-        mock.create_project = Mock(return_value={
+        mock.create_project = AsyncMock(return_value={
             '$id': '123',
             'name': 'New Project'
         })
-        mock.update_project = Mock(return_value={
+        mock.update_project = AsyncMock(return_value={
             '$id': '123',
             'name': 'Updated Project'
         })
-        mock.delete_project = Mock(return_value=True)
-        mock.get_build_logs = Mock(return_value=[])
-        mock.create_build_log = Mock(return_value={
+        mock.delete_project = AsyncMock(return_value=True)
+        mock.get_build_logs = AsyncMock(return_value=[])
+        mock.get_build_log = AsyncMock(return_value={
+            '$id': 'log123',
+            'project_id': '123',
+            'title': 'Test Log',
+            'content': 'Content'
+        })
+        mock.get_build_logs_page = AsyncMock(return_value=([], None))
+        mock.iter_build_logs = Mock(side_effect=lambda *args, **kwargs: async_iter([]))
+        mock.create_build_log = AsyncMock(return_value={
             '$id': 'log123',
             'title': 'New Log'
         })
-        mock.update_build_log = Mock(return_value={
+        mock.update_build_log = AsyncMock(return_value={
             '$id': 'log123',
             'title': 'Updated Log'
         })
-        mock.delete_build_log = Mock(return_value=True)
-        mock.upload_file = Mock(return_value={
+        mock.delete_build_log = AsyncMock(return_value=True)
+        mock.delete_build_logs = AsyncMock(return_value=True)
+        mock.delete_file = AsyncMock(return_value=True)
+        mock.get_file_owner = AsyncMock(return_value='test_user_123')
+        mock.upload_file_stream = AsyncMock(return_value={
             '$id': 'file123',
             'name': 'test.jpg'
         })
@@ -66,6 +80,16 @@ class TestHomeEndpoint:
         response = client.get("/")
         assert "Document Your Journey" in response.text or "BuildLog" in response.text
 
+    def test_logged_in_users_go_to_dashboard(self, client, mock_appwrite, sample_user_data):
+        """Test the landing, login and signup pages send a signed-in user to the dashboard"""
+        mock_appwrite.get_account = AsyncMock(return_value=sample_user_data)
+        client.cookies.set("session", "session-token")
+        for path in ("/", "/login", "/signup"):
+            response = client.get(path, follow_redirects=False)
+            assert response.status_code == 302
+            assert response.headers["location"] == "/dashboard"
+        mock_appwrite.get_account.assert_awaited_with("session-token")
+
 
 class TestDashboardEndpoint:
     """Test dashboard endpoint"""
@@ -85,6 +109,12 @@ class TestDashboardEndpoint:
         assert response.status_code == 200
         assert "Project 1" in response.text or "Dashboard" in response.text
 
+    def test_dashboard_fetches_only_card_fields(self, client, mock_appwrite, mock_current_user):
+        """Test the dashboard asks Appwrite only for the attributes its cards render"""
+        response = client.get("/dashboard")
+        assert response.status_code == 200
+        assert mock_appwrite.get_projects.call_args.kwargs["fields"] == main.DASHBOARD_PROJECT_FIELDS
+
 
 class TestProjectEndpoints:
     """Test project-related endpoints"""
@@ -111,11 +141,50 @@ class TestProjectEndpoints:
         )
         assert response.status_code in [200, 303]
 
+    def test_create_project_is_idempotent(self, client, mock_appwrite, mock_current_user):
+        """Test the idempotency key picks the document id and a repeat redirects to the first project"""
+        data = {"name": "Test Project", "idempotency_key": "form-key"}
+        response = client.post("/projects/new", data=data, follow_redirects=False)
+        document_id = mock_appwrite.create_project.await_args.kwargs["document_id"]
+        assert len(document_id) == 36
+
+        mock_appwrite.create_project.side_effect = AlreadyCreatedError(document_id)
+        response = client.post("/projects/new", data=data, follow_redirects=False)
+        assert response.status_code == 303
+        assert response.headers["location"] == f"/projects/{document_id}"
+
+        client.post("/projects/new", data={"name": "Test Project"}, headers={"Idempotency-Key": "form-key"},
+                    follow_redirects=False)
+        assert mock_appwrite.create_project.await_args.kwargs["document_id"] == document_id
+
+        response = client.post("/projects/new", data={"name": "Test Project"}, headers={"Idempotency-Key": "x" * 300})
+        assert response.status_code == 400
+
+    def test_new_forms_carry_an_idempotency_key(self, client, mock_appwrite, mock_current_user):
+        """Test each render of a create form gets its own hidden key"""
+        first = client.get("/projects/new").text
+        second = client.get("/projects/new").text
+        assert 'name="idempotency_key"' in first
+        assert first != second
+        assert 'name="idempotency_key"' in client.get("/projects/123/logs/new").text
+        assert 'name="idempotency_key"' not in client.get("/projects/123/logs/log123/edit").text
+
     def test_view_project(self, client, mock_appwrite):
         """Test viewing a single project"""
         response = client.get("/projects/123")
         assert response.status_code == 200
 
+    def test_view_project_timeline_pagination(self, client, mock_appwrite, mock_current_user):
+        """Test the timeline links to the next page of older logs"""
+        mock_appwrite.get_build_logs_page.return_value = (
+            [{'$id': 'log1', 'title': 'Newest', 'log_type': 'update', 'created_at': '2025-10-13'}],
+            'log1'
+        )
+        response = client.get("/projects/123?after=log0")
+        assert response.status_code == 200
+        assert "?after=log1" in response.text
+        mock_appwrite.get_build_logs_page.assert_called_once_with('123', cursor='log0')
+
     def test_edit_project_form(self, client, mock_appwrite):
         """Test edit project form"""
         response = client.get("/projects/123/edit")
@@ -143,6 +212,41 @@ class TestProjectEndpoints:
         response = client.post("/projects/123/delete", follow_redirects=False)
         assert response.status_code in [200, 303]
 
+    def test_delete_project_cascades_in_background(self, client, mock_appwrite, mock_current_user):
+        """Test the delete answers with a redirect and the logs, files and project go after it"""
+        file_id = "6ad30d700036ef4d4306"
+        mock_appwrite.get_build_logs_page.side_effect = [([{"$id": "log1", "images": [f"/files/{file_id}"]}], None), ([], None)]
+        response = client.post("/projects/123/delete", follow_redirects=False)
+        assert response.status_code == 303
+
+        mock_appwrite.delete_file.assert_awaited_once_with(file_id)
+        mock_appwrite.delete_build_logs.assert_awaited_once_with("123", ["log1"])
+        mock_appwrite.delete_project.assert_awaited_once_with("123")
+
+        progress = client.get("/projects/123/delete/progress").json()
+        assert (progress["status"], progress["done"], progress["files_deleted"]) == ("completed", 1, 1)
+        assert client.get("/projects/456/delete/progress").status_code == 404
+
+    def test_delete_progress_of_another_user(self, client, mock_appwrite, mock_current_user):
+        """Test a second user cannot follow someone else's project deletion"""
+        mock_appwrite.get_build_logs_page.return_value = ([], None)
+        client.post("/projects/123/delete", follow_redirects=False)
+        assert client.get("/projects/123/delete/progress").status_code == 200
+
+        main.app.dependency_overrides[main.get_current_user] = lambda: {**mock_current_user, '$id': 'someone_else'}
+        assert client.get("/projects/123/delete/progress").status_code == 404
+
+    def test_delete_project_of_another_user(self, client, mock_appwrite, mock_current_user):
+        """Test deleting someone else's project answers 404 and starts no cascade"""
+        mock_appwrite.get_project.return_value = {'$id': '789', 'user_id': 'someone_else'}
+        with patch('main.analytics_cache.bump') as bump:
+            response = client.post("/projects/789/delete", follow_redirects=False)
+
+        assert response.status_code == 404
+        assert main.project_deletions.get("789") is None
+        mock_appwrite.get_build_logs_page.assert_not_called()
+        bump.assert_not_called()
+
     def test_view_nonexistent_project(self, client, mock_appwrite):
         """Test viewing nonexistent project returns 404"""
         mock_appwrite.get_project.side_effect = Exception("Not found")
@@ -172,13 +276,21 @@ class TestBuildLogEndpoints:
         )
         assert response.status_code in [200, 303]
 
-    def test_edit_log_form(self, client, mock_appwrite):
-        """Test edit build log form"""
-        mock_appwrite.get_build_logs.return_value = [
-            {'$id': 'log123', 'title': 'Test Log', 'content': 'Content'}
-        ]
+    def test_create_build_log_repeat_is_not_an_error(self, client, mock_appwrite, mock_current_user):
+        """Test a resent log create with the same key redirects as if it had been written"""
+        mock_appwrite.create_build_log.side_effect = AlreadyCreatedError("log-id")
+        response = client.post("/projects/123/logs/new", data={
+            "title": "Test Log", "content": "Log content", "idempotency_key": "form-key"
+        }, follow_redirects=False)
+        assert response.status_code == 303
+        assert mock_appwrite.create_build_log.await_args.kwargs["document_id"] is not None
+
+    def test_edit_log_form(self, client, mock_appwrite, mock_current_user):
+        """Test edit build log form fetches only the log being edited"""
         response = client.get("/projects/123/logs/log123/edit")
         assert response.status_code == 200
+        mock_appwrite.get_build_log.assert_awaited_once_with('log123')
+        mock_appwrite.get_build_logs.assert_not_called()
 
     def test_update_build_log(self, client, mock_appwrite):
         """Test updating a build log"""
@@ -194,6 +306,28 @@ class TestBuildLogEndpoints:
         )
         assert response.status_code in [200, 303]
 
+    def test_bulk_import(self, client, mock_appwrite, mock_current_user):
+        """Test an NDJSON import writes each valid row and rejects other content types"""
+        body = b'{"title": "One", "content": "x"}\n{"title": "Two", "content": "y"}\n'
+        response = client.post("/projects/123/logs/import", content=body,
+                               headers={"Content-Type": "application/x-ndjson"})
+        assert response.json() == {"imported": 2, "duplicates": 0, "failed": 0, "errors": []}
+        assert mock_appwrite.create_build_log.await_count == 2
+
+        response = client.post("/projects/123/logs/import", content=body, headers={"Content-Type": "application/json"})
+        assert response.status_code == 415
+
+        mock_appwrite.get_project.return_value = {'$id': '789', 'user_id': 'someone_else'}
+        response = client.post("/projects/789/logs/import", content=body,
+                               headers={"Content-Type": "application/x-ndjson"})
+        assert response.status_code == 404
+        assert mock_appwrite.create_build_log.await_count == 2
+
+        mock_appwrite.get_project.side_effect = Exception("Not found")
+        response = client.post("/projects/456/logs/import", content=body,
+                               headers={"Content-Type": "application/x-ndjson"})
+        assert response.status_code == 404
+
     def test_delete_build_log(self, client, mock_appwrite):
         """Test deleting a build log"""
         response = client.post("/projects/123/logs/log123/delete", follow_redirects=False)
@@ -203,9 +337,9 @@ class TestBuildLogEndpoints:
 class TestExportEndpoint:
     """Test markdown export endpoint"""
 
-    def test_export_to_markdown(self, client, mock_appwrite):
+    def test_export_to_markdown(self, client, mock_appwrite, async_iter):
         """Test exporting project to markdown"""
-        mock_appwrite.get_build_logs.return_value = [
+        mock_appwrite.iter_build_logs.side_effect = lambda *args, **kwargs: async_iter([
             {
                 '$id': 'log1',
                 'title': 'First Log',
@@ -213,7 +347,7 @@ class TestExportEndpoint:
                 'created_at': '2025-10-13',
                 'log_type': 'update'
             }
-        ]
+        ])
         response = client.get("/projects/123/export")
         assert response.status_code == 200
         assert "markdown" in response.text.lower() or "export" in response.text.lower()
@@ -241,7 +375,7 @@ class TestPortfolioEndpoint:
 class TestFileUploadEndpoint:
     """Test file upload endpoint"""
 
-    def test_upload_file(self, client, mock_appwrite):
+    def test_upload_file(self, client, mock_appwrite, mock_current_user):
         """Test uploading a file"""
         from io import BytesIO
 
@@ -255,6 +389,66 @@ class TestFileUploadEndpoint:
         assert json_response["success"] is True
         assert "file_id" in json_response
 
+    def test_upload_streams_and_reports_progress(self, client, mock_appwrite, mock_current_user):
+        """Test the upload is streamed under a server-chosen id and its progress can be polled"""
+        from io import BytesIO
+
+        upload_id = client.post("/upload/new", data={"size": "1024"}).json()["upload_id"]
+        response = client.post(
+            "/upload",
+            files={"file": ("video.mp4", BytesIO(b"x" * 1024), "video/mp4")},
+            data={"upload_id": upload_id}
+        )
+        assert response.status_code == 200
+        assert response.json()["upload_id"] == upload_id
+        assert response.json()["size"] == 1024
+
+        args, kwargs = mock_appwrite.upload_file_stream.call_args
+        assert args[1:] == ("video.mp4", 1024)
+        assert kwargs["file_id"] == upload_id
+        assert kwargs["owner_id"] == mock_current_user["$id"]
+
+        progress = client.get(f"/upload/{upload_id}/progress").json()
+        assert progress["status"] == "completed"
+        assert progress["percent"] == 100.0
+
+    def test_upload_id_chosen_by_server(self, client, mock_appwrite, mock_current_user):
+        """Test an upload without an id gets a fresh one, never the client's choice"""
+        from io import BytesIO
+
+        response = client.post("/upload", files={"file": ("a.txt", BytesIO(b"data"), "text/plain")})
+        upload_id = response.json()["upload_id"]
+        assert mock_appwrite.upload_file_stream.call_args.kwargs["file_id"] == upload_id
+
+        response = client.post(
+            "/upload",
+            files={"file": ("test.jpg", BytesIO(b"data"), "image/jpeg")},
+            data={"upload_id": "chosen-by-client"}
+        )
+        assert response.status_code == 404
+        assert mock_appwrite.upload_file_stream.call_count == 1
+
+    def test_resume_checks_owner_and_size(self, client, mock_appwrite, mock_current_user):
+        """Test another user's upload cannot be resumed or polled, nor one with a different size"""
+        from io import BytesIO
+
+        others = "6ad30d700036ef4d4399"
+        main.upload_progress.start(others, 4, owner="someone_else")
+        response = client.post("/upload", files={"file": ("a.txt", BytesIO(b"data"), "text/plain")},
+                               data={"upload_id": others})
+        assert response.status_code == 404
+        assert client.get(f"/upload/{others}/progress").status_code == 404
+
+        upload_id = client.post("/upload/new", data={"size": "10"}).json()["upload_id"]
+        response = client.post("/upload", files={"file": ("a.txt", BytesIO(b"data"), "text/plain")},
+                               data={"upload_id": upload_id})
+        assert response.status_code == 409
+        mock_appwrite.upload_file_stream.assert_not_called()
+
+    def test_upload_progress_unknown_id(self, client, mock_current_user):
+        """Test polling an unknown upload returns 404"""
+        assert client.get("/upload/missing/progress").status_code == 404
+
 
 class TestHealthEndpoint:
     """Test health check endpoint"""
@@ -266,6 +460,9 @@ class TestHealthEndpoint:
         json_response = response.json()
         assert json_response["status"] == "healthy"
         assert json_response["service"] == "BuildLog API"
+        assert json_response["backend"] == "appwrite"
+        assert {"hits", "misses", "entries", "bytes"} <= set(json_response["cache"])
+        assert json_response["appwrite_circuit"] == "closed"
 
 
 class TestErrorHandling:
@@ -346,10 +543,11 @@ class TestErrorHandling:
         assert response.status_code == 500
 
     def test_delete_project_error_handling(self, client, mock_appwrite):
-        """Test delete project error handling"""
-        mock_appwrite.delete_project.side_effect = Exception("Delete error")
+        """Test deleting a project that cannot be read returns 404 and starts nothing"""
+        mock_appwrite.get_project.side_effect = Exception("Not found")
         response = client.post("/projects/123/delete", follow_redirects=False)
-        assert response.status_code == 500
+        assert response.status_code == 404
+        mock_appwrite.delete_project.assert_not_called()
 
     def test_new_log_form_error_handling(self, client, mock_appwrite):
         """Test new log form with nonexistent project"""
@@ -373,10 +571,15 @@ class TestErrorHandling:
     def test_edit_log_not_found(self, client, mock_appwrite):
         """Test editing nonexistent log"""
         mock_appwrite.get_project.return_value = {"$id": "123", "name": "Project"}
-        mock_appwrite.get_build_logs.return_value = []
+        mock_appwrite.get_build_log.side_effect = Exception("Not found")
         response = client.get("/projects/123/logs/999/edit")
         assert response.status_code == 404
 
+    def test_edit_log_of_another_project(self, client, mock_appwrite, mock_current_user):
+        """Test a log is not editable under a project it does not belong to"""
+        response = client.get("/projects/456/logs/log123/edit")
+        assert response.status_code == 404
+
     def test_edit_log_project_not_found(self, client, mock_appwrite):
         """Test editing log when project not found"""
         mock_appwrite.get_project.side_effect = Exception("Not found")
@@ -414,10 +617,10 @@ class TestErrorHandling:
         response = client.get("/portfolio/123")
         assert response.status_code == 404
 
-    def test_upload_file_error_handling(self, client, mock_appwrite):
+    def test_upload_file_error_handling(self, client, mock_appwrite, mock_current_user):
         """Test upload file error handling"""
         from io import BytesIO
-        mock_appwrite.upload_file.side_effect = Exception("Upload error")
+        mock_appwrite.upload_file_stream.side_effect = Exception("Upload error")
 
         file_data = BytesIO(b"fake image data")
         response = client.post(
@@ -584,7 +787,7 @@ class TestAnalyticsEndpoints:
         assert response.status_code == 200
         assert "Analytics" in response.text or "Chart" in response.text
 
-    @patch('main.analytics_service')
+    @patch('main.analytics_service', new_callable=AsyncMock)
     def test_get_analytics_data(self, mock_analytics, client, mock_appwrite):
         """Test getting analytics data"""
         mock_analytics.get_complete_analytics.return_value = {
@@ -639,7 +842,7 @@ class TestAnalyticsEndpoints:
         assert json_response['total_logs'] == 20
         assert json_response['active_projects'] == 3
 
-    @patch('main.analytics_service')
+    @patch('main.analytics_service', new_callable=AsyncMock)
     def test_get_analytics_with_no_data(self, mock_analytics, client, mock_appwrite):
         """Test analytics with no data"""
         mock_analytics.get_complete_analytics.return_value = {
@@ -661,7 +864,39 @@ class TestAnalyticsEndpoints:
         assert json_response['total_projects'] == 0
         assert json_response['total_logs'] == 0
 
-    @patch('main.analytics_service')
+    @patch('main.analytics_service', new_callable=AsyncMock)
+    def test_analytics_revalidates_with_etag(self, mock_analytics, client, mock_appwrite, mock_current_user):
+        """Test a repeat visit is answered from the cache, 304 when the ETag matches, and recomputed after a write"""
+        mock_analytics.get_complete_analytics.return_value = {'total_projects': 1, 'total_logs': 2}
+
+        first = client.get("/api/analytics")
+        etag = first.headers["etag"]
+        assert first.json() == {'total_projects': 1, 'total_logs': 2}
+        assert etag.startswith('"') and first.headers["cache-control"] == "private, no-cache"
+
+        response = client.get("/api/analytics", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert client.get("/api/analytics").content == first.content
+        assert mock_analytics.get_complete_analytics.await_count == 1
+
+        mock_analytics.get_complete_analytics.return_value = {'total_projects': 1, 'total_logs': 3}
+        client.post("/projects/123/logs/new", data={"title": "Log", "content": "Text"}, follow_redirects=False)
+        response = client.get("/api/analytics", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()['total_logs'] == 3
+        assert response.headers["etag"] != etag
+        assert mock_analytics.get_complete_analytics.await_count == 2
+
+    @patch('main.analytics_service', new_callable=AsyncMock)
+    def test_analytics_errors_are_not_cached(self, mock_analytics, client, mock_appwrite, mock_current_user):
+        """Test a failed computation is retried on the next request"""
+        mock_analytics.get_complete_analytics.side_effect = [Exception("Appwrite down"), {'total_projects': 0}]
+        assert client.get("/api/analytics").status_code == 500
+        assert client.get("/api/analytics").json() == {'total_projects': 0}
+        assert mock_analytics.get_complete_analytics.await_args.kwargs["raise_errors"] is True
+
+    @patch('main.analytics_service', new_callable=AsyncMock)
     def test_analytics_error_handling(self, mock_analytics, client, mock_appwrite):
         """Test analytics API error handling"""
         mock_analytics.get_complete_analytics.side_effect = Exception("Analytics error")
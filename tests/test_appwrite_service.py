@@ -1,7 +1,15 @@
 """Tests for Appwrite Service"""
+import asyncio
+import io
+import json
+import time
+
+import httpx
 import pytest
 from unittest.mock import Mock, patch
-from app.services.appwrite_service import AppwriteService, appwrite_service
+from app.services.appwrite_service import AppwriteService, AsyncAppwriteService, appwrite_service, file_owner
+from app.services.resilience import CircuitOpenError
+from app.services.storage_backend import AlreadyCreatedError
 
 
 class TestAppwriteService:
@@ -23,7 +31,42 @@ class TestAppwriteService:
         assert "Content-Type" in headers
         assert headers["Content-Type"] == "application/json"
 
-    @patch('app.services.appwrite_service.requests.post')
+    def test_admin_headers_precomputed(self):
+        """Test admin headers are built once and handed out as copies"""
+        service = AppwriteService()
+        headers = service._get_headers()
+        assert headers == service._admin_headers
+        headers["X-Appwrite-Key"] = "changed"
+        assert service._get_headers()["X-Appwrite-Key"] == service.api_key
+
+    def test_session_headers(self):
+        """Test session headers carry the session cookie and no API key"""
+        service = AppwriteService()
+        headers = service._get_headers("secret123")
+        assert headers["Cookie"] == "a_session_test_project_id=secret123"
+        assert "X-Appwrite-Key" not in headers
+
+    def test_pooled_client(self):
+        """Test the service owns one long-lived pooled client"""
+        service = AppwriteService()
+        assert isinstance(service.client, httpx.Client)
+        pool = service.client._transport._pool
+        assert pool._max_connections == 20
+        service.close()
+        assert service.client.is_closed
+
+    @patch('app.services.appwrite_service._http2_available', return_value=False)
+    @patch('app.services.appwrite_service.settings')
+    def test_http2_falls_back_without_h2(self, mock_settings, mock_h2):
+        """Test HTTP/2 falls back to HTTP/1.1 when h2 is missing"""
+        mock_settings.appwrite_http2 = True
+        mock_settings.appwrite_pool_size = 5
+        mock_settings.appwrite_keepalive_expiry = 5.0
+        mock_settings.appwrite_timeout = 5.0
+        service = AppwriteService()
+        assert service.client._transport._pool._http2 is False
+
+    @patch('app.services.appwrite_service.httpx.Client.request')
     @patch('app.services.appwrite_service.ID.unique')
     def test_create_project_success(self, mock_id, mock_post):
         """Test creating a project successfully"""
@@ -49,7 +92,7 @@ class TestAppwriteService:
         assert result["name"] == "Test Project"
         mock_post.assert_called_once()
 
-    @patch('app.services.appwrite_service.requests.post')
+    @patch('app.services.appwrite_service.httpx.Client.request')
     def test_create_project_filters_none_values(self, mock_post):
         """Test that None values are filtered out"""
         mock_response = Mock()
@@ -73,7 +116,7 @@ class TestAppwriteService:
         assert "demo_url" not in payload["data"]
         assert "name" in payload["data"]
 
-    @patch('app.services.appwrite_service.requests.get')
+    @patch('app.services.appwrite_service.httpx.Client.request')
     def test_get_projects_success(self, mock_get):
         """Test getting projects successfully"""
         mock_response = Mock()
@@ -92,8 +135,11 @@ class TestAppwriteService:
         assert len(result) == 2
         assert result[0]["name"] == "Project 1"
         mock_get.assert_called_once()
+        queries = [json.loads(q) for q in mock_get.call_args[1]["params"]["queries[]"]]
+        assert {"method": "equal", "attribute": "user_id", "values": ["user123"]} in queries
+        assert {"method": "limit", "values": [5000]} in queries
 
-    @patch('app.services.appwrite_service.requests.get')
+    @patch('app.services.appwrite_service.httpx.Client.request')
     def test_get_project_success(self, mock_get):
         """Test getting a single project"""
         mock_response = Mock()
@@ -110,7 +156,7 @@ class TestAppwriteService:
         assert result["$id"] == "project123"
         assert result["name"] == "Test Project"
 
-    @patch('app.services.appwrite_service.requests.patch')
+    @patch('app.services.appwrite_service.httpx.Client.request')
     def test_update_project_success(self, mock_patch):
         """Test updating a project"""
         mock_response = Mock()
@@ -130,7 +176,7 @@ class TestAppwriteService:
         assert result["name"] == "Updated Project"
         mock_patch.assert_called_once()
 
-    @patch('app.services.appwrite_service.requests.delete')
+    @patch('app.services.appwrite_service.httpx.Client.request')
     def test_delete_project_success(self, mock_delete):
         """Test deleting a project"""
         mock_response = Mock()
@@ -143,7 +189,7 @@ class TestAppwriteService:
         assert result is True
         mock_delete.assert_called_once()
 
-    @patch('app.services.appwrite_service.requests.post')
+    @patch('app.services.appwrite_service.httpx.Client.request')
     @patch('app.services.appwrite_service.ID.unique')
     def test_create_build_log_success(self, mock_id, mock_post):
         """Test creating a build log"""
@@ -167,7 +213,7 @@ class TestAppwriteService:
         assert result["$id"] == "log_id_123"
         assert result["project_id"] == "project123"
 
-    @patch('app.services.appwrite_service.requests.get')
+    @patch('app.services.appwrite_service.httpx.Client.request')
     def test_get_build_logs_success(self, mock_get):
         """Test getting build logs for a project"""
         mock_response = Mock()
@@ -175,8 +221,7 @@ class TestAppwriteService:
         mock_response.json.return_value = {
             "documents": [
                 {"$id": "1", "title": "Log 1", "project_id": "project123"},
-                {"$id": "2", "title": "Log 2", "project_id": "project123"},
-                {"$id": "3", "title": "Log 3", "project_id": "other_project"}
+                {"$id": "2", "title": "Log 2", "project_id": "project123"}
             ]
         }
         mock_get.return_value = mock_response
@@ -184,11 +229,156 @@ class TestAppwriteService:
         service = AppwriteService()
         result = service.get_build_logs("project123")
 
-        # Should filter to only logs for project123
         assert len(result) == 2
-        assert all(log["project_id"] == "project123" for log in result)
+        # Filtering and ordering happen on the server
+        queries = [json.loads(q) for q in mock_get.call_args[1]["params"]["queries[]"]]
+        assert {"method": "equal", "attribute": "project_id", "values": ["project123"]} in queries
+        assert {"method": "orderDesc", "attribute": "created_at"} in queries
+
+    @patch('app.services.appwrite_service.httpx.Client.request')
+    def test_get_build_logs_ascending_with_limit(self, mock_get):
+        """Test requesting oldest-first logs with an explicit limit"""
+        mock_response = Mock()
+        mock_response.json.return_value = {"documents": []}
+        mock_get.return_value = mock_response
+
+        service = AppwriteService()
+        service.get_build_logs("project123", order="asc", limit=10)
+
+        queries = [json.loads(q) for q in mock_get.call_args[1]["params"]["queries[]"]]
+        assert {"method": "orderAsc", "attribute": "created_at"} in queries
+        assert {"method": "limit", "values": [10]} in queries
+
+    @patch('app.services.appwrite_service.httpx.Client.request')
+    def test_get_build_logs_selects_fields(self, mock_get):
+        """Test a field projection becomes a select query that keeps $id for cursors"""
+        mock_response = Mock()
+        mock_response.json.return_value = {"documents": []}
+        mock_get.return_value = mock_response
+
+        service = AppwriteService()
+        service.get_build_logs("project123", fields=["created_at", "log_type"])
+
+        queries = [json.loads(q) for q in mock_get.call_args[1]["params"]["queries[]"]]
+        assert {"method": "select", "values": ["$id", "created_at", "log_type"]} in queries
+
+    def test_list_queries_without_fields_selects_everything(self):
+        """Test no select query is sent unless fields are requested"""
+        service = AppwriteService()
+        queries = [json.loads(q) for q in service._list_queries("user_id", "user123")]
+        assert all(q["method"] != "select" for q in queries)
+
+    def test_list_params_rejects_unknown_order(self):
+        """Test an invalid sort order is rejected before calling Appwrite"""
+        service = AppwriteService()
+        with pytest.raises(ValueError):
+            service._list_queries("project_id", "project123", order="sideways")
+
+    def test_iter_build_logs_walks_cursor_pages(self):
+        """Test iteration follows cursorAfter until a short page"""
+        documents = [{"$id": f"log{i}", "project_id": "project123"} for i in range(5)]
+        seen_queries = []
+
+        def handler(request):
+            queries = [json.loads(q) for q in request.url.params.get_list("queries[]")]
+            seen_queries.append(queries)
+            limit = next(q["values"][0] for q in queries if q["method"] == "limit")
+            cursor = next((q["values"][0] for q in queries if q["method"] == "cursorAfter"), None)
+            start = 0 if cursor is None else [d["$id"] for d in documents].index(cursor) + 1
+            return httpx.Response(200, json={"documents": documents[start:start + limit]})
 
-    @patch('app.services.appwrite_service.requests.patch')
+        service = AppwriteService()
+        service.client = httpx.Client(transport=httpx.MockTransport(handler))
+        result = list(service.iter_build_logs("project123", page_size=2))
+
+        assert [d["$id"] for d in result] == [d["$id"] for d in documents]
+        assert len(seen_queries) == 3
+        assert {"method": "cursorAfter", "values": ["log3"]} in seen_queries[-1]
+
+    @patch('app.services.appwrite_service.httpx.Client.request')
+    def test_get_project_served_from_cache(self, mock_get):
+        """Test repeated reads hit the cache until the project is updated"""
+        mock_response = Mock()
+        mock_response.json.return_value = {"$id": "project123", "name": "Test Project"}
+        mock_get.return_value = mock_response
+
+        service = AppwriteService()
+        service.get_project("project123")
+        service.get_project("project123")
+        assert mock_get.call_count == 1
+        assert service.cache.hits == 1
+
+        service.update_project("project123", {"name": "Renamed"})
+        service.get_project("project123")
+        assert mock_get.call_count == 3
+
+    @patch('app.services.appwrite_service.AppwriteService._update_counters')
+    @patch('app.services.appwrite_service.httpx.Client.request')
+    def test_list_caches_invalidated_by_writes(self, mock_request, mock_counters):
+        """Test project and log lists are dropped by the writes that change them"""
+        mock_response = Mock()
+        mock_response.status_code = 201
+        mock_response.json.return_value = {"documents": [{"$id": "log1", "project_id": "project123"}]}
+        mock_request.return_value = mock_response
+
+        service = AppwriteService()
+        service.get_build_logs("project123")
+        service.get_build_logs("project123")
+        assert mock_request.call_count == 1
+
+        # Deleting reads the log first to learn its project
+        service.delete_build_log("log1")
+        service.get_build_logs("project123")
+        assert mock_request.call_count == 4
+
+        service.create_build_log("project123", {"title": "New"})
+        service.get_build_logs("project123")
+        assert mock_request.call_count == 6
+
+        service.get_projects("user123")
+        service.create_project("user123", {"name": "Another"})
+        service.get_projects("user123")
+        assert mock_request.call_count == 9
+
+    def test_get_build_logs_for_projects_batches_ids(self):
+        """Test ids are sent in Query.equal batches and results grouped by project"""
+        project_ids = [f"project{i}" for i in range(150)]
+        seen_values = []
+
+        def handler(request):
+            queries = [json.loads(q) for q in request.url.params.get_list("queries[]")]
+            values = next(q["values"] for q in queries if q["method"] == "equal")
+            seen_values.append(values)
+            documents = [{"$id": f"log-{pid}", "project_id": pid} for pid in values if pid in ("project0", "project120")]
+            return httpx.Response(200, json={"documents": documents})
+
+        service = AppwriteService()
+        service.client = httpx.Client(transport=httpx.MockTransport(handler))
+        grouped = service.get_build_logs_for_projects(project_ids + ["project0"])
+
+        assert [len(v) for v in seen_values] == [100, 50]
+        assert len(grouped) == 150
+        assert grouped["project0"] == [{"$id": "log-project0", "project_id": "project0"}]
+        assert grouped["project120"][0]["$id"] == "log-project120"
+        assert grouped["project5"] == []
+
+    @patch('app.services.appwrite_service.httpx.Client.request')
+    def test_get_build_logs_page_returns_next_cursor(self, mock_get):
+        """Test a full page hands back the cursor for the next one"""
+        mock_response = Mock()
+        mock_response.json.return_value = {"documents": [{"$id": "a"}, {"$id": "b"}]}
+        mock_get.return_value = mock_response
+
+        service = AppwriteService()
+        documents, cursor = service.get_build_logs_page("project123", page_size=2)
+        assert cursor == "b"
+
+        documents, cursor = service.get_build_logs_page("project123", cursor="b", page_size=3)
+        assert cursor is None
+        queries = [json.loads(q) for q in mock_get.call_args[1]["params"]["queries[]"]]
+        assert {"method": "cursorAfter", "values": ["b"]} in queries
+
+    @patch('app.services.appwrite_service.httpx.Client.request')
     def test_update_build_log_success(self, mock_patch):
         """Test updating a build log"""
         mock_response = Mock()
@@ -206,7 +396,7 @@ class TestAppwriteService:
 
         assert result["title"] == "Updated Log"
 
-    @patch('app.services.appwrite_service.requests.delete')
+    @patch('app.services.appwrite_service.httpx.Client.request')
     def test_delete_build_log_success(self, mock_delete):
         """Test deleting a build log"""
         mock_response = Mock()
@@ -218,7 +408,7 @@ class TestAppwriteService:
 
         assert result is True
 
-    @patch('app.services.appwrite_service.requests.post')
+    @patch('app.services.appwrite_service.httpx.Client.request')
     @patch('app.services.appwrite_service.ID.unique')
     def test_upload_file_success(self, mock_id, mock_post):
         """Test file upload"""
@@ -236,6 +426,92 @@ class TestAppwriteService:
 
         assert result["$id"] == "file_id_123"
         assert result["name"] == "test.jpg"
+        # Multipart uploads must not force a JSON content type
+        assert "Content-Type" not in mock_post.call_args[1]["headers"]
+
+    @patch('app.services.appwrite_service.UPLOAD_CHUNK_SIZE', 4)
+    def test_upload_file_stream_sends_chunks(self):
+        """Test a large file goes up in Content-Range chunks tied together by x-appwrite-id"""
+        chunks = []
+
+        def handler(request):
+            if request.method == "GET":
+                return httpx.Response(404, json={"message": "File not found"})
+            chunks.append((request.headers.get("Content-Range"), request.headers.get("x-appwrite-id")))
+            return httpx.Response(201, json={"$id": "upload1", "chunksUploaded": len(chunks)})
+
+        service = AppwriteService()
+        service.client = httpx.Client(transport=httpx.MockTransport(handler))
+        progress = []
+        result = service.upload_file_stream(io.BytesIO(b"0123456789"), "big.bin", 10, "upload1", progress.append)
+
+        assert result["$id"] == "upload1"
+        assert chunks == [("bytes 0-3/10", None), ("bytes 4-7/10", "upload1"), ("bytes 8-9/10", "upload1")]
+        assert progress == [0, 4, 8, 10]
+
+    @patch('app.services.appwrite_service.time.sleep')
+    @patch('app.services.appwrite_service.UPLOAD_CHUNK_SIZE', 4)
+    def test_upload_file_stream_retries_failed_chunk(self, mock_sleep):
+        """Test a chunk that fails with a server error is resent"""
+        attempts = []
+
+        def handler(request):
+            attempts.append(request.headers.get("Content-Range"))
+            if len(attempts) == 2:
+                return httpx.Response(503, json={"message": "Unavailable"})
+            return httpx.Response(201, json={"$id": "file1"})
+
+        service = AppwriteService()
+        service.client = httpx.Client(transport=httpx.MockTransport(handler))
+        service.upload_file_stream(io.BytesIO(b"01234567"), "big.bin", 8)
+
+        assert attempts == ["bytes 0-3/8", "bytes 4-7/8", "bytes 4-7/8"]
+        mock_sleep.assert_called_once()
+
+    @patch('app.services.appwrite_service.UPLOAD_CHUNK_SIZE', 4)
+    def test_upload_file_stream_resumes(self):
+        """Test resuming skips the chunks Appwrite already has"""
+        sent = []
+
+        def handler(request):
+            if request.method == "GET":
+                return httpx.Response(200, json={"$id": "upload1", "chunksUploaded": 2, "chunksTotal": 3})
+            sent.append((request.headers["Content-Range"], request.content))
+            return httpx.Response(201, json={"$id": "upload1"})
+
+        service = AppwriteService()
+        service.client = httpx.Client(transport=httpx.MockTransport(handler))
+        service.upload_file_stream(io.BytesIO(b"0123456789"), "big.bin", 10, "upload1")
+
+        assert len(sent) == 1
+        assert sent[0][0] == "bytes 8-9/10"
+        assert b"89" in sent[0][1] and b"0123" not in sent[0][1]
+
+    def test_upload_records_owner(self):
+        """Test the uploader goes into the file's permissions and get_file_owner reads it back"""
+        sent = []
+
+        def handler(request):
+            if request.method == "GET":
+                return httpx.Response(200, json={"$id": "file1", "$permissions": ['read("user:u1")', 'delete("user:u1")']})
+            sent.append(request.content)
+            return httpx.Response(201, json={"$id": "file1"})
+
+        service = AppwriteService()
+        service.client = httpx.Client(transport=httpx.MockTransport(handler))
+        service.upload_file(b"png", "shot.png", owner_id="u1")
+
+        assert b'delete("user:u1")' in sent[0]
+        assert service.get_file_owner("file1") == "u1"
+
+    def test_file_owner_missing(self):
+        """Test a file that is gone, or has no user permissions, has no owner"""
+        service = AppwriteService()
+        service.client = httpx.Client(transport=httpx.MockTransport(
+            lambda request: httpx.Response(404, json={"message": "File not found"})
+        ))
+        assert service.get_file_owner("gone") is None
+        assert file_owner({"$permissions": ['read("any")']}) is None
 
     def test_get_file_url(self):
         """Test getting file URL"""
@@ -246,7 +522,7 @@ class TestAppwriteService:
         assert "test_storage" in url
         assert "view" in url
 
-    @patch('app.services.appwrite_service.requests.delete')
+    @patch('app.services.appwrite_service.httpx.Client.request')
     def test_delete_file_success(self, mock_delete):
         """Test deleting a file"""
         mock_response = Mock()
@@ -258,7 +534,7 @@ class TestAppwriteService:
 
         assert result is True
 
-    @patch('app.services.appwrite_service.requests.post')
+    @patch('app.services.appwrite_service.httpx.Client.request')
     def test_create_project_error_handling(self, mock_post):
         """Test error handling in create_project"""
         mock_post.side_effect = Exception("Network error")
@@ -269,7 +545,7 @@ class TestAppwriteService:
 
         assert "Network error" in str(exc_info.value)
 
-    @patch('app.services.appwrite_service.requests.get')
+    @patch('app.services.appwrite_service.httpx.Client.request')
     def test_get_projects_error_handling(self, mock_get):
         """Test error handling in get_projects"""
         mock_get.side_effect = Exception("API error")
@@ -285,7 +561,7 @@ class TestAppwriteService:
         assert appwrite_service is not None
         assert isinstance(appwrite_service, AppwriteService)
 
-    @patch('app.services.appwrite_service.requests.patch')
+    @patch('app.services.appwrite_service.httpx.Client.request')
     def test_update_project_filters_none(self, mock_patch):
         """Test that update_project filters None values"""
         mock_response = Mock()
@@ -306,7 +582,7 @@ class TestAppwriteService:
         assert "demo_url" not in payload["data"]
         assert "name" in payload["data"]
 
-    @patch('app.services.appwrite_service.requests.get')
+    @patch('app.services.appwrite_service.httpx.Client.request')
     def test_get_project_error_handling(self, mock_get):
         """Test error handling in get_project"""
         mock_get.side_effect = Exception("Connection error")
@@ -317,7 +593,7 @@ class TestAppwriteService:
 
         assert "Connection error" in str(exc_info.value)
 
-    @patch('app.services.appwrite_service.requests.patch')
+    @patch('app.services.appwrite_service.httpx.Client.request')
     def test_update_project_error_handling(self, mock_patch):
         """Test error handling in update_project"""
         mock_patch.side_effect = Exception("Update failed")
@@ -328,7 +604,7 @@ class TestAppwriteService:
 
         assert "Update failed" in str(exc_info.value)
 
-    @patch('app.services.appwrite_service.requests.delete')
+    @patch('app.services.appwrite_service.httpx.Client.request')
     def test_delete_project_error_handling(self, mock_delete):
         """Test error handling in delete_project"""
         mock_delete.side_effect = Exception("Delete failed")
@@ -339,7 +615,7 @@ class TestAppwriteService:
 
         assert "Delete failed" in str(exc_info.value)
 
-    @patch('app.services.appwrite_service.requests.post')
+    @patch('app.services.appwrite_service.httpx.Client.request')
     def test_create_build_log_error_handling(self, mock_post):
         """Test error handling in create_build_log"""
         mock_post.side_effect = Exception("Create log failed")
@@ -350,7 +626,7 @@ class TestAppwriteService:
 
         assert "Create log failed" in str(exc_info.value)
 
-    @patch('app.services.appwrite_service.requests.get')
+    @patch('app.services.appwrite_service.httpx.Client.request')
     def test_get_build_logs_error_handling(self, mock_get):
         """Test error handling in get_build_logs"""
         mock_get.side_effect = Exception("Fetch logs failed")
@@ -361,7 +637,7 @@ class TestAppwriteService:
 
         assert "Fetch logs failed" in str(exc_info.value)
 
-    @patch('app.services.appwrite_service.requests.patch')
+    @patch('app.services.appwrite_service.httpx.Client.request')
     def test_update_build_log_error_handling(self, mock_patch):
         """Test error handling in update_build_log"""
         mock_patch.side_effect = Exception("Update log failed")
@@ -372,7 +648,7 @@ class TestAppwriteService:
 
         assert "Update log failed" in str(exc_info.value)
 
-    @patch('app.services.appwrite_service.requests.delete')
+    @patch('app.services.appwrite_service.httpx.Client.request')
     def test_delete_build_log_error_handling(self, mock_delete):
         """Test error handling in delete_build_log"""
         mock_delete.side_effect = Exception("Delete log failed")
@@ -383,7 +659,7 @@ class TestAppwriteService:
 
         assert "Delete log failed" in str(exc_info.value)
 
-    @patch('app.services.appwrite_service.requests.post')
+    @patch('app.services.appwrite_service.httpx.Client.request')
     def test_upload_file_error_handling(self, mock_post):
         """Test error handling in upload_file"""
         mock_post.side_effect = Exception("Upload failed")
@@ -394,7 +670,7 @@ class TestAppwriteService:
 
         assert "Upload failed" in str(exc_info.value)
 
-    @patch('app.services.appwrite_service.requests.delete')
+    @patch('app.services.appwrite_service.httpx.Client.request')
     def test_delete_file_error_handling(self, mock_delete):
         """Test error handling in delete_file"""
         mock_delete.side_effect = Exception("Delete file failed")
@@ -404,3 +680,303 @@ class TestAppwriteService:
             service.delete_file("file123")
 
         assert "Delete file failed" in str(exc_info.value)
+
+
+class TestAsyncAppwriteService:
+    """Test the asyncio counterpart of the Appwrite service"""
+
+    @pytest.fixture
+    def requests_seen(self):
+        return []
+
+    @pytest.fixture
+    def service(self, requests_seen):
+        """Async service wired to an in-memory transport"""
+        def handler(request):
+            requests_seen.append(request)
+            if request.method == "DELETE":
+                return httpx.Response(204)
+            if request.url.path.endswith("/missing"):
+                return httpx.Response(404, json={"message": "Document not found"})
+            if request.url.path.endswith("/documents") and request.method == "GET":
+                queries = [json.loads(q) for q in request.url.params.get_list("queries[]")]
+                user_ids = next(q["values"] for q in queries if q["method"] == "equal")
+                documents = [{"$id": "1", "user_id": "user123"}, {"$id": "2", "user_id": "other"}]
+                return httpx.Response(200, json={
+                    "documents": [d for d in documents if d["user_id"] in user_ids]
+                })
+            return httpx.Response(200, json={"$id": "project123", "name": "Test Project"})
+
+        service = AsyncAppwriteService()
+        service.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return service
+
+    async def test_get_project(self, service, requests_seen):
+        """Test getting a single project"""
+        result = await service.get_project("project123")
+
+        assert result["$id"] == "project123"
+        assert requests_seen[0].url.path.endswith("/test_projects/documents/project123")
+        assert requests_seen[0].headers["X-Appwrite-Key"] == "test_api_key"
+
+    async def test_get_account_uses_session_cookie(self, service, requests_seen):
+        """Test account lookup authenticates with the session cookie"""
+        await service.get_account("secret123")
+
+        assert requests_seen[0].headers["Cookie"] == "a_session_test_project_id=secret123"
+        assert "X-Appwrite-Key" not in requests_seen[0].headers
+
+    @patch('app.services.appwrite_service.ID.unique', return_value="test_id_123")
+    async def test_create_project(self, mock_id, service, requests_seen):
+        """Test creating a project sends the cleaned payload"""
+        await service.create_project("user123", {"name": "Test", "demo_url": None})
+
+        payload = json.loads(requests_seen[0].content)
+        assert payload == {"documentId": "test_id_123", "data": {
+            "name": "Test", "user_id": "user123", "log_count": 0, "last_log_at": None, "log_type_counts": "{}"
+        }}
+
+    async def test_get_projects(self, service):
+        """Test projects are scoped to the user by a server-side query"""
+        result = await service.get_projects("user123")
+
+        assert [p["$id"] for p in result] == ["1"]
+
+    async def test_iter_projects(self, service):
+        """Test async iteration over a user's projects"""
+        result = [p async for p in service.iter_projects("user123", page_size=10)]
+
+        assert [p["$id"] for p in result] == ["1"]
+
+    async def test_delete_build_log(self, service):
+        """Test deleting a build log"""
+        assert await service.delete_build_log("log123") is True
+
+    async def test_error_propagates(self, service):
+        """Test HTTP errors are raised to the caller"""
+        with pytest.raises(httpx.HTTPStatusError):
+            await service.get_project("missing")
+
+    async def test_aclose(self, service):
+        """Test closing the pooled client"""
+        await service.aclose()
+        assert service.client.is_closed
+
+    async def test_concurrent_identical_gets_coalesce(self):
+        """Test concurrent identical reads share one upstream request"""
+        calls = []
+
+        async def handler(request):
+            calls.append(request)
+            await asyncio.sleep(0.05)
+            return httpx.Response(200, json={"$id": "project123", "name": "Shared"})
+
+        service = AsyncAppwriteService()
+        service.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        results = await asyncio.gather(*[service.get_project("project123") for _ in range(20)])
+
+        assert len(calls) == 1
+        assert all(r["name"] == "Shared" for r in results)
+        assert service._in_flight == {}
+
+    async def test_coalescing_keeps_sessions_apart(self):
+        """Test reads made with different session cookies are not shared"""
+        calls = []
+
+        async def handler(request):
+            calls.append(request.headers["Cookie"])
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"$id": "user"})
+
+        service = AsyncAppwriteService()
+        service.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        await asyncio.gather(service.get_account("a"), service.get_account("a"), service.get_account("b"))
+
+        assert sorted(calls) == ["a_session_test_project_id=a", "a_session_test_project_id=b"]
+
+    async def test_coalesced_errors_reach_every_caller(self):
+        """Test a failed shared read raises for each waiting caller"""
+        async def handler(request):
+            await asyncio.sleep(0.01)
+            return httpx.Response(404, json={"message": "Document not found"})
+
+        service = AsyncAppwriteService()
+        service.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        results = await asyncio.gather(
+            service.get_project("missing"), service.get_project("missing"), return_exceptions=True
+        )
+
+        assert all(isinstance(r, httpx.HTTPStatusError) for r in results)
+
+    @patch('app.services.appwrite_service.UPLOAD_CHUNK_SIZE', 4)
+    async def test_upload_file_stream_reads_async_file(self):
+        """Test the async upload reads an UploadFile-like source chunk by chunk"""
+        class AsyncFile:
+            def __init__(self, data):
+                self.buffer = io.BytesIO(data)
+                self.reads = []
+
+            async def read(self, size):
+                self.reads.append(size)
+                return self.buffer.read(size)
+
+            async def seek(self, offset):
+                self.buffer.seek(offset)
+
+        def handler(request):
+            return httpx.Response(201, json={"$id": "file1"})
+
+        service = AsyncAppwriteService()
+        service.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        source = AsyncFile(b"0123456789")
+        result = await service.upload_file_stream(source, "big.bin", 10)
+
+        assert result["$id"] == "file1"
+        assert source.reads == [4, 4, 4]
+
+
+class TestResilience:
+    """Test retries, the circuit breaker and 429 handling on Appwrite calls"""
+
+    @pytest.fixture(autouse=True)
+    def no_sleep(self):
+        with patch('app.services.appwrite_service.time.sleep') as sleep:
+            yield sleep
+
+    def make_service(self, responses):
+        """Sync service whose transport replays the given responses or errors in order"""
+        calls = []
+
+        def handler(request):
+            calls.append(request.method)
+            outcome = responses.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        service = AppwriteService()
+        service.client = httpx.Client(transport=httpx.MockTransport(handler))
+        return service, calls
+
+    def test_read_retried_after_server_error(self):
+        """Test an idempotent read is resent after a 503 and a dropped connection"""
+        service, calls = self.make_service([
+            httpx.Response(503),
+            httpx.ConnectError("reset"),
+            httpx.Response(200, json={"$id": "project123"})
+        ])
+
+        assert service.get_project("project123")["$id"] == "project123"
+        assert calls == ["GET", "GET", "GET"]
+        assert service.breaker.state == "closed"
+
+    def test_write_not_retried_after_server_error(self):
+        """Test a non-idempotent write is not resent after a 503"""
+        service, calls = self.make_service([httpx.Response(503)])
+
+        with pytest.raises(httpx.HTTPStatusError):
+            service.update_project("project123", {"name": "x"})
+        assert calls == ["PATCH"]
+
+    def test_rate_limited_write_resent_after_retry_after(self):
+        """Test a 429 is resent, even for writes, after pausing for Retry-After"""
+        service, calls = self.make_service([
+            httpx.Response(429, headers={"Retry-After": "2"}),
+            httpx.Response(200, json={"$id": "project123"})
+        ])
+
+        service.update_project("project123", {"name": "x"})
+        assert calls == ["PATCH", "PATCH"]
+        assert service.limiter.paused_until > 0
+
+    @patch('app.services.appwrite_service.AppwriteService._update_counters')
+    def test_keyed_create_resent_after_lost_response(self, mock_counters):
+        """Test a keyed create whose first attempt went through but lost its response is read back and counted"""
+        service, calls = self.make_service([
+            httpx.ReadError("connection reset"),
+            httpx.Response(409, json={"message": "Document already exists"}),
+            httpx.Response(200, json={"$id": "log-key", "project_id": "project123"})
+        ])
+
+        log = service.create_build_log("project123", {"title": "T"}, document_id="log-key")
+        assert log["$id"] == "log-key"
+        assert calls == ["POST", "POST", "GET"]
+        mock_counters.assert_called_once_with("project123", new=log)
+
+    def test_keyed_create_repeat_is_reported(self):
+        """Test a 409 on the first attempt is a repeat of an earlier call"""
+        service, calls = self.make_service([httpx.Response(409, json={"message": "Document already exists"})])
+
+        with pytest.raises(AlreadyCreatedError):
+            service.create_build_log("project123", {"title": "T"}, document_id="log-key")
+        assert calls == ["POST"]
+
+    def test_client_errors_not_retried(self):
+        """Test a 404 is returned to the caller straight away"""
+        service, calls = self.make_service([httpx.Response(404)])
+
+        with pytest.raises(httpx.HTTPStatusError):
+            service.get_project("missing")
+        assert calls == ["GET"]
+        assert service.breaker.state == "closed"
+
+    @patch('app.services.appwrite_service.settings.appwrite_max_retries', 0)
+    def test_breaker_fails_fast_when_open(self):
+        """Test repeated server errors open the circuit and later calls skip Appwrite"""
+        service, calls = self.make_service([httpx.Response(500) for _ in range(5)])
+
+        for _ in range(5):
+            with pytest.raises(httpx.HTTPStatusError):
+                service.get_project("project123")
+
+        with pytest.raises(CircuitOpenError):
+            service.get_project("project123")
+        assert len(calls) == 5
+
+    def test_probe_failing_outside_transport_is_released(self):
+        """Test a half-open probe that raises something other than a transport error frees the probe"""
+        service, calls = self.make_service([RuntimeError("bug"), httpx.Response(200, json={"$id": "project123"})])
+        service.breaker.opened_at = time.monotonic() - service.breaker.reset_timeout
+
+        with pytest.raises(RuntimeError):
+            service.get_project("project123")
+        assert service.get_project("project123")["$id"] == "project123"
+        assert service.breaker.state == "closed"
+
+    async def test_cancelled_probe_is_released(self):
+        """Test cancelling the half-open probe mid-request lets the next request probe"""
+        started = asyncio.Event()
+
+        async def handler(request):
+            if not started.is_set():
+                started.set()
+                await asyncio.Event().wait()
+            return httpx.Response(200, json={"$id": "project123"})
+
+        service = AsyncAppwriteService()
+        service.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        service.breaker.opened_at = time.monotonic() - service.breaker.reset_timeout
+
+        probe = asyncio.ensure_future(service.update_project("project123", {"name": "x"}))
+        await started.wait()
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        assert (await service.update_project("project123", {"name": "x"}))["$id"] == "project123"
+        assert service.breaker.state == "closed"
+
+    async def test_async_read_retried(self):
+        """Test the async service resends a read after a server error"""
+        responses = [httpx.Response(502), httpx.Response(200, json={"$id": "project123"})]
+
+        async def handler(request):
+            return responses.pop(0)
+
+        service = AsyncAppwriteService()
+        service.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        with patch('app.services.appwrite_service.asyncio.sleep'):
+            result = await service.get_project("project123")
+
+        assert result["$id"] == "project123"
+        assert responses == []
@@ -0,0 +1,87 @@
+"""
+Tests for counting build log days into chart buckets, with and without NumPy
+"""
+import random
+
+import pytest
+
+from app.services import bucketing
+from app.services.analytics_engine import AnalyticsEngine
+from app.services.bucketing import DayCounts
+
+MODES = [
+    pytest.param(False, id="python"),
+    pytest.param(True, id="numpy", marks=pytest.mark.skipif(bucketing.np is None, reason="NumPy is not installed")),
+]
+
+
+@pytest.mark.parametrize("vectorized", MODES)
+class TestDayCounts:
+    """Test both implementations count the same windows"""
+
+    def test_windows(self, vectorized):
+        """Test daily and weekly buckets leave out days before and after the window"""
+        counts = DayCounts(vectorized)
+        for day in (9, 10, 10, 12, 16, 17, 30):
+            counts.add(day)
+
+        assert counts.window(10, 3) == [2, 0, 1]
+        assert counts.window(10, 2, 7) == [4, 1]
+        assert counts.since(16) == 3
+        assert counts.since(31) == 0
+
+    def test_bins(self, vectorized):
+        """Test buckets between uneven edges, such as months, leave out days outside them"""
+        counts = DayCounts(vectorized)
+        for day in (4, 5, 5, 7, 9, 12, 30):
+            counts.add(day)
+        counts.add(12, 4)
+
+        assert counts.bins([5, 6, 10, 13]) == [2, 2, 5]
+        assert counts.bins([31, 40]) == [0]
+
+    def test_weighted_days(self, vectorized):
+        """Test days added with a count, such as rollups, mix with single logs"""
+        counts = DayCounts(vectorized)
+        counts.add(5, 3)
+        counts.add(5)
+        counts.add(6, 0)
+        counts.add(8, 2)
+
+        assert counts.window(5, 4) == [4, 0, 0, 2]
+        assert counts.since(6) == 2
+
+    def test_empty_and_recounted(self, vectorized):
+        """Test windows of nothing, and counts taken again after more days arrive"""
+        counts = DayCounts(vectorized)
+        assert counts.window(0, 3) == [0, 0, 0]
+        assert counts.since(0) == 0
+
+        counts.add(1)
+        assert counts.window(0, 3) == [0, 1, 0]
+
+
+def test_requires_numpy_when_asked(monkeypatch):
+    """Test asking for the vectorized counts without NumPy fails clearly, and the default falls back"""
+    monkeypatch.setattr(bucketing, "np", None)
+    with pytest.raises(RuntimeError):
+        DayCounts(vectorized=True)
+    assert DayCounts().vectorized is False
+
+
+@pytest.mark.skipif(bucketing.np is None, reason="NumPy is not installed")
+def test_engine_charts_agree():
+    """Test the engine draws identical charts from either implementation"""
+    rng = random.Random(3)
+    today = 20100
+    logs = [{'project_id': 'p1', 'created_day': today - rng.randrange(400) + 3} for _ in range(2000)]
+    logs.append({'project_id': 'p1', 'created_at': '2025-01-15T10:00:00'})
+
+    charts = []
+    for vectorized in (False, True):
+        engine = AnalyticsEngine([{'$id': 'p1'}], today, weekly=True, activity_days=30, trend_weeks=8,
+                                 heatmap_days=365, vectorized=vectorized)
+        for log in logs:
+            engine.add(log)
+        charts.append((engine.complete(), engine.activity_heatmap()))
+    assert charts[0] == charts[1]
@@ -0,0 +1,128 @@
+"""
+Tests for the streaming bulk import of build logs
+"""
+import asyncio
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.services import bulk_import
+from app.services.bulk_import import (
+    RowError, build_log_data, import_build_logs, import_format, iter_csv_rows, iter_ndjson_rows
+)
+
+
+async def stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(rows):
+    return [(number, row) async for number, row in rows]
+
+
+class TestParsing:
+    """Test rows are read from NDJSON and CSV however the body is chunked"""
+
+    def test_import_format(self):
+        """Test the parser follows the Content-Type, ignoring parameters"""
+        assert import_format("application/x-ndjson") == "ndjson"
+        assert import_format("text/csv; charset=utf-8") == "csv"
+        assert import_format("application/x-www-form-urlencoded") is None
+        assert import_format(None) is None
+
+    async def test_ndjson_split_across_chunks(self):
+        """Test lines broken over chunks, multi-byte characters and blank lines"""
+        body = '{"title": "Café"}\r\n\n[1]\n{"title": \n{"title": "Last"}'.encode()
+        rows = await collect(iter_ndjson_rows(stream(*(body[i:i + 3] for i in range(0, len(body), 3)))))
+
+        assert rows[0] == (1, {"title": "Café"})
+        assert str(rows[1][1]) == "Row must be a JSON object"
+        assert isinstance(rows[2][1], RowError)
+        assert rows[3] == (4, {"title": "Last"})
+
+    async def test_csv_quoted_fields_and_lists(self):
+        """Test quoted fields spanning lines, comma-separated lists and JSON columns"""
+        body = (
+            b'Title,content,tags,links\n'
+            b'First,"Line one\nLine ""two""","a, b",\n'
+            b'Second,Body,,"[{""url"": ""https://example.com""}]"\n'
+            b'Third,Body,,not json\n'
+        )
+        rows = await collect(iter_csv_rows(stream(body[:20], body[20:])))
+
+        assert rows[0] == (1, {"title": "First", "content": 'Line one\nLine "two"', "tags": ["a", "b"]})
+        assert rows[1][1]["links"] == [{"url": "https://example.com"}]
+        assert str(rows[2][1]) == "Column links must be a JSON list"
+
+    async def test_overlong_rows_are_skipped(self, monkeypatch):
+        """Test a row over the length limit is reported without holding it and the next row is read"""
+        monkeypatch.setattr(bulk_import, "MAX_ROW_LENGTH", 10)
+        rows = await collect(iter_ndjson_rows(stream(b'{"title": "', b"x" * 30, b'"}\n{"a": 1}\n')))
+
+        assert [number for number, _ in rows] == [1, 2]
+        assert "longer than 10" in str(rows[0][1])
+        assert rows[1][1] == {"a": 1}
+
+
+class TestValidation:
+    """Test rows are checked with BuildLogCreate"""
+
+    def test_valid_row(self):
+        """Test defaults are applied, created_at is kept and objects are stored as JSON strings"""
+        data = build_log_data({
+            "title": "T", "content": "C", "created_at": "2024-03-01T10:00:00",
+            "links": [{"url": "https://example.com"}]
+        })
+        assert data["log_type"] == "update"
+        assert data["created_at"] == "2024-03-01T10:00:00"
+        assert json.loads(data["links"][0]) == {"url": "https://example.com"}
+
+    def test_invalid_rows(self):
+        """Test missing fields and unreadable dates name the problem"""
+        with pytest.raises(RowError, match="content"):
+            build_log_data({"title": "T"})
+        with pytest.raises(RowError, match="created_at"):
+            build_log_data({"title": "T", "content": "C", "created_at": "last spring"})
+
+
+class TestImport:
+    """Test rows are written concurrently, failures reported and counters repaired once"""
+
+    async def test_writes_with_bounded_concurrency(self):
+        """Test no more than the configured number of writes are in flight"""
+        in_flight = peak = 0
+
+        async def create(project_id, data, update_counters=True, document_id=None):
+            nonlocal in_flight, peak
+            assert update_counters is False
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.001)
+            in_flight -= 1
+
+        storage = AsyncMock()
+        storage.create_build_log.side_effect = create
+        rows = stream(*(json.dumps({"title": f"Log {i}", "content": "x"}).encode() + b"\n" for i in range(50)))
+
+        result = await import_build_logs(storage, "p1", iter_ndjson_rows(rows), concurrency=4)
+
+        assert result == {"imported": 50, "duplicates": 0, "failed": 0, "errors": []}
+        assert peak == 4
+        storage.repair_project_counters.assert_awaited_once_with("p1")
+
+    async def test_row_errors_are_reported(self):
+        """Test parse, validation and write failures are listed by row and the rest imported"""
+        storage = AsyncMock()
+        storage.create_build_log.side_effect = [Exception("document_invalid_structure"), None]
+        body = b'{"title": "A", "content": "x"}\nnot json\n{"title": "B"}\n{"title": "C", "content": "x"}\n'
+
+        result = await import_build_logs(storage, "p1", iter_ndjson_rows(stream(body)), concurrency=1)
+
+        assert result["imported"] == 1
+        assert result["failed"] == 3
+        errors = {error["row"]: error["error"] for error in result["errors"]}
+        assert sorted(errors) == [1, 2, 3]
+        assert errors[1] == "document_invalid_structure"
+        assert errors[3].startswith("content:")
@@ -0,0 +1,77 @@
+"""
+Tests for the in-process document cache
+"""
+from unittest.mock import patch
+
+from app.services.cache import DocumentCache
+
+
+class TestDocumentCache:
+    """Test LRU, expiry, byte budget and tag invalidation"""
+
+    def test_hit_and_miss_counters(self):
+        """Test lookups are counted as hits or misses"""
+        cache = DocumentCache()
+        assert cache.get("a") is None
+        cache.set("a", {"$id": "a"})
+        assert cache.get("a") == {"$id": "a"}
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["entries"] == 1
+
+    def test_entries_expire(self):
+        """Test entries older than the TTL are treated as misses"""
+        cache = DocumentCache(ttl=10)
+        with patch("app.services.cache.time.monotonic", return_value=100.0):
+            cache.set("a", {"$id": "a"})
+        with patch("app.services.cache.time.monotonic", return_value=111.0):
+            assert cache.get("a") is None
+        assert cache.stats()["entries"] == 0
+
+    def test_least_recently_used_evicted(self):
+        """Test the entry count cap evicts the least recently used entry"""
+        cache = DocumentCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.evictions == 1
+
+    def test_byte_budget(self):
+        """Test the byte cap evicts old entries and skips oversized values"""
+        cache = DocumentCache(max_bytes=100)
+        cache.set("a", "x" * 60)
+        cache.set("b", "y" * 60)
+        assert cache.get("a") is None
+        assert cache.size_bytes <= 100
+
+        cache.set("huge", "z" * 200)
+        assert cache.get("huge") is None
+
+    def test_invalidate_by_tag(self):
+        """Test invalidating a tag drops every entry carrying it"""
+        cache = DocumentCache()
+        cache.set("project", {"$id": "p1"}, ["project:p1"])
+        cache.set("list", [{"$id": "p1"}, {"$id": "p2"}], ["user:u1", "project:p1", "project:p2"])
+        cache.set("other", [{"$id": "p3"}], ["user:u2", "project:p3"])
+
+        cache.invalidate("project:p1")
+
+        assert cache.get("project") is None
+        assert cache.get("list") is None
+        assert cache.get("other") == [{"$id": "p3"}]
+        assert cache.size_bytes == cache.stats()["bytes"] > 0
+
+    def test_zero_entries_disables_cache(self):
+        """Test max_entries=0 turns the cache off"""
+        cache = DocumentCache(max_entries=0)
+        cache.set("a", 1)
+        assert cache.get("a") is None
+        assert cache.evictions == 0
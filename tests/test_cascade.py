@@ -0,0 +1,115 @@
+"""
+Tests for the cascading project delete
+"""
+from unittest.mock import AsyncMock
+
+from app.services.cascade import cascade_total, delete_project_cascade, referenced_file_ids
+from app.services.progress import ProgressTracker
+
+# File ids as the app gives them to uploads
+F1, F2 = "6ad30d700036ef4d4301", "6ad30d700036ef4d4302"
+
+
+def make_storage(pages, owners=None):
+    """Storage whose log pages come from `pages`, one per call; files belong to u1 unless `owners` says otherwise"""
+    storage = AsyncMock()
+    storage.get_build_logs_page.side_effect = [(page, None) for page in pages]
+    storage.get_file_owner.side_effect = lambda file_id: (owners or {}).get(file_id, "u1")
+    return storage
+
+
+class TestReferencedFiles:
+    """Test file ids are found in the ways images refer to uploads"""
+
+    def test_ids_and_urls(self):
+        """Test app ids, /files/ URLs and this bucket's view URLs give the id; other references are skipped"""
+        log = {"images": [
+            "6ad30d700036ef4d4306",
+            "/files/6ad30d700036ef4d4307",
+            "https://test.appwrite.io/v1/storage/buckets/test_storage/files/file3/view?project=p",
+            "https://example.com/pictures/cat.png",
+            "/files/6ad30d700036ef4d4307",
+            None,
+        ]}
+        assert referenced_file_ids(log) == ["6ad30d700036ef4d4306", "6ad30d700036ef4d4307", "file3"]
+        assert referenced_file_ids({}) == []
+
+    def test_foreign_references_skipped(self):
+        """Test other hosts, other buckets and bare words are never taken for uploads"""
+        log = {"images": [
+            "screenshot",
+            "https://example.com/files/6ad30d700036ef4d4306",
+            "https://test.appwrite.io/v1/storage/buckets/other_bucket/files/file3/view",
+            "https://evil.test/v1/storage/buckets/test_storage/files/file3/view",
+            "/files/file2",
+        ]}
+        assert referenced_file_ids(log) == []
+
+    def test_total_from_counters(self):
+        """Test the expected total is the project's log count, or unknown without counters"""
+        assert cascade_total({"log_count": 7, "log_type_counts": "{}"}) == 7
+        assert cascade_total({"name": "Old"}) == 0
+
+
+class TestDeleteProjectCascade:
+    """Test the batches, the order of deletes and the reported progress"""
+
+    async def test_deletes_files_then_logs_then_project(self):
+        """Test every batch's files and logs go before the project and progress counts them"""
+        storage = make_storage([
+            [{"$id": "l1", "images": [F1]}, {"$id": "l2", "images": [F1, F2]}],
+            [{"$id": "l3", "images": []}],
+            [],
+        ])
+        tracker = ProgressTracker()
+        tracker.start("p1", 2)
+
+        await delete_project_cascade(storage, "p1", "u1", tracker, batch_size=2)
+
+        assert storage.get_build_logs_page.await_args.kwargs["page_size"] == 2
+        assert [c.args for c in storage.delete_build_logs.await_args_list] == [("p1", ["l1", "l2"]), ("p1", ["l3"])]
+        assert sorted(c.args[0] for c in storage.delete_file.await_args_list) == [F1, F2]
+        storage.delete_project.assert_awaited_once_with("p1")
+
+        progress = tracker.get("p1")
+        assert progress["status"] == "completed"
+        assert (progress["done"], progress["total"], progress["files_deleted"]) == (3, 3, 2)
+
+    async def test_other_users_files_kept(self):
+        """Test files the owner did not upload, or with no recorded uploader, are skipped and kept"""
+        storage = make_storage([[{"$id": "l1", "images": [F1, F2, "6ad30d700036ef4d4303"]}], []],
+                               owners={F2: "u2", "6ad30d700036ef4d4303": None})
+        tracker = ProgressTracker()
+        tracker.start("p1", 1)
+
+        await delete_project_cascade(storage, "p1", "u1", tracker)
+
+        storage.delete_file.assert_awaited_once_with(F1)
+        assert (tracker.get("p1")["files_deleted"], tracker.get("p1")["files_skipped"]) == (1, 2)
+        assert tracker.get("p1")["status"] == "completed"
+
+    async def test_file_errors_do_not_stop_the_cascade(self):
+        """Test a file that cannot be deleted is counted and the logs still go"""
+        storage = make_storage([[{"$id": "l1", "images": [F1]}], []])
+        storage.delete_file.side_effect = Exception("404")
+        tracker = ProgressTracker()
+        tracker.start("p1", 1)
+
+        await delete_project_cascade(storage, "p1", "u1", tracker)
+
+        assert tracker.get("p1")["files_failed"] == 1
+        assert tracker.get("p1")["status"] == "completed"
+
+    async def test_failure_keeps_the_project(self):
+        """Test a failed log delete is reported and the project is left for a retry"""
+        storage = make_storage([[{"$id": "l1"}], []])
+        storage.delete_build_logs.side_effect = Exception("Appwrite down")
+        tracker = ProgressTracker()
+        tracker.start("p1", 1)
+
+        await delete_project_cascade(storage, "p1", "u1", tracker)
+
+        storage.delete_project.assert_not_awaited()
+        assert tracker.get("p1")["status"] == "failed"
+        assert tracker.get("p1")["error"] == "Appwrite down"
+        assert not tracker.running("p1")
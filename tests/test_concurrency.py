@@ -0,0 +1,66 @@
+"""
+Load test: concurrent requests must overlap their Appwrite waits instead of serializing
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+import main
+
+APPWRITE_DELAY = 0.2  # seconds per simulated Appwrite call
+CONCURRENT_REQUESTS = 10
+
+
+async def slow_appwrite(request: httpx.Request) -> httpx.Response:
+    """Stand-in Appwrite that answers every call after a fixed delay"""
+    await asyncio.sleep(APPWRITE_DELAY)
+    path = request.url.path
+    if path.endswith("/account"):
+        return httpx.Response(200, json={"$id": "user123", "name": "Test User"})
+    if path.endswith("/documents"):
+        return httpx.Response(200, json={"total": 0, "documents": []})
+    return httpx.Response(200, json={"$id": "project123", "name": "Slow Project", "status": "in_progress"})
+
+
+@pytest.fixture
+def slow_backend(monkeypatch):
+    """Route the real async service through the slow stand-in"""
+    client = httpx.AsyncClient(transport=httpx.MockTransport(slow_appwrite))
+    monkeypatch.setattr(main.storage, "client", client)
+    yield client
+
+
+@pytest.mark.slow
+async def test_concurrent_requests_do_not_serialize(slow_backend):
+    """Ten project pages finish in roughly the time of one, not ten"""
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", cookies={"session": "secret"}) as client:
+        start = time.perf_counter()
+        responses = await asyncio.gather(*[
+            client.get("/projects/project123") for _ in range(CONCURRENT_REQUESTS)
+        ])
+        elapsed = time.perf_counter() - start
+
+    assert all(r.status_code == 200 for r in responses)
+    # Each request waits on the session lookup, then project and logs in parallel
+    per_request = 2 * APPWRITE_DELAY
+    assert elapsed < per_request * CONCURRENT_REQUESTS / 3
+
+
+@pytest.mark.slow
+async def test_analytics_does_not_block_other_requests(slow_backend):
+    """A slow analytics computation leaves the health check responsive"""
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", cookies={"session": "secret"}) as client:
+        analytics = asyncio.create_task(client.get("/api/analytics"))
+        await asyncio.sleep(0.01)
+
+        start = time.perf_counter()
+        health = await client.get("/health")
+        elapsed = time.perf_counter() - start
+
+        assert health.status_code == 200
+        assert elapsed < APPWRITE_DELAY
+        assert (await analytics).status_code == 200
@@ -44,6 +44,8 @@ class TestSettings:
             assert settings.appwrite_endpoint is not None
             assert settings.appwrite_database_id == "buildlog_db"
             assert settings.debug is True
+            assert settings.appwrite_pool_size == 20
+            assert settings.appwrite_http2 is False
 
     def test_get_settings_cached(self):
         """Test that get_settings returns cached instance"""
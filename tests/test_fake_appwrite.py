@@ -0,0 +1,496 @@
+"""
+Tests running the Appwrite services against the in-process fake server
+"""
+import asyncio
+import io
+import json
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from unittest.mock import patch
+
+import main
+from app.services.analytics_cache import AnalyticsCache
+from app.services.analytics_service import AnalyticsService
+from app.services.bulk_import import import_build_logs, iter_ndjson_rows
+from app.services.cascade import cascade_total, delete_project_cascade
+from app.services.progress import ProgressTracker
+from app.services.project_counters import read_counters
+from app.services.storage_backend import AlreadyCreatedError
+from tests.fake_appwrite import FakeAppwrite, apply_queries, generate_build_logs, generate_projects
+
+DATABASE = "test_database"
+PROJECTS = "test_projects"
+LOGS = "test_logs"
+ROLLUPS = "analytics_rollups"
+
+
+class AsyncFile:
+    """Minimal stand-in for UploadFile's async read/seek"""
+
+    def __init__(self, data: bytes):
+        self.buffer = io.BytesIO(data)
+
+    async def read(self, size):
+        return self.buffer.read(size)
+
+    async def seek(self, offset):
+        self.buffer.seek(offset)
+
+
+class TestQueries:
+    """Test the listDocuments query evaluation on its own"""
+
+    @pytest.fixture
+    def fake(self):
+        fake = FakeAppwrite()
+        for n, day in enumerate([3, 1, 2, 2]):
+            fake.add_document(DATABASE, LOGS, {"n": n, "project_id": f"p{n % 2}", "created_at": f"2025-01-0{day}"},
+                              document_id=f"d{n}")
+        return fake
+
+    def run(self, fake, *queries):
+        collection = fake.collections[(DATABASE, LOGS)]
+        return apply_queries(list(collection.values()), list(queries), collection)
+
+    def test_filter_order_and_select(self, fake):
+        """Test equal filters, descending order with insertion-order ties and select"""
+        total, documents = self.run(
+            fake,
+            '{"method":"equal","attribute":"project_id","values":["p0","p1"]}',
+            '{"method":"orderDesc","attribute":"created_at"}',
+            '{"method":"select","values":["$id"]}'
+        )
+        assert total == 4
+        assert documents == [{"$id": "d0"}, {"$id": "d2"}, {"$id": "d3"}, {"$id": "d1"}]
+
+    def test_cursor_after(self, fake):
+        """Test cursor paging continues after the cursor document"""
+        _, documents = self.run(
+            fake,
+            '{"method":"orderAsc","attribute":"created_at"}',
+            '{"method":"limit","values":[2]}',
+            '{"method":"cursorAfter","values":["d2"]}'
+        )
+        assert [d["$id"] for d in documents] == ["d3", "d0"]
+
+    def test_range_filters(self, fake):
+        """Test comparison queries"""
+        total, _ = self.run(fake, '{"method":"between","attribute":"created_at","values":["2025-01-02","2025-01-03"]}')
+        assert total == 3
+
+    def test_generators_are_deterministic(self):
+        """Test seeded generators produce the same data"""
+        import random
+        assert generate_projects(3, random.Random(1)) == generate_projects(3, random.Random(1))
+        logs = generate_build_logs(5, random.Random(1), days=1)
+        assert all(log["created_at"].startswith("2025-01-01") for log in logs)
+
+
+class TestAsyncServiceOnFake:
+    """The async service's requests as the fake Appwrite answers them"""
+
+    async def test_account_and_session_flow(self, fake_async_service):
+        """Test signup, login, session lookup and logout"""
+        account = await fake_async_service.create_account("ada@example.com", "secret123", "Ada")
+        session = await fake_async_service.create_session("ada@example.com", "secret123")
+        user = await fake_async_service.get_account(session["secret"])
+        assert user["$id"] == account["$id"] == session["userId"]
+
+        await fake_async_service.delete_session(session["secret"], session["$id"])
+        with pytest.raises(httpx.HTTPStatusError):
+            await fake_async_service.get_account(session["secret"])
+
+    async def test_projects_and_logs(self, fake_async_service, fake_appwrite):
+        """Test CRUD, ordering and cursor paging through the real request code"""
+        project = await fake_async_service.create_project("u1", {"name": "Demo", "created_at": "2025-01-01T00:00:00"})
+        for day in range(1, 6):
+            await fake_async_service.create_build_log(project["$id"], {
+                "title": f"Day {day}", "created_at": f"2025-01-0{day}T00:00:00"
+            })
+
+        fake_appwrite.reset_stats()
+        logs = [log async for log in fake_async_service.iter_build_logs(project["$id"], page_size=2, fields=["title"])]
+        assert [log["title"] for log in logs] == ["Day 5", "Day 4", "Day 3", "Day 2", "Day 1"]
+        assert set(logs[0]) == {"$id", "title"}
+        assert fake_appwrite.total_calls == 3
+
+        updated = await fake_async_service.update_project(project["$id"], {"status": "completed"})
+        assert updated["name"] == "Demo"
+        await fake_async_service.delete_project(project["$id"])
+        with pytest.raises(httpx.HTTPStatusError):
+            await fake_async_service.get_project(project["$id"])
+
+    async def test_logs_for_many_projects_fan_out(self, fake_async_service, fake_appwrite):
+        """Test logs for 150 projects are fetched with two batched list requests"""
+        seeded = fake_appwrite.seed(projects=150, logs_per_project=2)
+        fake_appwrite.reset_stats()
+
+        grouped = await fake_async_service.get_build_logs_for_projects(seeded["project_ids"], fields=["log_type"])
+
+        assert sum(len(logs) for logs in grouped.values()) == 300
+        assert fake_appwrite.total_calls == 2
+
+    async def test_documents_by_id(self, fake_async_service, fake_appwrite):
+        """Test multi-gets keep the requested order, skip missing ids and reuse cached documents"""
+        seeded = fake_appwrite.seed(projects=150, logs_per_project=1)
+        wanted = [*reversed(seeded["project_ids"]), "missing"]
+        fake_appwrite.reset_stats()
+
+        projects = await fake_async_service.get_projects_by_ids(wanted)
+        assert [p["$id"] for p in projects] == wanted[:-1]
+        assert fake_appwrite.total_calls == 2
+
+        again = await fake_async_service.get_projects_by_ids(wanted[:3])
+        assert again == projects[:3]
+        assert fake_appwrite.total_calls == 2
+        named = await fake_async_service.get_projects_by_ids(wanted[:3], fields=["name"])
+        assert set(named[0]) == {"$id", "name"}
+        assert fake_appwrite.total_calls == 3
+
+        log_ids = [log["$id"] for log in fake_appwrite.documents(DATABASE, LOGS)][:2]
+        log = await fake_async_service.get_build_log(log_ids[0])
+        assert [l["$id"] for l in await fake_async_service.get_build_logs_by_ids(log_ids)] == log_ids
+        assert log["$id"] == log_ids[0]
+
+    async def test_cascading_project_delete(self, fake_async_service, fake_appwrite):
+        """Test a project's logs go in batches with its owner's uploaded files, and logs already gone are skipped"""
+        seeded = fake_appwrite.seed(projects=2, logs_per_project=250)
+        project_id, other_id = seeded["project_ids"]
+        project = await fake_async_service.get_project(project_id)
+        upload = await fake_async_service.upload_file(b"png", "shot.png", owner_id=project["user_id"])
+        foreign = await fake_async_service.upload_file(b"png", "theirs.png", owner_id="someone_else")
+        assert await fake_async_service.get_file_owner(upload["$id"]) == project["user_id"]
+        await fake_async_service.create_build_log(project_id, {
+            "title": "Shot", "content": "x", "created_at": "2025-01-01T00:00:00",
+            "images": [fake_async_service.get_file_url(upload["$id"]), fake_async_service.get_file_url(foreign["$id"])]
+        })
+        tracker = ProgressTracker()
+        tracker.start(project_id, cascade_total(project))
+
+        await delete_project_cascade(fake_async_service, project_id, project["user_id"], tracker)
+
+        assert tracker.get(project_id)["status"] == "completed"
+        assert tracker.get(project_id)["done"] == 251
+        assert (tracker.get(project_id)["files_deleted"], tracker.get(project_id)["files_skipped"]) == (1, 1)
+        assert {log["project_id"] for log in fake_appwrite.documents(DATABASE, LOGS)} == {other_id}
+        assert [p["$id"] for p in fake_appwrite.documents(DATABASE, PROJECTS)] == [other_id]
+        assert [file_id for _, file_id in fake_appwrite.files] == [foreign["$id"]]
+        assert await fake_async_service.get_file_owner(upload["$id"]) is None
+        assert await fake_async_service.delete_build_logs(project_id, ["missing"]) is True
+
+    async def test_bulk_import_skips_per_row_counter_updates(self, fake_async_service, fake_appwrite):
+        """Test an import writes one request per row and repairs the counters once at the end"""
+        project = await fake_async_service.create_project("u1", {"name": "Diary", "created_at": "2024-01-01T00:00:00"})
+
+        async def body():
+            for i in range(300):
+                yield json.dumps({"title": f"Log {i}", "content": "x", "log_type": "note",
+                                  "created_at": f"2024-02-{i % 28 + 1:02d}T10:00:00"}).encode() + b"\n"
+
+        fake_appwrite.reset_stats()
+        result = await import_build_logs(fake_async_service, project["$id"], iter_ndjson_rows(body()), key="import-1")
+
+        assert result == {"imported": 300, "duplicates": 0, "failed": 0, "errors": []}
+        assert fake_appwrite.calls[("POST", "/v1/databases/{database_id}/collections/{collection_id}/documents")] == 300
+        assert fake_appwrite.total_calls < 320
+        counters = read_counters(await fake_async_service.get_project(project["$id"]))
+        assert counters["log_count"] == 300
+        assert counters["last_log_at"] == "2024-02-28T10:00:00"
+
+        again = await import_build_logs(fake_async_service, project["$id"], iter_ndjson_rows(body()), key="import-1")
+        assert (again["imported"], again["duplicates"]) == (0, 300)
+        assert len(fake_appwrite.documents(DATABASE, LOGS)) == 300
+
+    async def test_idempotent_creates(self, fake_async_service, fake_appwrite):
+        """Test creates with a document id are resent after a 503 and a repeat is reported, not written"""
+        project = await fake_async_service.create_project("u1", {"name": "Demo"}, document_id="project-key")
+        assert project["$id"] == "project-key"
+        with pytest.raises(AlreadyCreatedError):
+            await fake_async_service.create_project("u1", {"name": "Demo"}, document_id="project-key")
+
+        fake_appwrite.fail_next(1)
+        with patch('app.services.appwrite_service.asyncio.sleep'):
+            log = await fake_async_service.create_build_log("project-key", {"title": "T", "content": "x"}, document_id="log-key")
+        with pytest.raises(AlreadyCreatedError) as raised:
+            await fake_async_service.create_build_log("project-key", {"title": "T", "content": "x"}, document_id="log-key")
+
+        assert raised.value.document_id == log["$id"] == "log-key"
+        assert len(fake_appwrite.documents(DATABASE, LOGS)) == 1
+        assert read_counters(await fake_async_service.get_project("project-key"))["log_count"] == 1
+
+        fake_appwrite.fail_next(1)
+        with pytest.raises(httpx.HTTPStatusError):
+            await fake_async_service.create_build_log("project-key", {"title": "T", "content": "x"})
+
+    async def test_create_whose_response_was_lost(self, fake_async_service, fake_appwrite):
+        """Test a create that went through but answered 503 is read back and counted by its resend"""
+        fake_async_service.rollups = True
+        await fake_async_service.create_project("u1", {"name": "Demo"}, document_id="project-key")
+
+        fake_appwrite.fail_next(1, applied=True)
+        with patch('app.services.appwrite_service.asyncio.sleep'):
+            log = await fake_async_service.create_build_log("project-key", {
+                "title": "T", "content": "x", "created_at": "2025-01-01T09:00:00"
+            }, document_id="log-key")
+
+        assert log["$id"] == "log-key"
+        assert len(fake_appwrite.documents(DATABASE, LOGS)) == 1
+        assert read_counters(await fake_async_service.get_project("project-key"))["log_count"] == 1
+        assert (await fake_async_service.get_rollups("u1", 0))[0]["log_count"] == 1
+
+        # A later call with the same id did not make the earlier attempt, so it is a repeat
+        with pytest.raises(AlreadyCreatedError):
+            await fake_async_service.create_build_log("project-key", {"title": "T", "content": "x"}, document_id="log-key")
+        assert read_counters(await fake_async_service.get_project("project-key"))["log_count"] == 1
+
+    async def test_retries_injected_failures(self, fake_async_service, fake_appwrite):
+        """Test transient 503s from the server are retried"""
+        project = fake_appwrite.add_document(DATABASE, PROJECTS, {"name": "Demo"})
+        fake_appwrite.fail_next(2)
+        with patch('app.services.appwrite_service.asyncio.sleep'):
+            fetched = await fake_async_service.get_project(project["$id"])
+        assert fetched["name"] == "Demo"
+        assert fake_appwrite.total_calls == 3
+
+    async def test_latency_and_concurrency(self, fake_async_service, fake_appwrite):
+        """Test concurrent requests overlap on the server and each waits the latency"""
+        seeded = fake_appwrite.seed(projects=5, logs_per_project=1)
+        fake_appwrite.latency = 0.05
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(*(fake_async_service.get_project(pid) for pid in seeded["project_ids"]))
+
+        assert fake_appwrite.peak_concurrency == 5
+        assert 0.05 <= loop.time() - start < 0.25
+
+    async def test_build_log_writes_maintain_project_counters(self, fake_async_service, fake_appwrite):
+        """Test concurrent creates, an edit and a delete leave correct counters on the project"""
+        project = await fake_async_service.create_project("u1", {"name": "Demo"})
+        fake_appwrite.latency = 0.001
+        logs = await asyncio.gather(*(
+            fake_async_service.create_build_log(project["$id"], {
+                "title": f"Log {n}", "log_type": "update", "created_at": f"2025-01-0{n + 1}T00:00:00"
+            }) for n in range(5)
+        ))
+        await fake_async_service.update_build_log(logs[0]["$id"], {"log_type": "milestone"})
+        await fake_async_service.delete_build_log(logs[4]["$id"])
+
+        counters = read_counters(await fake_async_service.get_project(project["$id"]))
+        assert counters == {
+            "log_count": 4, "last_log_at": "2025-01-04T00:00:00", "log_type_counts": {"milestone": 1, "update": 3}
+        }
+        # Locks are dropped once nobody holds or waits for them
+        assert len(fake_async_service._locks["counters"]) == 0
+
+    async def test_cancelled_counter_update_releases_its_lock(self, fake_async_service, fake_appwrite):
+        """Test a write cancelled while holding the project's lock lets the next writer in"""
+        project = await fake_async_service.create_project("u1", {"name": "Demo"})
+        fake_appwrite.latency = 0.02
+        holder = asyncio.ensure_future(fake_async_service.create_build_log(project["$id"], {"title": "First"}))
+        waiter = asyncio.ensure_future(fake_async_service.create_build_log(project["$id"], {"title": "Second"}))
+        while not len(fake_async_service._locks["counters"]):
+            await asyncio.sleep(0.005)
+        holder.cancel()
+
+        await asyncio.wait_for(waiter, 1)
+        assert holder.cancelled()
+        assert len(fake_async_service._locks["counters"]) == 0
+
+    async def test_last_log_at_reread_in_time_order(self, fake_async_service, fake_appwrite):
+        """Test last_log_at is re-read by created_ts, and by created_at only among logs not backfilled"""
+        project = await fake_async_service.create_project("u1", {"name": "Demo"})
+        logs = [
+            await fake_async_service.create_build_log(project["$id"], {"title": "T", "created_at": created_at})
+            for created_at in ("2025-01-01T10:00:00+02:00", "2025-01-01T09:00:00Z", "2025-01-03T00:00:00")
+        ]
+
+        await fake_async_service.delete_build_log(logs[2]["$id"])
+        assert read_counters(await fake_async_service.get_project(project["$id"]))["last_log_at"] == "2025-01-01T09:00:00Z"
+
+        fake_appwrite.add_document(DATABASE, LOGS, {"project_id": project["$id"], "title": "Old", "created_at": "2025-01-02"})
+        newest = await fake_async_service.create_build_log(project["$id"], {"title": "T", "created_at": "2025-01-04T00:00:00"})
+        await fake_async_service.delete_build_log(newest["$id"])
+        assert read_counters(await fake_async_service.get_project(project["$id"]))["last_log_at"] == "2025-01-02"
+
+    async def test_counters_set_by_repair(self, fake_async_service, fake_appwrite):
+        """Test a project from before counters is left alone until repaired, and repair fixes drift"""
+        seeded = fake_appwrite.seed(projects=1, logs_per_project=3, counters=False)
+        project_id = seeded["project_ids"][0]
+        await fake_async_service.create_build_log(project_id, {"title": "New", "log_type": "note"})
+        assert "log_count" not in await fake_async_service.get_project(project_id)
+
+        counters = await fake_async_service.repair_project_counters(project_id)
+        assert counters["log_count"] == 4
+
+        await fake_async_service.update_project(project_id, {"log_count": 99})
+        counters = await fake_async_service.repair_project_counters(project_id)
+        assert counters["log_count"] == 4
+        assert (await fake_async_service.get_project(project_id))["log_count"] == 4
+
+    async def test_build_log_writes_maintain_rollups(self, fake_async_service, fake_appwrite):
+        """Test concurrent creates, an edit and a delete leave one correct rollup per day, matching a rebuild"""
+        fake_async_service.rollups = True
+        project = await fake_async_service.create_project("u1", {"name": "Demo"})
+        fake_appwrite.latency = 0.001
+        logs = await asyncio.gather(*(
+            fake_async_service.create_build_log(project["$id"], {
+                "title": f"Log {n}", "log_type": "update", "created_at": f"2025-01-0{n % 2 + 1}T00:00:00"
+            }) for n in range(6)
+        ))
+        await fake_async_service.update_build_log(logs[0]["$id"], {"log_type": "milestone"})
+        await fake_async_service.delete_build_log(logs[1]["$id"])
+
+        rollups = await fake_async_service.get_rollups("u1", 20089)
+        assert rollups == [
+            {"day": 20089, "log_count": 3, "counts": {project["$id"]: {"milestone": 1, "update": 2}}},
+            {"day": 20090, "log_count": 2, "counts": {project["$id"]: {"update": 2}}},
+        ]
+        assert len(fake_appwrite.documents(DATABASE, ROLLUPS)) == 2
+
+        # The day's last log going removes its rollup, as rebuild_rollups would
+        extra = await fake_async_service.create_build_log(project["$id"], {
+            "title": "Later", "log_type": "note", "created_at": "2025-01-05T00:00:00"
+        })
+        assert len(fake_appwrite.documents(DATABASE, ROLLUPS)) == 3
+        await fake_async_service.delete_build_log(extra["$id"])
+        assert len(fake_appwrite.documents(DATABASE, ROLLUPS)) == 2
+
+        fake_appwrite.add_document(DATABASE, ROLLUPS, {"user_id": "u1", "day": 19000, "log_count": 1, "counts": "{}"})
+        assert await fake_async_service.rebuild_rollups("u1") == 2
+        assert await fake_async_service.get_rollups("u1", 0) == rollups
+        assert len(fake_appwrite.documents(DATABASE, ROLLUPS)) == 2
+
+    async def test_analytics_from_rollups(self, fake_async_service, fake_appwrite):
+        """Test rollup analytics match log analytics and read no logs however many there are"""
+        fake_async_service.rollups = True
+        now = datetime.now()
+        project = await fake_async_service.create_project("u1", {"name": "Demo"})
+        for n in range(8):
+            created_at = (now - timedelta(days=n * 3)).isoformat()
+            await fake_async_service.create_build_log(project["$id"], {"title": "T", "log_type": "note", "created_at": created_at})
+
+        from_logs = await AnalyticsService(fake_async_service, use_rollups=False).get_complete_analytics("u1")
+        fake_async_service.cache.clear()
+        fake_appwrite.reset_stats()
+        from_rollups = await AnalyticsService(fake_async_service, use_rollups=True).get_complete_analytics("u1")
+
+        assert from_rollups == from_logs
+        assert from_rollups["weekly_logs"] == 3
+        assert fake_appwrite.total_calls == 2
+
+    async def test_activity_reads_only_the_window(self, fake_async_service, fake_appwrite):
+        """Test the activity range is filtered by created_day on the server, not after reading every log"""
+        now = datetime.now()
+        project = await fake_async_service.create_project("u1", {"name": "Demo"})
+        for n in range(30):
+            created_at = (now - timedelta(days=n)).isoformat()
+            await fake_async_service.create_build_log(project["$id"], {"title": "T", "log_type": "note", "created_at": created_at})
+
+        from app.services.timestamps import today
+        fake_appwrite.reset_stats()
+        activity = await AnalyticsService(fake_async_service).get_activity("u1", today() - 6, today(), 'week')
+
+        assert activity["total"] == 7
+        assert fake_appwrite.total_calls == 2
+        logs = [log async for log in fake_async_service.iter_build_logs_for_projects(
+            [project["$id"]], fields=["created_day"], start_day=today() - 6, end_day=today()
+        )]
+        assert len(logs) == 7
+
+    async def test_bulk_import_updates_rollups_once(self, fake_async_service, fake_appwrite):
+        """Test an import adds its rows to the owner's rollups in one update per day"""
+        fake_async_service.rollups = True
+        project = await fake_async_service.create_project("u1", {"name": "Diary"})
+
+        async def body():
+            for i in range(20):
+                yield json.dumps({"title": f"Log {i}", "content": "x", "created_at": f"2024-02-0{i % 4 + 1}T10:00:00"}).encode() + b"\n"
+
+        await import_build_logs(fake_async_service, project["$id"], iter_ndjson_rows(body()), user_id="u1")
+
+        rollups = await fake_async_service.get_rollups("u1", 0)
+        assert [(r["day"], r["log_count"]) for r in rollups] == [(19754, 5), (19755, 5), (19756, 5), (19757, 5)]
+
+    @patch('app.services.appwrite_service.UPLOAD_CHUNK_SIZE', 4)
+    async def test_chunked_upload(self, fake_async_service, fake_appwrite):
+        """Test a chunked upload is reassembled by the server"""
+        uploaded = await fake_async_service.upload_file_stream(AsyncFile(b"0123456789"), "a.bin", 10)
+        assert uploaded["chunksUploaded"] == uploaded["chunksTotal"] == 3
+        assert fake_appwrite.file_content("test_storage", uploaded["$id"]) == b"0123456789"
+
+
+class TestSyncServiceOnFake:
+    """The sync service against the same fake"""
+
+    def test_project_round_trip(self, fake_sync_service, fake_appwrite):
+        """Test creating and listing projects"""
+        fake_sync_service.create_project("u1", {"name": "A", "created_at": "2025-01-01"})
+        fake_sync_service.create_project("u1", {"name": "B", "created_at": "2025-01-02"})
+        fake_sync_service.create_project("u2", {"name": "C", "created_at": "2025-01-03"})
+
+        assert [p["name"] for p in fake_sync_service.get_projects("u1")] == ["B", "A"]
+        assert len(fake_appwrite.documents(DATABASE, PROJECTS)) == 3
+
+    def test_documents_by_id(self, fake_sync_service, fake_appwrite):
+        """Test the single-log and multi-get reads"""
+        project = fake_sync_service.create_project("u1", {"name": "A", "created_at": "2025-01-01"})
+        log = fake_sync_service.create_build_log(project["$id"], {"title": "First", "created_at": "2025-01-02"})
+
+        assert fake_sync_service.get_build_log(log["$id"])["title"] == "First"
+        assert fake_sync_service.get_build_logs_by_ids(["missing", log["$id"]], fields=["title"]) == [
+            {"$id": log["$id"], "title": "First"}
+        ]
+        assert [p["name"] for p in fake_sync_service.get_projects_by_ids([project["$id"]])] == ["A"]
+
+    def test_rollups(self, fake_sync_service, fake_appwrite):
+        """Test log writes update the daily rollups and a rebuild reproduces them"""
+        fake_sync_service.rollups = True
+        project = fake_sync_service.create_project("u1", {"name": "A", "created_at": "2025-01-01"})
+        log = fake_sync_service.create_build_log(project["$id"], {"title": "First", "created_at": "2025-01-02"})
+        fake_sync_service.create_build_log(project["$id"], {"title": "Second", "created_at": "2025-01-02"})
+        fake_sync_service.delete_build_log(log["$id"])
+
+        rollups = fake_sync_service.get_rollups("u1", 20090, 20090)
+        assert rollups == [{"day": 20090, "log_count": 1, "counts": {project["$id"]: {"note": 1}}}]
+        assert fake_sync_service.rebuild_rollups("u1") == 1
+        assert fake_sync_service.get_rollups("u1", 0) == rollups
+
+    def test_rejects_wrong_api_key(self, fake_sync_service):
+        """Test the fake checks the API key like Appwrite"""
+        fake_sync_service._admin_headers = {**fake_sync_service._admin_headers, "X-Appwrite-Key": "wrong"}
+        with pytest.raises(httpx.HTTPStatusError) as error:
+            fake_sync_service.get_projects("u1")
+        assert error.value.response.status_code == 401
+
+
+class TestRoutesOnFake:
+    """The FastAPI routes running on the Appwrite backend and the fake server"""
+
+    async def test_dashboard_and_analytics(self, fake_async_service, fake_appwrite, mock_current_user, monkeypatch):
+        """Test pages render from seeded data"""
+        monkeypatch.setattr(main, "storage", fake_async_service)
+        monkeypatch.setattr(main, "analytics_service", AnalyticsService(fake_async_service))
+        monkeypatch.setattr(main, "analytics_cache", AnalyticsCache())
+        fake_appwrite.seed(projects=3, logs_per_project=4, user_id=mock_current_user["$id"])
+
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            dashboard = await client.get("/dashboard")
+            assert "Project 2" in dashboard.text
+
+            fake_appwrite.reset_stats()
+            response = await client.get("/api/analytics")
+            analytics, analytics_etag = response.json(), response.headers["etag"]
+            assert analytics["total_projects"] == 3
+            assert analytics["total_logs"] == 12
+            # Every section reads the projects; the request's identity map makes that one call
+            assert fake_appwrite.total_calls == 1
+
+            # Revalidating the unchanged analytics reads nothing
+            fake_appwrite.reset_stats()
+            response = await client.get("/api/analytics", headers={"If-None-Match": analytics_etag})
+            assert response.status_code == 304
+            assert fake_appwrite.total_calls == 0
@@ -0,0 +1,27 @@
+"""
+Tests for idempotency keys
+"""
+import pytest
+
+from app.services.idempotency import document_id, idempotent_document_id
+
+
+class TestDocumentIds:
+    """Test keys map to stable, scoped Appwrite document ids"""
+
+    def test_same_key_same_id(self):
+        """Test a key always gives the same valid id, and other scopes or keys give others"""
+        first = document_id("project:u1", "key")
+        assert first == document_id("project:u1", "key")
+        assert len(first) == 36 and first.isalnum()
+        assert first != document_id("project:u2", "key")
+        assert first != document_id("project:u1", "other")
+
+    def test_requests_without_or_with_bad_keys(self):
+        """Test no key means no chosen id and unusable keys are refused"""
+        assert idempotent_document_id("project:u1", None) is None
+        assert idempotent_document_id("project:u1", "") is None
+        with pytest.raises(ValueError):
+            idempotent_document_id("project:u1", "x" * 256)
+        with pytest.raises(ValueError):
+            idempotent_document_id("project:u1", "line\nbreak")
@@ -0,0 +1,114 @@
+"""
+Tests for the request-scoped identity map over storage
+"""
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from app.services.analytics_service import AnalyticsService
+from app.services.identity_map import IdentityMap
+
+
+class Backend:
+    """Minimal backend recording how often each read reaches it"""
+
+    def __init__(self):
+        self.reads = []
+        self.fail = False
+
+    async def get_projects(self, user_id: str, order: str = "desc", limit: int = None, fields: list = None):
+        self.reads.append(("get_projects", user_id, order, fields))
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("backend down")
+        return [{"$id": "p1", "name": "Demo"}]
+
+    async def get_project(self, project_id: str):
+        self.reads.append(("get_project", project_id))
+        return {"$id": project_id}
+
+    async def update_project(self, project_id: str, data: dict):
+        return {"$id": project_id, **data}
+
+    async def iter_build_logs(self, project_id: str, order: str = "desc", page_size: int = None, fields: list = None):
+        self.reads.append(("iter_build_logs", project_id))
+        yield {"$id": "l1"}
+
+    def get_file_url(self, file_id: str):
+        return f"/files/{file_id}"
+
+
+@pytest.fixture
+def backend():
+    return Backend()
+
+
+class TestIdentityMap:
+    """Test reads are shared within a map and writes reset it"""
+
+    async def test_concurrent_and_repeated_reads_share_one_call(self, backend):
+        """Test equal reads, however their arguments are spelled, reach the backend once"""
+        store = IdentityMap(backend)
+        results = await asyncio.gather(
+            store.get_projects("u1", fields=["name"]),
+            store.get_projects("u1", "desc", None, ["name"]),
+            store.get_projects(user_id="u1", order="desc", fields=("name",)),
+        )
+        again = await store.get_projects("u1", fields=["name"])
+
+        assert len(backend.reads) == 1
+        assert all(result is again for result in results)
+        assert (store.hits, store.misses) == (3, 1)
+
+    async def test_different_arguments_are_separate_reads(self, backend):
+        """Test other users, fields or documents are read on their own"""
+        store = IdentityMap(backend)
+        await store.get_projects("u1")
+        await store.get_projects("u1", fields=["name"])
+        await store.get_projects("u2")
+        await store.get_project("p1")
+        await store.get_project("p1")
+
+        assert len(backend.reads) == 4
+
+    async def test_writes_clear_the_map(self, backend):
+        """Test a read after a write goes to the backend again"""
+        store = IdentityMap(backend)
+        await store.get_project("p1")
+        assert await store.update_project("p1", {"name": "New"}) == {"$id": "p1", "name": "New"}
+        await store.get_project("p1")
+
+        assert backend.reads == [("get_project", "p1"), ("get_project", "p1")]
+
+    async def test_failed_reads_are_not_kept(self, backend):
+        """Test an error reaches every waiting caller and the next read retries"""
+        store = IdentityMap(backend)
+        backend.fail = True
+        outcomes = await asyncio.gather(store.get_projects("u1"), store.get_projects("u1"), return_exceptions=True)
+        assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+
+        backend.fail = False
+        assert await store.get_projects("u1") == [{"$id": "p1", "name": "Demo"}]
+        assert len(backend.reads) == 2
+
+    async def test_streams_and_other_calls_pass_through(self, backend):
+        """Test iterators are not held in memory and other attributes come from the backend"""
+        store = IdentityMap(backend)
+        for _ in range(2):
+            assert [log async for log in store.iter_build_logs("p1")] == [{"$id": "l1"}]
+
+        assert len(backend.reads) == 2
+        assert store.get_file_url("f1") == "/files/f1"
+
+
+async def test_complete_analytics_reads_projects_once(async_iter):
+    """Test the analytics sections share one project list read"""
+    storage = AsyncMock()
+    storage.get_projects.return_value = [{"$id": "p1", "name": "Demo", "status": "in_progress"}]
+    storage.iter_build_logs_for_projects = Mock(side_effect=lambda *args, **kwargs: async_iter([]))
+
+    analytics = await AnalyticsService(storage).get_complete_analytics("u1")
+
+    assert analytics["total_projects"] == 1
+    assert storage.get_projects.await_count == 1
@@ -0,0 +1,56 @@
+"""
+Tests for the progress tracker
+"""
+from app.services.progress import ProgressTracker
+
+
+class TestProgressTracker:
+    """Test tracking, completion and bounding of operations"""
+
+    def test_progress_lifecycle(self):
+        """Test an operation moves from in progress to completed"""
+        tracker = ProgressTracker()
+        tracker.start("op1", 200)
+        tracker.update("op1", 50)
+
+        assert tracker.get("op1")["percent"] == 25.0
+        assert tracker.get("op1")["status"] == "in_progress"
+
+        tracker.finish("op1")
+        assert tracker.get("op1")["status"] == "completed"
+        assert tracker.get("op1")["percent"] == 100.0
+
+    def test_failure_keeps_progress(self):
+        """Test a failed operation reports its error and how far it got"""
+        tracker = ProgressTracker()
+        tracker.start("op1", 10)
+        tracker.update("op1", 4)
+        tracker.fail("op1", "boom")
+
+        progress = tracker.get("op1")
+        assert progress["status"] == "failed"
+        assert progress["error"] == "boom"
+        assert progress["done"] == 4
+
+    def test_details_and_estimated_totals(self):
+        """Test extra counts are reported and an estimated total grows with the work done"""
+        tracker = ProgressTracker()
+        tracker.start("op1", 2)
+        tracker.update("op1", 3, files_deleted=1)
+
+        assert tracker.running("op1")
+        assert tracker.get("op1")["files_deleted"] == 1
+        assert tracker.get("op1")["percent"] == 100.0
+
+        tracker.finish("op1")
+        assert not tracker.running("op1")
+        assert not tracker.running("unknown")
+
+    def test_oldest_entries_dropped(self):
+        """Test only the most recent operations are remembered"""
+        tracker = ProgressTracker(max_entries=2)
+        for operation_id in ("a", "b", "c"):
+            tracker.start(operation_id, 1)
+
+        assert tracker.get("a") is None
+        assert tracker.get("c") is not None
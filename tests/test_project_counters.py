@@ -0,0 +1,80 @@
+"""
+Tests for the build log counters stored on projects
+"""
+from unittest.mock import AsyncMock
+
+from app.services.project_counters import (
+    apply_log_change, counters_from_logs, encode_counters, has_counters, read_counters, repair
+)
+
+
+def log(created_at, log_type="update"):
+    return {"created_at": created_at, "log_type": log_type}
+
+
+class TestApplyLogChange:
+    """Test counter deltas for created, edited and deleted logs"""
+
+    def test_create_counts_and_moves_last_log_at(self):
+        """Test a new log increments its type and advances last_log_at"""
+        counters = counters_from_logs([log("2025-01-01"), log("2025-01-03", "feature")])
+        assert apply_log_change(counters, new=log("2025-01-02")) is False
+        assert counters == {
+            "log_count": 3, "last_log_at": "2025-01-03", "log_type_counts": {"update": 2, "feature": 1}
+        }
+
+    def test_deleting_newest_log_needs_reread(self):
+        """Test removing the newest log asks for last_log_at to be re-read"""
+        counters = counters_from_logs([log("2025-01-01"), log("2025-01-03", "feature")])
+        assert apply_log_change(counters, old=log("2025-01-03", "feature")) is True
+        assert counters["log_type_counts"] == {"update": 1}
+
+    def test_deleting_older_log_keeps_last_log_at(self):
+        """Test removing an older log leaves last_log_at alone"""
+        counters = counters_from_logs([log("2025-01-01"), log("2025-01-03")])
+        assert apply_log_change(counters, old=log("2025-01-01")) is False
+        assert counters["last_log_at"] == "2025-01-03"
+
+    def test_deleting_last_log(self):
+        """Test the last log going away leaves empty counters without a re-read"""
+        counters = counters_from_logs([log("2025-01-01")])
+        assert apply_log_change(counters, old=log("2025-01-01")) is False
+        assert counters["log_count"] == 0
+        assert counters["log_type_counts"] == {}
+
+    def test_edit_moves_type(self):
+        """Test changing a log's type moves its count"""
+        counters = counters_from_logs([log("2025-01-01"), log("2025-01-02")])
+        assert apply_log_change(counters, old=log("2025-01-02"), new=log("2025-01-02", "note")) is False
+        assert counters["log_type_counts"] == {"update": 1, "note": 1}
+        assert counters["log_count"] == 2
+
+    def test_last_log_at_compares_moments_not_strings(self):
+        """Test timestamps in other formats or offsets are ordered by when they happened"""
+        counters = counters_from_logs([log("2025-01-01T10:00:00+02:00")])
+        apply_log_change(counters, new=log("2025-01-01T09:00:00Z"))
+        assert counters["last_log_at"] == "2025-01-01T09:00:00Z"
+
+        counters = counters_from_logs([log("2025-01-01T10:00:00.000+00:00"), log("2025-01-01T09:00:00Z")])
+        assert counters["last_log_at"] == "2025-01-01T10:00:00.000+00:00"
+        assert apply_log_change(counters, old=log("2025-01-01T09:00:00Z")) is False
+
+    def test_encoding_round_trip(self):
+        """Test stored counters decode back to the same values"""
+        counters = counters_from_logs([log("2025-01-01", "milestone")])
+        stored = {"$id": "p1", **encode_counters(counters)}
+        assert isinstance(stored["log_type_counts"], str)
+        assert has_counters(stored)
+        assert read_counters(stored) == counters
+        assert not has_counters({"$id": "p2"})
+
+
+async def test_repair_walks_user_projects(async_iter):
+    """Test the repair command repairs every project of a user plus explicit ones"""
+    storage = AsyncMock()
+    storage.iter_projects = lambda user_id, **kwargs: async_iter([{"$id": "p1"}, {"$id": "p2"}])
+    storage.repair_project_counters.return_value = {"log_count": 0, "last_log_at": None}
+
+    assert await repair(storage, ["user1"], ["p2", "p3"]) == 3
+    repaired = [call.args[0] for call in storage.repair_project_counters.call_args_list]
+    assert repaired == ["p2", "p3", "p1"]
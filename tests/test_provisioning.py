@@ -0,0 +1,116 @@
+"""
+Tests for the Appwrite schema provisioning tool, run against the fake Appwrite server
+"""
+import pytest
+
+from app.services.provisioning import SchemaProvisioner, desired_schema, format_changes, main
+
+
+@pytest.fixture
+def provisioner(fake_sync_service):
+    return SchemaProvisioner(fake_sync_service, poll_interval=0)
+
+
+def actions(changes):
+    return {(c["action"], c["target"]) for c in changes}
+
+
+class TestProvisioning:
+    """Test creating, re-checking and repairing the schema"""
+
+    def test_creates_everything_then_nothing(self, provisioner, fake_appwrite):
+        """Test a first run creates the whole schema and a second run changes nothing"""
+        changes = provisioner.run()
+
+        assert ("create", "database test_database") in actions(changes)
+        assert ("create", "collection test_projects") in actions(changes)
+        assert ("create", "index test_logs.idx_project_id_created_at") in actions(changes)
+        logs = fake_appwrite.schemas[("test_database", "test_logs")]
+        assert logs["indexes"]["idx_project_id_created_at"]["orders"] == ["ASC", "DESC"]
+        assert logs["attributes"]["log_type"]["default"] == "update"
+        projects = fake_appwrite.schemas[("test_database", "test_projects")]
+        assert projects["attributes"]["repository_url"]["format"] == "url"
+        assert projects["$permissions"] == ['create("users")', 'read("users")', 'update("users")', 'delete("users")']
+
+        fake_appwrite.reset_stats()
+        assert provisioner.run() == []
+        assert all(method == "GET" for method, _ in fake_appwrite.calls)
+
+    def test_check_reports_without_writing(self, provisioner, fake_appwrite):
+        """Test a check on an empty server lists the work but creates nothing"""
+        changes = provisioner.run(apply=False)
+
+        expected = sum(len(c["attributes"]) + len(c["indexes"]) + 1 for c in desired_schema().values()) + 1
+        assert len(changes) == expected
+        assert fake_appwrite.databases == {}
+        assert fake_appwrite.schemas == {}
+
+    def test_repairs_drift(self, provisioner, fake_appwrite):
+        """Test changed attributes and indexes are fixed while undeclared ones are only reported"""
+        provisioner.run()
+        logs = fake_appwrite.schemas[("test_database", "test_logs")]
+        logs["attributes"]["title"]["size"] = 50
+        logs["indexes"]["idx_project_id_created_at"]["orders"] = ["ASC", "ASC"]
+        del logs["indexes"]["idx_project_id"]
+        fake_appwrite.add_document("test_database", "test_logs", {"title": "x"})  # unrelated to the schema
+        logs["attributes"]["legacy"] = {"key": "legacy", "type": "string", "size": 10, "required": False,
+                                        "array": False, "default": None, "status": "available"}
+
+        found = provisioner.run(apply=False)
+        assert actions(found) == {
+            ("update", "attribute test_logs.title"),
+            ("recreate", "index test_logs.idx_project_id_created_at"),
+            ("create", "index test_logs.idx_project_id"),
+            ("drift", "attribute test_logs.legacy"),
+        }
+
+        assert actions(provisioner.run()) == actions(found)
+        assert logs["attributes"]["title"]["size"] == 200
+        assert logs["indexes"]["idx_project_id_created_at"]["orders"] == ["ASC", "DESC"]
+        assert "idx_project_id" in logs["indexes"]
+        assert actions(provisioner.run()) == {("drift", "attribute test_logs.legacy")}
+
+    def test_type_changes_are_left_alone(self, provisioner, fake_appwrite):
+        """Test an attribute of the wrong type is reported, never altered"""
+        provisioner.run()
+        projects = fake_appwrite.schemas[("test_database", "test_projects")]
+        projects["attributes"]["log_count"] = {**projects["attributes"]["log_count"], "type": "string", "size": 10}
+
+        changes = provisioner.run()
+        assert [c["action"] for c in changes] == ["drift"]
+        assert "declared integer" in changes[0]["detail"]
+        assert projects["attributes"]["log_count"]["type"] == "string"
+
+    def test_service_writes_fit_the_schema(self, provisioner, fake_sync_service, sample_project_data):
+        """Test documents the service writes validate against the provisioned collections"""
+        provisioner.run()
+
+        project = fake_sync_service.create_project("test_user_123", sample_project_data)
+        log = fake_sync_service.create_build_log(project["$id"], {
+            "title": "First", "content": "Hello", "log_type": "feature", "tags": ["a"],
+            "created_at": "2025-10-13T12:00:00"
+        })
+
+        assert log["project_id"] == project["$id"]
+        assert log["created_day"] == project["created_day"] == 20374
+        assert fake_sync_service.get_project(project["$id"])["log_count"] == 1
+
+
+def test_format_changes():
+    """Test the report wording for applied changes, checks and a clean schema"""
+    changes = [{"action": "create", "target": "index logs.idx", "detail": "created_at"}]
+    assert format_changes(changes, applied=True) == "created    index logs.idx  (created_at)"
+    assert format_changes(changes, applied=False).startswith("create ")
+    assert format_changes([], applied=True) == "Schema is up to date"
+
+
+def test_check_command_exit_status(monkeypatch, fake_appwrite, fake_sync_service, capsys):
+    """Test --check exits 1 while work is pending and 0 once provisioned"""
+    monkeypatch.setattr("app.services.appwrite_service.AppwriteService", lambda: fake_sync_service)
+    monkeypatch.setattr(fake_sync_service, "close", lambda: None)  # main closes the service after each run
+
+    assert main(["--check"]) == 1
+    assert fake_appwrite.schemas == {}
+    assert main([]) == 0
+    assert main(["--check"]) == 0
+    assert capsys.readouterr().out.strip().endswith("Schema is up to date")
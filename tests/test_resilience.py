@@ -0,0 +1,116 @@
+"""
+Tests for retry backoff, the circuit breaker and the token bucket
+"""
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+from app.services.resilience import (
+    CircuitBreaker, CircuitOpenError, TokenBucket, backoff_delay, retry_after_seconds
+)
+
+
+class TestBackoff:
+    """Test jittered exponential backoff and Retry-After parsing"""
+
+    def test_backoff_grows_and_is_capped(self):
+        """Test delays stay within the exponential envelope and the cap"""
+        for attempt in range(10):
+            delay = backoff_delay(attempt, base=0.1, cap=2.0)
+            assert 0 <= delay <= min(2.0, 0.1 * 2 ** attempt)
+
+    def test_retry_after_seconds(self):
+        """Test Retry-After given in seconds"""
+        assert retry_after_seconds("3") == 3.0
+        assert retry_after_seconds(None) is None
+        assert retry_after_seconds("soon") is None
+
+    def test_retry_after_http_date(self):
+        """Test Retry-After given as an HTTP date"""
+        when = datetime.now(timezone.utc) + timedelta(seconds=30)
+        assert 25 <= retry_after_seconds(format_datetime(when, usegmt=True)) <= 30
+
+
+class TestCircuitBreaker:
+    """Test the closed -> open -> half-open -> closed cycle"""
+
+    def test_opens_after_threshold(self):
+        """Test consecutive failures open the circuit and requests fail fast"""
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+        for _ in range(3):
+            breaker.before_request()
+            breaker.record_failure()
+
+        assert breaker.state == "open"
+        with pytest.raises(CircuitOpenError):
+            breaker.before_request()
+
+    def test_success_resets_failures(self):
+        """Test a success in between keeps the circuit closed"""
+        breaker = CircuitBreaker(failure_threshold=2)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == "closed"
+
+    def test_half_open_allows_one_probe(self):
+        """Test one probe goes through after the reset timeout and closes the circuit"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+        with patch("app.services.resilience.time.monotonic", return_value=100.0):
+            breaker.record_failure()
+        with patch("app.services.resilience.time.monotonic", return_value=111.0):
+            assert breaker.state == "half_open"
+            breaker.before_request()
+            with pytest.raises(CircuitOpenError):
+                breaker.before_request()
+            breaker.record_success()
+        assert breaker.state == "closed"
+
+    def test_failed_probe_reopens(self):
+        """Test a failed probe opens the circuit again"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+        with patch("app.services.resilience.time.monotonic", return_value=100.0):
+            breaker.record_failure()
+        with patch("app.services.resilience.time.monotonic", return_value=111.0):
+            breaker.before_request()
+            breaker.record_failure()
+            assert breaker.state == "open"
+
+
+    def test_released_probe_lets_another_through(self):
+        """Test a probe that ended with no outcome can be replaced by the next request"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+        with patch("app.services.resilience.time.monotonic", return_value=100.0):
+            breaker.record_failure()
+        with patch("app.services.resilience.time.monotonic", return_value=111.0):
+            assert breaker.before_request() is True
+            breaker.release_probe()
+            assert breaker.before_request() is True
+            assert breaker.state == "half_open"
+
+class TestTokenBucket:
+    """Test steady-state spacing and 429 pauses"""
+
+    def test_unlimited_by_default(self):
+        """Test a zero rate never delays callers"""
+        bucket = TokenBucket()
+        assert all(bucket.reserve() == 0 for _ in range(100))
+
+    def test_burst_then_spacing(self):
+        """Test callers beyond the burst wait for tokens to refill"""
+        with patch("app.services.resilience.time.monotonic", return_value=0.0):
+            bucket = TokenBucket(rate=10, capacity=2)
+            assert bucket.reserve() == 0
+            assert bucket.reserve() == 0
+            assert bucket.reserve() == pytest.approx(0.1)
+            assert bucket.reserve() == pytest.approx(0.2)
+
+    def test_pause_delays_everyone(self):
+        """Test a Retry-After pause applies to every caller"""
+        with patch("app.services.resilience.time.monotonic", return_value=50.0):
+            bucket = TokenBucket()
+            bucket.pause(2.5)
+            assert bucket.reserve() == pytest.approx(2.5)
+            assert bucket.reserve() == pytest.approx(2.5)
@@ -0,0 +1,78 @@
+"""
+Tests for the daily build log rollups
+"""
+from unittest.mock import AsyncMock
+
+from app.services.rollups import (
+    apply_rollup_change, encode_rollup, merge_changes, read_rollup, rebuild, rollup_changes, rollup_id,
+    rollup_total, rollups_from_logs
+)
+
+
+def log(created_at, log_type="update", project_id="p1"):
+    return {"created_at": created_at, "log_type": log_type, "project_id": project_id}
+
+
+class TestRollupChanges:
+    """Test the per-day deltas of created, edited and deleted logs"""
+
+    def test_create_and_delete(self):
+        """Test a new log adds one and a deleted log takes one away, on its day"""
+        assert rollup_changes(new=log("2025-01-01T10:00:00")) == {20089: {"p1": {"update": 1}}}
+        assert rollup_changes(old={"created_day": 20090, "project_id": "p2"}) == {20090: {"p2": {"note": -1}}}
+
+    def test_edits(self):
+        """Test an edit moves the log between days or types, and one within the same bucket changes nothing"""
+        old = log("2025-01-01T10:00:00")
+        assert rollup_changes(old, log("2025-01-01T18:00:00")) == {}
+        assert rollup_changes(old, log("2025-01-01T10:00:00", "feature")) == {20089: {"p1": {"update": -1, "feature": 1}}}
+        assert rollup_changes(old, log("2025-01-03T10:00:00")) == {20089: {"p1": {"update": -1}}, 20091: {"p1": {"update": 1}}}
+
+    def test_merge_cancels_out(self):
+        """Test changes merged together drop the days they cancel on"""
+        changes = merge_changes(rollup_changes(new=log("2025-01-01")), rollup_changes(new=log("2025-01-02")))
+        merge_changes(changes, rollup_changes(old=log("2025-01-01")))
+        assert changes == {20090: {"p1": {"update": 1}}}
+
+
+class TestRollups:
+    """Test stored rollups"""
+
+    def test_apply_drops_empty_counts(self):
+        """Test counts reaching zero disappear, along with projects left without any"""
+        counts = {"p1": {"update": 1}, "p2": {"note": 2}}
+        assert apply_rollup_change(counts, {"p1": {"update": -1}, "p2": {"note": -1}}) == {"p2": {"note": 1}}
+
+    def test_encoding_round_trip(self):
+        """Test counts are stored as JSON with their total"""
+        counts = {"p1": {"update": 2}, "p2": {"feature": 1}}
+        stored = {"day": 20089, **encode_rollup(counts)}
+        assert stored["log_count"] == 3
+        assert read_rollup(stored) == {"day": 20089, "log_count": 3, "counts": counts}
+
+    def test_from_logs_and_totals(self):
+        """Test recomputing from logs, and totals filtered by project and type"""
+        days = rollups_from_logs([log("2025-01-01"), log("2025-01-01", "feature", "p2"), log("2025-01-02"), {"title": "no date"}])
+        assert days == {20089: {"p1": {"update": 1}, "p2": {"feature": 1}}, 20090: {"p1": {"update": 1}}}
+
+        rollup = {"day": 20089, "counts": days[20089]}
+        assert rollup_total(rollup) == 2
+        assert rollup_total(rollup, project_ids={"p2"}) == 1
+        assert rollup_total(rollup, log_type="update") == 1
+
+    def test_ids_are_stable_per_user_and_day(self):
+        """Test every write of a day addresses the same document, within Appwrite's id length"""
+        assert rollup_id("u1", 20089) == rollup_id("u1", 20089)
+        assert len({rollup_id("u1", 20089), rollup_id("u1", 20090), rollup_id("u2", 20089)}) == 3
+        assert len(rollup_id("u1", 20089)) <= 36
+
+
+async def test_rebuild_repairs_counters_and_rollups(async_iter):
+    """Test the rebuild command repairs each project's counters and rebuilds each user's rollups"""
+    storage = AsyncMock()
+    storage.iter_projects = lambda user_id, **kwargs: async_iter([{"$id": "p1"}, {"$id": "p2"}])
+    storage.rebuild_rollups.return_value = 4
+
+    assert await rebuild(storage, ["u1", "u2"]) == 8
+    assert storage.repair_project_counters.await_count == 4
+    assert [call.args[0] for call in storage.rebuild_rollups.call_args_list] == ["u1", "u2"]
@@ -0,0 +1,410 @@
+"""
+Tests for the SQLite storage backend
+"""
+import io
+import json
+import os
+from datetime import datetime
+
+import httpx
+import pytest
+from unittest.mock import patch
+
+import main
+from app.services.analytics_cache import AnalyticsCache
+from app.services.analytics_service import AnalyticsService
+from app.services.cascade import cascade_total, delete_project_cascade
+from app.services.progress import ProgressTracker
+from app.services.project_counters import read_counters
+from app.services.sqlite_service import AsyncSQLiteService
+from app.services.storage_backend import (
+    AlreadyCreatedError, AuthenticationError, ConflictError, NotFoundError, StorageBackend
+)
+
+
+@pytest.fixture
+def sqlite_service(tmp_path):
+    """SQLite backend in a temporary directory, with cheap password hashing"""
+    with patch('app.services.sqlite_service.PASSWORD_ITERATIONS', 1000):
+        service = AsyncSQLiteService(str(tmp_path / "buildlog.db"), str(tmp_path / "uploads"))
+        yield service
+    service._db.close()
+
+
+class AsyncFile:
+    """Minimal stand-in for UploadFile's async read/seek"""
+
+    def __init__(self, data: bytes):
+        self.buffer = io.BytesIO(data)
+
+    async def read(self, size):
+        return self.buffer.read(size)
+
+    async def seek(self, offset):
+        self.buffer.seek(offset)
+
+
+class TestAsyncSQLiteService:
+    """Test the SQLite backend against the storage interface"""
+
+    def test_implements_storage_backend(self, sqlite_service):
+        """Test the backend is a drop-in StorageBackend"""
+        assert isinstance(sqlite_service, StorageBackend)
+
+    def test_wal_mode_and_indexes(self, sqlite_service):
+        """Test the database runs in WAL mode with the list indexes"""
+        assert sqlite_service._run("PRAGMA journal_mode")[0][0] == "wal"
+        indexes = {row["name"] for row in sqlite_service._run("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {"idx_projects_user_id_created_at", "idx_build_logs_project_id_created_at", "idx_build_logs_created_at"} <= indexes
+
+    def test_list_queries_use_indexes(self, sqlite_service):
+        """Test project and log lists are answered from an index"""
+        sql, params = sqlite_service._list_sql("build_logs", "project_id", ["p1"], "desc", None, 10)
+        plan = " ".join(row["detail"] for row in sqlite_service._run(f"EXPLAIN QUERY PLAN {sql}", params))
+        assert "idx_build_logs_project_id_created_at" in plan
+
+    async def test_accounts_and_sessions(self, sqlite_service):
+        """Test signup, login, session lookup and logout"""
+        account = await sqlite_service.create_account("Ada@example.com", "secret123", "Ada")
+        session = await sqlite_service.create_session("ada@example.com", "secret123")
+
+        user = await sqlite_service.get_account(session["secret"])
+        assert user == {"$id": account["$id"], "email": "ada@example.com", "name": "Ada"}
+
+        with pytest.raises(ConflictError, match="already exists"):
+            await sqlite_service.create_account("ada@example.com", "other", "Ada 2")
+        with pytest.raises(AuthenticationError):
+            await sqlite_service.create_session("ada@example.com", "wrong")
+
+        await sqlite_service.delete_session(session["secret"], session["$id"])
+        with pytest.raises(AuthenticationError):
+            await sqlite_service.get_account(session["secret"])
+
+    async def test_project_crud(self, sqlite_service):
+        """Test creating, reading, updating and deleting a project"""
+        project = await sqlite_service.create_project("user1", {
+            "name": "Demo", "description": "", "tech_stack": ["Python"], "created_at": "2025-01-01T00:00:00"
+        })
+        assert "description" not in project
+
+        fetched = await sqlite_service.get_project(project["$id"])
+        assert fetched == project
+
+        updated = await sqlite_service.update_project(project["$id"], {"status": "completed", "demo_url": None})
+        assert updated["status"] == "completed"
+        assert updated["name"] == "Demo"
+
+        assert await sqlite_service.delete_project(project["$id"]) is True
+        with pytest.raises(NotFoundError):
+            await sqlite_service.get_project(project["$id"])
+
+    async def test_lists_are_ordered_paged_and_projected(self, sqlite_service):
+        """Test ordering by created_at, cursor pages and field projection"""
+        for day in range(1, 6):
+            await sqlite_service.create_build_log("p1", {
+                "title": f"Day {day}", "content": "x" * 100, "log_type": "update",
+                "created_at": f"2025-01-0{day}T00:00:00"
+            })
+        await sqlite_service.create_build_log("p2", {"title": "Other", "created_at": "2025-01-03T12:00:00"})
+
+        newest = await sqlite_service.get_build_logs("p1")
+        assert [log["title"] for log in newest] == ["Day 5", "Day 4", "Day 3", "Day 2", "Day 1"]
+
+        oldest = await sqlite_service.get_build_logs("p1", order="asc", limit=2)
+        assert [log["title"] for log in oldest] == ["Day 1", "Day 2"]
+
+        page, cursor = await sqlite_service.get_build_logs_page("p1", page_size=2)
+        page2, cursor2 = await sqlite_service.get_build_logs_page("p1", cursor=cursor, page_size=2)
+        assert [log["title"] for log in page + page2] == ["Day 5", "Day 4", "Day 3", "Day 2"]
+        assert cursor2 is not None
+
+        streamed = [log async for log in sqlite_service.iter_build_logs("p1", page_size=2, fields=["title"])]
+        assert len(streamed) == 5
+        assert set(streamed[0]) == {"$id", "title"}
+
+        grouped = await sqlite_service.get_build_logs_for_projects(["p1", "p2", "p3"], fields=["log_type"])
+        assert [len(grouped[p]) for p in ("p1", "p2", "p3")] == [5, 1, 0]
+
+    async def test_update_and_delete_build_log(self, sqlite_service):
+        """Test build log updates merge and deletes remove the document"""
+        log = await sqlite_service.create_build_log("p1", {"title": "Draft", "content": "Hello"})
+        updated = await sqlite_service.update_build_log(log["$id"], {"title": "Final"})
+        assert updated["title"] == "Final"
+        assert updated["content"] == "Hello"
+
+        await sqlite_service.delete_build_log(log["$id"])
+        assert await sqlite_service.get_build_logs("p1") == []
+
+    async def test_documents_by_id(self, sqlite_service):
+        """Test the single-log read and multi-gets in the order of the ids given"""
+        first = await sqlite_service.create_project("user1", {"name": "First"})
+        second = await sqlite_service.create_project("user1", {"name": "Second"})
+        log = await sqlite_service.create_build_log(first["$id"], {"title": "Hello", "content": "World"})
+
+        assert (await sqlite_service.get_build_log(log["$id"]))["content"] == "World"
+        with pytest.raises(NotFoundError):
+            await sqlite_service.get_build_log("missing")
+
+        projects = await sqlite_service.get_projects_by_ids([second["$id"], "missing", first["$id"]], fields=["name"])
+        assert projects == [{"$id": second["$id"], "name": "Second"}, {"$id": first["$id"], "name": "First"}]
+        assert [l["title"] for l in await sqlite_service.get_build_logs_by_ids([log["$id"]])] == ["Hello"]
+        assert await sqlite_service.get_projects_by_ids([]) == []
+
+    async def test_cascading_project_delete(self, sqlite_service):
+        """Test deleting a project removes its logs and their owner's uploaded files and no others"""
+        project = await sqlite_service.create_project("user1", {"name": "Doomed"})
+        other = await sqlite_service.create_project("user1", {"name": "Kept"})
+        upload = await sqlite_service.upload_file(b"png", "shot.png", owner_id="user1")
+        foreign = await sqlite_service.upload_file(b"png", "theirs.png", owner_id="user2")
+        assert await sqlite_service.get_file_owner(upload["$id"]) == "user1"
+        for i in range(5):
+            await sqlite_service.create_build_log(project["$id"], {
+                "title": f"Log {i}", "images": [f"/files/{upload['$id']}", f"/files/{foreign['$id']}"]
+            })
+        await sqlite_service.create_build_log(other["$id"], {"title": "Other"})
+        tracker = ProgressTracker()
+        tracker.start(project["$id"], cascade_total(project))
+
+        await delete_project_cascade(sqlite_service, project["$id"], "user1", tracker, batch_size=2)
+
+        assert tracker.get(project["$id"])["done"] == 5
+        assert (tracker.get(project["$id"])["files_deleted"], tracker.get(project["$id"])["files_skipped"]) == (1, 1)
+        assert await sqlite_service.get_projects("user1", fields=["name"]) == [{"$id": other["$id"], "name": "Kept"}]
+        assert sqlite_service._run("SELECT COUNT(*) FROM build_logs")[0][0] == 1
+        assert sqlite_service._run("SELECT id FROM files")[0][0] == foreign["$id"]
+        assert not os.path.exists(sqlite_service.local_file_path(upload["$id"]))
+        assert await sqlite_service.get_file_owner(upload["$id"]) is None
+
+    async def test_idempotent_creates(self, sqlite_service):
+        """Test a create repeating a document id is rejected and leaves the counters alone"""
+        project = await sqlite_service.create_project("user1", {"name": "Demo"}, document_id="project-key")
+        await sqlite_service.create_build_log(project["$id"], {"title": "T"}, document_id="log-key")
+
+        with pytest.raises(AlreadyCreatedError):
+            await sqlite_service.create_project("user1", {"name": "Demo"}, document_id="project-key")
+        with pytest.raises(AlreadyCreatedError):
+            await sqlite_service.create_build_log(project["$id"], {"title": "T"}, document_id="log-key")
+        assert (await sqlite_service.get_project("project-key"))["log_count"] == 1
+
+    async def test_build_log_writes_maintain_project_counters(self, sqlite_service):
+        """Test create, edit and delete keep the project's counters in step with its logs"""
+        project = await sqlite_service.create_project("user1", {"name": "Demo"})
+        first = await sqlite_service.create_build_log(project["$id"], {"log_type": "update", "created_at": "2025-01-01T00:00:00"})
+        second = await sqlite_service.create_build_log(project["$id"], {"log_type": "feature", "created_at": "2025-01-02T00:00:00"})
+        await sqlite_service.update_build_log(first["$id"], {"log_type": "bug_fix"})
+
+        counters = read_counters(await sqlite_service.get_project(project["$id"]))
+        assert counters == {
+            "log_count": 2, "last_log_at": "2025-01-02T00:00:00", "log_type_counts": {"bug_fix": 1, "feature": 1}
+        }
+
+        await sqlite_service.delete_build_log(second["$id"])
+        counters = read_counters(await sqlite_service.get_project(project["$id"]))
+        assert counters == {"log_count": 1, "last_log_at": "2025-01-01T00:00:00", "log_type_counts": {"bug_fix": 1}}
+
+    async def test_last_log_at_reread_in_time_order(self, sqlite_service):
+        """Test last_log_at is re-read by created_ts, and by created_at only among logs not backfilled"""
+        project = await sqlite_service.create_project("user1", {"name": "Demo"})
+        logs = [
+            await sqlite_service.create_build_log(project["$id"], {"title": "T", "created_at": created_at})
+            for created_at in ("2025-01-01T10:00:00+02:00", "2025-01-01T09:00:00Z", "2025-01-03T00:00:00")
+        ]
+
+        await sqlite_service.delete_build_log(logs[2]["$id"])
+        assert read_counters(await sqlite_service.get_project(project["$id"]))["last_log_at"] == "2025-01-01T09:00:00Z"
+
+        sqlite_service._run(
+            "INSERT INTO build_logs (id, project_id, created_at, data) VALUES (?, ?, ?, ?)",
+            ("old", project["$id"], "2025-01-02", json.dumps({"project_id": project["$id"], "created_at": "2025-01-02"}))
+        )
+        newest = await sqlite_service.create_build_log(project["$id"], {"title": "T", "created_at": "2025-01-04T00:00:00"})
+        await sqlite_service.delete_build_log(newest["$id"])
+        assert read_counters(await sqlite_service.get_project(project["$id"]))["last_log_at"] == "2025-01-02"
+
+    async def test_writes_store_numeric_timestamps(self, sqlite_service):
+        """Test creates store created_ts and created_day, and moving a log's created_at updates them"""
+        project = await sqlite_service.create_project("user1", {"name": "Demo", "created_at": "2025-01-01T12:00:00"})
+        log = await sqlite_service.create_build_log(project["$id"], {"created_at": "2025-01-01T12:00:00"})
+        assert project["created_day"] == log["created_day"] == 20089
+        assert log["created_ts"] == int(datetime(2025, 1, 1, 12).timestamp())
+
+        updated = await sqlite_service.update_build_log(log["$id"], {"created_at": "2025-01-03T08:00:00"})
+        assert updated["created_day"] == 20091
+
+    async def test_repair_project_counters(self, sqlite_service):
+        """Test drifted counters are recomputed from the logs"""
+        project = await sqlite_service.create_project("user1", {"name": "Demo"})
+        await sqlite_service.create_build_log(project["$id"], {"log_type": "note", "created_at": "2025-01-05T00:00:00"})
+        await sqlite_service.update_project(project["$id"], {"log_count": 40})
+
+        counters = await sqlite_service.repair_project_counters(project["$id"])
+        assert counters["log_count"] == 1
+        assert (await sqlite_service.get_project(project["$id"]))["log_count"] == 1
+
+    async def test_build_log_writes_maintain_rollups(self, sqlite_service):
+        """Test create, edit and delete keep the owner's daily rollups in step, and a rebuild agrees"""
+        sqlite_service.rollups = True
+        first = await sqlite_service.create_project("user1", {"name": "First"})
+        second = await sqlite_service.create_project("user1", {"name": "Second"})
+        a = await sqlite_service.create_build_log(first["$id"], {"log_type": "update", "created_at": "2025-01-01T10:00:00"})
+        await sqlite_service.create_build_log(second["$id"], {"log_type": "feature", "created_at": "2025-01-01T12:00:00"})
+        c = await sqlite_service.create_build_log(first["$id"], {"log_type": "note", "created_at": "2025-01-02T09:00:00"})
+        await sqlite_service.update_build_log(a["$id"], {"log_type": "bug_fix"})
+        await sqlite_service.update_build_log(c["$id"], {"created_at": "2025-01-03T09:00:00"})
+
+        rollups = await sqlite_service.get_rollups("user1", 20089)
+        assert rollups == [
+            {"day": 20089, "log_count": 2, "counts": {first["$id"]: {"bug_fix": 1}, second["$id"]: {"feature": 1}}},
+            {"day": 20091, "log_count": 1, "counts": {first["$id"]: {"note": 1}}},
+        ]
+        assert await sqlite_service.get_rollups("user1", 20090, 20090) == []
+
+        await sqlite_service.delete_build_log(c["$id"])
+        assert [r["day"] for r in await sqlite_service.get_rollups("user1", 0)] == [20089]
+        assert await sqlite_service.rebuild_rollups("user1") == 1
+        assert await sqlite_service.get_rollups("user1", 0) == rollups[:1]
+
+    async def test_rebuild_rollups(self, sqlite_service):
+        """Test logs written with rollups off are rolled up by a rebuild, which also drops stale days"""
+        project = await sqlite_service.create_project("user1", {"name": "Demo"})
+        await sqlite_service.create_build_log(project["$id"], {"created_at": "2025-01-05T00:00:00"})
+        assert await sqlite_service.get_rollups("user1", 0) == []
+        sqlite_service.rollups = True
+        await sqlite_service.update_rollups("user1", {20000: {"gone": {"note": 2}}})
+
+        assert await sqlite_service.rebuild_rollups("user1") == 1
+        assert await sqlite_service.get_rollups("user1", 0) == [
+            {"day": 20093, "log_count": 1, "counts": {project["$id"]: {"note": 1}}}
+        ]
+
+    async def test_analytics_from_rollups(self, sqlite_service):
+        """Test analytics answered from rollups match those computed from the logs, without reading logs"""
+        sqlite_service.rollups = True
+        now = datetime.now()
+        for name, logs in (("Busy", 5), ("Quiet", 1)):
+            project = await sqlite_service.create_project("user1", {"name": name})
+            for i in range(logs):
+                created_at = now.replace(day=1).isoformat() if i % 2 else now.isoformat()
+                await sqlite_service.create_build_log(project["$id"], {"log_type": "feature", "created_at": created_at})
+
+        from_logs = await AnalyticsService(sqlite_service, use_rollups=False).get_complete_analytics("user1")
+        with patch.object(sqlite_service, "iter_build_logs_for_projects") as iter_logs:
+            from_rollups = await AnalyticsService(sqlite_service, use_rollups=True).get_complete_analytics("user1")
+        iter_logs.assert_not_called()
+        assert from_rollups == from_logs
+        assert from_rollups["total_logs"] == 6
+
+    @patch('app.services.sqlite_service.UPLOAD_CHUNK_SIZE', 4)
+    async def test_upload_stream_resumes(self, sqlite_service):
+        """Test chunked uploads land on disk and resume after the stored chunks"""
+        progress = []
+        uploaded = await sqlite_service.upload_file_stream(AsyncFile(b"0123456789"), "a.bin", 10, "file1", progress.append)
+        assert uploaded["chunksUploaded"] == uploaded["chunksTotal"] == 3
+        assert progress == [0, 4, 8, 10]
+
+        sqlite_service._run("UPDATE files SET chunks_uploaded = 2 WHERE id = 'file1'")
+        progress = []
+        await sqlite_service.upload_file_stream(AsyncFile(b"0123456789"), "a.bin", 10, "file1", progress.append)
+        assert progress == [8, 10]
+
+        with open(sqlite_service.local_file_path("file1"), "rb") as f:
+            assert f.read() == b"0123456789"
+
+        await sqlite_service.delete_file("file1")
+        assert sqlite_service._run("SELECT COUNT(*) FROM files")[0][0] == 0
+
+
+class TestRoutesOnSQLite:
+    """The unchanged routes and analytics running on the SQLite backend"""
+
+    @pytest.fixture
+    def app_on_sqlite(self, sqlite_service, monkeypatch):
+        monkeypatch.setattr(main, "storage", sqlite_service)
+        monkeypatch.setattr(main, "analytics_service", AnalyticsService(sqlite_service))
+        monkeypatch.setattr(main, "analytics_cache", AnalyticsCache())
+        return sqlite_service
+
+    async def test_signup_project_log_analytics_and_files(self, app_on_sqlite):
+        """Test a full user journey end to end"""
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/signup", data={"name": "Ada", "email": "ada@example.com", "password": "secret123"})
+            assert response.status_code == 303
+            client.cookies.set("session", response.cookies["session"])
+
+            response = await client.post("/projects/new", data={"name": "Edge App", "tech_stack": "Python,SQLite"})
+            assert response.status_code == 303
+            project_id = response.headers["location"].rsplit("/", 1)[1]
+
+            response = await client.post(f"/projects/{project_id}/logs/new", data={
+                "title": "First log", "content": "Hello **world**", "log_type": "milestone"
+            })
+            assert response.status_code == 303
+
+            dashboard = await client.get("/dashboard")
+            assert "Edge App" in dashboard.text
+            detail = await client.get(f"/projects/{project_id}")
+            assert "First log" in detail.text
+
+            response = await client.get("/api/analytics")
+            analytics = response.json()
+            assert analytics["total_projects"] == 1
+            assert analytics["total_logs"] == 1
+            etag = response.headers["etag"]
+            assert (await client.get("/api/analytics", headers={"If-None-Match": etag})).status_code == 304
+
+            await client.post(f"/projects/{project_id}/logs/new", data={"title": "Second log", "content": "More"})
+            response = await client.get("/api/analytics", headers={"If-None-Match": etag})
+            assert response.status_code == 200
+            assert response.json()["total_logs"] == 2
+
+            upload = await client.post("/upload", files={"file": ("notes.txt", b"hello", "text/plain")})
+            file_id = upload.json()["file_id"]
+            assert (await client.get(f"/files/{file_id}")).content == b"hello"
+
+            health = (await client.get("/health")).json()
+            assert health["backend"] == "sqlite"
+
+    async def test_bulk_import(self, app_on_sqlite):
+        """Test a streamed CSV import writes valid rows, reports the others and repairs counters"""
+        async def body():
+            yield b"title,content,log_type,created_at\n"
+            for day in range(1, 4):
+                yield f"Day {day},Notes,feature,2024-05-0{day}T09:00:00\n".encode()
+            yield b"No content,,note,\n"
+
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/signup", data={"name": "Ada", "email": "ada@example.com", "password": "secret123"})
+            client.cookies.set("session", response.cookies["session"])
+            response = await client.post("/projects/new", data={"name": "Diary"})
+            project_id = response.headers["location"].rsplit("/", 1)[1]
+
+            app_on_sqlite.rollups = True
+            response = await client.post(f"/projects/{project_id}/logs/import", content=body(),
+                                         headers={"Content-Type": "text/csv"})
+            assert response.status_code == 200
+            result = response.json()
+            assert (result["imported"], result["failed"]) == (3, 1)
+            assert result["errors"][0]["row"] == 4
+
+            wrong_type = await client.post(f"/projects/{project_id}/logs/import", content=b"x",
+                                           headers={"Content-Type": "text/plain"})
+            assert wrong_type.status_code == 415
+
+            activity = (await client.get("/api/analytics/activity", params={
+                "from": "2024-04-20", "to": "2024-05-02", "granularity": "month"
+            })).json()
+            assert (activity["labels"], activity["values"]) == (["2024-04", "2024-05"], [0, 2])
+            response = await client.get("/api/analytics/activity", params={
+                "from": "2024-05-01", "to": "2024-05-31", "project_id": project_id, "log_type": "note"
+            })
+            assert response.json()["total"] == 0
+            response = await client.get("/api/analytics/activity", params={"granularity": "year"})
+            assert response.status_code == 400
+
+        counters = read_counters(await app_on_sqlite.get_project(project_id))
+        assert counters == {"log_count": 3, "last_log_at": "2024-05-03T09:00:00", "log_type_counts": {"feature": 3}}
+        project = await app_on_sqlite.get_project(project_id)
+        rollups = await app_on_sqlite.get_rollups(project["user_id"], 0)
+        assert [(r["day"], r["counts"]) for r in rollups] == [(day, {project_id: {"feature": 1}}) for day in (19844, 19845, 19846)]
@@ -0,0 +1,60 @@
+"""
+Tests for the numeric timestamps stored next to created_at
+"""
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+
+from app.services.timestamps import (
+    backfill, day_date, document_day, epoch_fields, missing_epoch_fields, parse_timestamp, weekday
+)
+
+
+class TestParsing:
+    """Test created_at values in the formats found in stored documents"""
+
+    def test_mixed_iso_formats_land_on_the_same_day(self):
+        """Test naive, fractional, space-separated and date-only values parse to one local day"""
+        values = ["2025-01-02T09:30:00", "2025-01-02T09:30:00.123456", "2025-01-02 09:30:00", "2025-01-02"]
+        assert {document_day({"created_at": v}) for v in values} == {20090}
+
+    def test_offsets_convert_to_local_time(self):
+        """Test Z suffixes, offsets and over-long fractions, as Appwrite writes them, are read"""
+        expected = datetime(2025, 1, 2, 9, 30, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+        assert parse_timestamp("2025-01-02T09:30:00Z") == expected
+        assert parse_timestamp("2025-01-02T11:30:00.000000000+02:00") == expected
+
+    def test_unreadable_values(self):
+        """Test values that are not timestamps give no fields instead of failing"""
+        assert parse_timestamp("yesterday") is None
+        assert parse_timestamp(None) is None
+        assert epoch_fields("") == {}
+        assert document_day({}) is None
+
+    def test_epoch_fields(self):
+        """Test created_ts is epoch seconds and created_day the local day number"""
+        fields = epoch_fields("2025-01-02T09:30:00")
+        assert fields == {"created_ts": int(datetime(2025, 1, 2, 9, 30).timestamp()), "created_day": 20090}
+        assert day_date(20090).isoformat() == "2025-01-02"
+        assert weekday(20090) == day_date(20090).weekday()
+
+    def test_stored_day_wins(self):
+        """Test a stored created_day is used without parsing created_at"""
+        assert document_day({"created_day": 5, "created_at": "2025-01-02"}) == 5
+        assert missing_epoch_fields({"created_at": "2025-01-02", "created_day": 20090}) == {
+            "created_ts": int(datetime(2025, 1, 2).timestamp())
+        }
+
+
+async def test_backfill_updates_only_stale_documents(async_iter):
+    """Test the backfill writes the fields of documents missing them and skips current ones"""
+    current = {"$id": "p1", "created_at": "2025-01-02", **epoch_fields("2025-01-02")}
+    storage = AsyncMock()
+    storage.iter_projects = lambda user_id, **kwargs: async_iter([current, {"$id": "p2", "created_at": "2025-01-03"}])
+    storage.iter_build_logs_for_projects = lambda project_ids, **kwargs: async_iter([
+        {"$id": "l1", "created_at": "2025-01-04T10:00:00Z"},
+        {"$id": "l2", "created_at": "2025-01-05", "created_ts": 1, "created_day": 20093},
+    ])
+
+    assert await backfill(storage, ["user1"]) == {"projects": 1, "logs": 2}
+    storage.update_project.assert_awaited_once_with("p2", epoch_fields("2025-01-03"))
+    assert storage.update_build_log.await_args_list[1].args == ("l2", {"created_ts": epoch_fields("2025-01-05")["created_ts"]})